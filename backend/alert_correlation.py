@@ -0,0 +1,195 @@
+"""
+Ingest-time alert deduplication and correlation
+Repeats of the same (system, alert_type) inside a sliding window fold into one
+parent incident instead of becoming new alerts
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from backend.storage import StorageBackend
+
+SEVERITY_RANK = {"low": 0, "medium": 1, "high": 2, "critical": 3}
+
+
+def parse_timestamp(value: str) -> float:
+    """Epoch seconds for an ISO 8601 timestamp; now if it can't be parsed"""
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except (AttributeError, ValueError):
+        return time.time()
+
+
+class CorrelationResult(NamedTuple):
+    incident_id: str
+    suppressed: bool
+    occurrence_count: int
+    # The write stored the parent for the first time (not a re-ingested id)
+    new: bool = False
+
+
+class _Incident:
+    __slots__ = ("parent_id", "last_seen")
+
+    def __init__(self, parent_id: str, last_seen: float):
+        self.parent_id = parent_id
+        self.last_seen = last_seen
+
+
+class AlertCorrelator:
+    """
+    Sliding-window grouping by (system, alert_type)
+    Open incidents are tracked in time buckets of bucket_seconds; whole buckets
+    are dropped once they fall out of the window, so memory is bounded by the
+    number of distinct keys seen within one window.
+
+    The parent alert in storage carries occurrence_count, first_seen and
+    last_seen. On a local miss the store's incident record (keyed by
+    system and alert_type, tracking last_seen) is consulted, so workers that
+    did not see the first alert still fold repeats into the same parent,
+    however long the incident has been flapping.
+    """
+
+    def __init__(
+        self,
+        store: StorageBackend,
+        window_seconds: Optional[float] = None,
+        bucket_seconds: Optional[float] = None,
+    ):
+        self.store = store
+        self.window = window_seconds or float(os.getenv("DEDUP_WINDOW_SECONDS", "900"))
+        self.bucket_seconds = bucket_seconds or max(self.window / 15, 1.0)
+        self._open: Dict[Tuple[str, str], _Incident] = {}
+        self._buckets: Dict[int, Set[Tuple[str, str]]] = {}
+        # Bulk ingest correlates on a worker thread, single ingest on the loop
+        self._lock = threading.Lock()
+        self.suppressed = 0
+
+    def _bucket(self, ts: float) -> int:
+        return int(ts // self.bucket_seconds)
+
+    def _expire(self, now: float) -> None:
+        """Drop every bucket that ended before the window (about 15 live buckets)"""
+        horizon = self._bucket(now - self.window)
+        while self._buckets:
+            oldest = min(self._buckets)
+            if oldest >= horizon:
+                break
+            for key in self._buckets.pop(oldest):
+                incident = self._open.get(key)
+                # Keys re-seen later are also tracked in a newer bucket
+                if incident is not None and self._bucket(incident.last_seen) < horizon:
+                    del self._open[key]
+
+    def _track(self, key: Tuple[str, str], incident: _Incident) -> None:
+        self._open[key] = incident
+        self._buckets.setdefault(self._bucket(incident.last_seen), set()).add(key)
+
+    def _find_stored_parent(self, alert: Dict, ts: float) -> Optional[Dict]:
+        """Parent of the key's incident in storage if it was seen inside the window"""
+        latest = self.store.latest_incident(
+            alert.get("system"), alert.get("alert_type")
+        )
+        if latest is None:
+            return None
+        parent_id, last_seen = latest
+        if ts - last_seen > self.window:
+            return None
+        return self.store.get_alert(parent_id)
+
+    def _write(
+        self, pending: Dict[str, Dict], results: List[CorrelationResult]
+    ) -> List[CorrelationResult]:
+        """Store the pending parents; results come back with new filled in"""
+        inserted = set(self.store.add_alerts(pending.values()))
+        self.store.save_incidents(
+            (
+                record.get("system"),
+                record.get("alert_type"),
+                record["id"],
+                record["last_seen_epoch"],
+            )
+            for record in pending.values()
+        )
+        marked = []
+        for result in results:
+            # A parent repeated within the batch is new only once
+            new = not result.suppressed and result.incident_id in inserted
+            inserted.discard(result.incident_id)
+            marked.append(result._replace(new=new))
+        return marked
+
+    def ingest(self, alert: Dict) -> CorrelationResult:
+        """
+        Store alert as a new parent incident, or fold it into an open one
+        alert is a plain dict (Alert.dict()); it is annotated in place
+        """
+        pending: Dict[str, Dict] = {}
+        with self._lock:
+            result = self._correlate(alert, pending)
+            return self._write(pending, [result])[0]
+
+    def ingest_many(self, alerts: List[Dict]) -> List[CorrelationResult]:
+        """
+        Correlate a batch and write every touched parent with one batched store
+        write; repeats inside the batch coalesce into a single parent update
+        """
+        pending: Dict[str, Dict] = {}
+        with self._lock:
+            results = [self._correlate(alert, pending) for alert in alerts]
+            return self._write(pending, results)
+
+    def _correlate(self, alert: Dict, pending: Dict[str, Dict]) -> CorrelationResult:
+        """Decide new-vs-repeat; the record to write is left in pending[id]"""
+        # Future-dated alerts count as now: one clock-skewed sender must not
+        # expire every open incident or hold its own open indefinitely
+        ts = min(parse_timestamp(alert.get("timestamp", "")), time.time())
+        key = (alert.get("system"), alert.get("alert_type"))
+        self._expire(ts)
+
+        parent = None
+        incident = self._open.get(key)
+        if incident is not None and ts - incident.last_seen <= self.window:
+            parent = pending.get(incident.parent_id) or self.store.get_alert(
+                incident.parent_id
+            )
+        if parent is None:
+            parent = self._find_stored_parent(alert, ts)
+
+        if parent is None or parent["id"] == alert["id"]:
+            alert["occurrence_count"] = (parent or {}).get("occurrence_count", 0) + 1
+            alert.setdefault(
+                "first_seen", (parent or {}).get("first_seen", alert.get("timestamp"))
+            )
+            alert["last_seen"] = alert.get("timestamp")
+            alert["last_seen_epoch"] = ts
+            pending[alert["id"]] = alert
+            self._track(key, _Incident(alert["id"], ts))
+            return CorrelationResult(alert["id"], False, alert["occurrence_count"])
+
+        # Repeat inside the window: bump the parent instead of storing a new alert.
+        # Copy first so the memory backend can still unindex the old version.
+        parent = dict(parent)
+        parent["occurrence_count"] = parent.get("occurrence_count", 1) + 1
+        if ts >= parent.get("last_seen_epoch", 0.0):
+            parent["last_seen"] = alert.get("timestamp")
+            parent["last_seen_epoch"] = ts
+        if SEVERITY_RANK.get(alert.get("severity"), -1) > SEVERITY_RANK.get(
+            parent.get("severity"), -1
+        ):
+            parent["severity"] = alert["severity"]
+        pending[parent["id"]] = parent
+
+        self._track(key, _Incident(parent["id"], parent["last_seen_epoch"]))
+        self.suppressed += 1
+        return CorrelationResult(parent["id"], True, parent["occurrence_count"])
+
+    def stats(self) -> Dict:
+        return {
+            "window_seconds": self.window,
+            "open_incidents": len(self._open),
+            "suppressed": self.suppressed,
+        }
@@ -0,0 +1,54 @@
+"""
+Alert listing helpers
+Opaque keyset cursors, field projection and fast JSON encoding for GET /alerts
+"""
+
+import base64
+import json
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # stdlib fallback, same output just slower
+    orjson = None
+
+# Always returned so a projected row can still be fetched or paged from
+REQUIRED_FIELDS = ("id", "timestamp")
+
+
+def dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def encode_cursor(alert: Dict) -> str:
+    """Cursor pointing just past alert in (timestamp, id) order"""
+    key = dumps([alert.get("timestamp", ""), alert["id"]])
+    return base64.urlsafe_b64encode(key).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Inverse of encode_cursor; raises ValueError on anything malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, alert_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if not isinstance(timestamp, str) or not isinstance(alert_id, str):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return timestamp, alert_id
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """'severity,system' -> ['id', 'timestamp', 'severity', 'system']"""
+    if not fields:
+        return None
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    return list(REQUIRED_FIELDS) + [f for f in requested if f not in REQUIRED_FIELDS]
+
+
+def project(alerts: Iterable[Dict], fields: Optional[List[str]]) -> List[Dict]:
+    if fields is None:
+        return list(alerts)
+    return [{f: alert[f] for f in fields if f in alert} for alert in alerts]
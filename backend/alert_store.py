@@ -0,0 +1,266 @@
+"""
+In-memory storage backend
+Indexed alert repository for single-process runs and benchmarks
+"""
+
+import heapq
+import threading
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from backend.storage import StorageBackend
+
+# Sorts after any alert id, used as the upper sentinel when bisecting by time
+_MAX_ID = "\uffff"
+
+
+def _remove(keys: List[Tuple[str, str]], key: Tuple[str, str]) -> None:
+    """Delete key from the sorted list keys if present"""
+    pos = bisect_left(keys, key)
+    if pos < len(keys) and keys[pos] == key:
+        del keys[pos]
+
+
+class AlertStore(StorageBackend):
+    """
+    In-memory alert repository
+    Hash index on alert id for O(1) lookups, plus secondary indexes on
+    system, severity, alert_type and timestamp for filtered listings; every
+    index keeps its alerts as sorted (timestamp, id) pairs, so a page is a
+    bisect from the cursor plus at most a walk to the page's last match
+    """
+
+    INDEXED_FIELDS = ("system", "severity", "alert_type")
+
+    def __init__(self):
+        self._alerts: Dict[str, Dict] = {}
+        # Sorted (timestamp, id) pairs; ISO 8601 strings order lexicographically
+        self._by_time: List[Tuple[str, str]] = []
+        # field -> value -> sorted (timestamp, id) pairs of matching alerts
+        self._indexes: Dict[str, Dict[str, List[Tuple[str, str]]]] = {
+            field: {} for field in self.INDEXED_FIELDS
+        }
+        # (system, alert_type) -> (parent_id, last_seen)
+        self._incidents: Dict[Tuple[str, str], Tuple[str, float]] = {}
+        self._plans: Dict[str, Dict] = {}
+        self._executions: Dict[str, Dict] = {}
+        self._jobs: Dict[str, Dict] = {}
+        # scope -> bucket -> name -> value
+        self._counters: Dict[str, Dict[int, Dict[str, float]]] = {}
+        # Analyses record counters from pool threads
+        self._counters_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Alerts
+    # ------------------------------------------------------------------
+
+    def add_alert(self, alert: Dict) -> bool:
+        """Insert or replace an alert and update every index"""
+        alert_id = alert["id"]
+        existing = self._alerts.get(alert_id)
+        if existing is not None:
+            self._unindex(existing)
+
+        self._alerts[alert_id] = alert
+        key = (alert.get("timestamp", ""), alert_id)
+        for field in self.INDEXED_FIELDS:
+            insort(self._indexes[field].setdefault(alert.get(field), []), key)
+        insort(self._by_time, key)
+        return existing is None
+
+    def get_alert(self, alert_id: str) -> Optional[Dict]:
+        """O(1) lookup by alert id"""
+        return self._alerts.get(alert_id)
+
+    def count_alerts(self) -> int:
+        return len(self._alerts)
+
+    def query_alerts(
+        self,
+        severity: Optional[str] = None,
+        system: Optional[str] = None,
+        alert_type: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        after: Optional[Tuple[str, str]] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict]:
+        """
+        Filtered listing ordered by (timestamp, id)
+        Each candidate index (the timestamp index and one per equality
+        filter) is bisected to the time bounds and the after cursor; the
+        narrowest range is walked in order, checking the other filters,
+        until limit alerts match
+        """
+        filters = [
+            (field, value)
+            for field, value in (
+                ("severity", severity),
+                ("system", system),
+                ("alert_type", alert_type),
+            )
+            if value is not None
+        ]
+        candidates = [
+            (field, self._indexes[field].get(value, [])) for field, value in filters
+        ] + [(None, self._by_time)]
+        ranges = []
+        for field, keys in candidates:
+            lo, hi = self._bounds(keys, since, until, after)
+            ranges.append((hi - lo, field, keys, lo, hi))
+        _, walked, keys, lo, hi = min(ranges, key=lambda r: r[0])
+        others = [(field, value) for field, value in filters if field != walked]
+
+        if not others:
+            if limit is not None:
+                hi = min(hi, lo + limit)
+            return [self._alerts[alert_id] for _, alert_id in keys[lo:hi]]
+
+        results = []
+        for i in range(lo, hi):
+            alert = self._alerts[keys[i][1]]
+            if all(alert.get(field) == value for field, value in others):
+                results.append(alert)
+                if limit is not None and len(results) >= limit:
+                    break
+        return results
+
+    @staticmethod
+    def _bounds(
+        keys: List[Tuple[str, str]],
+        since: Optional[str],
+        until: Optional[str],
+        after: Optional[Tuple[str, str]],
+    ) -> Tuple[int, int]:
+        """Slice of sorted (timestamp, id) keys inside the bounds, after cursor"""
+        lo = bisect_left(keys, (since,)) if since is not None else 0
+        if after is not None:
+            lo = max(lo, bisect_right(keys, tuple(after)))
+        hi = bisect_right(keys, (until, _MAX_ID)) if until is not None else len(keys)
+        return lo, max(lo, hi)
+
+    def _unindex(self, alert: Dict) -> None:
+        key = (alert.get("timestamp", ""), alert["id"])
+        for field in self.INDEXED_FIELDS:
+            keys = self._indexes[field].get(alert.get(field))
+            if keys is not None:
+                _remove(keys, key)
+                if not keys:
+                    del self._indexes[field][alert.get(field)]
+        _remove(self._by_time, key)
+
+    # ------------------------------------------------------------------
+    # Open incidents
+    # ------------------------------------------------------------------
+
+    def save_incidents(self, incidents: Iterable[Tuple[str, str, str, float]]) -> None:
+        for system, alert_type, parent_id, last_seen in incidents:
+            current = self._incidents.get((system, alert_type))
+            if current is None or last_seen >= current[1]:
+                self._incidents[(system, alert_type)] = (parent_id, last_seen)
+
+    def latest_incident(
+        self, system: str, alert_type: str
+    ) -> Optional[Tuple[str, float]]:
+        return self._incidents.get((system, alert_type))
+
+    # ------------------------------------------------------------------
+    # Remediation plans
+    # ------------------------------------------------------------------
+
+    def save_plan(self, alert_id: str, plan: Dict) -> None:
+        self._plans[alert_id] = plan
+
+    def get_plan(self, alert_id: str) -> Optional[Dict]:
+        return self._plans.get(alert_id)
+
+    def count_plans(self) -> int:
+        return len(self._plans)
+
+    # ------------------------------------------------------------------
+    # Execution results
+    # ------------------------------------------------------------------
+
+    def save_execution(self, alert_id: str, result: Dict) -> None:
+        self._executions[alert_id] = result
+
+    def get_execution(self, alert_id: str) -> Optional[Dict]:
+        return self._executions.get(alert_id)
+
+    def count_executions(self) -> int:
+        return len(self._executions)
+
+    # ------------------------------------------------------------------
+    # Execution jobs
+    # ------------------------------------------------------------------
+
+    def save_job(self, job: Dict) -> None:
+        current = self._jobs.get(job["job_id"])
+        cancel_requested = current["cancel_requested"] if current else False
+        self._jobs[job["job_id"]] = dict(job, cancel_requested=cancel_requested)
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        job = self._jobs.get(job_id)
+        return dict(job) if job else None
+
+    def claim_job(
+        self, job_id: str, host: str, limit: int, now: float, stale_before: float
+    ) -> bool:
+        job = self._jobs.get(job_id)
+        if job is None or job["status"] != "queued":
+            return False
+        running = sum(
+            1
+            for other in self._jobs.values()
+            if other["host"] == host
+            and other["status"] == "running"
+            and other["started_at"] >= stale_before
+        )
+        if running >= limit:
+            return False
+        job.update(status="running", started_at=now)
+        return True
+
+    def cancel_job(self, job_id: str) -> Optional[str]:
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        if job["status"] == "queued":
+            job["status"] = "cancelled"
+        elif job["status"] == "running":
+            job["cancel_requested"] = True
+        return job["status"]
+
+    # ------------------------------------------------------------------
+    # Statistics counters
+    # ------------------------------------------------------------------
+
+    def increment_counters(self, deltas: Dict[Tuple[str, int, str], float]) -> None:
+        with self._counters_lock:
+            for (scope, bucket, name), value in deltas.items():
+                names = self._counters.setdefault(scope, {}).setdefault(bucket, {})
+                names[name] = names.get(name, 0) + value
+
+    def read_counters(
+        self, scope: str, since_bucket: int = 0, prefix: str = ""
+    ) -> Dict[str, float]:
+        totals: Dict[str, float] = {}
+        with self._counters_lock:
+            for bucket, names in self._counters.get(scope, {}).items():
+                if bucket < since_bucket:
+                    continue
+                for name, value in names.items():
+                    if name.startswith(prefix):
+                        totals[name] = totals.get(name, 0) + value
+        return totals
+
+    def top_counters(self, scope: str, limit: int) -> Dict[str, float]:
+        with self._counters_lock:
+            names = self._counters.get(scope, {}).get(0, {})
+            return dict(heapq.nlargest(limit, names.items(), key=lambda kv: kv[1]))
+
+    def prune_counters(self, scope: str, before_bucket: int) -> None:
+        with self._counters_lock:
+            buckets = self._counters.get(scope, {})
+            for bucket in [b for b in buckets if b < before_bucket]:
+                del buckets[bucket]
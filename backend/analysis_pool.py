@@ -0,0 +1,213 @@
+"""
+Non-blocking analysis offload
+Runs blocking Bedrock calls on a bounded thread pool so the event loop stays free,
+plus the rate-limited fan-out used by batch analysis
+"""
+
+import asyncio
+import contextlib
+import functools
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+
+class AnalysisPool:
+    """
+    Bounded thread pool for blocking LLM calls
+    At most max_concurrency analyses run at once; extra requests wait in the
+    pool's queue without holding up the event loop
+    """
+
+    def __init__(self, max_concurrency: Optional[int] = None):
+        self.max_concurrency = max_concurrency or int(
+            os.getenv("ANALYSIS_CONCURRENCY", "4")
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency, thread_name_prefix="analysis"
+        )
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._queued = 0
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Await func(*args, **kwargs) executed on the pool"""
+        loop = asyncio.get_running_loop()
+        self._queued += 1
+        try:
+            return await loop.run_in_executor(
+                self._executor, functools.partial(self._call, func, *args, **kwargs)
+            )
+        finally:
+            self._queued -= 1
+
+    def _call(self, func: Callable, *args, **kwargs) -> Any:
+        with self._lock:
+            self._in_flight += 1
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    async def iterate(self, func: Callable, *args) -> AsyncIterator[Any]:
+        """
+        Async-iterate the blocking generator func(*args) on the pool
+        Items are handed to the event loop as they are produced. If the
+        consumer stops early the generator is closed on its thread after its
+        next item, which releases the pool slot.
+        """
+        loop = asyncio.get_running_loop()
+        items: asyncio.Queue = asyncio.Queue()
+        stopped = threading.Event()
+        end = object()
+
+        def produce() -> None:
+            generator = func(*args)
+            try:
+                for item in generator:
+                    loop.call_soon_threadsafe(items.put_nowait, (item, None))
+                    if stopped.is_set():
+                        break
+            except Exception as e:
+                loop.call_soon_threadsafe(items.put_nowait, (end, e))
+            else:
+                loop.call_soon_threadsafe(items.put_nowait, (end, None))
+            finally:
+                generator.close()
+
+        producer = asyncio.ensure_future(self.run(produce))
+        try:
+            while True:
+                item, error = await items.get()
+                if item is end:
+                    if error is not None:
+                        raise error
+                    return
+                yield item
+        finally:
+            stopped.set()
+            # Finished: collect the task. Stopped early: stop waiting on the
+            # thread, which closes the generator after its next item.
+            producer.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await producer
+
+    def stats(self) -> Dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "running": self._in_flight,
+            "waiting": max(self._queued - self._in_flight, 0),
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class RateLimiter:
+    """
+    Async token bucket
+    Allows `rate` acquisitions per second with bursts of up to `burst`;
+    a rate of 0 or less means unlimited
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+async def analyze_batch(
+    pool: AnalysisPool,
+    analyze: Callable,
+    alerts: List[Dict],
+    concurrency: int,
+    limiter: Optional[RateLimiter] = None,
+) -> AsyncIterator[Dict]:
+    """
+    Fan analyze(alert) out over the pool and yield per-alert results as they
+    complete, followed by one summary record with per-batch timing stats.
+    alerts holds dicts with "alert_id" and either "alert" or "error".
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    batch_start = time.perf_counter()
+
+    async def run_one(item: Dict) -> Dict:
+        if "error" in item:
+            return {"alert_id": item["alert_id"], **item["error"], "duration": 0.0}
+        async with semaphore:
+            if limiter is not None:
+                await limiter.acquire()
+            start = time.perf_counter()
+            try:
+                result = await pool.run(analyze, item["alert"])
+                return {
+                    "alert_id": item["alert_id"],
+                    "status": "completed",
+                    "plan": result,
+                    "duration": round(time.perf_counter() - start, 3),
+                }
+            except Exception as e:
+                return {
+                    "alert_id": item["alert_id"],
+                    "status": "failed",
+                    "error": str(e),
+                    "duration": round(time.perf_counter() - start, 3),
+                }
+
+    tasks = [asyncio.ensure_future(run_one(item)) for item in alerts]
+    statuses: Dict[str, int] = {}
+    durations: List[float] = []
+    first_result_at = None
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            result = await next_done
+            if first_result_at is None:
+                first_result_at = time.perf_counter() - batch_start
+            statuses[result["status"]] = statuses.get(result["status"], 0) + 1
+            if result["status"] in ("completed", "failed"):
+                durations.append(result["duration"])
+            yield {"type": "result", **result}
+    finally:
+        # Client went away mid-stream: don't keep analysing for nobody
+        for task in tasks:
+            task.cancel()
+
+    wall = time.perf_counter() - batch_start
+    durations.sort()
+    yield {
+        "type": "summary",
+        "total": len(alerts),
+        "statuses": statuses,
+        "concurrency": concurrency,
+        "wall_time": round(wall, 3),
+        "time_to_first_result": round(first_result_at or 0.0, 3),
+        "analysis_time": {
+            "min": durations[0] if durations else 0.0,
+            "mean": round(statistics.fmean(durations), 3) if durations else 0.0,
+            "p50": durations[len(durations) // 2] if durations else 0.0,
+            "p95": durations[int(len(durations) * 0.95)] if durations else 0.0,
+            "max": durations[-1] if durations else 0.0,
+        },
+        "throughput_per_sec": round(len(alerts) / wall, 2) if wall > 0 else 0.0,
+    }
@@ -3,16 +3,54 @@ FastAPI main application
 API endpoints for alert triage and remediation
 """
 
-from fastapi import FastAPI, HTTPException, Body
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from backend.models import Alert, RemediationPlan, ExecutionResult, HealthCheck
+from fastapi.responses import (
+    FileResponse,
+    JSONResponse,
+    PlainTextResponse,
+    Response,
+    StreamingResponse,
+)
+from backend.models import (
+    Alert,
+    RemediationPlan,
+    ExecutionResult,
+    HealthCheck,
+    BatchAnalyzeRequest,
+    FanoutExecuteRequest,
+)
 from backend.aws_bedrock_service import BedrockService
+from backend.bedrock_resilience import CircuitOpenError
 from backend.script_executor import ScriptExecutor
+from backend.storage import create_storage
+from backend.alert_correlation import AlertCorrelator
+from backend.stats_aggregator import StatsAggregator
+from backend.instrumentation import metrics
+from backend.bulk_ingest import iter_json_records, validate_chunk
+from backend.alert_listing import (
+    decode_cursor,
+    dumps,
+    encode_cursor,
+    parse_fields,
+    project,
+)
+from backend.analysis_pool import AnalysisPool, RateLimiter, analyze_batch
+from backend.execution_jobs import (
+    TERMINAL_STATUSES,
+    ExecutionQueue,
+    create_executor,
+)
+from backend.fanout import RmmClient, fan_out, queued_runner
 from dotenv import load_dotenv
+import math
 import os
+import time
+import uuid
 from datetime import datetime
+from typing import Dict, Iterator, Optional
 
 # Load environment variables
 load_dotenv()
@@ -44,10 +82,71 @@ except Exception as e:
 
 script_executor = ScriptExecutor()
 
-# In-memory storage (replace with database in production)
-alerts_db = []
-plans_db = {}
-executions_db = {}
+# Blocking Bedrock calls run here, off the event loop (ANALYSIS_CONCURRENCY caps it)
+analysis_pool = AnalysisPool()
+
+# Batch analysis limits (BATCH_RATE_LIMIT = Bedrock calls/sec per worker)
+MAX_BATCH_SIZE = int(os.getenv("BATCH_MAX_ALERTS", "500"))
+batch_rate_limiter = None  # created on first use inside the running loop
+
+# Shared storage (SQLite by default, so all gunicorn workers see the same data)
+alert_store = create_storage()
+print(f"[OK] Storage backend: {type(alert_store).__name__}")
+
+# Ingest-time dedup: repeats within DEDUP_WINDOW_SECONDS fold into one incident
+dedup_enabled = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+alert_correlator = AlertCorrelator(alert_store)
+
+# Running counters + 1m/1h/1d rollups behind /stats
+stats = StatsAggregator(alert_store)
+
+
+def _save_execution(
+    alert_id: str, status: str, output: str, execution_time: float, **extra
+) -> Dict:
+    """Record stats and MTTR for a finished remediation and store its result"""
+    # Time from the alert being received to remediation completing
+    mttr = stats.record_execution(alert_store.get_alert(alert_id), status)
+    if mttr is not None:
+        metrics.observe("mttr_seconds", mttr)
+
+    execution_result = {
+        "alert_id": alert_id,
+        **extra,
+        "status": status,
+        "output": output,
+        "execution_time": execution_time,
+        "mttr_minutes": round(mttr / 60, 2) if mttr is not None else None,
+        "timestamp": datetime.utcnow().isoformat(),
+    }
+    alert_store.save_execution(alert_id, execution_result)
+    return execution_result
+
+
+def _record_execution(job: Dict) -> None:
+    """Completion hook for execution jobs"""
+    if job.get("rollout_id"):
+        return  # a fan-out host; the rollout saves one result for the alert
+    result = job["result"]
+    job["result"] = _save_execution(
+        job["alert_id"],
+        result["status"],
+        result["output"],
+        result.get("execution_time", 0),
+        job_id=job["job_id"],
+    )
+
+
+# Approved scripts run as queued jobs (EXECUTION_WORKERS, EXECUTION_PER_HOST_LIMIT)
+execution_queue = ExecutionQueue(
+    alert_store, create_executor(script_executor), on_complete=_record_execution
+)
+MAX_JOB_WAIT = float(os.getenv("EXECUTION_MAX_WAIT_SECONDS", "30"))
+
+# Fleet fan-out: hosts are reached through the RMM API at RMM_URL
+rmm_client = RmmClient.from_env()
+FANOUT_PARALLELISM = int(os.getenv("FANOUT_PARALLELISM", "20"))
+FANOUT_MAX_TARGETS = int(os.getenv("FANOUT_MAX_TARGETS", "1000"))
 
 # Auto-load demo alert on startup
 import json
@@ -55,7 +154,9 @@ import json
 try:
     with open("data/alerts.json", "r") as f:
         demo_alert = json.load(f)
-        alerts_db.append(demo_alert)
+        demo_alert.setdefault("received_at", time.time())
+        if alert_store.add_alert(demo_alert):
+            stats.record_ingest([demo_alert])
         print(f"[OK] Auto-loaded demo alert: {demo_alert['id']}")
 except Exception as e:
     print(f"[WARN] Could not auto-load demo alert: {e}")
@@ -87,26 +188,177 @@ async def serve_frontend():
 async def ingest_alert(alert: Alert):
     """
     Ingest new alert from monitoring system
-    Stores alert and returns acknowledgment
+    Repeats of an open (system, alert_type) incident are suppressed and counted
+    on the parent incident; only the parent should be sent for analysis
     """
-    alerts_db.append(alert.dict())
+    alert_data = alert.dict()
+    alert_data["received_at"] = time.time()
+
+    if not dedup_enabled:
+        with metrics.span("ingest"):
+            inserted = alert_store.add_alerts([alert_data])
+            stats.record_ingest([alert_data], new_ids=inserted)
+        return {
+            "message": "Alert received successfully",
+            "alert_id": alert.id,
+            "timestamp": datetime.utcnow().isoformat(),
+        }
+
+    with metrics.span("ingest"):
+        result = alert_correlator.ingest(alert_data)
+        stats.record_ingest([alert_data], [result])
     return {
-        "message": "Alert received successfully",
+        "message": (
+            "Duplicate alert suppressed"
+            if result.suppressed
+            else "Alert received successfully"
+        ),
         "alert_id": alert.id,
+        "incident_id": result.incident_id,
+        "suppressed": result.suppressed,
+        "occurrence_count": result.occurrence_count,
         "timestamp": datetime.utcnow().isoformat(),
     }
 
 
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "1000"))
+BULK_MAX_LINE_CHARS = int(os.getenv("BULK_MAX_LINE_CHARS", str(1 << 20)))
+BULK_MAX_ERRORS = 1000
+
+
+@app.post("/alerts/ingest/bulk")
+async def ingest_alerts_bulk(request: Request):
+    """
+    Bulk ingest from a streamed NDJSON or JSON-array body
+    Records are parsed incrementally and validated BULK_CHUNK_SIZE at a time;
+    invalid records are reported per line and do not fail the rest. Chunks are
+    validated and written on a worker thread, off the event loop.
+    """
+    start = time.perf_counter()
+    received = accepted = suppressed = 0
+    errors = []
+
+    def flush(chunk):
+        nonlocal accepted, suppressed
+        alerts, chunk_errors = validate_chunk(chunk)
+        errors.extend(chunk_errors)
+        if not alerts:
+            return
+        received_at = time.time()
+        for alert in alerts:
+            alert["received_at"] = received_at
+        results = inserted = None
+        with metrics.span("bulk_ingest_chunk"):
+            if dedup_enabled:
+                results = alert_correlator.ingest_many(alerts)
+                suppressed += sum(1 for r in results if r.suppressed)
+            else:
+                inserted = alert_store.add_alerts(alerts)
+            stats.record_ingest(alerts, results, new_ids=inserted)
+        accepted += len(alerts)
+
+    chunk = []
+    records = iter_json_records(request.stream(), max_line=BULK_MAX_LINE_CHARS)
+    async for number, record in records:
+        received += 1
+        chunk.append((number, record))
+        if len(chunk) >= BULK_CHUNK_SIZE:
+            await run_in_threadpool(flush, chunk)
+            chunk = []
+    if chunk:
+        await run_in_threadpool(flush, chunk)
+
+    duration = time.perf_counter() - start
+    return {
+        "received": received,
+        "accepted": accepted,
+        "suppressed": suppressed,
+        "failed": len(errors),
+        "errors": errors[:BULK_MAX_ERRORS],
+        "errors_truncated": len(errors) > BULK_MAX_ERRORS,
+        "duration": round(duration, 3),
+        "alerts_per_sec": round(received / duration, 1) if duration > 0 else 0.0,
+    }
+
+
+ALERTS_PAGE_SIZE = int(os.getenv("ALERTS_PAGE_SIZE", "100"))
+ALERTS_MAX_PAGE_SIZE = int(os.getenv("ALERTS_MAX_PAGE_SIZE", "1000"))
+
+
 @app.get("/alerts")
-async def list_alerts():
-    """List all alerts"""
-    return {"count": len(alerts_db), "alerts": alerts_db}
+async def list_alerts(
+    severity: Optional[str] = None,
+    system: Optional[str] = None,
+    alert_type: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    fields: Optional[str] = None,
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+):
+    """
+    List alerts in (timestamp, id) order, filtered and paginated
+    json returns one page (limit, default ALERTS_PAGE_SIZE) plus next_cursor;
+    ndjson streams every match page by page, one alert per line, for exports.
+    fields=severity,system projects each alert (id and timestamp always kept).
+    """
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    filters = dict(
+        severity=severity,
+        system=system,
+        alert_type=alert_type,
+        since=since,
+        until=until,
+    )
+    projection = parse_fields(fields)
+
+    if format == "ndjson":
+        return StreamingResponse(
+            _export_alerts(filters, after, limit, projection),
+            media_type="application/x-ndjson",
+        )
+
+    page_size = min(limit or ALERTS_PAGE_SIZE, ALERTS_MAX_PAGE_SIZE)
+    # One extra row tells us whether another page exists
+    alerts = alert_store.query_alerts(**filters, after=after, limit=page_size + 1)
+    has_more = len(alerts) > page_size
+    alerts = alerts[:page_size]
+    payload = {
+        "count": len(alerts),
+        "alerts": project(alerts, projection),
+        "next_cursor": encode_cursor(alerts[-1]) if has_more else None,
+    }
+    return Response(content=dumps(payload), media_type="application/json")
+
+
+def _export_alerts(filters, after, limit, projection):
+    """
+    Sync generator so each page's query runs in Starlette's threadpool;
+    every page is a complete query, so no cursor is held across threads
+    """
+    remaining = limit
+    while remaining is None or remaining > 0:
+        page_size = ALERTS_MAX_PAGE_SIZE
+        if remaining is not None:
+            page_size = min(page_size, remaining)
+            remaining -= page_size
+        alerts = alert_store.query_alerts(**filters, after=after, limit=page_size)
+        if not alerts:
+            return
+        yield b"".join(dumps(a) + b"\n" for a in project(alerts, projection))
+        if len(alerts) < page_size:
+            return
+        after = (alerts[-1].get("timestamp", ""), alerts[-1]["id"])
 
 
 @app.get("/alerts/{alert_id}")
 async def get_alert(alert_id: str):
     """Get specific alert by ID"""
-    alert = next((a for a in alerts_db if a["id"] == alert_id), None)
+    alert = alert_store.get_alert(alert_id)
     if not alert:
         raise HTTPException(status_code=404, detail="Alert not found")
     return alert
@@ -119,7 +371,7 @@ async def analyze_alert(alert_id: str):
     Generates remediation plan with safety checks
     """
     # Find alert
-    alert_data = next((a for a in alerts_db if a["id"] == alert_id), None)
+    alert_data = alert_store.get_alert(alert_id)
     if not alert_data:
         raise HTTPException(status_code=404, detail="Alert not found")
 
@@ -133,37 +385,181 @@ async def analyze_alert(alert_id: str):
             detail="AWS Bedrock service not configured. Please set AWS credentials in .env file",
         )
 
-    # Analyze with AWS Bedrock
+    # Analyze with AWS Bedrock on the analysis pool so other requests keep flowing
     try:
-        plan = bedrock_service.analyze_alert(alert)
-        plans_db[alert_id] = plan.dict()
+        plan = await analysis_pool.run(_analyze_and_store, alert)
 
         return {
             "status": "completed",
             "alert_id": alert_id,
-            "plan": plan.dict(),
+            "plan": plan,
             "timestamp": datetime.utcnow().isoformat(),
         }
+    except CircuitOpenError as e:
+        # Bedrock is degraded: fail fast and tell the client when to come back
+        retry_after = math.ceil(bedrock_service.resilience.breaker.retry_after())
+        raise HTTPException(
+            status_code=503,
+            detail=f"Analysis unavailable: {e}",
+            headers={"Retry-After": str(max(retry_after, 1))},
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 
+def _analyze_and_store(alert: Alert) -> dict:
+    """Blocking analysis + plan persistence; runs on the analysis pool"""
+    with metrics.span("analyze"):
+        plan = bedrock_service.analyze_alert(alert).dict()
+    alert_store.save_plan(alert.id, plan)
+    stats.record_analysis()
+    return plan
+
+
+@app.post("/alerts/{alert_id}/analyze/stream")
+async def analyze_alert_stream(alert_id: str):
+    """
+    Analyze an alert and stream the plan as Server-Sent Events
+    "field" events carry each plan field (root_cause, confidence, reasoning,
+    steps, ...) as soon as the model has written it; a final "plan" event
+    carries the validated plan (with the script), or "error" if it failed
+    """
+    alert_data = alert_store.get_alert(alert_id)
+    if not alert_data:
+        raise HTTPException(status_code=404, detail="Alert not found")
+    alert = Alert(**alert_data)
+
+    if not ai_service_configured:
+        raise HTTPException(
+            status_code=503,
+            detail="AWS Bedrock service not configured. Please set AWS credentials in .env file",
+        )
+
+    async def events():
+        # Sent straight away so the client knows the analysis has started
+        yield _sse("status", {"alert_id": alert_id, "status": "analyzing"})
+        try:
+            async for event in analysis_pool.iterate(_analyze_stream_and_store, alert):
+                if event["type"] == "field":
+                    yield _sse(
+                        "field", {"field": event["field"], "value": event["value"]}
+                    )
+                else:
+                    yield _sse("plan", {"alert_id": alert_id, "plan": event["plan"]})
+        except Exception as e:
+            yield _sse("error", {"detail": f"Analysis failed: {str(e)}"})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _sse(kind: str, payload: Dict) -> str:
+    return f"event: {kind}\ndata: {json.dumps(payload)}\n\n"
+
+
+def _analyze_stream_and_store(alert: Alert) -> Iterator[Dict]:
+    """Streamed analysis; the final plan is persisted like _analyze_and_store"""
+    for event in bedrock_service.analyze_alert_stream(alert):
+        if event["type"] == "plan":
+            alert_store.save_plan(alert.id, event["plan"])
+            stats.record_analysis()
+        yield event
+
+
+@app.post("/alerts/analyze/batch")
+async def analyze_alerts_batch(request: BatchAnalyzeRequest):
+    """
+    Analyze many alerts concurrently (alert storm triage)
+    Select alerts by explicit ids or by filter; results are streamed back as
+    NDJSON in completion order, followed by a summary line with batch timings
+    """
+    global batch_rate_limiter
+
+    if not ai_service_configured:
+        raise HTTPException(
+            status_code=503,
+            detail="AWS Bedrock service not configured. Please set AWS credentials in .env file",
+        )
+
+    if request.alert_ids:
+        alert_ids = list(dict.fromkeys(request.alert_ids))
+        if len(alert_ids) > MAX_BATCH_SIZE:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Batch selects {len(alert_ids)} alerts; limit is {MAX_BATCH_SIZE}",
+            )
+        items = []
+        for alert_id in alert_ids:
+            alert_data = alert_store.get_alert(alert_id)
+            if alert_data is None:
+                items.append(
+                    {
+                        "alert_id": alert_id,
+                        "error": {"status": "not_found", "error": "Alert not found"},
+                    }
+                )
+            else:
+                items.append({"alert_id": alert_id, "alert": Alert(**alert_data)})
+    elif request.filter is not None:
+        criteria = request.filter.dict(exclude_none=True)
+        if not criteria:
+            raise HTTPException(
+                status_code=400, detail="Filter needs at least one field"
+            )
+        # One past the limit is enough to know the batch is too big
+        matches = alert_store.query_alerts(**criteria, limit=MAX_BATCH_SIZE + 1)
+        if len(matches) > MAX_BATCH_SIZE:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Filter selects more than {MAX_BATCH_SIZE} alerts; narrow it",
+            )
+        items = [{"alert_id": a["id"], "alert": Alert(**a)} for a in matches]
+    else:
+        raise HTTPException(
+            status_code=400, detail="Provide either alert_ids or filter"
+        )
+
+    if batch_rate_limiter is None:
+        batch_rate_limiter = RateLimiter(float(os.getenv("BATCH_RATE_LIMIT", "5")))
+
+    concurrency = min(
+        request.max_concurrency or analysis_pool.max_concurrency,
+        analysis_pool.max_concurrency,
+    )
+
+    async def stream():
+        async for record in analyze_batch(
+            analysis_pool, _analyze_and_store, items, concurrency, batch_rate_limiter
+        ):
+            yield json.dumps(record) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
 @app.get("/alerts/{alert_id}/plan")
 async def get_remediation_plan(alert_id: str):
     """Get remediation plan for alert"""
-    if alert_id not in plans_db:
+    plan = alert_store.get_plan(alert_id)
+    if plan is None:
         raise HTTPException(status_code=404, detail="Remediation plan not found")
-    return plans_db[alert_id]
+    return plan
 
 
 @app.post("/alerts/{alert_id}/execute")
 async def execute_remediation(
-    alert_id: str, approved: bool = True, request_body: dict = Body(None)
+    alert_id: str,
+    approved: bool = True,
+    wait: float = Query(0, ge=0),
 ):
     """
-    Execute approved remediation script
+    Queue approved remediation script for execution
     Requires human approval
-    Accepts plan in request body to handle multi-worker deployments
+    Runs the plan stored for the alert, never one supplied by the client.
+    Returns the job (202); with wait=N the response holds until it
+    finishes or N seconds pass.
     """
     if not approved:
         return {
@@ -172,19 +568,15 @@ async def execute_remediation(
             "alert_id": alert_id,
         }
 
-    # Get remediation plan from request body or memory
-    plan = None
-    if request_body and "plan" in request_body:
-        plan = request_body["plan"]
-    if not plan:
-        plan = plans_db.get(alert_id)
+    plan = alert_store.get_plan(alert_id)
     if not plan:
         raise HTTPException(status_code=404, detail="Remediation plan not found")
 
-    # Validate script safety
-    validation = script_executor.validator.validate(
-        plan["script"], plan["script_language"]
-    )
+    # Validate script safety (once; the verdict is handed to the executor)
+    with metrics.span("validation"):
+        validation = script_executor.validator.validate(
+            plan["script"], plan["script_language"]
+        )
     if validation["recommendation"] == "REJECTED":
         return {
             "status": "rejected",
@@ -193,50 +585,272 @@ async def execute_remediation(
             "alert_id": alert_id,
         }
 
-    # Execute script
-    try:
-        result = script_executor.execute_script(plan["script"], plan["script_language"])
+    alert = alert_store.get_alert(alert_id) or {}
+    job = await execution_queue.submit(
+        alert_id,
+        alert.get("system") or "unknown",
+        plan["script"],
+        plan["script_language"],
+        validation=validation,
+    )
+    if wait:
+        job = await execution_queue.wait(job["job_id"], min(wait, MAX_JOB_WAIT))
+    return _job_response(job)
 
-        # Calculate MTTR (mock for demo)
-        mttr = 4  # 4 minutes for demo
 
-        execution_result = {
+@app.post("/alerts/{alert_id}/execute/fanout")
+async def execute_fanout(
+    alert_id: str,
+    request: FanoutExecuteRequest,
+    approved: bool = Query(..., description="Technician approval for the rollout"),
+):
+    """
+    Run the approved plan on many target systems in canary waves
+    Requires human approval. Every host runs as an execution job (per-host
+    limit, job record under its job_id). Streams NDJSON: a record per batch
+    and per host as they finish, then a summary. The rollout stops on a
+    failed canary or once failures exceed max_failure_rate of the targets;
+    closing the stream stops it as well.
+    """
+    if not approved:
+        return {
+            "status": "cancelled",
+            "message": "Execution cancelled by technician",
             "alert_id": alert_id,
-            "status": result["status"],
-            "output": result["output"],
-            "execution_time": result["execution_time"],
-            "mttr_minutes": mttr,
-            "timestamp": datetime.utcnow().isoformat(),
         }
 
-        executions_db[alert_id] = execution_result
+    plan = alert_store.get_plan(alert_id)
+    if not plan:
+        raise HTTPException(status_code=404, detail="Remediation plan not found")
 
-        return execution_result
+    targets = list(dict.fromkeys(request.targets))
+    if len(targets) > FANOUT_MAX_TARGETS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"{len(targets)} targets; limit is {FANOUT_MAX_TARGETS}",
+        )
+    if rmm_client is None and not script_executor.demo_mode:
+        raise HTTPException(
+            status_code=400, detail="Fan-out needs RMM_URL to reach remote hosts"
+        )
+
+    with metrics.span("validation"):
+        validation = script_executor.validator.validate(
+            plan["script"], plan["script_language"]
+        )
+    if validation["recommendation"] == "REJECTED":
+        return {
+            "status": "rejected",
+            "message": "Script failed safety validation",
+            "issues": validation["issues"],
+            "alert_id": alert_id,
+        }
+
+    # Demo mode (no RMM): every host is simulated by the queue's executor
+    rollout_id = uuid.uuid4().hex
+    run_host = queued_runner(
+        execution_queue,
+        alert_id,
+        plan["script"],
+        plan["script_language"],
+        validation=validation,
+        rmm=rmm_client,
+        rollout_id=rollout_id,
+    )
+
+    rollout = {
+        # Hosts run on the queue's workers, so no more than that at once
+        "parallelism": min(
+            request.parallelism or FANOUT_PARALLELISM,
+            FANOUT_PARALLELISM,
+            execution_queue.workers,
+        ),
+        "canary": (
+            request.canary
+            if request.canary is not None
+            else int(os.getenv("FANOUT_CANARY_HOSTS", "1"))
+        ),
+        "wave_fraction": (
+            request.wave_percent or float(os.getenv("FANOUT_WAVE_PERCENT", "10"))
+        )
+        / 100,
+        "max_failure_rate": (
+            request.max_failure_rate
+            if request.max_failure_rate is not None
+            else float(os.getenv("FANOUT_MAX_FAILURE_RATE", "0.05"))
+        ),
+    }
+
+    async def stream():
+        hosts = {}
+        async for record in fan_out(targets, run_host, **rollout):
+            if record["type"] == "host":
+                hosts[record["host"]] = record["status"]
+            elif record["type"] == "summary":
+                summary = f"{record['succeeded']}/{len(targets)} hosts remediated"
+                if record["stopped"]:
+                    summary += f"; stopped: {record['stop_reason']}"
+                _save_execution(
+                    alert_id,
+                    "success" if record["succeeded"] == len(targets) else "failed",
+                    summary,
+                    record["wall_time"],
+                    fanout={
+                        "rollout_id": rollout_id,
+                        "summary": record,
+                        "hosts": hosts,
+                    },
+                )
+            yield json.dumps(record) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+def _job_response(job: Dict) -> JSONResponse:
+    """200 once the job has finished, 202 while it is queued or running"""
+    done = job["status"] in TERMINAL_STATUSES
+    return JSONResponse(job, status_code=200 if done else 202)
+
+
+@app.get("/jobs/{job_id}")
+async def get_execution_job(job_id: str, wait: float = Query(0, ge=0)):
+    """
+    Execution job status
+    With wait=N, long-polls until the job finishes or N seconds pass
+    """
+    job = await execution_queue.wait(job_id, min(wait, MAX_JOB_WAIT))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Execution job not found")
+    return _job_response(job)
+
+
+@app.get("/jobs/{job_id}/stream")
+async def stream_execution_job(
+    job_id: str, request: Request, since: int = Query(0, ge=0)
+):
+    """
+    Live script output as Server-Sent Events
+    One "output" event per line (its id is the line's sequence number, so a
+    reconnecting EventSource resumes after Last-Event-ID), "status" events as
+    the job moves through the queue, and a final "done" event with the job
+    """
+    if alert_store.get_job(job_id) is None:
+        raise HTTPException(status_code=404, detail="Execution job not found")
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id and last_event_id.isdigit():
+        since = int(last_event_id) + 1
+
+    async def events():
+        async for kind, payload in execution_queue.stream(job_id, since):
+            if kind == "output":
+                seq, line = payload
+                # A bare CR would end the SSE data line early
+                line = line.replace("\r", "")
+                yield f"id: {seq}\nevent: output\ndata: {line}\n\n"
+            elif kind == "ping":
+                yield ": ping\n\n"
+            else:
+                yield f"event: {kind}\ndata: {json.dumps(payload)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Execution failed: {str(e)}")
+
+@app.post("/jobs/{job_id}/cancel")
+async def cancel_execution_job(job_id: str):
+    """Cancel a queued job, or kill the script of a running one"""
+    status = execution_queue.cancel(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Execution job not found")
+    return {"job_id": job_id, "status": status}
 
 
 @app.get("/alerts/{alert_id}/result")
 async def get_execution_result(alert_id: str):
     """Get execution result for alert"""
-    if alert_id not in executions_db:
+    result = alert_store.get_execution(alert_id)
+    if result is None:
         raise HTTPException(status_code=404, detail="Execution result not found")
-    return executions_db[alert_id]
+    return result
+
+
+@app.get("/cache/plans")
+async def get_plan_cache_stats():
+    """Plan cache size, hit rate and Bedrock calls saved"""
+    if not ai_service_configured or bedrock_service.plan_cache is None:
+        raise HTTPException(status_code=404, detail="Plan cache not enabled")
+    return bedrock_service.plan_cache.stats()
+
+
+@app.delete("/cache/plans")
+async def invalidate_plan_cache(
+    fingerprint: Optional[str] = None,
+    system: Optional[str] = None,
+    alert_type: Optional[str] = None,
+):
+    """
+    Invalidate cached plans
+    Narrow by fingerprint, system and/or alert_type; no filter clears everything
+    """
+    if not ai_service_configured or bedrock_service.plan_cache is None:
+        raise HTTPException(status_code=404, detail="Plan cache not enabled")
+    removed = bedrock_service.plan_cache.invalidate(
+        fingerprint=fingerprint, system=system, alert_type=alert_type
+    )
+    return {"removed": removed}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Per-stage latency summaries and counters in Prometheus text format"""
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
 
 
 @app.get("/stats")
 async def get_statistics():
-    """Get system statistics"""
-    total_alerts = len(alerts_db)
-    analyzed = len(plans_db)
-    executed = len(executions_db)
+    """
+    Get system statistics
+    Served from running counters, so the cost does not grow with history
+    """
+    summary = stats.snapshot()
 
     return {
-        "total_alerts": total_alerts,
-        "analyzed": analyzed,
-        "executed": executed,
-        "success_rate": (executed / analyzed * 100) if analyzed > 0 else 0,
+        "total_alerts": summary["alerts"],
+        "suppressed": summary["suppressed"],
+        "analyzed": summary["analyzed"],
+        "executed": summary["executed"],
+        "success_rate": summary["success_rate"],
+        "by_severity": summary["by_severity"],
+        "top_systems": summary["top_systems"],
+        "mttr": dict(summary["mttr"], mean_minutes=summary["mttr_mean_minutes"]),
+        "windows": summary["windows"],
+        "analysis_pool": analysis_pool.stats(),
+        "execution_queue": execution_queue.stats(),
+        "dedup": alert_correlator.stats() if dedup_enabled else None,
+        "context_cache": (
+            bedrock_service.context_cache.stats() if ai_service_configured else None
+        ),
+        "validation_cache": script_executor.validator.stats(),
+        "plan_cache": (
+            bedrock_service.plan_cache.stats()
+            if ai_service_configured and bedrock_service.plan_cache is not None
+            else None
+        ),
+        "bedrock": (
+            bedrock_service.resilience.stats() if ai_service_configured else None
+        ),
+        "prompt": (
+            bedrock_service.prompt_builder.stats() if ai_service_configured else None
+        ),
+        "routing": (bedrock_service.router.stats() if ai_service_configured else None),
+        "templates": (
+            bedrock_service.template_planner.stats() if ai_service_configured else None
+        ),
     }
 
 
@@ -6,8 +6,23 @@ Uses Claude 3.5 Sonnet via AWS Bedrock for intelligent alert analysis
 import boto3
 import json
 import os
-from typing import Dict, List
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
 from backend.models import Alert, RemediationPlan
+from backend.context_cache import ContextDataCache
+from backend.sop_matcher import SOPMatch, SOPMatcher
+from backend.sop_retrieval import SOPVectorIndex, default_index_dir
+from backend.plan_cache import PlanCache
+from backend.plan_stream import PlanStreamParser, plan_fields
+from backend.prompt_builder import PromptBuilder
+from backend.model_router import ModelRouter, RouteDecision, sop_match_confidence
+from backend.plan_templates import TemplateError, TemplatePlanner
+from backend.instrumentation import metrics
+from backend.bedrock_resilience import (
+    CircuitOpenError,
+    ResilientCaller,
+    client_config,
+)
 from botocore.exceptions import ClientError
 
 
@@ -17,7 +32,11 @@ class BedrockService:
     Analyzes alerts and generates safe remediation scripts
     """
 
-    def __init__(self):
+    def __init__(self, client=None):
+        """
+        client: optional pre-built bedrock-runtime client (e.g. a stub for
+        load tests); when omitted one is created from the environment
+        """
         # AWS credentials from environment
         self.aws_region = os.getenv("AWS_REGION", "us-east-1")
         self.aws_access_key = os.getenv("AWS_ACCESS_KEY_ID")
@@ -25,38 +44,16 @@ class BedrockService:
         self.aws_session_token = os.getenv(
             "AWS_SESSION_TOKEN"
         )  # For SSO/temporary credentials
+        # Alternate bedrock-runtime endpoint (VPC endpoint, or a local stub)
+        self.endpoint_url = os.getenv("BEDROCK_ENDPOINT_URL") or None
 
-        # Initialize Bedrock Runtime client
-        # boto3 will automatically use credentials in this order:
-        # 1. Explicit credentials from .env (if provided)
-        # 2. AWS CLI credentials (~/.aws/credentials)
-        # 3. IAM role (if running on EC2/Lambda)
-        # 4. SSO credentials (if aws sso login was used)
+        # Initialize Bedrock Runtime client (unless one was injected)
         try:
-            client_kwargs = {
-                "service_name": "bedrock-runtime",
-                "region_name": self.aws_region,
-            }
-
-            # Only add explicit credentials if they're set in .env
-            # Otherwise, boto3 will use AWS CLI/SSO credentials automatically
-            if self.aws_access_key and self.aws_secret_key:
-                client_kwargs["aws_access_key_id"] = self.aws_access_key
-                client_kwargs["aws_secret_access_key"] = self.aws_secret_key
-
-                # Add session token if present (for temporary/SSO credentials)
-                if self.aws_session_token:
-                    client_kwargs["aws_session_token"] = self.aws_session_token
-                    print("[OK] Using temporary/SSO credentials from .env")
-                else:
-                    print("[OK] Using permanent credentials from .env")
+            if client is not None:
+                self.bedrock = client
+                print("[OK] Using injected Bedrock client")
             else:
-                print(
-                    "[OK] Using AWS CLI/SSO credentials (no explicit credentials in .env)"
-                )
-
-            self.bedrock = boto3.client(**client_kwargs)
-            print(f"[OK] AWS Bedrock client initialized (region: {self.aws_region})")
+                self.bedrock = self._create_client()
         except Exception as e:
             raise ValueError(
                 f"Failed to initialize AWS Bedrock client: {str(e)}\n\n"
@@ -68,399 +65,364 @@ class BedrockService:
 
         # Amazon Nova Pro - AWS-native AI model
         # Benefits: Immediately available, no approval needed, cost-effective, AWS-native
-        self.model_id = "amazon.nova-pro-v1:0"
+        # Easy alerts are routed to a smaller model or an SOP template instead
+        self.router = ModelRouter()
+        self.model_id = self.router.pro_model
         self.model_name = "Amazon Nova Pro"
+        # SOP script templates, compiled once: zero-call plans for easy
+        # alerts and the fallback when Bedrock is unavailable
+        self.template_planner = TemplatePlanner()
+        self.template_fallback_min_confidence = float(
+            os.getenv("TEMPLATE_FALLBACK_MIN_CONFIDENCE", "0.5")
+        )
 
-        # Fallback cache for demo reliability
+        # Budgeted prompt assembly with per-alert-type token counts
+        self.prompt_builder = PromptBuilder()
+
+        # Throttle backoff and circuit breaker around every model call
+        self.resilience = ResilientCaller()
+
+        # SOP KB and device history, parsed once and reloaded on file change
+        self.context_cache = ContextDataCache()
+        self._sop_matcher = None
+        self._sop_matcher_version = -1
+        self._sop_vectors = None
+        self._sop_vectors_version = -1
+        self.semantic_min_score = float(os.getenv("SOP_SEMANTIC_MIN_SCORE", "0.05"))
+
+        # Plan cache keyed on alert fingerprint, shared across workers on disk
+        self.plan_cache = None
+        if os.getenv("PLAN_CACHE_ENABLED", "true").lower() == "true":
+            try:
+                self.plan_cache = PlanCache()
+            except Exception as e:
+                print(f"[WARN] Plan cache disabled: {e}")
+
+        # Demo mode: answer every alert with a template plan when its SOP has one
         self.use_cache = os.getenv("USE_CACHED_RESPONSES", "false").lower() == "true"
-        self.cached_responses = self._load_cached_responses()
+        try:
+            usable = self.template_planner.warm(self.load_sop_kb())
+            print(f"[OK] {usable} SOP script template(s) compiled")
+        except Exception as e:
+            print(f"Warning: SOP script templates not compiled: {e}")
 
-    def _load_cached_responses(self) -> Dict:
+    def _create_client(self):
         """
-        Load pre-cached demo responses as fallback
-        Used when USE_CACHED_RESPONSES=true or if API fails
+        Build the bedrock-runtime client from environment credentials
+        boto3 will automatically use credentials in this order:
+        1. Explicit credentials from .env (if provided)
+        2. AWS CLI credentials (~/.aws/credentials)
+        3. IAM role (if running on EC2/Lambda)
+        4. SSO credentials (if aws sso login was used)
         """
-        return {
-            "INC0012345": {
-                "root_cause": "IIS logs accumulating in C:\\inetpub\\logs consuming excessive disk space",
-                "confidence": 0.92,
-                "reasoning": "Historical pattern shows similar incident on 2025-09-15 where disk space reached 92%. Current metrics indicate rapid growth in log directory size. Device history confirms IIS logs are primary contributor. SOP recommends archiving logs older than 30 days as standard remediation.",
-                "steps": [
-                    "Identify IIS log files older than 30 days in C:\\inetpub\\logs\\LogFiles",
-                    "Create backup directory at D:\\Backups\\IISLogs for retention compliance",
-                    "Copy old logs to backup location before deletion",
-                    "Safely delete old log files with comprehensive error handling",
-                    "Verify disk space reduction and confirm operations successful",
-                    "Update monitoring threshold if disk usage normalized",
-                ],
-                "script": """# Disk Space Cleanup Script - IIS Logs
-# Generated by Agentic Alert Triage Assistant
-# Alert ID: INC0012345
-# Safety: Creates backup before deletion, includes error handling
-
-Write-Host "Starting disk cleanup on C:\\" -ForegroundColor Green
-Write-Host "Target: IIS logs older than 30 days" -ForegroundColor Yellow
-Write-Host "=" * 60 -ForegroundColor Gray
-
-$LogPath = "C:\\inetpub\\logs\\LogFiles"
-$DaysToKeep = 30
-$CutoffDate = (Get-Date).AddDays(-$DaysToKeep)
-$BackupPath = "D:\\Backups\\IISLogs"
-
-try {
-    # Safety check: Ensure path exists
-    Write-Host "Checking log path..." -ForegroundColor Cyan
-    if (-not (Test-Path $LogPath)) {
-        Write-Host "ERROR: Log path not found - $LogPath" -ForegroundColor Red
-        Write-Host "This may indicate IIS is not installed or logs are in different location" -ForegroundColor Yellow
-        exit 1
-    }
-
-    Write-Host "✓ Log path verified: $LogPath" -ForegroundColor Green
-
-    # Find old logs
-    Write-Host "Scanning for logs older than $DaysToKeep days..." -ForegroundColor Cyan
-    $OldLogs = Get-ChildItem -Path $LogPath -Recurse -File |
-               Where-Object { $_.LastWriteTime -lt $CutoffDate }
-
-    if ($OldLogs.Count -eq 0) {
-        Write-Host "No old logs found. Disk space issue may be elsewhere." -ForegroundColor Yellow
-        Write-Host "Consider checking:" -ForegroundColor Yellow
-        Write-Host "  - Application logs" -ForegroundColor Gray
-        Write-Host "  - Temp directories" -ForegroundColor Gray
-        Write-Host "  - Database files" -ForegroundColor Gray
-        exit 0
-    }
-
-    $TotalSize = ($OldLogs | Measure-Object -Property Length -Sum).Sum / 1GB
-    $TotalSizeRounded = [math]::Round($TotalSize, 2)
-
-    Write-Host "✓ Found $($OldLogs.Count) files totaling $TotalSizeRounded GB" -ForegroundColor Green
-    Write-Host ""
-
-    # Create backup directory (safety measure)
-    Write-Host "Preparing backup location..." -ForegroundColor Cyan
-    if (-not (Test-Path $BackupPath)) {
-        New-Item -ItemType Directory -Force -Path $BackupPath | Out-Null
-        Write-Host "✓ Created backup directory: $BackupPath" -ForegroundColor Green
-    } else {
-        Write-Host "✓ Backup directory exists: $BackupPath" -ForegroundColor Green
-    }
-
-    # Backup old logs (optional but recommended for compliance)
-    Write-Host ""
-    Write-Host "Creating backup of logs before deletion..." -ForegroundColor Yellow
-    Write-Host "This may take a few moments..." -ForegroundColor Gray
-
-    $BackupCount = 0
-    foreach ($log in $OldLogs) {
-        try {
-            Copy-Item -Path $log.FullName -Destination $BackupPath -Force -ErrorAction Stop
-            $BackupCount++
-
-            # Progress indicator every 50 files
-            if ($BackupCount % 50 -eq 0) {
-                Write-Host "  Backed up $BackupCount files..." -ForegroundColor Gray
-            }
-        } catch {
-            Write-Host "Warning: Could not backup $($log.Name): $($_.Exception.Message)" -ForegroundColor Yellow
-        }
-    }
-
-    Write-Host "✓ Backup complete: $BackupCount files backed up" -ForegroundColor Green
-    Write-Host ""
-
-    # Delete old logs
-    Write-Host "Deleting old logs..." -ForegroundColor Yellow
-    $DeletedCount = 0
-    $DeletedSize = 0
-
-    foreach ($log in $OldLogs) {
-        try {
-            $fileSize = $log.Length
-            Remove-Item -Path $log.FullName -Force -ErrorAction Stop
-            $DeletedCount++
-            $DeletedSize += $fileSize
-
-            # Progress indicator
-            if ($DeletedCount % 50 -eq 0) {
-                $deletedGB = [math]::Round($DeletedSize / 1GB, 2)
-                Write-Host "  Deleted $DeletedCount files ($deletedGB GB)..." -ForegroundColor Gray
-            }
-        } catch {
-            Write-Host "Warning: Could not delete $($log.Name): $($_.Exception.Message)" -ForegroundColor Yellow
-        }
-    }
-
-    $FinalDeletedSize = [math]::Round($DeletedSize / 1GB, 2)
-    Write-Host "✓ Cleanup complete" -ForegroundColor Green
-    Write-Host "  Files deleted: $DeletedCount" -ForegroundColor Cyan
-    Write-Host "  Space freed: $FinalDeletedSize GB" -ForegroundColor Cyan
-    Write-Host ""
-
-    # Verify new disk usage
-    Write-Host "Verifying disk space..." -ForegroundColor Cyan
-    $Disk = Get-PSDrive C
-    $UsedPercent = [math]::Round(($Disk.Used / ($Disk.Used + $Disk.Free)) * 100, 2)
-    $UsedGB = [math]::Round($Disk.Used / 1GB, 2)
-    $FreeGB = [math]::Round($Disk.Free / 1GB, 2)
-
-    Write-Host "Current disk usage:" -ForegroundColor Cyan
-    Write-Host "  Used: $UsedGB GB ($UsedPercent%)" -ForegroundColor $(if ($UsedPercent -lt 80) { "Green" } else { "Yellow" })
-    Write-Host "  Free: $FreeGB GB" -ForegroundColor Green
-    Write-Host ""
-
-    if ($UsedPercent -lt 80) {
-        Write-Host "SUCCESS: Disk usage now within acceptable range" -ForegroundColor Green
-        Write-Host "Alert can be marked as RESOLVED" -ForegroundColor Green
-    } elseif ($UsedPercent -lt 90) {
-        Write-Host "WARNING: Disk usage improved but still elevated" -ForegroundColor Yellow
-        Write-Host "Consider additional cleanup or capacity expansion" -ForegroundColor Yellow
-    } else {
-        Write-Host "WARNING: Disk usage still critical" -ForegroundColor Red
-        Write-Host "Further investigation needed - logs may not be primary cause" -ForegroundColor Yellow
-    }
-
-    Write-Host ""
-    Write-Host "=" * 60 -ForegroundColor Gray
-    Write-Host "Cleanup operation completed successfully" -ForegroundColor Green
-    Write-Host "Backup location: $BackupPath" -ForegroundColor Gray
-
-} catch {
-    Write-Host ""
-    Write-Host "=" * 60 -ForegroundColor Red
-    Write-Host "ERROR: Unexpected error occurred" -ForegroundColor Red
-    Write-Host "Error: $($_.Exception.Message)" -ForegroundColor Red
-    Write-Host ""
-    Write-Host "ROLLBACK INSTRUCTIONS:" -ForegroundColor Yellow
-    Write-Host "1. Logs backed up to: $BackupPath" -ForegroundColor Gray
-    Write-Host "2. To restore: Copy-Item '$BackupPath\\*' -Destination '$LogPath' -Force" -ForegroundColor Gray
-    Write-Host "3. Contact system administrator if issue persists" -ForegroundColor Gray
-    Write-Host "=" * 60 -ForegroundColor Red
-    exit 1
-}
-""",
-                "script_language": "powershell",
-                "safety_checks": [
-                    "Backup created before deletion at D:\\Backups\\IISLogs",
-                    "Only deletes files older than 30 days (configurable threshold)",
-                    "Preserves current day logs automatically",
-                    "Includes Try-Catch error handling with detailed rollback guidance",
-                    "Verifies path existence before any operations",
-                    "Progress indicators and colored output for audit trail",
-                    "File-by-file deletion with individual error handling",
-                    "Post-cleanup verification of disk usage",
-                ],
-                "estimated_time": "2-3 minutes",
-                "rollback_plan": "If issues occur, all deleted logs are backed up at D:\\Backups\\IISLogs. To restore, run: Copy-Item 'D:\\Backups\\IISLogs\\*' -Destination 'C:\\inetpub\\logs\\LogFiles' -Force. Script includes detailed error messages and graceful failure handling.",
-            }
+        client_kwargs = {
+            "service_name": "bedrock-runtime",
+            "region_name": self.aws_region,
+            # Pool sized to ANALYSIS_CONCURRENCY, adaptive client-side rate limiting
+            "config": client_config(),
         }
+        if self.endpoint_url:
+            client_kwargs["endpoint_url"] = self.endpoint_url
+
+        # Only add explicit credentials if they're set in .env
+        # Otherwise, boto3 will use AWS CLI/SSO credentials automatically
+        if self.aws_access_key and self.aws_secret_key:
+            client_kwargs["aws_access_key_id"] = self.aws_access_key
+            client_kwargs["aws_secret_access_key"] = self.aws_secret_key
+
+            # Add session token if present (for temporary/SSO credentials)
+            if self.aws_session_token:
+                client_kwargs["aws_session_token"] = self.aws_session_token
+                print("[OK] Using temporary/SSO credentials from .env")
+            else:
+                print("[OK] Using permanent credentials from .env")
+        else:
+            print(
+                "[OK] Using AWS CLI/SSO credentials (no explicit credentials in .env)"
+            )
+
+        client = boto3.client(**client_kwargs)
+        print(f"[OK] AWS Bedrock client initialized (region: {self.aws_region})")
+        if self.endpoint_url:
+            print(f"[OK] Bedrock endpoint override: {self.endpoint_url}")
+        return client
 
     def load_sop_kb(self) -> Dict:
-        """Load SOP knowledge base from data directory"""
-        try:
-            kb_path = os.path.join("..", "data", "sop_kb.json")
-            with open(kb_path, "r") as f:
-                return json.load(f)
-        except FileNotFoundError:
-            print("Warning: sop_kb.json not found, using empty knowledge base")
-            return {}
-        except json.JSONDecodeError as e:
-            print(f"Warning: Failed to parse sop_kb.json: {e}")
-            return {}
+        """SOP knowledge base from the context cache (empty if unavailable)"""
+        return self.context_cache.sop_kb()
 
     def load_device_history(self, system: str) -> List[Dict]:
-        """Load historical incidents for specific device"""
-        try:
-            history_path = os.path.join("..", "data", "device_history.json")
-            with open(history_path, "r") as f:
-                history = json.load(f)
-                return history.get(system, [])
-        except FileNotFoundError:
-            print("Warning: device_history.json not found")
-            return []
-        except json.JSONDecodeError as e:
-            print(f"Warning: Failed to parse device_history.json: {e}")
-            return []
+        """Historical incidents for a specific device from the context cache"""
+        return self.context_cache.device_history(system)
 
     def analyze_alert(self, alert: Alert) -> RemediationPlan:
         """
         Main analysis function using Claude 3.5 Sonnet on Bedrock
         Implements safety-first prompt engineering
         """
-
-        # Check cache first for demo reliability
-        if self.use_cache and alert.id in self.cached_responses:
-            print(f"Using cached response for alert {alert.id}")
-            cached = self.cached_responses[alert.id]
-            return RemediationPlan(alert_id=alert.id, **cached)
-
-        # Gather context from knowledge base and history
-        sop_kb = self.load_sop_kb()
-        device_history = self.load_device_history(alert.system)
-
-        # Find relevant SOP for this alert type
-        relevant_sop = self._find_relevant_sop(alert.alert_type, sop_kb)
-
-        # Build context-aware prompt
-        prompt_content = self._build_analysis_prompt(
-            alert, relevant_sop, device_history
-        )
+        start = time.perf_counter()
+        plan, fingerprint, prompt_content, route = self._prepare_analysis(alert)
+        if plan is not None:
+            self._record_route(route, start, self._plan_source(route))
+            return plan
 
         # Call Bedrock API with safety constraints
         try:
             print(
-                f"Calling AWS Bedrock ({self.model_name}) to analyze alert {alert.id}..."
+                f"Calling AWS Bedrock ({route.model_id}, {route.route} route) "
+                f"to analyze alert {alert.id}..."
             )
-            response_text = self._call_bedrock(prompt_content)
-            plan = self._parse_remediation_plan(response_text, alert.id)
+            with metrics.span("bedrock_call"):
+                response_text = self._call_bedrock(prompt_content, route.model_id)
+            with metrics.span("json_parse"):
+                plan = self._parse_remediation_plan(response_text, alert.id)
             print(f"Successfully generated remediation plan for {alert.id}")
+            if fingerprint is not None:
+                self.plan_cache.put(fingerprint, alert, plan.dict())
+            self._record_route(route, start, "model")
             return plan
 
         except Exception as e:
-            # Fallback to cached response if Bedrock fails
-            print(f"Bedrock API error: {e}")
-            if alert.id in self.cached_responses:
-                print(f"Falling back to cached response for {alert.id}")
-                cached = self.cached_responses[alert.id]
-                return RemediationPlan(alert_id=alert.id, **cached)
-            raise Exception(
-                f"Analysis failed and no cached response available: {str(e)}"
+            self._record_route(route, start, "error")
+            return self._fallback_plan(alert, e)
+
+    def analyze_alert_stream(self, alert: Alert) -> Iterator[Dict]:
+        """
+        Streaming variant of analyze_alert
+        Yields {"type": "field", "field", "value"} for each plan field as soon
+        as the model has finished writing it, then {"type": "plan", "plan"}
+        with the validated plan (cached and fallback plans arrive as just the
+        final event)
+        """
+        route_start = time.perf_counter()
+        plan, fingerprint, prompt_content, route = self._prepare_analysis(alert)
+        if plan is not None:
+            self._record_route(route, route_start, self._plan_source(route))
+        else:
+            try:
+                print(
+                    f"Streaming AWS Bedrock ({route.model_id}, {route.route} route) "
+                    f"analysis of alert {alert.id}..."
+                )
+                parser = PlanStreamParser()
+                chunks = []
+                start = time.perf_counter()
+                first_field = True
+                for chunk in self._stream_bedrock(prompt_content, route.model_id):
+                    chunks.append(chunk)
+                    for name, value in plan_fields(parser, chunk):
+                        if first_field:
+                            metrics.observe(
+                                "analysis_first_field_seconds",
+                                time.perf_counter() - start,
+                            )
+                            first_field = False
+                        yield {"type": "field", "field": name, "value": value}
+                metrics.observe(
+                    "stage_duration_seconds",
+                    time.perf_counter() - start,
+                    stage="bedrock_stream",
+                )
+                with metrics.span("json_parse"):
+                    plan = self._parse_remediation_plan("".join(chunks), alert.id)
+                print(f"Successfully generated remediation plan for {alert.id}")
+                if fingerprint is not None:
+                    self.plan_cache.put(fingerprint, alert, plan.dict())
+                self._record_route(route, route_start, "model")
+            except Exception as e:
+                self._record_route(route, route_start, "error")
+                plan = self._fallback_plan(alert, e)
+        yield {"type": "plan", "plan": plan.dict()}
+
+    def _prepare_analysis(
+        self, alert: Alert
+    ) -> Tuple[Optional[RemediationPlan], Optional[str], Optional[str], RouteDecision]:
+        """
+        Shared lead-in of both analysis paths: (plan, None, None, route) when a
+        cached or template plan answers the alert, otherwise (None,
+        fingerprint, prompt, route) for the model the route picked
+        """
+        # Gather context from knowledge base and history
+        with metrics.span("context_load"):
+            sop_kb = self.load_sop_kb()
+            device_history = self.load_device_history(alert.system)
+
+        # Rank SOPs for this alert; the top two decide the match confidence
+        with metrics.span("sop_lookup"):
+            candidates = self.find_sop_candidates(alert, limit=2) if sop_kb else []
+            relevant_sop = candidates[0].sop if candidates else {}
+
+        # Pick template / fast model / Nova Pro
+        with metrics.span("route"):
+            has_template = self.template_planner.can_plan(relevant_sop)
+            route = self.router.route(alert, candidates, has_template)
+            if self.use_cache and has_template and route.route != "template":
+                route = route._replace(
+                    route="template", model_id=None, reason="USE_CACHED_RESPONSES"
+                )
+        if route.route == "template":
+            try:
+                plan = self.template_planner.plan(alert, relevant_sop, route.confidence)
+                print(f"Template plan for alert {alert.id} ({route.reason})")
+                return plan, None, None, route
+            except TemplateError as e:
+                # e.g. a required parameter missing from the alert metrics
+                print(f"Warning: template plan for {alert.id} failed: {e}")
+                route = self.router.route(alert, candidates, False)
+
+        # Repeat alert with an equivalent fingerprint: reuse the earlier plan
+        fingerprint = None
+        if self.plan_cache is not None:
+            with metrics.span("plan_cache_lookup"):
+                fingerprint = self.plan_cache.fingerprint(alert, relevant_sop)
+                # Severity is not part of the fingerprint: keep plans from the
+                # fast model apart from Nova Pro's
+                if route.route != "pro":
+                    fingerprint = f"{route.route}:{fingerprint}"
+                cached_plan = self.plan_cache.get(fingerprint)
+            if cached_plan is not None:
+                print(f"Plan cache hit for alert {alert.id} ({fingerprint[:12]})")
+                plan = RemediationPlan(alert_id=alert.id, **cached_plan)
+                return plan, None, None, route
+
+        # Build context-aware prompt
+        with metrics.span("prompt_build"):
+            prompt_content = self._build_analysis_prompt(
+                alert, relevant_sop, device_history
             )
+        return None, fingerprint, prompt_content, route
+
+    def _record_route(self, route: RouteDecision, start: float, outcome: str) -> None:
+        """Per-route latency and call counts"""
+        self.router.record(route.route, time.perf_counter() - start, outcome)
+
+    @staticmethod
+    def _plan_source(route: RouteDecision) -> str:
+        """Outcome label for a plan answered without a model call"""
+        return "template" if route.route == "template" else "plan_cache"
 
-    def _find_relevant_sop(self, alert_type: str, sop_kb: Dict) -> Dict:
+    def _fallback_plan(self, alert: Alert, error: Exception) -> RemediationPlan:
         """
-        Find relevant SOP using simple keyword matching
-        In production: use semantic search with embeddings
+        Template plan when Bedrock fails, otherwise re-raise
+        Only used for an SOP matched with at least
+        TEMPLATE_FALLBACK_MIN_CONFIDENCE that has a usable script template
         """
-        for sop_id, sop_data in sop_kb.items():
-            triggers = sop_data.get("triggers", [])
-            if any(trigger in alert_type.lower() for trigger in triggers):
-                return sop_data
-        return {}
+        print(f"Bedrock API error: {error}")
+        try:
+            candidates = self.find_sop_candidates(alert, limit=2)
+            confidence = sop_match_confidence(candidates, self.router.strong_score)
+            if candidates and confidence >= self.template_fallback_min_confidence:
+                reason = str(error).splitlines()[0][:200]
+                plan = self.template_planner.plan(
+                    alert, candidates[0].sop, confidence, fallback_reason=reason
+                )
+                print(f"Falling back to template plan for {alert.id}")
+                metrics.inc("analysis_template_fallback_total")
+                return plan
+        except TemplateError as e:
+            print(f"Warning: no template fallback for {alert.id}: {e}")
+        if isinstance(error, CircuitOpenError):
+            raise error
+        raise Exception(f"Analysis failed and no template plan available: {str(error)}")
+
+    # Trigger hits in alert_type count double compared to the free-text description
+    SOP_MATCH_WEIGHTS = {"alert_type": 2.0, "description": 1.0}
+
+    def find_sop_candidates(self, alert: Alert, limit: int = 5) -> List[SOPMatch]:
+        """
+        Ranked SOP candidates for an alert
+        Trigger-automaton hits come first; remaining slots are filled from the
+        semantic vector index. Both are rebuilt only when the KB file changes.
+        """
+        sop_kb = self.load_sop_kb()
+        version = self.context_cache.sop_kb_version
+        if self._sop_matcher is None or version != self._sop_matcher_version:
+            self._sop_matcher = SOPMatcher(sop_kb)
+            self._sop_matcher_version = version
+
+        candidates = self._sop_matcher.match(
+            [
+                (alert.alert_type, self.SOP_MATCH_WEIGHTS["alert_type"]),
+                (alert.description, self.SOP_MATCH_WEIGHTS["description"]),
+            ],
+            limit=limit,
+        )
+        if len(candidates) < limit:
+            seen = {c.sop_id for c in candidates}
+            for sop_id, score in self.semantic_sop_search(alert, limit):
+                if sop_id not in seen and len(candidates) < limit:
+                    candidates.append(
+                        SOPMatch(sop_id, sop_kb[sop_id], score, (), "semantic")
+                    )
+        return candidates
+
+    def semantic_sop_search(self, alert: Alert, k: int = 5) -> List:
+        """Top-k (sop_id, cosine) from the on-disk SOP vector index"""
+        version = self.context_cache.sop_kb_version
+        if version != self._sop_vectors_version:
+            self._sop_vectors_version = version
+            try:
+                self._sop_vectors = SOPVectorIndex.load_or_build(
+                    self.load_sop_kb(), default_index_dir(self.context_cache.data_dir)
+                )
+            except Exception as e:
+                print(f"[WARN] Semantic SOP search disabled: {e}")
+                self._sop_vectors = None
+
+        if self._sop_vectors is None:
+            return []
+        return [
+            (sop_id, score)
+            for sop_id, score in self._sop_vectors.search(
+                f"{alert.alert_type} {alert.description}", k
+            )
+            if score >= self.semantic_min_score
+        ]
+
+    def _find_relevant_sop(self, alert: Alert, sop_kb: Dict) -> Dict:
+        """
+        Best-ranked SOP for the alert, or {} if nothing matches
+        Trigger matches win; semantic search covers alerts no trigger names
+        """
+        if not sop_kb:
+            return {}
+        candidates = self.find_sop_candidates(alert, limit=1)
+        return candidates[0].sop if candidates else {}
 
     def _build_analysis_prompt(
         self, alert: Alert, sop: Dict, history: List[Dict]
     ) -> str:
         """
         Constructs the Claude prompt with full context
-        Follows safety-first approach with explicit constraints
+        Follows safety-first approach with explicit constraints; history and
+        SOP are fitted to the prompt builder's per-section token budgets
         """
+        return self.prompt_builder.build(alert, sop, history)
+
+    def _request_body(self, prompt: str) -> str:
+        """Nova Messages API request body for prompt"""
+        # Nova uses a similar format to Claude but with different parameter names
+        request_body = {
+            "messages": [{"role": "user", "content": [{"text": prompt}]}],
+            "inferenceConfig": {
+                "max_new_tokens": 4000,
+                "temperature": 0.3,  # Lower for more consistent, focused responses
+                "top_p": 0.95,
+            },
+        }
+        return json.dumps(request_body)
 
-        # Format historical context
-        history_context = ""
-        if history:
-            recent = history[-3:]  # Last 3 incidents
-            history_context = "Recent similar incidents on this system:\n"
-            for h in recent:
-                history_context += f"- {h['date']}: {h['issue']} → Resolved in {h['resolution_time']} min\n"
-                history_context += f"  Action taken: {h['action_taken']}\n"
-        else:
-            history_context = "No historical incidents found for this system.\n"
-
-        # Format SOP steps
-        sop_steps = ""
-        if sop:
-            sop_steps = "Standard Operating Procedure:\n"
-            sop_steps += f"Title: {sop.get('title', 'N/A')}\n"
-            for i, step in enumerate(sop.get("steps", []), 1):
-                sop_steps += f"{i}. {step}\n"
-
-            if sop.get("safety_notes"):
-                sop_steps += "\nSAFETY REQUIREMENTS FROM SOP:\n"
-                for note in sop["safety_notes"]:
-                    sop_steps += f"- {note}\n"
-        else:
-            sop_steps = "No specific SOP found for this alert type. Use general best practices.\n"
-
-        # Main prompt with safety emphasis
-        prompt = f"""You are an expert IT operations assistant specializing in alert triage and remediation for Windows Server environments.
-
-ALERT DETAILS:
-- Alert ID: {alert.id}
-- Timestamp: {alert.timestamp}
-- Severity: {alert.severity}
-- Affected System: {alert.system} (Windows Server 2019)
-- Alert Type: {alert.alert_type}
-- Description: {alert.description}
-- Metrics: {json.dumps(alert.metrics, indent=2)}
-
-HISTORICAL CONTEXT:
-{history_context}
-
-KNOWLEDGE BASE:
-{sop_steps}
-
-YOUR TASK:
-1. Analyze the root cause of this alert using all provided context
-2. Provide a confidence score (0.0 to 1.0, where 1.0 = 100% confident)
-3. Explain your reasoning clearly, referencing historical data and metrics
-4. Generate a detailed step-by-step remediation plan in plain English
-5. Write a complete, production-ready PowerShell script to execute the remediation
-
-CRITICAL SAFETY REQUIREMENTS FOR THE SCRIPT:
-- NEVER include destructive commands without explicit safeguards
-- ALWAYS include backup steps before any modifications
-- Use Write-Host with color coding for clear logging at each step
-- Include comprehensive Try-Catch error handling blocks
-- Verify operations with Test-Path or equivalent checks before proceeding
-- Provide progress indicators for long-running operations
-- Include post-operation verification to confirm success
-- Add detailed comments explaining each section
-- Provide rollback instructions in case of failure
-- Exit with appropriate exit codes (0 = success, 1 = error)
-
-OUTPUT FORMAT - RESPOND WITH VALID JSON ONLY:
-{{
-    "root_cause": "Brief root cause explanation (1-2 sentences)",
-    "confidence": 0.92,
-    "reasoning": "Detailed explanation of why you believe this is the cause. Reference historical patterns, current metrics, and SOP guidance. Explain your confidence level.",
-    "remediation_steps": [
-        "Step 1: Clear action with expected outcome",
-        "Step 2: Next action with verification step",
-        "Continue with all necessary steps in logical order"
-    ],
-    "script": "# Complete PowerShell script\\n# With extensive comments\\n# Include all safety measures listed above\\n...",
-    "safety_checks": [
-        "Specific safety measure 1 with detail",
-        "Specific safety measure 2 explaining protection",
-        "List ALL safety mechanisms implemented in the script"
-    ],
-    "estimated_execution_time": "2-3 minutes",
-    "rollback_plan": "Detailed step-by-step instructions on how to undo changes if something goes wrong, including specific commands"
-}}
-
-IMPORTANT FORMATTING RULES:
-1. Respond ONLY with the JSON object
-2. Do NOT include markdown formatting or code blocks
-3. Ensure all JSON is valid and properly escaped
-4. PowerShell script should be in the "script" field as a single string with \\n for newlines
-5. Do NOT wrap the JSON in ```json``` or any other markers
-
-Generate the remediation plan now:"""
-
-        return prompt
-
-    def _call_bedrock(self, prompt: str) -> str:
+    def _call_bedrock(self, prompt: str, model_id: Optional[str] = None) -> str:
         """
-        Call AWS Bedrock API with Amazon Nova Pro
+        Call AWS Bedrock API with Amazon Nova Pro (or the routed model_id)
         Uses the Messages API format required by Nova models
         """
+        model_id = model_id or self.model_id
         try:
-            # Prepare request body for Amazon Nova
-            # Nova uses a similar format to Claude but with different parameter names
-            request_body = {
-                "messages": [{"role": "user", "content": [{"text": prompt}]}],
-                "inferenceConfig": {
-                    "max_new_tokens": 4000,
-                    "temperature": 0.3,  # Lower for more consistent, focused responses
-                    "top_p": 0.95,
-                },
-            }
-
-            # Call Bedrock API
-            response = self.bedrock.invoke_model(
-                modelId=self.model_id, body=json.dumps(request_body)
+            # Call Bedrock API (throttles retried with jittered backoff)
+            body = self._request_body(prompt)
+            response = self.resilience.call(
+                lambda: self.bedrock.invoke_model(modelId=model_id, body=body)
             )
 
             # Parse response
@@ -476,31 +438,81 @@ Generate the remediation plan now:"""
 
             raise Exception("Bedrock response missing content")
 
+        except CircuitOpenError:
+            raise
+
         except ClientError as e:
-            error_code = e.response["Error"]["Code"]
-            error_message = e.response["Error"]["Message"]
-
-            # Handle specific AWS errors
-            if error_code == "ThrottlingException":
-                raise Exception(f"AWS Bedrock rate limit exceeded: {error_message}")
-            elif error_code == "ModelNotReadyException":
-                raise Exception(f"Model {self.model_id} is not ready: {error_message}")
-            elif error_code == "AccessDeniedException":
-                raise Exception(
-                    f"Access denied to AWS Bedrock. Please verify:\n"
-                    f"1. AWS credentials are correct\n"
-                    f"2. IAM user has bedrock:InvokeModel permission\n"
-                    f"3. Model {self.model_id} is enabled in your AWS account\n"
-                    f"Error: {error_message}"
-                )
-            else:
-                raise Exception(
-                    f"AWS Bedrock API error ({error_code}): {error_message}"
-                )
+            raise self._client_error(e, model_id)
 
         except Exception as e:
             raise Exception(f"Bedrock API call failed: {str(e)}")
 
+    def _stream_bedrock(
+        self, prompt: str, model_id: Optional[str] = None
+    ) -> Iterator[str]:
+        """
+        Text deltas of a streamed Nova response (invoke_model_with_response_stream)
+        Only opening the stream is retried; an error mid-stream is raised as is
+        """
+        model_id = model_id or self.model_id
+        stream = None
+        try:
+            body = self._request_body(prompt)
+            response = self.resilience.call(
+                lambda: self.bedrock.invoke_model_with_response_stream(
+                    modelId=model_id, body=body
+                )
+            )
+            stream = response["body"]
+
+            # Nova streams {"contentBlockDelta": {"delta": {"text": "..."}}} chunks
+            # between messageStart and messageStop; error events raise here
+            for event in stream:
+                chunk = event.get("chunk")
+                if chunk is None:
+                    continue
+                delta = json.loads(chunk["bytes"]).get("contentBlockDelta")
+                if delta and delta.get("delta", {}).get("text"):
+                    yield delta["delta"]["text"]
+
+        except CircuitOpenError:
+            raise
+
+        except ClientError as e:
+            raise self._client_error(e, model_id)
+
+        except Exception as e:
+            raise Exception(f"Bedrock streaming call failed: {str(e)}")
+
+        finally:
+            # Consumer stopped early: release the pooled connection
+            if stream is not None and hasattr(stream, "close"):
+                stream.close()
+
+    def _client_error(self, e: ClientError, model_id: str) -> Exception:
+        """Readable exception for an AWS error response"""
+        error_code = e.response["Error"]["Code"]
+        error_message = e.response["Error"]["Message"]
+
+        # Handle specific AWS errors
+        if error_code == "ThrottlingException":
+            return Exception(
+                f"AWS Bedrock rate limit exceeded after "
+                f"{self.resilience.max_attempts} attempts: {error_message}"
+            )
+        elif error_code == "ModelNotReadyException":
+            return Exception(f"Model {model_id} is not ready: {error_message}")
+        elif error_code == "AccessDeniedException":
+            return Exception(
+                f"Access denied to AWS Bedrock. Please verify:\n"
+                f"1. AWS credentials are correct\n"
+                f"2. IAM user has bedrock:InvokeModel permission "
+                f"(and InvokeModelWithResponseStream for streamed analysis)\n"
+                f"3. Model {model_id} is enabled in your AWS account\n"
+                f"Error: {error_message}"
+            )
+        return Exception(f"AWS Bedrock API error ({error_code}): {error_message}")
+
     def _parse_remediation_plan(
         self, bedrock_response: str, alert_id: str
     ) -> RemediationPlan:
@@ -0,0 +1,247 @@
+"""
+Bedrock call resilience
+botocore client config (connection pool sized to analysis concurrency,
+adaptive client-side rate limiting), jittered exponential backoff for
+throttled calls, and a circuit breaker that fails fast while Bedrock is
+degraded instead of queueing every analysis behind timeouts.
+"""
+
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional, TypeVar
+
+from botocore.config import Config
+from botocore.exceptions import (
+    ClientError,
+    ConnectionClosedError,
+    EndpointConnectionError,
+    ReadTimeoutError,
+)
+
+T = TypeVar("T")
+
+# Error codes retried with backoff (the request may succeed a moment later)
+RETRYABLE_ERROR_CODES = {
+    "ThrottlingException",
+    "ServiceUnavailableException",
+    "ModelNotReadyException",
+}
+
+# Error codes that say Bedrock itself is unhealthy and count against the breaker
+DEGRADED_ERROR_CODES = RETRYABLE_ERROR_CODES | {
+    "InternalServerException",
+    "ModelTimeoutException",
+}
+
+TRANSPORT_ERRORS = (EndpointConnectionError, ConnectionClosedError, ReadTimeoutError)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling Bedrock while the circuit breaker is open"""
+
+
+def client_config(max_pool_connections: Optional[int] = None) -> Config:
+    """
+    botocore config for the bedrock-runtime client
+    The pool holds one connection per concurrent analysis so calls never wait
+    on a free socket. Adaptive mode rate-limits the client once Bedrock starts
+    throttling; retries themselves are done by ResilientCaller, so the SDK
+    makes a single attempt and every throttle is visible to the breaker.
+    """
+    return Config(
+        max_pool_connections=max_pool_connections
+        or int(os.getenv("ANALYSIS_CONCURRENCY", "4")),
+        connect_timeout=float(os.getenv("BEDROCK_CONNECT_TIMEOUT", "5")),
+        read_timeout=float(os.getenv("BEDROCK_READ_TIMEOUT", "60")),
+        retries={"mode": "adaptive", "total_max_attempts": 1},
+    )
+
+
+def error_code(error: Exception) -> Optional[str]:
+    """AWS error code of a ClientError, None for anything else"""
+    if isinstance(error, ClientError):
+        return error.response.get("Error", {}).get("Code")
+    return None
+
+
+def is_retryable(error: Exception) -> bool:
+    return error_code(error) in RETRYABLE_ERROR_CODES or isinstance(
+        error, TRANSPORT_ERRORS
+    )
+
+
+def is_degraded(error: Exception) -> bool:
+    return error_code(error) in DEGRADED_ERROR_CODES or isinstance(
+        error, TRANSPORT_ERRORS
+    )
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter delay before retry number attempt (0-based)"""
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker
+    closed: calls go through. After failure_threshold degraded failures in a
+    row it opens and rejects calls for reset_timeout seconds, then lets one
+    trial call through (half_open): success closes it, failure reopens it.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: Optional[int] = None,
+        reset_timeout: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold or int(
+            os.getenv("BEDROCK_BREAKER_THRESHOLD", "5")
+        )
+        self.reset_timeout = reset_timeout or float(
+            os.getenv("BEDROCK_BREAKER_RESET_SECONDS", "30")
+        )
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self.rejected = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if (
+            self._state == "open"
+            and self._clock() - self._opened_at >= self.reset_timeout
+        ):
+            self._state = "half_open"
+            self._trial_in_flight = False
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go out now (takes the half-open trial slot)"""
+        with self._lock:
+            state = self._current_state()
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = "closed"
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            state = self._current_state()
+            if state == "half_open" or (
+                state == "closed" and self._failures >= self.failure_threshold
+            ):
+                self._state = "open"
+                self._opened_at = self._clock()
+                self._trial_in_flight = False
+                self.times_opened += 1
+
+    def retry_after(self) -> float:
+        """Seconds until the next trial call is allowed (0 unless open)"""
+        with self._lock:
+            if self._current_state() != "open":
+                return 0.0
+            return max(self.reset_timeout - (self._clock() - self._opened_at), 0.0)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "state": self._current_state(),
+                "consecutive_failures": self._failures,
+                "times_opened": self.times_opened,
+                "rejected": self.rejected,
+            }
+
+
+class ResilientCaller:
+    """
+    Runs Bedrock calls through the breaker with jittered exponential backoff
+    Retryable errors (throttles, model not ready, dropped connections) are
+    retried up to max_attempts; degraded errors count against the breaker.
+    Any other error (access denied, validation) is raised straight away.
+    """
+
+    def __init__(
+        self,
+        breaker: Optional[CircuitBreaker] = None,
+        max_attempts: Optional[int] = None,
+        base_delay: Optional[float] = None,
+        max_delay: Optional[float] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.breaker = breaker or CircuitBreaker()
+        self.max_attempts = max_attempts or int(os.getenv("BEDROCK_MAX_ATTEMPTS", "4"))
+        self.base_delay = (
+            base_delay
+            if base_delay is not None
+            else float(os.getenv("BEDROCK_BACKOFF_BASE", "0.5"))
+        )
+        self.max_delay = (
+            max_delay
+            if max_delay is not None
+            else float(os.getenv("BEDROCK_BACKOFF_MAX", "8"))
+        )
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.throttled = 0
+
+    def call(self, func: Callable[[], T]) -> T:
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                raise CircuitOpenError(
+                    f"Bedrock circuit open, retry in {self.breaker.retry_after():.0f}s"
+                )
+            with self._lock:
+                self.calls += 1
+            try:
+                result = func()
+            except Exception as e:
+                if error_code(e) == "ThrottlingException":
+                    with self._lock:
+                        self.throttled += 1
+                # Any answer other than a degraded one means Bedrock is up
+                if is_degraded(e):
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+                attempt += 1
+                if not is_retryable(e) or attempt >= self.max_attempts:
+                    raise
+                with self._lock:
+                    self.retries += 1
+                self._sleep(backoff_delay(attempt - 1, self.base_delay, self.max_delay))
+                continue
+            self.breaker.record_success()
+            return result
+
+    def stats(self) -> Dict:
+        with self._lock:
+            counters = {
+                "calls": self.calls,
+                "retries": self.retries,
+                "throttled": self.throttled,
+            }
+        return {"breaker": self.breaker.stats(), **counters}
@@ -0,0 +1,292 @@
+"""
+Bulk alert ingestion helpers
+Incremental NDJSON / JSON-array parsing and chunked Pydantic validation
+"""
+
+import codecs
+import json
+import re
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple, Union
+
+from pydantic import TypeAdapter, ValidationError
+
+from backend.models import Alert
+
+ALERT_LIST = TypeAdapter(List[Alert])
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+_STRUCTURAL = re.compile(r'["{}\[\],]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+# Longest NDJSON line kept in memory; longer lines are reported and dropped
+MAX_LINE_CHARS = 1 << 20
+
+
+class RecordError(Exception):
+    """A single record could not be parsed"""
+
+
+async def iter_json_records(
+    chunks: AsyncIterator[bytes],
+    max_line: int = MAX_LINE_CHARS,
+) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    Yield (line_number, record) from a streamed body without buffering it all
+    The body is NDJSON (one object per line) or a JSON array, detected from the
+    first non-whitespace character. For arrays, line_number is the 1-based
+    element index. Unparseable records are yielded as RecordError instances;
+    a malformed array element is skipped up to its end and parsing goes on.
+    NDJSON lines longer than max_line characters are RecordErrors too.
+    """
+    utf8 = codecs.getincrementaldecoder("utf-8")("replace")
+    buffer = ""
+    mode = None  # "ndjson" | "array"
+    lines = LineSplitter(max_line)
+    number = 0
+    # Array element the fast decoder could not parse: where it starts, and
+    # the ElementScanner finding its end (kept across chunks)
+    start = 0
+    scanner = None
+
+    async for chunk in chunks:
+        text = utf8.decode(chunk)
+        if mode is None:
+            buffer += text
+            stripped = buffer.lstrip()
+            if not stripped:
+                continue
+            mode = "array" if stripped[0] == "[" else "ndjson"
+            if mode == "array":
+                buffer = stripped[1:]
+            else:
+                text, buffer = buffer, ""
+        elif mode == "array":
+            buffer += text
+
+        if mode == "ndjson":
+            # Only the new text is searched; a long line is never re-split
+            complete = lines.feed(text)
+            for item in _line_records(complete, number):
+                yield item
+            number += len(complete)
+            continue
+
+        pos = start
+        while True:
+            if scanner is None:
+                pos = _skip_separators(buffer, pos)
+                if pos >= len(buffer) or buffer[pos] == "]":
+                    break
+                try:
+                    record, end = _decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    # Split across chunks or malformed: find where it ends
+                    scanner = ElementScanner(pos)
+                else:
+                    if end < len(buffer) or isinstance(record, (dict, list)):
+                        number += 1
+                        yield number, record
+                        pos = end
+                        continue
+                    scanner = ElementScanner(pos)  # a scalar may go on
+            end = scanner.scan(buffer)
+            if end is None:
+                break  # element continues in the next chunk
+            number += 1
+            yield number, _loads(buffer[scanner.start : end])
+            scanner = None
+            pos = end
+        # Keep only the unfinished element (or the unread tail)
+        cut = scanner.start if scanner is not None else pos
+        buffer = buffer[cut:]
+        if scanner is not None:
+            scanner.shift(cut)
+        start = 0
+
+    tail = utf8.decode(b"", final=True)
+    if mode == "ndjson":
+        complete = lines.feed(tail) + lines.finish()
+        for item in _line_records(complete, number):
+            yield item
+    elif mode == "array":
+        buffer += tail
+        pos = scanner.start if scanner is not None else _skip_separators(buffer, 0)
+        if pos < len(buffer) and buffer[pos] != "]":
+            yield number + 1, RecordError("Truncated JSON array element")
+
+
+class LineSplitter:
+    """
+    Splits streamed text into NDJSON lines, searching each chunk for newlines
+    once. A line longer than max_length stops being buffered as soon as it
+    passes the limit and comes back as a RecordError.
+    """
+
+    def __init__(self, max_length: int):
+        self.max_length = max_length
+        self.parts: List[str] = []
+        self.length = 0
+        self.overlong = False
+
+    def feed(self, text: str) -> List[Union[str, RecordError]]:
+        """Lines completed by text; the unfinished last line is kept"""
+        complete = []
+        start = 0
+        while True:
+            end = text.find("\n", start)
+            if end < 0:
+                break
+            self._add(text[start:end])
+            complete.append(self._take())
+            start = end + 1
+        self._add(text[start:])
+        return complete
+
+    def finish(self) -> List[Union[str, RecordError]]:
+        """The last line, when the body does not end with a newline"""
+        return [self._take()] if self.parts or self.overlong else []
+
+    def _add(self, piece: str) -> None:
+        if self.overlong or not piece:
+            return
+        self.length += len(piece)
+        if self.length > self.max_length:
+            self.overlong = True
+            self.parts = []
+        else:
+            self.parts.append(piece)
+
+    def _take(self) -> Union[str, RecordError]:
+        if self.overlong:
+            line = RecordError(f"Line longer than {self.max_length} characters")
+        else:
+            line = "".join(self.parts)
+        self.parts = []
+        self.length = 0
+        self.overlong = False
+        return line
+
+
+def _line_records(
+    lines: List[Union[str, RecordError]], number: int
+) -> Iterator[Tuple[int, Any]]:
+    """Number lines after number, skipping blank ones"""
+    for line in lines:
+        number += 1
+        if isinstance(line, RecordError):
+            yield number, line
+        elif line.strip():
+            yield number, _loads(line)
+
+
+class ElementScanner:
+    """
+    Finds where a JSON array element ends without parsing it, tracking
+    bracket depth and string state; resumable, so an element spread over
+    many chunks is scanned once in total
+    """
+
+    def __init__(self, start: int):
+        self.start = start
+        self.pos = start
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+
+    def shift(self, offset: int) -> None:
+        """The buffer lost its first offset characters"""
+        self.start -= offset
+        self.pos -= offset
+
+    def scan(self, buffer: str) -> Optional[int]:
+        """End offset of the element in buffer, or None if it goes on"""
+        i = self.pos
+        n = len(buffer)
+        while i < n:
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                    i += 1
+                    continue
+                match = _STRING_SPECIAL.search(buffer, i)
+                if match is None:
+                    i = n
+                    break
+                i = match.start()
+                if buffer[i] == "\\":
+                    self.escape = True
+                else:
+                    self.in_string = False
+                    if self.depth == 0:
+                        return i + 1  # a string element ends with its quote
+                i += 1
+                continue
+            match = _STRUCTURAL.search(buffer, i)
+            if match is None:
+                i = n
+                break
+            i = match.start()
+            c = buffer[i]
+            if c == '"':
+                self.in_string = True
+            elif c in "{[":
+                self.depth += 1
+            elif c in "}]":
+                if self.depth == 0:
+                    # The array's "]" ends the element; a stray "}" is part of it
+                    return i if c == "]" else i + 1
+                self.depth -= 1
+                if self.depth == 0:
+                    return i + 1
+            elif self.depth == 0:
+                return i  # "," after a scalar element
+            i += 1
+        self.pos = i
+        return None
+
+
+def _loads(line: str) -> Any:
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError as e:
+        return RecordError(f"Invalid JSON: {e}")
+
+
+def _skip_separators(buffer: str, pos: int) -> int:
+    while pos < len(buffer) and (buffer[pos] in _WHITESPACE or buffer[pos] == ","):
+        pos += 1
+    return pos
+
+
+def validate_chunk(
+    chunk: List[Tuple[int, Any]],
+) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Validate one chunk of parsed records with a single TypeAdapter call
+    Returns (alert dicts ready for storage, per-line errors)
+    """
+    errors = []
+    numbered = []
+    for number, record in chunk:
+        if isinstance(record, RecordError):
+            errors.append({"line": number, "error": str(record)})
+        else:
+            numbered.append((number, record))
+
+    records = [record for _, record in numbered]
+    try:
+        alerts = ALERT_LIST.validate_python(records)
+    except ValidationError as e:
+        bad: Dict[int, List[str]] = {}
+        for err in e.errors():
+            index = err["loc"][0]
+            field = ".".join(str(part) for part in err["loc"][1:]) or "record"
+            bad.setdefault(index, []).append(f"{field}: {err['msg']}")
+        for index, messages in bad.items():
+            errors.append({"line": numbered[index][0], "error": "; ".join(messages)})
+        # Everything else in the chunk is valid; validate the survivors in one go
+        records = [r for i, r in enumerate(records) if i not in bad]
+        alerts = ALERT_LIST.validate_python(records)
+
+    errors.sort(key=lambda err: err["line"])
+    return ALERT_LIST.dump_python(alerts), errors
@@ -0,0 +1,149 @@
+"""
+In-memory cache for analysis context data (SOP knowledge base, device history)
+Files are parsed once and reloaded only when their mtime or size changes
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+
+
+class CachedJSONFile:
+    """
+    One JSON file held in memory
+    The file is stat()ed at most once per check_interval seconds; it is only
+    re-read when (mtime, size) differs from what was loaded. With
+    keep_last_good, a missing, unparseable or rejected (transform raised)
+    file leaves the previously loaded value in place instead of the default.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        default: Any,
+        transform: Optional[Callable[[Any], Any]] = None,
+        check_interval: float = 1.0,
+        keep_last_good: bool = False,
+    ):
+        self.path = path
+        self.default = default
+        self.transform = transform
+        self.check_interval = check_interval
+        self.keep_last_good = keep_last_good
+        self.hits = 0
+        self.misses = 0
+        self.version = 0  # bumped on every (re)load
+        self._value = default
+        self._signature: Optional[Tuple[int, int]] = None
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def get(self) -> Any:
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            self.hits += 1
+            return self._value
+
+        with self._lock:
+            self._checked_at = now
+            signature = self._stat()
+            if signature == self._signature and self.version:
+                self.hits += 1
+                return self._value
+
+            self.misses += 1
+            self._value = self._load(signature)
+            self._signature = signature
+            self.version += 1
+            return self._value
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def _load(self, signature: Optional[Tuple[int, int]]) -> Any:
+        name = os.path.basename(self.path)
+        if signature is None:
+            print(f"Warning: {name} not found")
+            return self._fallback()
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except json.JSONDecodeError as e:
+            print(f"Warning: Failed to parse {name}: {e}")
+            return self._fallback()
+        if self.transform:
+            try:
+                data = self.transform(data)
+            except Exception as e:
+                if not self.keep_last_good:
+                    raise
+                print(f"Warning: Rejected {name}: {e}")
+                return self._fallback()
+        print(f"[OK] Loaded {name} into context cache")
+        return data
+
+    def _fallback(self) -> Any:
+        if self.keep_last_good and self.version:
+            return self._value
+        return self.default
+
+    def stats(self) -> Dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "version": self.version,
+            "loaded": self._signature is not None,
+        }
+
+
+def _index_history(history: Dict) -> Dict[str, List[Dict]]:
+    """Per-system index, incidents sorted oldest to newest"""
+    return {
+        system: sorted(incidents, key=lambda h: h.get("date", ""))
+        for system, incidents in history.items()
+    }
+
+
+class ContextDataCache:
+    """
+    Context data used to build analysis prompts
+    In steady state sop_kb() and device_history() are pure memory lookups
+    """
+
+    def __init__(self, data_dir: Optional[str] = None, check_interval: float = None):
+        self.data_dir = data_dir or os.getenv("DATA_DIR", DEFAULT_DATA_DIR)
+        if check_interval is None:
+            check_interval = float(os.getenv("CONTEXT_CACHE_CHECK_INTERVAL", "1.0"))
+
+        self._sop_kb = CachedJSONFile(
+            os.path.join(self.data_dir, "sop_kb.json"),
+            default={},
+            check_interval=check_interval,
+        )
+        self._history = CachedJSONFile(
+            os.path.join(self.data_dir, "device_history.json"),
+            default={},
+            transform=_index_history,
+            check_interval=check_interval,
+        )
+
+    def sop_kb(self) -> Dict:
+        return self._sop_kb.get()
+
+    @property
+    def sop_kb_version(self) -> int:
+        return self._sop_kb.version
+
+    def device_history(self, system: str) -> List[Dict]:
+        return self._history.get().get(system, [])
+
+    def stats(self) -> Dict:
+        return {"sop_kb": self._sop_kb.stats(), "device_history": self._history.stats()}
@@ -0,0 +1,372 @@
+"""
+Asynchronous remediation jobs
+Execute requests are queued and run by a bounded pool of asyncio workers with
+a per-host concurrency limit and cancellation. Job state lives in shared
+storage, so any gunicorn worker can answer status polls and cancel requests.
+"""
+
+import asyncio
+import os
+import time
+import uuid
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from backend.output_buffer import OutputBuffer, lines_since
+from backend.storage import StorageBackend
+
+TERMINAL_STATUSES = ("success", "failed", "cancelled")
+
+# Idle seconds before stream() yields a keep-alive ping
+STREAM_PING_INTERVAL = 15.0
+
+# executor(script, language, validation=..., output=OutputBuffer)
+#     -> {status, output, exit_code, ...}
+Executor = Callable[..., Awaitable[Dict]]
+
+
+class FakeExecutor:
+    """
+    Stand-in executor for local runs and benchmarks
+    Prints `lines` output lines spread over `duration` seconds and reports
+    `status`; no script is run
+    """
+
+    def __init__(self, duration: float = 2.0, status: str = "success", lines: int = 5):
+        self.duration = duration
+        self.status = status
+        self.lines = lines
+
+    async def __call__(
+        self,
+        script: str,
+        language: str,
+        validation: Optional[Dict] = None,
+        output: Optional[OutputBuffer] = None,
+    ) -> Dict:
+        start = time.time()
+        if output is None:
+            output = OutputBuffer()
+        output.write_line(f"Fake {language} run: {len(script.splitlines())} line(s)")
+        for step in range(1, self.lines + 1):
+            await asyncio.sleep(self.duration / self.lines)
+            output.write_line(f"Step {step}/{self.lines} done")
+        return {
+            "status": self.status,
+            "output": output.text(),
+            "exit_code": 0 if self.status == "success" else 1,
+            "execution_time": round(time.time() - start, 2),
+        }
+
+
+def create_executor(script_executor) -> Executor:
+    """
+    Executor the job queue runs scripts with (EXECUTION_EXECUTOR)
+    script (default) goes through ScriptExecutor; fake only sleeps
+    """
+    kind = os.getenv("EXECUTION_EXECUTOR", "script").lower()
+
+    if kind == "fake":
+        return FakeExecutor(float(os.getenv("EXECUTION_FAKE_SECONDS", "2")))
+
+    if kind == "script":
+        return script_executor.execute_script_async
+
+    raise ValueError(f"Unknown EXECUTION_EXECUTOR: {kind} (expected script or fake)")
+
+
+class ExecutionQueue:
+    """
+    Bounded pool of asyncio workers pulling job ids off a queue
+    A job whose host is already at its limit is parked, not held by a
+    worker, and retried when a job on that host finishes here or after
+    poll_interval (the host may be busy in another process). Running jobs
+    check storage every poll_interval for a cancel request from elsewhere,
+    and save the tail of their output there for streams served elsewhere.
+    """
+
+    def __init__(
+        self,
+        store: StorageBackend,
+        executor: Executor,
+        workers: Optional[int] = None,
+        per_host: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+        stale_after: Optional[float] = None,
+        on_complete: Optional[Callable[[Dict], None]] = None,
+    ):
+        self.store = store
+        self.executor = executor
+        self.workers = workers or int(os.getenv("EXECUTION_WORKERS", "4"))
+        self.per_host = per_host or int(os.getenv("EXECUTION_PER_HOST_LIMIT", "1"))
+        self.poll_interval = poll_interval or float(
+            os.getenv("EXECUTION_POLL_INTERVAL", "0.5")
+        )
+        # A claim older than this belongs to a worker that died mid-run
+        self.stale_after = stale_after or float(
+            os.getenv("EXECUTION_STALE_SECONDS", "900")
+        )
+        # Called with each finished (not cancelled) job before it is saved;
+        # it may replace job["result"] with the record clients should see
+        self.on_complete = on_complete
+
+        # Created on first submit, inside the running loop
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        # Jobs owned by this process:
+        # job_id -> (script, language, validation, executor)
+        self._pending: Dict[str, tuple] = {}
+        self._parked: Dict[str, List[str]] = {}
+        self._retry_scheduled: Dict[str, asyncio.TimerHandle] = {}
+        self._running: Dict[str, asyncio.Task] = {}
+        self._outputs: Dict[str, OutputBuffer] = {}
+        self._done: Dict[str, asyncio.Event] = {}
+        self._completed = 0
+
+    def _start(self) -> None:
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            self._workers = [
+                asyncio.ensure_future(self._worker()) for _ in range(self.workers)
+            ]
+
+    async def submit(
+        self,
+        alert_id: str,
+        host: str,
+        script: str,
+        language: str,
+        validation: Optional[Dict] = None,
+        executor: Optional[Executor] = None,
+        rollout_id: Optional[str] = None,
+    ) -> Dict:
+        """
+        Record a queued job and hand it to the workers
+        executor replaces the queue's own for this job (e.g. a remote host's);
+        rollout_id tags the hosts of one fan-out
+        """
+        self._start()
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "alert_id": alert_id,
+            "host": host,
+            "rollout_id": rollout_id,
+            "script_language": language,
+            "status": "queued",
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+        }
+        self.store.save_job(job)
+        self._pending[job["job_id"]] = (
+            script,
+            language,
+            validation,
+            executor or self.executor,
+        )
+        self._done[job["job_id"]] = asyncio.Event()
+        self._queue.put_nowait(job["job_id"])
+        return job
+
+    def cancel(self, job_id: str) -> Optional[str]:
+        """
+        Cancel a job wherever it is
+        Queued jobs are dropped; a running job here is killed right away, one
+        running in another process at that worker's next poll
+        """
+        status = self.store.cancel_job(job_id)
+        task = self._running.get(job_id)
+        if task is not None:
+            task.cancel()
+            status = "cancelling"
+        elif status == "running":
+            status = "cancelling"
+        elif status == "cancelled" and job_id in self._pending:
+            self._finish_cancelled(job_id)
+        return status
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Dict]:
+        """Job record once it reaches a terminal status, or after timeout"""
+        job = self.store.get_job(job_id)
+        if job is None or job["status"] in TERMINAL_STATUSES or timeout <= 0:
+            return job
+
+        done = self._done.get(job_id)
+        if done is not None:
+            try:
+                await asyncio.wait_for(done.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            return self.store.get_job(job_id)
+
+        # Owned by another process: poll shared storage
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(min(self.poll_interval, deadline - time.monotonic()))
+            job = self.store.get_job(job_id)
+            if job["status"] in TERMINAL_STATUSES:
+                break
+        return job
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            if job_id not in self._pending:
+                continue  # cancelled while parked
+            job = self.store.get_job(job_id)
+            if job["status"] != "queued":
+                # Cancelled from another process before it started
+                self._finish_cancelled(job_id)
+                continue
+
+            now = time.time()
+            if not self.store.claim_job(
+                job_id, job["host"], self.per_host, now, now - self.stale_after
+            ):
+                self._park(job_id, job["host"])
+                continue
+
+            job.update(status="running", started_at=now)
+            await self._run(job)
+
+    def _park(self, job_id: str, host: str) -> None:
+        self._parked.setdefault(host, []).append(job_id)
+        if host not in self._retry_scheduled:
+            loop = asyncio.get_running_loop()
+            self._retry_scheduled[host] = loop.call_later(
+                self.poll_interval, self._unpark, host
+            )
+
+    def _unpark(self, host: str) -> None:
+        handle = self._retry_scheduled.pop(host, None)
+        if handle is not None:
+            handle.cancel()
+        for job_id in self._parked.pop(host, []):
+            self._queue.put_nowait(job_id)
+
+    async def _run(self, job: Dict) -> None:
+        job_id = job["job_id"]
+        script, language, validation, executor = self._pending[job_id]
+        output = OutputBuffer()
+        self._outputs[job_id] = output
+        task = asyncio.ensure_future(
+            executor(script, language, validation=validation, output=output)
+        )
+        self._running[job_id] = task
+        saved_seq = 0
+        try:
+            while not task.done():
+                await asyncio.wait({task}, timeout=self.poll_interval)
+                if output.next_seq != saved_seq:
+                    saved_seq = output.next_seq
+                    job["output"] = output.snapshot()
+                    self.store.save_job(job)
+                if not task.done() and self.store.get_job(job_id)["cancel_requested"]:
+                    task.cancel()
+        finally:
+            self._running.pop(job_id, None)
+
+        if task.cancelled():
+            output.write_line("Execution cancelled by technician")
+            result = {"status": "cancelled", "output": output.text(), "exit_code": None}
+        elif task.exception() is not None:
+            output.write_line(f"Execution error: {str(task.exception())}")
+            result = {"status": "failed", "output": output.text(), "exit_code": 1}
+        else:
+            result = task.result()
+
+        # No awaits from here on: streams see the closed buffer and the saved
+        # final state together
+        output.close()
+        job.update(
+            status="failed" if result["status"] == "rejected" else result["status"],
+            finished_at=time.time(),
+            result=result,
+            output=output.snapshot(),
+        )
+        if self.on_complete is not None and job["status"] != "cancelled":
+            try:
+                self.on_complete(job)
+            except Exception as e:
+                print(f"Warning: execution job {job_id} completion hook failed: {e}")
+        self.store.save_job(job)
+        self._completed += 1
+        self._outputs.pop(job_id, None)
+        self._release(job_id)
+        self._unpark(job["host"])
+
+    async def stream(self, job_id: str, since: int = 0) -> AsyncIterator[tuple]:
+        """
+        Follow a job: yields ("status", {job_id, status}) when it changes,
+        ("output", (seq, line)) for each output line from seq `since` on,
+        ("ping", None) while idle, and finally ("done", job)
+        Lines come straight from the buffer when the job runs here, otherwise
+        from the tail the owning worker saves every poll_interval. Lines that
+        fell out of the ring buffer before they were sent are skipped.
+        """
+        status = None
+        next_seq = since
+        idle_since = time.monotonic()
+        while True:
+            output = self._outputs.get(job_id)
+            if output is not None and not output.closed:
+                lines = output.since(next_seq)
+                if status != "running":
+                    status = "running"
+                    yield "status", {"job_id": job_id, "status": status}
+            else:
+                job = self.store.get_job(job_id)
+                if job is None:
+                    return
+                lines = lines_since(job.get("output"), next_seq)
+                if job["status"] != status and job["status"] not in TERMINAL_STATUSES:
+                    status = job["status"]
+                    yield "status", {"job_id": job_id, "status": status}
+
+            for seq, line in lines:
+                yield "output", (seq, line)
+                next_seq = seq + 1
+            if output is None or output.closed:
+                if job["status"] in TERMINAL_STATUSES:
+                    yield "done", job
+                    return
+
+            if lines:
+                idle_since = time.monotonic()
+            elif time.monotonic() - idle_since >= STREAM_PING_INTERVAL:
+                idle_since = time.monotonic()
+                yield "ping", None
+
+            if output is not None and not output.closed:
+                await output.wait(next_seq, STREAM_PING_INTERVAL)
+            else:
+                await asyncio.sleep(self.poll_interval)
+
+    def _finish_cancelled(self, job_id: str) -> None:
+        for parked in self._parked.values():
+            if job_id in parked:
+                parked.remove(job_id)
+        self._release(job_id)
+
+    def _release(self, job_id: str) -> None:
+        self._pending.pop(job_id, None)
+        done = self._done.pop(job_id, None)
+        if done is not None:
+            done.set()
+
+    def stats(self) -> Dict:
+        return {
+            "workers": self.workers,
+            "per_host_limit": self.per_host,
+            "running": len(self._running),
+            "queued": len(self._pending) - len(self._running),
+            "parked_hosts": len(self._parked),
+            "completed": self._completed,
+        }
+
+    async def shutdown(self) -> None:
+        for task in list(self._running.values()) + self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
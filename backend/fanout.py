@@ -0,0 +1,281 @@
+"""
+Fleet-wide remediation fan-out
+Runs one approved script against many target systems in canary waves (one
+host, then a slice of the fleet, then the rest) with bounded parallelism,
+stopping once failures exceed a threshold. Every host runs as an
+ExecutionQueue job, so per-host claims apply and each run leaves a job
+record; remote hosts are reached through an RMM script-execution API.
+"""
+
+import asyncio
+import json
+import math
+import os
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from backend.execution_jobs import TERMINAL_STATUSES, ExecutionQueue
+from backend.output_buffer import OutputBuffer
+
+# Output kept per host in fan-out records (the tail, where errors usually are)
+HOST_OUTPUT_CHARS = 2000
+
+
+def rollout_batches(
+    count: int, canary: int = 1, wave_fraction: float = 0.1
+) -> List[int]:
+    """
+    Batch sizes for count targets: canary hosts, then wave_fraction of the
+    fleet, then the rest (200 hosts -> [1, 20, 179])
+    """
+    sizes = []
+    remaining = count
+    for size in (canary, math.ceil(count * wave_fraction)):
+        size = min(size, remaining)
+        if size > 0:
+            sizes.append(size)
+            remaining -= size
+    if remaining:
+        sizes.append(remaining)
+    return sizes
+
+
+class RmmClient:
+    """
+    Client for an RMM script-execution API
+    POST {base_url}/hosts/{host}/scripts with {script, language, timeout}
+    returns {status, output, exit_code}. Calls are blocking urllib requests
+    on a dedicated thread pool sized to the fan-out parallelism.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        token: Optional[str] = None,
+        timeout: Optional[float] = None,
+        max_workers: Optional[int] = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.token = token
+        # Script timeout on the host, plus slack for the round trip
+        self.script_timeout = int(os.getenv("EXECUTION_TIMEOUT", "300"))
+        self.timeout = timeout or self.script_timeout + 30
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or int(os.getenv("FANOUT_PARALLELISM", "20")),
+            thread_name_prefix="rmm",
+        )
+
+    @classmethod
+    def from_env(cls) -> Optional["RmmClient"]:
+        """Client for RMM_URL, None if it is not set"""
+        base_url = os.getenv("RMM_URL")
+        if not base_url:
+            return None
+        return cls(base_url, token=os.getenv("RMM_API_TOKEN"))
+
+    async def run(self, host: str, script: str, language: str) -> Dict:
+        loop = asyncio.get_running_loop()
+        payload = {
+            "script": script,
+            "language": language,
+            "timeout": self.script_timeout,
+        }
+        return await loop.run_in_executor(self._executor, self._post, host, payload)
+
+    def executor(self, host: str) -> Callable[..., Awaitable[Dict]]:
+        """ExecutionQueue executor that runs a job's script on host"""
+
+        async def run_on_host(
+            script: str,
+            language: str,
+            validation: Optional[Dict] = None,
+            output: Optional[OutputBuffer] = None,
+        ) -> Dict:
+            result = await self.run(host, script, language)
+            if output is not None:
+                output.write(result.get("output") or "")
+                result["output"] = output.text()
+            return result
+
+        return run_on_host
+
+    def _post(self, host: str, payload: Dict) -> Dict:
+        request = urllib.request.Request(
+            f"{self.base_url}/hosts/{urllib.parse.quote(host, safe='')}/scripts",
+            data=json.dumps(payload).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        if self.token:
+            request.add_header("Authorization", f"Bearer {self.token}")
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            detail = e.read().decode(errors="replace")[:200]
+            return {
+                "status": "failed",
+                "output": f"RMM error {e.code}: {detail}",
+                "exit_code": None,
+            }
+        except (urllib.error.URLError, TimeoutError) as e:
+            return {
+                "status": "failed",
+                "output": f"RMM unreachable: {e}",
+                "exit_code": None,
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def queued_runner(
+    queue: ExecutionQueue,
+    alert_id: str,
+    script: str,
+    language: str,
+    validation: Optional[Dict] = None,
+    rmm: Optional[RmmClient] = None,
+    rollout_id: Optional[str] = None,
+    timeout: Optional[float] = None,
+) -> Callable[[str], Awaitable[Dict]]:
+    """
+    run_host for fan_out that submits each host as an ExecutionQueue job
+    (through rmm when given, else the queue's own executor) and waits for it.
+    A job still unfinished after timeout seconds, or whose rollout was
+    abandoned, is cancelled.
+    """
+    if timeout is None:
+        timeout = float(os.getenv("FANOUT_HOST_WAIT_SECONDS", "600"))
+
+    async def run_host(host: str) -> Dict:
+        job = await queue.submit(
+            alert_id,
+            host,
+            script,
+            language,
+            validation=validation,
+            executor=rmm.executor(host) if rmm is not None else None,
+            rollout_id=rollout_id,
+        )
+        job_id = job["job_id"]
+        try:
+            job = await queue.wait(job_id, timeout)
+        except asyncio.CancelledError:
+            queue.cancel(job_id)
+            raise
+        if job["status"] not in TERMINAL_STATUSES:
+            queue.cancel(job_id)
+            return {
+                "status": "failed",
+                "job_id": job_id,
+                "output": f"Job still {job['status']} after {timeout:.0f}s",
+                "exit_code": None,
+            }
+        return dict(job["result"] or {"status": job["status"]}, job_id=job_id)
+
+    return run_host
+
+
+async def fan_out(
+    targets: List[str],
+    run_host: Callable[[str], Awaitable[Dict]],
+    parallelism: int,
+    canary: int = 1,
+    wave_fraction: float = 0.1,
+    max_failure_rate: float = 0.05,
+) -> AsyncIterator[Dict]:
+    """
+    Run run_host(host) for every target in canary waves and yield a record
+    per batch and per host as results arrive, then one summary record.
+    A failed canary stops the rollout, as does exceeding the failure budget
+    (max_failure_rate of all targets). Hosts already running finish; hosts
+    not yet started are reported as skipped.
+    """
+    sizes = rollout_batches(len(targets), canary, wave_fraction)
+    budget = math.floor(len(targets) * max_failure_rate)
+    semaphore = asyncio.Semaphore(parallelism)
+    counts = {"success": 0, "failed": 0, "skipped": 0}
+    stop_reason = None
+    start = time.perf_counter()
+
+    async def run_one(host: str, batch: int) -> Dict:
+        nonlocal stop_reason
+        async with semaphore:
+            if stop_reason is not None:
+                counts["skipped"] += 1
+                return {
+                    "type": "host",
+                    "host": host,
+                    "batch": batch,
+                    "status": "skipped",
+                }
+            host_start = time.perf_counter()
+            try:
+                result = await run_host(host)
+            except Exception as e:
+                result = {"status": "failed", "output": f"Execution error: {e}"}
+            status = "success" if result["status"] == "success" else "failed"
+
+            # Checked before the slot is released, so no further host starts
+            # once the rollout should stop
+            counts[status] += 1
+            if stop_reason is None and status == "failed":
+                if batch == 0 and canary:
+                    stop_reason = f"canary failed on {host}"
+                elif counts["failed"] > budget:
+                    stop_reason = (
+                        f"{counts['failed']} failures exceed the budget of "
+                        f"{budget} ({max_failure_rate:.0%} of {len(targets)} hosts)"
+                    )
+            return {
+                "type": "host",
+                "host": host,
+                "batch": batch,
+                "status": status,
+                "job_id": result.get("job_id"),
+                "exit_code": result.get("exit_code"),
+                "output": (result.get("output") or "")[-HOST_OUTPUT_CHARS:],
+                "duration": round(time.perf_counter() - host_start, 3),
+            }
+
+    offset = 0
+    for batch, size in enumerate(sizes):
+        hosts = targets[offset : offset + size]
+        offset += size
+        if stop_reason is not None:
+            for host in hosts:
+                counts["skipped"] += 1
+                yield {
+                    "type": "host",
+                    "host": host,
+                    "batch": batch,
+                    "status": "skipped",
+                }
+            continue
+
+        yield {"type": "batch", "batch": batch, "hosts": len(hosts)}
+        tasks = [asyncio.ensure_future(run_one(host, batch)) for host in hosts]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Client went away mid-rollout: don't start more hosts for nobody
+            for task in tasks:
+                task.cancel()
+
+    yield {
+        "type": "summary",
+        "total": len(targets),
+        "succeeded": counts["success"],
+        "failed": counts["failed"],
+        "skipped": counts["skipped"],
+        "batches": sizes,
+        "stopped": stop_reason is not None,
+        "stop_reason": stop_reason,
+        "wall_time": round(time.perf_counter() - start, 3),
+    }
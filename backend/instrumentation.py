@@ -0,0 +1,176 @@
+"""
+Hot-path instrumentation
+Per-stage timing spans feeding HDR-style histograms, exposed in the Prometheus
+text format on GET /metrics
+"""
+
+import threading
+import time
+from typing import Dict, List, Sequence, Tuple
+
+# Values keep their top 7 significant bits: every power of two is split into
+# 128 linear sub-buckets, so relative error stays under 1% at any magnitude
+SUB_BUCKET_BITS = 7
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class HdrHistogram:
+    """
+    Log-linear histogram of non-negative integers (HDR-style)
+    Recording is one dict increment; memory is bounded by the value range,
+    not the number of samples.
+    """
+
+    __slots__ = ("_counts", "count", "total", "max", "_lock")
+
+    def __init__(self):
+        self._counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        self._lock = threading.Lock()
+
+    def record(self, value: int) -> None:
+        shift = value.bit_length() - SUB_BUCKET_BITS
+        key = (value >> shift) << shift if shift > 0 else value
+        with self._lock:
+            self._counts[key] = self._counts.get(key, 0) + 1
+            self.count += 1
+            self.total += value
+            if value > self.max:
+                self.max = value
+
+    def quantiles(self, qs: Sequence[float] = QUANTILES) -> List[int]:
+        """Highest value equivalent to the bucket holding each quantile"""
+        with self._lock:
+            buckets = sorted(self._counts.items())
+            count = self.count
+            largest = self.max
+        results = []
+        seen = 0
+        pending = iter(sorted(qs))
+        q = next(pending, None)
+        for key, bucket_count in buckets:
+            seen += bucket_count
+            while q is not None and seen >= q * count:
+                shift = max(key.bit_length() - SUB_BUCKET_BITS, 0)
+                results.append(min(key + (1 << shift) - 1, largest))
+                q = next(pending, None)
+        results.extend(largest for _ in range(len(qs) - len(results)))
+        return results
+
+
+class Span:
+    """Times a block into a histogram; exceptions also bump an error counter"""
+
+    __slots__ = ("_registry", "_stage", "_histogram", "_start")
+
+    def __init__(self, registry: "MetricsRegistry", stage: str, histogram):
+        self._registry = registry
+        self._stage = stage
+        self._histogram = histogram
+
+    def __enter__(self) -> "Span":
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._histogram.record(time.perf_counter_ns() - self._start)
+        if exc_type is not None:
+            self._registry.inc("stage_errors_total", stage=self._stage)
+
+
+class MetricsRegistry:
+    """
+    Per-process registry of nanosecond histograms and counters
+    Each gunicorn worker keeps its own numbers; Prometheus scrapes whichever
+    worker answers, so run one scrape target per worker (or one worker) when
+    exact totals matter.
+    """
+
+    HELP = {
+        "stage_duration_seconds": "Time spent in each pipeline stage",
+        "stage_errors_total": "Stage spans that exited with an exception",
+        "mttr_seconds": "Time from alert receipt to successful remediation",
+        "analysis_first_field_seconds": "Time from a streamed Bedrock call to its first plan field",
+        "prompt_tokens_total": "Estimated analysis prompt tokens sent, by alert type",
+    }
+
+    def __init__(self, namespace: str = "alert_triage"):
+        self.namespace = namespace
+        self._histograms: Dict[Tuple[str, Labels], HdrHistogram] = {}
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._stage_histograms: Dict[str, HdrHistogram] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, **labels: str) -> HdrHistogram:
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, HdrHistogram())
+        return histogram
+
+    def span(self, stage: str) -> Span:
+        """with metrics.span("bedrock_call"): ..."""
+        histogram = self._stage_histograms.get(stage)
+        if histogram is None:
+            histogram = self.histogram("stage_duration_seconds", stage=stage)
+            self._stage_histograms[stage] = histogram
+        return Span(self, stage, histogram)
+
+    def observe(self, name: str, seconds: float, **labels: str) -> None:
+        self.histogram(name, **labels).record(int(seconds * 1e9))
+
+    def inc(self, name: str, amount: float = 1, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines: List[str] = []
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+
+        last = None
+        for (name, labels), histogram in histograms:
+            full = f"{self.namespace}_{name}"
+            if name != last:
+                lines.append(f"# HELP {full} {self.HELP.get(name, name)}")
+                lines.append(f"# TYPE {full} summary")
+                last = name
+            for q, value in zip(QUANTILES, histogram.quantiles(QUANTILES)):
+                quantile_labels = labels + (("quantile", str(q)),)
+                lines.append(f"{full}{_fmt(quantile_labels)} {value / 1e9:.9f}")
+            lines.append(f"{full}_sum{_fmt(labels)} {histogram.total / 1e9:.9f}")
+            lines.append(f"{full}_count{_fmt(labels)} {histogram.count}")
+
+        last = None
+        for (name, labels), value in counters:
+            full = f"{self.namespace}_{name}"
+            if name != last:
+                lines.append(f"# HELP {full} {self.HELP.get(name, name)}")
+                lines.append(f"# TYPE {full} counter")
+                last = name
+            lines.append(f"{full}{_fmt(labels)} {value:g}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _fmt(labels: Labels) -> str:
+    if not labels:
+        return ""
+    pairs = (f'{k}="{_escape(v)}"' for k, v in labels)
+    return "{" + ",".join(pairs) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Process-wide registry used by the service layer and /metrics
+metrics = MetricsRegistry()
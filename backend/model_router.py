@@ -0,0 +1,160 @@
+"""
+Analysis routing tier
+Picks how each alert is analyzed from its severity, alert_type and how
+confidently an SOP matched it: a template plan built from the SOP (no model
+call), a small fast model, or Nova Pro for the hard cases. Keeps per-route
+call counts and latency.
+"""
+
+import os
+import threading
+from typing import Dict, List, NamedTuple, Optional
+
+from backend.instrumentation import HdrHistogram, metrics
+from backend.models import Alert
+from backend.sop_matcher import SOPMatch
+
+ROUTES = ("template", "fast", "pro")
+
+DEFAULT_PRO_MODEL = "amazon.nova-pro-v1:0"
+DEFAULT_FAST_MODEL = "amazon.nova-lite-v1:0"
+
+
+def _csv(name: str, default: str) -> List[str]:
+    return [v.strip().lower() for v in os.getenv(name, default).split(",") if v.strip()]
+
+
+class RouteDecision(NamedTuple):
+    """Where one alert goes"""
+
+    route: str  # "template", "fast" or "pro"
+    model_id: Optional[str]  # None for the template route
+    confidence: float  # SOP match confidence, 0..1
+    reason: str
+
+
+def sop_match_confidence(candidates: List[SOPMatch], strong_score: float) -> float:
+    """
+    0..1 confidence that the top SOP candidate is the right one
+    Trigger matches: strength (score / strong_score, capped at 1) times the
+    top candidate's share of the top-two scores, so a weak or contested match
+    scores low. Semantic matches: the cosine similarity itself.
+    """
+    if not candidates:
+        return 0.0
+    top = candidates[0]
+    if top.source != "trigger":
+        return max(0.0, min(top.score, 1.0))
+    strength = min(top.score / strong_score, 1.0)
+    runner_up = next((c.score for c in candidates[1:] if c.source == "trigger"), 0.0)
+    return strength * top.score / (top.score + runner_up)
+
+
+class ModelRouter:
+    """
+    Severity / alert_type / SOP-confidence routing
+    pro: critical severity, alert types listed in ROUTE_PRO_ALERT_TYPES, or
+    no confident SOP match. template: severities in ROUTE_TEMPLATE_SEVERITIES
+    whose SOP matched with at least ROUTE_TEMPLATE_MIN_CONFIDENCE and has a
+    script template. fast: severities in ROUTE_FAST_SEVERITIES matched with
+    at least ROUTE_FAST_MIN_CONFIDENCE. Everything else goes to pro.
+    """
+
+    def __init__(self, pro_model: str = None, fast_model: str = None):
+        self.enabled = os.getenv("ROUTING_ENABLED", "true").lower() == "true"
+        self.pro_model = pro_model or os.getenv("BEDROCK_MODEL_ID", DEFAULT_PRO_MODEL)
+        self.fast_model = fast_model or os.getenv(
+            "BEDROCK_FAST_MODEL_ID", DEFAULT_FAST_MODEL
+        )
+        self.template_severities = _csv("ROUTE_TEMPLATE_SEVERITIES", "low")
+        self.fast_severities = _csv("ROUTE_FAST_SEVERITIES", "low,medium")
+        self.pro_alert_types = _csv("ROUTE_PRO_ALERT_TYPES", "")
+        self.template_min_confidence = float(
+            os.getenv("ROUTE_TEMPLATE_MIN_CONFIDENCE", "0.9")
+        )
+        self.fast_min_confidence = float(os.getenv("ROUTE_FAST_MIN_CONFIDENCE", "0.5"))
+        # Trigger score that counts as a full-strength match: a 10-character
+        # trigger hit in alert_type (weight 2)
+        self.strong_score = float(os.getenv("ROUTE_STRONG_MATCH_SCORE", "20"))
+
+        self._lock = threading.Lock()
+        self._stats = {
+            route: {"calls": 0, "model_calls": 0, "plan_cache_hits": 0, "errors": 0}
+            for route in ROUTES
+        }
+        self._latency = {route: HdrHistogram() for route in ROUTES}
+
+    def route(
+        self, alert: Alert, candidates: List[SOPMatch], has_template: bool
+    ) -> RouteDecision:
+        confidence = sop_match_confidence(candidates, self.strong_score)
+        severity = alert.severity.strip().lower()
+        alert_type = alert.alert_type.strip().lower()
+
+        def pro(reason: str) -> RouteDecision:
+            return RouteDecision("pro", self.pro_model, confidence, reason)
+
+        if not self.enabled:
+            return pro("routing disabled")
+        if severity == "critical":
+            return pro("critical severity")
+        if alert_type in self.pro_alert_types:
+            return pro(f"alert type {alert_type} is pinned to pro")
+        if (
+            severity in self.template_severities
+            and confidence >= self.template_min_confidence
+            and has_template
+        ):
+            return RouteDecision(
+                "template",
+                None,
+                confidence,
+                f"{severity} severity, SOP {candidates[0].sop_id} matched "
+                f"with {confidence:.2f}",
+            )
+        if severity in self.fast_severities and confidence >= self.fast_min_confidence:
+            return RouteDecision(
+                "fast",
+                self.fast_model,
+                confidence,
+                f"{severity} severity, SOP match {confidence:.2f}",
+            )
+        return pro(f"{severity} severity, SOP match {confidence:.2f}")
+
+    def record(self, route: str, seconds: float, outcome: str) -> None:
+        """
+        One analysis on route; outcome is "model" (a Bedrock call),
+        "template", "plan_cache" or "error"
+        """
+        metrics.observe("analysis_route_seconds", seconds, route=route)
+        metrics.inc("analysis_route_total", route=route, outcome=outcome)
+        with self._lock:
+            entry = self._stats[route]
+            entry["calls"] += 1
+            if outcome == "model":
+                entry["model_calls"] += 1
+            elif outcome == "plan_cache":
+                entry["plan_cache_hits"] += 1
+            elif outcome == "error":
+                entry["errors"] += 1
+        self._latency[route].record(int(seconds * 1e9))
+
+    def stats(self) -> Dict:
+        routes = {}
+        with self._lock:
+            counts = {route: dict(entry) for route, entry in self._stats.items()}
+        for route, entry in counts.items():
+            p50, p95, p99 = self._latency[route].quantiles((0.5, 0.95, 0.99))
+            routes[route] = dict(
+                entry,
+                latency_ms={
+                    "p50": round(p50 / 1e6, 1),
+                    "p95": round(p95 / 1e6, 1),
+                    "p99": round(p99 / 1e6, 1),
+                },
+            )
+        return {
+            "enabled": self.enabled,
+            "models": {"fast": self.fast_model, "pro": self.pro_model},
+            "routes": routes,
+        }
@@ -66,6 +66,40 @@ class ExecutionResult(BaseModel):
     timestamp: str = Field(default_factory=lambda: datetime.utcnow().isoformat())
 
 
+class AlertFilter(BaseModel):
+    """Server-side alert filter (all fields optional, combined with AND)"""
+
+    severity: Optional[str] = None
+    system: Optional[str] = None
+    alert_type: Optional[str] = None
+    since: Optional[str] = Field(None, description="ISO 8601 lower bound (inclusive)")
+    until: Optional[str] = Field(None, description="ISO 8601 upper bound (inclusive)")
+
+
+class BatchAnalyzeRequest(BaseModel):
+    """Batch analysis request: explicit alert ids or a filter"""
+
+    alert_ids: Optional[List[str]] = None
+    filter: Optional[AlertFilter] = None
+    max_concurrency: Optional[int] = Field(
+        None, ge=1, description="Per-batch parallelism (capped by the analysis pool)"
+    )
+
+
+class FanoutExecuteRequest(BaseModel):
+    """Run one approved plan against many target systems in canary waves"""
+
+    targets: List[str] = Field(..., min_length=1)
+    parallelism: Optional[int] = Field(None, ge=1, description="Hosts running at once")
+    canary: Optional[int] = Field(None, ge=0, description="Hosts in the first batch")
+    wave_percent: Optional[float] = Field(
+        None, gt=0, le=100, description="Second batch, as a percentage of targets"
+    )
+    max_failure_rate: Optional[float] = Field(
+        None, ge=0, le=1, description="Failure budget as a fraction of targets"
+    )
+
+
 class HealthCheck(BaseModel):
     """API health check response"""
 
@@ -0,0 +1,115 @@
+"""
+Bounded script output
+Ring buffer of output lines for one execution, with sequence numbers so live
+subscribers can follow it and resume after a reconnect
+"""
+
+import asyncio
+import os
+from collections import deque
+from itertools import islice
+from typing import Dict, List, Optional, Tuple
+
+
+class OutputBuffer:
+    """
+    Keeps the last max_lines lines of a script's output
+    Every line gets a sequence number; once the buffer is full the oldest
+    lines are dropped, so memory per execution stays capped however much
+    the script prints. Lines longer than max_line_chars are split.
+    """
+
+    def __init__(
+        self, max_lines: Optional[int] = None, max_line_chars: Optional[int] = None
+    ):
+        self.max_lines = max_lines or int(
+            os.getenv("EXECUTION_OUTPUT_MAX_LINES", "2000")
+        )
+        self.max_line_chars = max_line_chars or int(
+            os.getenv("EXECUTION_OUTPUT_MAX_LINE_CHARS", "4096")
+        )
+        self._lines: deque = deque(maxlen=self.max_lines)
+        self._partial = ""
+        self.next_seq = 0  # sequence number the next line will get
+        self.closed = False
+        self._changed = asyncio.Event()
+
+    @property
+    def first_seq(self) -> int:
+        """Sequence number of the oldest retained line"""
+        return self.next_seq - len(self._lines)
+
+    def write(self, text: str) -> None:
+        """Append raw output; an unterminated last line waits for more"""
+        before = self.next_seq
+        lines = (self._partial + text).split("\n")
+        self._partial = lines.pop()
+        for line in lines:
+            self._append(line.rstrip("\r"))
+        while len(self._partial) > self.max_line_chars:
+            self._append(self._partial[: self.max_line_chars])
+            self._partial = self._partial[self.max_line_chars :]
+        if self.next_seq != before:
+            self._wake()
+
+    def write_line(self, line: str) -> None:
+        self.flush()
+        self._append(line)
+        self._wake()
+
+    def flush(self) -> None:
+        if self._partial:
+            self._append(self._partial.rstrip("\r"))
+            self._partial = ""
+            self._wake()
+
+    def _append(self, line: str) -> None:
+        for start in range(0, max(len(line), 1), self.max_line_chars):
+            self._lines.append(line[start : start + self.max_line_chars])
+            self.next_seq += 1
+
+    def close(self) -> None:
+        self.flush()
+        self.closed = True
+        self._wake()
+
+    def _wake(self) -> None:
+        # Waiters hold the old event; the next wait gets a fresh one
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def since(self, seq: int) -> List[Tuple[int, str]]:
+        """Retained (seq, line) pairs from seq on"""
+        skip = max(seq - self.first_seq, 0)
+        return list(enumerate(islice(self._lines, skip, None), self.first_seq + skip))
+
+    async def wait(self, seq: int, timeout: float) -> None:
+        """Return once line seq exists, the buffer closes, or timeout passes"""
+        if self.next_seq > seq or self.closed:
+            return
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def text(self) -> str:
+        """Retained output, noting how many earlier lines were dropped"""
+        lines = list(self._lines)
+        if self._partial:
+            lines.append(self._partial)
+        if self.first_seq:
+            lines.insert(0, f"[... {self.first_seq} earlier line(s) dropped ...]")
+        return "\n".join(lines)
+
+    def snapshot(self) -> Dict:
+        """JSON-friendly copy for storage; see lines_since"""
+        return {"next_seq": self.next_seq, "lines": list(self._lines)}
+
+
+def lines_since(snapshot: Optional[Dict], seq: int) -> List[Tuple[int, str]]:
+    """(seq, line) pairs from seq on in a stored OutputBuffer snapshot"""
+    if not snapshot:
+        return []
+    first = snapshot["next_seq"] - len(snapshot["lines"])
+    skip = max(seq - first, 0)
+    return [(first + i, line) for i, line in enumerate(snapshot["lines"][skip:], skip)]
@@ -0,0 +1,254 @@
+"""
+Content-addressed remediation plan cache
+Repeat alerts (same system, alert type, similar metrics, same SOP) reuse a
+previous plan instead of making another Bedrock call
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from backend.models import Alert
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS plan_cache (
+    fingerprint TEXT PRIMARY KEY,
+    system TEXT,
+    alert_type TEXT,
+    plan TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_plan_cache_lru ON plan_cache (last_used);
+CREATE INDEX IF NOT EXISTS idx_plan_cache_scope ON plan_cache (system, alert_type);
+
+CREATE TABLE IF NOT EXISTS plan_cache_stats (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+SELECT_ENTRY = (
+    "SELECT plan, expires_at, last_used FROM plan_cache WHERE fingerprint = ?"
+)
+TOUCH_ENTRY = "UPDATE plan_cache SET last_used = ? WHERE fingerprint = ?"
+DELETE_ENTRY = "DELETE FROM plan_cache WHERE fingerprint = ?"
+UPSERT_ENTRY = (
+    "INSERT OR REPLACE INTO plan_cache "
+    "(fingerprint, system, alert_type, plan, created_at, expires_at, last_used) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+COUNT_ENTRIES = "SELECT COUNT(*) FROM plan_cache"
+EVICT_LRU = (
+    "DELETE FROM plan_cache WHERE fingerprint IN "
+    "(SELECT fingerprint FROM plan_cache ORDER BY last_used LIMIT ?)"
+)
+PURGE_EXPIRED = "DELETE FROM plan_cache WHERE expires_at <= ?"
+ADD_STAT = (
+    "INSERT INTO plan_cache_stats (name, value) VALUES (?, ?) "
+    "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value"
+)
+STAT_NAMES = ("hits", "misses", "expired")
+
+
+def _bucket(value, step: float):
+    """Collapse nearby numeric readings (95% vs 96% disk) onto one bucket"""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return int(value // step * step) if step else value
+    if isinstance(value, str):
+        return value.strip().lower()
+    return value
+
+
+def _scope(value: str) -> str:
+    """system / alert_type as the fingerprint sees them"""
+    return value.strip().lower()
+
+
+def alert_fingerprint(alert: Alert, sop: Dict, metric_bucket: float = 5) -> str:
+    """
+    Normalised fingerprint of (system, alert_type, bucketed metrics, SOP version)
+    The SOP version is a hash of the matched SOP's content, so editing the SOP
+    naturally misses the cache
+    """
+    sop_digest = hashlib.sha256(json.dumps(sop, sort_keys=True).encode())
+    sop_version = sop_digest.hexdigest()[:12]
+    key = {
+        "system": _scope(alert.system),
+        "alert_type": _scope(alert.alert_type),
+        "metrics": {
+            k.lower(): _bucket(v, metric_bucket)
+            for k, v in sorted(alert.metrics.items())
+        },
+        "sop": sop_version,
+    }
+    canonical = json.dumps(key, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class PlanCache:
+    """
+    LRU + TTL plan cache backed by SQLite (WAL), shared by all workers
+    Entries expire after ttl seconds; beyond max_entries the least recently
+    used are evicted. A hit only rewrites last_used once it is touch_interval
+    old, and hit/miss counters are kept in memory and added to the file every
+    stats_flush_interval seconds, so a lookup is normally a single read.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        metric_bucket: Optional[float] = None,
+        touch_interval: Optional[float] = None,
+        stats_flush_interval: Optional[float] = None,
+    ):
+        self.path = path or os.getenv("PLAN_CACHE_PATH", "plan_cache.db")
+        self.ttl = (
+            ttl if ttl is not None else float(os.getenv("PLAN_CACHE_TTL", "3600"))
+        )
+        self.max_entries = max_entries or int(
+            os.getenv("PLAN_CACHE_MAX_ENTRIES", "1000")
+        )
+        self.metric_bucket = (
+            metric_bucket
+            if metric_bucket is not None
+            else float(os.getenv("PLAN_CACHE_METRIC_BUCKET", "5"))
+        )
+        self.touch_interval = (
+            touch_interval
+            if touch_interval is not None
+            else float(os.getenv("PLAN_CACHE_TOUCH_INTERVAL", "60"))
+        )
+        self.stats_flush_interval = (
+            stats_flush_interval
+            if stats_flush_interval is not None
+            else float(os.getenv("PLAN_CACHE_STATS_FLUSH_INTERVAL", "5"))
+        )
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._pending = dict.fromkeys(STAT_NAMES, 0)
+        self._flushed_at = time.time()
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def fingerprint(self, alert: Alert, sop: Dict) -> str:
+        return alert_fingerprint(alert, sop, self.metric_bucket)
+
+    def get(self, fingerprint: str) -> Optional[Dict]:
+        """Cached plan dict (without alert_id), or None on miss/expiry"""
+        conn = self._conn()
+        now = time.time()
+        row = conn.execute(SELECT_ENTRY, (fingerprint,)).fetchone()
+        if row is None:
+            self._count(now, misses=1)
+            return None
+        plan, expires_at, last_used = row
+        if expires_at <= now:
+            conn.execute(DELETE_ENTRY, (fingerprint,))
+            self._count(now, expired=1, misses=1)
+            return None
+        # LRU order only needs last_used to this granularity
+        if now - last_used >= self.touch_interval:
+            conn.execute(TOUCH_ENTRY, (now, fingerprint))
+        self._count(now, hits=1)
+        return json.loads(plan)
+
+    def _count(self, now: float, **deltas: int) -> None:
+        with self._stats_lock:
+            for name, value in deltas.items():
+                self._pending[name] += value
+            due = now - self._flushed_at >= self.stats_flush_interval
+        if due:
+            self.flush_stats()
+
+    def flush_stats(self) -> None:
+        """Add the counts kept in memory to the shared stats table"""
+        with self._stats_lock:
+            pending = [(n, v) for n, v in self._pending.items() if v]
+            self._pending = dict.fromkeys(STAT_NAMES, 0)
+            self._flushed_at = time.time()
+        if pending:
+            self._conn().executemany(ADD_STAT, pending)
+
+    def put(self, fingerprint: str, alert: Alert, plan: Dict) -> None:
+        conn = self._conn()
+        now = time.time()
+        body = {k: v for k, v in plan.items() if k != "alert_id"}
+        conn.execute(
+            UPSERT_ENTRY,
+            (
+                fingerprint,
+                _scope(alert.system),
+                _scope(alert.alert_type),
+                json.dumps(body),
+                now,
+                now + self.ttl,
+                now,
+            ),
+        )
+        overflow = conn.execute(COUNT_ENTRIES).fetchone()[0] - self.max_entries
+        if overflow > 0:
+            conn.execute(PURGE_EXPIRED, (now,))
+            overflow = conn.execute(COUNT_ENTRIES).fetchone()[0] - self.max_entries
+            if overflow > 0:
+                conn.execute(EVICT_LRU, (overflow,))
+
+    def invalidate(
+        self,
+        fingerprint: Optional[str] = None,
+        system: Optional[str] = None,
+        alert_type: Optional[str] = None,
+    ) -> int:
+        """
+        Drop matching entries (all entries when no argument is given)
+        system and alert_type match case-insensitively, like the fingerprint.
+        Returns the number of plans removed
+        """
+        clauses, params = [], []
+        if fingerprint is not None:
+            clauses.append("fingerprint = ?")
+            params.append(fingerprint)
+        for column, value in (("system", system), ("alert_type", alert_type)):
+            if value is not None:
+                # Scopes are stored normalised, so this stays on idx_plan_cache_scope
+                clauses.append(f"{column} = ?")
+                params.append(_scope(value))
+        sql = "DELETE FROM plan_cache"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        return self._conn().execute(sql, params).rowcount
+
+    def stats(self) -> Dict:
+        self.flush_stats()
+        conn = self._conn()
+        counters = dict(conn.execute("SELECT name, value FROM plan_cache_stats"))
+        hits = counters.get("hits", 0)
+        misses = counters.get("misses", 0)
+        lookups = hits + misses
+        return {
+            "entries": conn.execute(COUNT_ENTRIES).fetchone()[0],
+            "hits": hits,
+            "misses": misses,
+            "expired": counters.get("expired", 0),
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "llm_calls_saved": hits,
+            "ttl_seconds": self.ttl,
+            "max_entries": self.max_entries,
+        }
@@ -0,0 +1,94 @@
+"""
+Incremental remediation-plan parsing
+Scans a streamed model response character by character and emits each
+top-level field of the plan JSON as soon as its value is complete, so the
+root cause and confidence reach the technician while the script is still
+being generated.
+"""
+
+import json
+from typing import Any, Dict, List, Tuple
+
+# Model field name -> RemediationPlan field name
+PLAN_FIELD_NAMES = {
+    "root_cause": "root_cause",
+    "confidence": "confidence",
+    "reasoning": "reasoning",
+    "remediation_steps": "steps",
+    "safety_checks": "safety_checks",
+    "estimated_execution_time": "estimated_time",
+    "rollback_plan": "rollback_plan",
+}
+# The script is only sent with the validated plan at the end
+
+
+class PlanStreamParser:
+    """
+    Incremental parser for one JSON object arriving in text chunks
+    feed() returns the (name, value) pairs of top-level members completed by
+    the new text. Only new characters are scanned, tracking nesting depth and
+    string/escape state, so the whole response is parsed in linear time.
+    Anything before the opening brace (a stray ```json fence) is ignored.
+    """
+
+    def __init__(self):
+        self._member: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self.done = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        fields = []
+        member = self._member
+        for char in chunk:
+            if self.done:
+                break
+            if self._in_string:
+                member.append(char)
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+            if self._depth == 0:
+                if char == "{":
+                    self._depth = 1
+                continue
+            if self._depth == 1 and char in ",}":
+                fields.extend(self._finish_member())
+                if char == "}":
+                    self._depth = 0
+                    self.done = True
+                continue
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+            member.append(char)
+        return fields
+
+    def _finish_member(self) -> List[Tuple[str, Any]]:
+        text = "".join(self._member).strip()
+        self._member.clear()
+        if not text:
+            return []
+        try:
+            member: Dict[str, Any] = json.loads("{" + text + "}")
+        except ValueError:
+            # Malformed member: leave it to the full parse at the end
+            return []
+        return list(member.items())
+
+
+def plan_fields(parser: PlanStreamParser, chunk: str) -> List[Tuple[str, Any]]:
+    """Fields completed by chunk, renamed to RemediationPlan names (no script)"""
+    return [
+        (PLAN_FIELD_NAMES[name], value)
+        for name, value in parser.feed(chunk)
+        if name in PLAN_FIELD_NAMES
+    ]
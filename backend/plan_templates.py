@@ -0,0 +1,402 @@
+"""
+Template remediation plans
+Builds a RemediationPlan straight from a matched SOP: its steps and safety
+notes, plus the PowerShell script named by its `script_template` in the
+scripts directory, with the placeholders the template declares filled from
+Alert.metrics. No model call; templates are compiled once and kept in memory.
+"""
+
+import math
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from backend.instrumentation import metrics
+from backend.models import Alert, RemediationPlan
+from backend.script_executor import ScriptSafetyValidator
+
+DEFAULT_TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), "..", "scripts")
+
+# {{ name }}, {{ name, other_name = default }}, {{ alert.system }}
+PLACEHOLDER = re.compile(r"\{\{\s*(.*?)\s*\}\}")
+# "# @key: value" lines at the top of a template describe the plan;
+# "# @param: names = kind ..." lines declare what alert data may fill
+METADATA = re.compile(r"#\s*@(\w+):\s*(.*)")
+RANGE = re.compile(r"(-?\d+(?:\.\d+)?)\.\.(-?\d+(?:\.\d+)?)")
+NAME = re.compile(r"[A-Za-z0-9][\w.\-]{0,79}")
+DRIVE = re.compile(r"([A-Za-z]):\\?")
+KINDS = ("int", "number", "bool", "name", "drive", "choice")
+ALERT_FIELDS = ("id", "system", "alert_type", "severity", "timestamp")
+# ASCII and typographic single quotes all close a PowerShell '...' string
+SINGLE_QUOTES = re.compile("['‘’‚‛]")
+
+
+class TemplateError(ValueError):
+    """A template that cannot be compiled or rendered for an alert"""
+
+
+class Placeholder(NamedTuple):
+    """Value looked up under the first of names present, else default"""
+
+    names: Tuple[str, ...]
+    default: Optional[str]  # inserted verbatim; None means required
+
+
+class Parameter(NamedTuple):
+    """
+    Placeholder names alert metrics may fill, and the values accepted:
+    int / number within low..high, bool, name (a bare identifier), drive
+    (a drive letter) or choice (one of choices, case-insensitive)
+    """
+
+    names: Tuple[str, ...]
+    kind: str
+    low: Optional[float] = None
+    high: Optional[float] = None
+    choices: Tuple[str, ...] = ()
+
+    def check(self, value: Any) -> Any:
+        """value converted for the template, or None if it is not accepted"""
+        if self.kind in ("int", "number"):
+            if isinstance(value, bool):
+                return None
+            try:
+                number = float(value)
+            except (TypeError, ValueError):
+                return None
+            if not math.isfinite(number):
+                return None
+            if self.kind == "int":
+                if not number.is_integer():
+                    return None
+                number = int(number)
+            if self.low is not None and number < self.low:
+                return None
+            if self.high is not None and number > self.high:
+                return None
+            return number
+        if self.kind == "bool":
+            return value if isinstance(value, bool) else None
+        if not isinstance(value, str):
+            return None
+        value = value.strip()
+        if self.kind == "name":
+            return value if NAME.fullmatch(value) else None
+        if self.kind == "drive":
+            match = DRIVE.fullmatch(value)
+            return match.group(1).upper() + ":\\" if match else None
+        for choice in self.choices:
+            if value.lower() == choice.lower():
+                return choice
+        return None
+
+
+def parse_parameter(spec: str) -> Parameter:
+    """Parameter from a `# @param: names = kind [low..high | choices]` line"""
+    names, _, kind_spec = spec.partition("=")
+    names = tuple(n.strip() for n in names.split(",") if n.strip())
+    kind, *rest = kind_spec.split() or [""]
+    if not names or kind not in KINDS:
+        raise TemplateError(f"Bad parameter declaration {spec!r}")
+    if kind == "choice":
+        if not rest:
+            raise TemplateError(f"Parameter {spec!r} lists no choices")
+        return Parameter(names, kind, choices=tuple(rest))
+    if rest:
+        match = RANGE.fullmatch("".join(rest))
+        if kind not in ("int", "number") or match is None:
+            raise TemplateError(f"Bad range in parameter declaration {spec!r}")
+        return Parameter(names, kind, float(match.group(1)), float(match.group(2)))
+    return Parameter(names, kind)
+
+
+def parse_placeholder(spec: str) -> Placeholder:
+    names, sep, default = spec.partition("=")
+    names = tuple(n.strip() for n in names.split(",") if n.strip())
+    if not names or not all(re.fullmatch(r"[\w.]+", n) for n in names):
+        raise TemplateError(f"Bad placeholder {{{{ {spec} }}}}")
+    return Placeholder(names, default.strip() if sep else None)
+
+
+def compile_text(text: str) -> Tuple[Union[str, Placeholder], ...]:
+    """text split into literal strings and Placeholders"""
+    segments: List[Union[str, Placeholder]] = []
+    position = 0
+    for match in PLACEHOLDER.finditer(text):
+        if match.start() > position:
+            segments.append(text[position : match.start()])
+        segments.append(parse_placeholder(match.group(1)))
+        position = match.end()
+    if position < len(text):
+        segments.append(text[position:])
+    return tuple(segments)
+
+
+def powershell_literal(value: Any) -> Optional[str]:
+    """value as a PowerShell literal, or None for values a script cannot take"""
+    if isinstance(value, bool):
+        return "$true" if value else "$false"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        return f"{value:.6g}" if math.isfinite(value) else None
+    if isinstance(value, str):
+        # Single-quoted: no variable expansion or subexpressions inside
+        text = SINGLE_QUOTES.sub(lambda m: m.group(0) * 2, value)
+        return "'" + re.sub(r"[\x00-\x1f]", " ", text) + "'"
+    return None
+
+
+def plain_text(value: Any) -> Optional[str]:
+    """value as prose for the plan text fields"""
+    if isinstance(value, float):
+        return f"{value:.6g}" if math.isfinite(value) else None
+    if isinstance(value, (bool, int, str)):
+        return re.sub(r"[\x00-\x1f]", " ", str(value))
+    return None
+
+
+class CompiledTemplate(NamedTuple):
+    """One script template, parsed once"""
+
+    name: str
+    script: Tuple[Union[str, Placeholder], ...]
+    metadata: Dict[str, Tuple[Union[str, Placeholder], ...]]
+    parameters: Tuple[str, ...]
+    inputs: Dict[str, Parameter]  # placeholder name -> what alert data may fill it
+
+    def values(self, alert: Alert) -> Tuple[Dict[str, Any], List[str]]:
+        """
+        Placeholder values for alert: alert.<field> plus the metrics the
+        template declares that pass their check; also the declared metrics
+        that were ignored for failing it. Other metrics are never used.
+        """
+        values: Dict[str, Any] = {
+            f"alert.{field}": getattr(alert, field) for field in ALERT_FIELDS
+        }
+        ignored = []
+        for name, value in alert.metrics.items():
+            parameter = self.inputs.get(name)
+            if parameter is None:
+                continue
+            checked = parameter.check(value)
+            if checked is None:
+                ignored.append(name)
+            else:
+                values[name] = checked
+        return values, ignored
+
+    def render(self, segments, values: Dict[str, Any], quote) -> str:
+        parts = []
+        for segment in segments:
+            if isinstance(segment, str):
+                parts.append(segment)
+                continue
+            rendered = None
+            for name in segment.names:
+                if name in values:
+                    rendered = quote(values[name])
+                    if rendered is not None:
+                        break
+            if rendered is None:
+                if segment.default is None:
+                    raise TemplateError(
+                        f"{self.name}: no usable value for "
+                        f"{' / '.join(segment.names)}"
+                    )
+                rendered = segment.default
+            parts.append(rendered)
+        return "".join(parts)
+
+
+def compile_template(name: str, source: str) -> CompiledTemplate:
+    metadata = {}
+    inputs: Dict[str, Parameter] = {}
+    lines = source.splitlines(keepends=True)
+    header = 0
+    for line in lines:
+        match = METADATA.fullmatch(line.strip())
+        if match is None:
+            break
+        if match.group(1) == "param":
+            parameter = parse_parameter(match.group(2))
+            inputs.update((n, parameter) for n in parameter.names)
+        else:
+            metadata[match.group(1)] = compile_text(match.group(2))
+        header += 1
+    # Header lines describe the plan; they are not part of the script
+    script = compile_text("".join(lines[header:]))
+    names = []
+    for segments in (script, *metadata.values()):
+        for segment in segments:
+            if not isinstance(segment, Placeholder):
+                continue
+            names.extend(n for n in segment.names if n not in names)
+            if segment.default is None and not any(
+                n in inputs or n.startswith("alert.") for n in segment.names
+            ):
+                raise TemplateError(
+                    f"{name}: required placeholder {' / '.join(segment.names)} "
+                    f"is not a declared @param"
+                )
+    unknown = sorted(set(inputs) - set(names))
+    if unknown:
+        raise TemplateError(f"{name}: @param for unknown placeholder {unknown}")
+    return CompiledTemplate(name, script, metadata, tuple(names), inputs)
+
+
+class TemplatePlanner:
+    """
+    SOP + compiled script template + Alert.metrics -> RemediationPlan
+    Templates are compiled once and recompiled only when their mtime
+    changes. Only placeholders a `# @param:` line declares are filled from
+    metrics, and only with values passing its type and range check; the
+    rest (paths and other destructive settings) keep the SOP default.
+    Script placeholders become PowerShell literals (strings single-quoted,
+    so metric values cannot inject code); placeholders in the leading
+    `# @root_cause:` / `# @estimated_time:` / `# @rollback:` lines are
+    filled as plain text for the plan and left out of the script. A
+    required placeholder without a usable metric, or a rendered script the
+    safety validator rejects, makes the template unusable for that alert
+    (TemplateError).
+    """
+
+    def __init__(
+        self,
+        template_dir: Optional[str] = None,
+        validator: Optional[ScriptSafetyValidator] = None,
+    ):
+        self.template_dir = template_dir or os.getenv(
+            "SCRIPT_TEMPLATE_DIR", DEFAULT_TEMPLATE_DIR
+        )
+        self.validator = validator or ScriptSafetyValidator()
+        self._lock = threading.Lock()
+        self._templates: Dict[str, Tuple[float, Optional[CompiledTemplate]]] = {}
+        self._counts = {
+            "compiles": 0,
+            "plans": 0,
+            "fallbacks": 0,
+            "errors": 0,
+            "rejected": 0,
+        }
+
+    def template(self, name: str) -> Optional[CompiledTemplate]:
+        """Compiled template name, or None if it is missing, empty or invalid"""
+        if not name:
+            return None
+        path = os.path.join(self.template_dir, os.path.basename(name))
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return None
+        with self._lock:
+            cached = self._templates.get(name)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        compiled = None
+        try:
+            with open(path, encoding="utf-8") as f:
+                source = f.read()
+            if source.strip():
+                compiled = compile_template(name, source)
+        except (OSError, UnicodeDecodeError, TemplateError) as e:
+            print(f"Warning: script template {name} unusable: {e}")
+        with self._lock:
+            self._templates[name] = (mtime, compiled)
+            self._counts["compiles"] += 1
+        return compiled
+
+    def warm(self, sop_kb: Dict) -> int:
+        """Compile every template the KB names; returns how many are usable"""
+        names = {sop.get("script_template") for sop in sop_kb.values()}
+        return sum(self.template(name) is not None for name in names if name)
+
+    def can_plan(self, sop: Dict) -> bool:
+        name = sop.get("script_template") if sop else None
+        return bool(name) and self.template(name) is not None
+
+    def plan(
+        self,
+        alert: Alert,
+        sop: Dict,
+        confidence: float,
+        fallback_reason: Optional[str] = None,
+    ) -> RemediationPlan:
+        """
+        Plan for alert from sop; fallback_reason (why the model was not
+        used) is recorded in the reasoning
+        """
+        start = time.perf_counter()
+        compiled = self.template(sop.get("script_template") or "")
+        if compiled is None:
+            raise TemplateError(f"No script template for SOP {sop.get('title', '?')}")
+        values, ignored = compiled.values(alert)
+        try:
+            script = compiled.render(compiled.script, values, powershell_literal)
+            text = {
+                key: compiled.render(segments, values, plain_text)
+                for key, segments in compiled.metadata.items()
+            }
+        except TemplateError:
+            with self._lock:
+                self._counts["errors"] += 1
+            raise
+        verdict = self.validator.validate(script, "powershell")
+        if not verdict["is_safe"]:
+            with self._lock:
+                self._counts["rejected"] += 1
+            raise TemplateError(
+                f"{compiled.name}: rendered script failed safety validation: "
+                f"{'; '.join(verdict['issues'])}"
+            )
+
+        used = [n for n in compiled.parameters if n in values]
+        reasoning = (
+            f"Matched SOP '{sop.get('title', 'N/A')}' with confidence "
+            f"{confidence:.2f}; plan synthesized from the SOP and script "
+            f"template {compiled.name} without a model call. "
+        )
+        reasoning += (
+            f"Filled from alert data: {', '.join(used)}."
+            if used
+            else "No alert metrics matched template parameters; SOP defaults used."
+        )
+        if ignored:
+            reasoning += (
+                f" Ignored out-of-range alert values for {', '.join(ignored)}; "
+                "SOP defaults used instead."
+            )
+        if fallback_reason:
+            reasoning += f" AI analysis unavailable ({fallback_reason})."
+        plan = RemediationPlan(
+            alert_id=alert.id,
+            root_cause=text.get(
+                "root_cause",
+                f"{sop.get('title', alert.alert_type)}: {alert.description}",
+            ),
+            confidence=round(max(0.0, min(confidence, 1.0)), 2),
+            reasoning=reasoning,
+            steps=list(sop.get("steps", [])),
+            script=script,
+            script_language="powershell",
+            safety_checks=list(sop.get("safety_notes", [])),
+            estimated_time=text.get("estimated_time", "Unknown"),
+            rollback_plan=text.get(
+                "rollback",
+                "Follow the rollback instructions printed by the script and "
+                "the SOP safety notes.",
+            ),
+        )
+        metrics.observe("template_plan_seconds", time.perf_counter() - start)
+        with self._lock:
+            self._counts["plans"] += 1
+            if fallback_reason:
+                self._counts["fallbacks"] += 1
+        return plan
+
+    def stats(self) -> Dict:
+        with self._lock:
+            usable = sorted(n for n, (_, t) in self._templates.items() if t)
+            return dict(self._counts, template_dir=self.template_dir, usable=usable)
@@ -0,0 +1,299 @@
+"""
+Analysis prompt assembly
+Static instruction blocks are built once at import; per-alert sections
+(description, metrics, history, SOP) are rendered against a token budget
+each, so prompt size stays flat as the knowledge base and device history
+grow. Prompt token counts are tracked per alert type.
+"""
+
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from backend.instrumentation import metrics
+from backend.models import Alert
+
+# Rough token estimate: ~4 characters per token for English prose and code
+CHARS_PER_TOKEN = 4
+
+# Default per-section budgets in estimated tokens (PROMPT_BUDGET_<SECTION>)
+DEFAULT_BUDGETS = {
+    "description": 150,
+    "metrics": 120,
+    "history": 250,
+    "sop": 500,
+}
+
+HEADER = (
+    "You are an expert IT operations assistant specializing in alert triage "
+    "and remediation for Windows Server environments.\n\n"
+)
+
+INSTRUCTIONS = """YOUR TASK:
+1. Analyze the root cause of this alert using all provided context
+2. Provide a confidence score (0.0 to 1.0, where 1.0 = 100% confident)
+3. Explain your reasoning clearly, referencing historical data and metrics
+4. Generate a detailed step-by-step remediation plan in plain English
+5. Write a complete, production-ready PowerShell script to execute the remediation
+
+CRITICAL SAFETY REQUIREMENTS FOR THE SCRIPT:
+- NEVER include destructive commands without explicit safeguards
+- ALWAYS include backup steps before any modifications
+- Use Write-Host with color coding for clear logging at each step
+- Include comprehensive Try-Catch error handling blocks
+- Verify operations with Test-Path or equivalent checks before proceeding
+- Provide progress indicators for long-running operations
+- Include post-operation verification to confirm success
+- Add detailed comments explaining each section
+- Provide rollback instructions in case of failure
+- Exit with appropriate exit codes (0 = success, 1 = error)
+
+OUTPUT FORMAT - RESPOND WITH VALID JSON ONLY:
+{
+    "root_cause": "Brief root cause explanation (1-2 sentences)",
+    "confidence": 0.92,
+    "reasoning": "Detailed explanation of why you believe this is the cause. Reference historical patterns, current metrics, and SOP guidance. Explain your confidence level.",
+    "remediation_steps": [
+        "Step 1: Clear action with expected outcome",
+        "Step 2: Next action with verification step",
+        "Continue with all necessary steps in logical order"
+    ],
+    "script": "# Complete PowerShell script\\n# With extensive comments\\n# Include all safety measures listed above\\n...",
+    "safety_checks": [
+        "Specific safety measure 1 with detail",
+        "Specific safety measure 2 explaining protection",
+        "List ALL safety mechanisms implemented in the script"
+    ],
+    "estimated_execution_time": "2-3 minutes",
+    "rollback_plan": "Detailed step-by-step instructions on how to undo changes if something goes wrong, including specific commands"
+}
+
+IMPORTANT FORMATTING RULES:
+1. Respond ONLY with the JSON object
+2. Do NOT include markdown formatting or code blocks
+3. Ensure all JSON is valid and properly escaped
+4. PowerShell script should be in the "script" field as a single string with \\n for newlines
+5. Do NOT wrap the JSON in ```json``` or any other markers
+
+Generate the remediation plan now:"""
+
+NO_HISTORY = "No historical incidents found for this system.\n"
+NO_SOP = "No specific SOP found for this alert type. Use general best practices.\n"
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimated model tokens for text (cheap; no tokenizer needed)"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+STATIC_TOKENS = estimate_tokens(HEADER) + estimate_tokens(INSTRUCTIONS)
+
+
+def clip(text: str, tokens: int) -> str:
+    """text cut to about tokens, marked with an ellipsis when cut"""
+    limit = max(tokens, 1) * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    return text[: limit - 1].rstrip() + "…"
+
+
+def compact_metrics(values: Dict, tokens: int) -> Tuple[str, bool]:
+    """
+    Metrics as "key=value, ..." within the budget, (text, truncated)
+    Floats lose trailing noise (95.123456 -> 95.1235); nested values are
+    compact JSON. Keys that do not fit are counted, not listed.
+    """
+    if not values:
+        return "none", False
+    parts = []
+    used = 0
+    for key, value in values.items():
+        if isinstance(value, float):
+            rendered = f"{value:.6g}"
+        elif isinstance(value, (dict, list)):
+            rendered = json.dumps(value, separators=(",", ":"), default=str)
+        else:
+            rendered = str(value)
+        part = f"{key}={rendered}"
+        cost = estimate_tokens(part) + 1
+        if used + cost > tokens:
+            break
+        parts.append(part)
+        used += cost
+    omitted = len(values) - len(parts)
+    if omitted:
+        parts.append(f"(+{omitted} more)")
+    return ", ".join(parts), omitted > 0
+
+
+class PromptBuilder:
+    """
+    Assembles the analysis prompt within per-section token budgets
+    history: most recent incidents in full while they fit (at most
+    max_incidents), the rest summarised in one line. sop: safety notes are
+    always kept; steps fill the remaining budget and the rest are counted.
+    """
+
+    def __init__(
+        self,
+        budgets: Optional[Dict[str, int]] = None,
+        max_incidents: Optional[int] = None,
+    ):
+        self.budgets = {
+            section: int(os.getenv(f"PROMPT_BUDGET_{section.upper()}", default))
+            for section, default in DEFAULT_BUDGETS.items()
+        }
+        self.budgets.update(budgets or {})
+        self.max_incidents = max_incidents or int(
+            os.getenv("PROMPT_HISTORY_MAX_INCIDENTS", "3")
+        )
+        self._lock = threading.Lock()
+        self._by_type: Dict[str, Dict] = {}
+        self._truncated = {section: 0 for section in self.budgets}
+
+    def build(self, alert: Alert, sop: Dict, history: List[Dict]) -> str:
+        truncated = []
+        description = clip(alert.description, self.budgets["description"])
+        if description != alert.description:
+            truncated.append("description")
+        alert_metrics, cut = compact_metrics(alert.metrics, self.budgets["metrics"])
+        if cut:
+            truncated.append("metrics")
+        history_text, cut = self._history(history)
+        if cut:
+            truncated.append("history")
+        sop_text, cut = self._sop(sop)
+        if cut:
+            truncated.append("sop")
+
+        prompt = "".join(
+            (
+                HEADER,
+                "ALERT DETAILS:\n",
+                f"- Alert ID: {alert.id}\n",
+                f"- Timestamp: {alert.timestamp}\n",
+                f"- Severity: {alert.severity}\n",
+                f"- Affected System: {alert.system} (Windows Server 2019)\n",
+                f"- Alert Type: {alert.alert_type}\n",
+                f"- Description: {description}\n",
+                f"- Metrics: {alert_metrics}\n\n",
+                "HISTORICAL CONTEXT:\n",
+                history_text,
+                "\nKNOWLEDGE BASE:\n",
+                sop_text,
+                "\n",
+                INSTRUCTIONS,
+            )
+        )
+        self._record(alert.alert_type, estimate_tokens(prompt), truncated)
+        return prompt
+
+    def _history(self, history: List[Dict]) -> Tuple[str, bool]:
+        if not history:
+            return NO_HISTORY, False
+        budget = self.budgets["history"]
+        recent = sorted(history, key=lambda h: str(h.get("date", "")), reverse=True)
+        lines = ["Recent similar incidents on this system:\n"]
+        used = estimate_tokens(lines[0])
+        shown = 0
+        for incident in recent[: self.max_incidents]:
+            issue = clip(str(incident.get("issue", "?")), 40)
+            action = clip(str(incident.get("action_taken", "?")), 40)
+            entry = (
+                f"- {incident.get('date', '?')}: {issue} "
+                f"→ Resolved in {incident.get('resolution_time', '?')} min\n"
+                f"  Action taken: {action}\n"
+            )
+            cost = estimate_tokens(entry)
+            if used + cost > budget:
+                break
+            lines.append(entry)
+            used += cost
+            shown += 1
+
+        rest = recent[shown:]
+        if rest:
+            times = [
+                h["resolution_time"]
+                for h in rest
+                if isinstance(h.get("resolution_time"), (int, float))
+            ]
+            summary = (
+                f"- {len(rest)} earlier incident(s) from "
+                f"{rest[-1].get('date', '?')} to {rest[0].get('date', '?')}"
+            )
+            if times:
+                summary += f", avg resolution {sum(times) / len(times):.0f} min"
+            lines.append(clip(summary, budget - used) + "\n")
+        # Incidents beyond max_incidents by design are not a truncation
+        return "".join(lines), shown < min(len(recent), self.max_incidents)
+
+    def _sop(self, sop: Dict) -> Tuple[str, bool]:
+        if not sop:
+            return NO_SOP, False
+        head = f"Standard Operating Procedure:\nTitle: {sop.get('title', 'N/A')}\n"
+        remaining = self.budgets["sop"] - estimate_tokens(head)
+        # Safety notes take the budget first; steps get what is left
+        notes, remaining, notes_cut = self._fit(
+            [f"- {clip(note, 60)}\n" for note in sop.get("safety_notes", [])],
+            remaining,
+            "more safety note(s)",
+        )
+        steps, remaining, steps_cut = self._fit(
+            [
+                f"{i}. {clip(step, 60)}\n"
+                for i, step in enumerate(sop.get("steps", []), 1)
+            ],
+            remaining,
+            "more step(s)",
+        )
+        text = head + steps
+        if notes:
+            text += "\nSAFETY REQUIREMENTS FROM SOP:\n" + notes
+        return text, notes_cut or steps_cut
+
+    @staticmethod
+    def _fit(lines: List[str], budget: int, label: str) -> Tuple[str, int, bool]:
+        """Leading lines that fit the budget, (text, budget left, cut)"""
+        kept = []
+        for line in lines:
+            cost = estimate_tokens(line)
+            if cost > budget:
+                break
+            kept.append(line)
+            budget -= cost
+        omitted = len(lines) - len(kept)
+        if omitted:
+            kept.append(f"... {omitted} {label} omitted\n")
+        return "".join(kept), budget, omitted > 0
+
+    def _record(self, alert_type: str, tokens: int, truncated: List[str]) -> None:
+        metrics.inc("prompt_tokens_total", tokens, alert_type=alert_type)
+        with self._lock:
+            entry = self._by_type.setdefault(
+                alert_type, {"prompts": 0, "tokens": 0, "max_tokens": 0}
+            )
+            entry["prompts"] += 1
+            entry["tokens"] += tokens
+            entry["max_tokens"] = max(entry["max_tokens"], tokens)
+            for section in truncated:
+                self._truncated[section] += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            by_type = {
+                alert_type: {
+                    "prompts": entry["prompts"],
+                    "mean_tokens": round(entry["tokens"] / entry["prompts"]),
+                    "max_tokens": entry["max_tokens"],
+                }
+                for alert_type, entry in self._by_type.items()
+            }
+            truncated = dict(self._truncated)
+        return {
+            "static_tokens": STATIC_TOKENS,
+            "budgets": dict(self.budgets),
+            "by_alert_type": by_type,
+            "truncated": truncated,
+        }
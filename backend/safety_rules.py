@@ -0,0 +1,865 @@
+"""
+Script safety rule packs
+Per-language rule files compiled once into matchers and hot-reloaded when
+the files change
+"""
+
+import glob
+import os
+import posixpath
+import re
+import shlex
+import time
+from typing import Callable, Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+
+from backend.context_cache import DEFAULT_DATA_DIR, CachedJSONFile
+from backend.script_lexer import (
+    BASH,
+    POWERSHELL,
+    Command,
+    Dialect,
+    ParsedScript,
+    dialect_for,
+    parse,
+)
+
+# Applied to every language when no rule pack files are present
+BUILTIN_PACK = {
+    "dangerous": [
+        {"id": "rm-rf-root", "pattern": r"rm\s+-rf\s+/"},
+        {
+            "id": "del-force-quiet",
+            "pattern": r"del\s+/[fF]\s+/[sS]\s+/[qQ]\s+C:\\\\_drive",
+        },
+        {"id": "drop-database", "pattern": r"DROP\s+DATABASE"},
+        {"id": "shutdown", "pattern": r"shutdown\s+/[sS]"},
+        {"id": "format-c", "pattern": r"format\s+[cC]:"},
+        {"id": "reg-delete-hklm", "pattern": r"reg\s+delete.*HKLM"},
+        {"id": "chmod-777-root", "pattern": r"chmod\s+777\s+/"},
+        {"id": "overwrite-disk", "pattern": r"> /dev/sda"},
+        {"id": "fork-bomb", "pattern": r":\(\)\s*\{\s*:\|:&\s*\};:"},
+        {"id": "remove-windows", "pattern": r"Remove-Item.*-Recurse.*C:\\\\Windows"},
+    ],
+    "required": [
+        {"id": "path-validation", "pattern": r"Test-Path"},
+        {"id": "error-handling", "pattern": r"try.*catch"},
+    ],
+    "backup_pattern": r"backup",
+}
+
+LANGUAGE_ALIASES = {
+    "ps": "powershell",
+    "ps1": "powershell",
+    "pwsh": "powershell",
+    "sh": "bash",
+    "shell": "bash",
+}
+
+# Rule sets at least this large build a token vocabulary of the script first,
+# so rules whose keyword never occurs are skipped without touching the script
+VOCABULARY_MIN_RULES = 32
+
+_METACHARS = set(".^$*+?{}[]\\|()")
+
+
+def fold_case(pattern: str) -> str:
+    """
+    Lowercase a regex's literals, leaving escape sequences (\\S, \\W) alone
+    Matching the folded pattern against lowercased text replaces IGNORECASE,
+    which disables the regex engine's fast literal search
+    """
+    out = []
+    i = 0
+    while i < len(pattern):
+        if pattern[i] == "\\":
+            out.append(pattern[i : i + 2])
+            i += 2
+        else:
+            out.append(pattern[i].lower())
+            i += 1
+    return "".join(out)
+
+
+def literal_prefix(pattern: str) -> str:
+    """
+    Literal text every match must start with ("" if there is none)
+    Used as a str.find prefilter before running the regex
+    """
+    runs = _literal_runs(pattern)
+    return runs[0][1] if runs and runs[0][0] == 0 else ""
+
+
+def required_literals(pattern: str) -> List[str]:
+    """Every literal run a match must contain, in pattern order"""
+    return [run for _, run in _literal_runs(pattern)]
+
+
+def _literal_runs(pattern: str) -> List[Tuple[int, str]]:
+    """
+    (offset, text) of the literal runs in the pattern's top-level sequence
+    Groups, classes and escapes like \\s break a run; a character made
+    optional by *, ? or {m,n} is dropped from it. Top-level alternation means
+    nothing is required, so no runs are returned.
+    """
+    if _has_top_level_alternation(pattern):
+        return []
+    runs: List[Tuple[int, str]] = []
+    current: List[str] = []
+    start = 0
+    i = 0
+
+    def close(at: int) -> None:
+        nonlocal current, start
+        if current:
+            runs.append((start, "".join(current)))
+        current = []
+        start = at
+
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\" and i + 1 < len(pattern) and not pattern[i + 1].isalnum():
+            literal, width = pattern[i + 1], 2
+        elif char not in _METACHARS:
+            literal, width = char, 1
+        else:
+            close(i + 1)
+            if char == "[":
+                i = _skip_class(pattern, i)
+            elif char == "(":
+                i = _skip_group(pattern, i)
+            elif char == "{":
+                i = pattern.find("}", i) + 1 or len(pattern)
+            else:
+                i += 2 if char == "\\" else 1
+            if i < len(pattern) and pattern[i] in "*?{+":
+                close(i + 1)
+            continue
+
+        i += width
+        quantifier = pattern[i : i + 1]
+        if quantifier in ("*", "?", "{"):
+            close(i)  # optional: the literal is not part of the run
+        else:
+            if not current:
+                start = i - width
+            current.append(literal)
+            if quantifier == "+":
+                close(i + 1)
+    close(len(pattern))
+    return runs
+
+
+def _skip_class(pattern: str, i: int) -> int:
+    """Index just past the character class starting at pattern[i] == '['"""
+    i += 1
+    if pattern[i : i + 1] == "^":
+        i += 1
+    if pattern[i : i + 1] == "]":
+        i += 1
+    while i < len(pattern) and pattern[i] != "]":
+        i += 2 if pattern[i] == "\\" else 1
+    return i + 1
+
+
+def _skip_group(pattern: str, i: int) -> int:
+    """Index just past the group starting at pattern[i] == '('"""
+    depth = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            i += 2
+            continue
+        if char == "[":
+            i = _skip_class(pattern, i)
+            continue
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return i
+
+
+def _has_top_level_alternation(pattern: str) -> bool:
+    depth = 0
+    in_class = False
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            i += 2
+            continue
+        if in_class:
+            in_class = char != "]"
+        elif char == "[":
+            in_class = True
+            if pattern[i + 1 : i + 2] == "]":
+                i += 1  # a leading ] is a literal inside the class
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "|" and depth == 0:
+            return True
+        i += 1
+    return False
+
+
+class CompiledRule(NamedTuple):
+    id: str
+    pattern: str
+    regex: re.Pattern
+    prefix: str
+    # Whitespace-free pieces of the literals every match contains: each must
+    # sit inside a single whitespace-delimited token of a matching script
+    keywords: Tuple[str, ...]
+
+    @classmethod
+    def build(cls, rule: Dict) -> "CompiledRule":
+        pattern = rule["pattern"]
+        folded = fold_case(pattern)
+        try:
+            regex = re.compile(folded)
+        except re.error as e:
+            raise ValueError(f"rule {rule.get('id', pattern)!r}: {e}") from e
+        keywords = tuple(
+            dict.fromkeys(
+                piece
+                for literal in required_literals(folded)
+                for piece in literal.split()
+            )
+        )
+        rule_id = rule.get("id", pattern)
+        return cls(rule_id, pattern, regex, literal_prefix(folded), keywords)
+
+    def search(self, text: str) -> bool:
+        """text must already be lowercased"""
+        start = 0
+        if self.prefix:
+            start = text.find(self.prefix)
+            if start < 0:
+                return False
+        return self.regex.search(text, start) is not None
+
+
+def _strings(value, field: str) -> Tuple[str, ...]:
+    """A rule field given as one string or a list of strings, lowercased"""
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+        raise ValueError(f"{field} must be a string or a list of strings")
+    return tuple(v.lower() for v in value)
+
+
+_BRACED_VARIABLE = re.compile(r"\$\{([^}]*)\}")
+_ABSOLUTE = re.compile(r"[/\\$~]|[a-z][\w]*:")
+_DRIVE = re.compile(r"[a-z]:(?:/|$)")
+
+
+def _normalize_path(arg: str) -> Optional[str]:
+    """
+    Comparable form of a path argument: / separators, no trailing slash or
+    glob, `..` resolved, ${env:windir} spelled $env:windir
+    ("C:\\Windows\\*" -> "c:/windows", "/" -> ""); None for a bare glob
+    """
+    path = _BRACED_VARIABLE.sub(r"$\1", arg).replace("\\", "/")
+    path = re.sub("/+", "/", path)
+    if path not in ("", "/") and ".." in path:
+        path = posixpath.normpath(path)
+    normalized = path.rstrip("/*")
+    if not normalized and not path.startswith("/"):
+        return None
+    return normalized
+
+
+def _resolve(arg: str, cwd: Optional[str]) -> str:
+    """A relative path argument joined to the known working directory"""
+    if cwd is None or _ABSOLUTE.match(arg):
+        return arg
+    return f"{cwd}/{arg}"
+
+
+# cd / Set-Location and friends: the directory relative paths resolve against
+_CHANGE_DIRECTORY = frozenset(
+    ("cd", "chdir", "pushd", "set-location", "sl", "push-location")
+)
+
+
+def working_directory(command: Command, cwd: Optional[str]) -> Optional[str]:
+    """Working directory after command (None once it is unknown)"""
+    if command.name not in _CHANGE_DIRECTORY:
+        return cwd
+    targets = [a for a in command.args if not a.startswith("-")]
+    if not targets:
+        return None  # home directory, or a -Path we cannot see
+    target = targets[0]
+    if _ABSOLUTE.match(target):
+        return target
+    return f"{cwd}/{target}" if cwd is not None else None
+
+
+class CommandRule(NamedTuple):
+    """
+    Rule matched against parsed commands rather than raw text, so comments,
+    strings and line layout cannot hide or fake a match
+    """
+
+    id: str
+    description: str
+    commands: FrozenSet[str]
+    # Every group needs one of its spellings among the flags
+    flags: Tuple[Tuple[str, ...], ...]
+    args: Tuple[str, ...]  # exact arguments that must all be present
+    paths: FrozenSet[str]  # a path argument naming one of these exactly...
+    under: Tuple[str, ...]  # ...or one of these or anything below it...
+    allowed: Tuple[str, ...] = ()  # ...unless it is one of these or below it
+    # A target that cannot be resolved statically (see unresolved) is
+    # treated as a match: recursive deletes fail closed
+    reject_unresolved: bool = False
+
+    @classmethod
+    def build(cls, rule: Dict) -> "CommandRule":
+        rule_id = rule.get("id", str(rule["command"]))
+        try:
+            flags = tuple(_strings(group, "flags") for group in rule.get("flags", []))
+            paths = [
+                _normalize_path(p) for p in _strings(rule.get("paths", []), "paths")
+            ]
+            under = [
+                _normalize_path(p) for p in _strings(rule.get("under", []), "under")
+            ]
+            allowed = [
+                _normalize_path(p)
+                for p in _strings(rule.get("except_under", []), "except_under")
+            ]
+            if None in paths or any(not root for root in under + allowed):
+                raise ValueError(
+                    "bare glob in paths, or root in under (list it in paths)"
+                )
+            return cls(
+                rule_id,
+                rule.get("description", rule_id),
+                frozenset(_strings(rule["command"], "command")),
+                flags,
+                _strings(rule.get("args", []), "args"),
+                frozenset(paths),
+                tuple(under),
+                tuple(allowed),
+                bool(rule.get("reject_unresolved", False)),
+            )
+        except ValueError as e:
+            raise ValueError(f"rule {rule_id!r}: {e}") from e
+
+    def _applies(self, command: Command, dialect: Dialect) -> bool:
+        """The command, its flags and its exact arguments match"""
+        if command.name not in self.commands:
+            return False
+        args = command.args
+        for group in self.flags:
+            # rm, chmod and friends parse their own flags Unix-style (-rf)
+            # whichever shell started them
+            if not any(
+                dialect.flag_matches(a, f) or BASH.flag_matches(a, f)
+                for a in args
+                for f in group
+            ):
+                return False
+        return all(arg in args for arg in self.args)
+
+    def matches(
+        self, command: Command, dialect: Dialect, cwd: Optional[str] = None
+    ) -> bool:
+        """cwd: working directory relative path arguments resolve against"""
+        if not self._applies(command, dialect):
+            return False
+        if not self.paths and not self.under:
+            return True
+        for arg in command.args:
+            if arg.startswith("-"):
+                continue
+            path = _normalize_path(_resolve(arg, cwd))
+            if path is None:
+                continue
+            if any(
+                path == root or path.startswith(root + "/") for root in self.allowed
+            ):
+                continue
+            if path in self.paths or any(
+                path == root or path.startswith(root + "/") for root in self.under
+            ):
+                return True
+        return False
+
+    def unresolved(
+        self, command: Command, dialect: Dialect, cwd: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        For a reject_unresolved rule the command applies to, the target that
+        cannot be checked: pipeline input, a variable or computed path the
+        rule does not name, or a .. that does not resolve to an absolute path
+        """
+        if not self.reject_unresolved or not self._applies(command, dialect):
+            return None
+        if command.piped:
+            return "pipeline input"
+        known = tuple(
+            root for root in (*self.paths, *self.under, *self.allowed) if "$" in root
+        )
+        for arg in command.args:
+            if arg.startswith("-"):
+                continue
+            resolved = _resolve(arg, cwd)
+            path = _normalize_path(resolved)
+            if path is None or any(
+                path == root or path.startswith(root + "/") for root in known
+            ):
+                continue
+            if "$" in path or "%" in path:
+                return arg
+            if ".." in resolved.replace("\\", "/").split("/") and not (
+                path == "" or path.startswith("/") or _DRIVE.match(path)
+            ):
+                return arg
+        return None
+
+
+# Nested scripts deeper than this are rejected rather than inspected
+MAX_NESTING = 4
+
+_SHELLS = frozenset(("bash", "sh", "zsh", "dash", "ksh", "su"))
+# Unix commands that run their arguments as a command (pwsh on Linux)
+_WRAPPERS = BASH.wrappers
+_POWERSHELLS = frozenset(("powershell", "pwsh"))
+# powershell.exe options that take a value (skipped to find a positional command)
+_POWERSHELL_VALUE_FLAGS = (
+    "-executionpolicy",
+    "-windowstyle",
+    "-inputformat",
+    "-outputformat",
+    "-configurationname",
+    "-workingdirectory",
+    "-version",
+    "-psconsolefile",
+)
+_DYNAMIC = re.compile(r"\$(?:\{[^}]*\}|[\w:]+)")
+
+
+def nested_scripts(
+    command: Command, dialect: Dialect
+) -> List[Tuple[Optional[str], Dialect]]:
+    """
+    (source, dialect) of each script the command runs from its arguments:
+    eval, sudo / env outside Bash, bash/sh -c, powershell/pwsh -Command / -EncodedCommand / positional
+    command, cmd /c, Invoke-Expression / iex, and Start-Process of one of
+    those. source is None when the code cannot be inspected: it is only a
+    variable, arrives on the pipeline, or is -EncodedCommand.
+    """
+    name = command.name
+    if name.endswith(".exe"):
+        name = name[:-4]
+    args = command.args
+
+    def code(text: str, nested: Dialect) -> List[Tuple[Optional[str], Dialect]]:
+        text = text.strip()
+        if not text or _DYNAMIC.fullmatch(text):
+            return [(None, nested)]
+        return [(text, nested)]
+
+    if name == "eval":
+        return code(" ".join(args), BASH)
+    if name in _WRAPPERS and dialect is not BASH:
+        # Re-read as a Bash command line, where sudo / env are unwrapped
+        return [(" ".join([name] + [shlex.quote(a) for a in args]), BASH)]
+    if name in _SHELLS:
+        for i, arg in enumerate(args):
+            if arg == "-c" or (
+                arg[:1] == "-" and arg[1:2] != "-" and arg[1:].isalpha() and "c" in arg
+            ):
+                return code(args[i + 1] if i + 1 < len(args) else "", BASH)
+        return []
+    if name in ("invoke-expression", "iex"):
+        rest = [a for a in args if not POWERSHELL.flag_matches(a, "-command")]
+        return code(" ".join(rest), POWERSHELL)
+    if name in _POWERSHELLS:
+        i = 0
+        while i < len(args):
+            arg = args[i]
+            if POWERSHELL.flag_matches(arg, "-command"):
+                return code(" ".join(args[i + 1 :]), POWERSHELL)
+            if POWERSHELL.flag_matches(arg, "-encodedcommand") or arg == "-ec":
+                # base64 is case sensitive and arguments are lowercased
+                return [(None, POWERSHELL)]
+            if POWERSHELL.flag_matches(arg, "-file"):
+                return []
+            if not arg.startswith("-"):
+                return code(" ".join(args[i:]), POWERSHELL)
+            takes_value = any(
+                POWERSHELL.flag_matches(arg, flag) for flag in _POWERSHELL_VALUE_FLAGS
+            )
+            i += 2 if takes_value else 1
+        return []
+    if name == "cmd":
+        for i, arg in enumerate(args):
+            if arg in ("/c", "/k"):
+                # cmd syntax is closest to PowerShell's for reg / del / rd
+                return code(" ".join(args[i + 1 :]), POWERSHELL)
+        return []
+    if name in ("start-process", "saps", "start"):
+        target = None
+        arguments: List[str] = []
+        i = 0
+        while i < len(args):
+            arg = args[i]
+            if POWERSHELL.flag_matches(arg, "-filepath"):
+                target = args[i + 1] if i + 1 < len(args) else None
+                i += 2
+            elif POWERSHELL.flag_matches(arg, "-argumentlist") or arg == "-args":
+                arguments.extend(args[i + 1 : i + 2])
+                i += 2
+            elif arg.startswith("-"):
+                i += 1
+            elif target is None:
+                target = arg
+                i += 1
+            else:
+                arguments.append(arg)
+                i += 1
+        if target is None:
+            return []
+        program = _normalize_path(target) or ""
+        program = program.rsplit("/", 1)[-1]
+        if program.endswith(".exe"):
+            program = program[:-4]
+        if program in _POWERSHELLS or program in _SHELLS or program == "cmd":
+            text = " ".join(a.replace(",", " ") for a in arguments)
+            # Re-read as the program's own command line
+            return [(f"{program} {text}", POWERSHELL)]
+        return []
+    return []
+
+
+# Structural checks a pack can list under "required" ({"check": name})
+CHECKS = frozenset(("error-handling",))
+
+
+class RulePack(NamedTuple):
+    dangerous: List[CompiledRule]
+    required: List[CompiledRule]
+    backup: Optional[CompiledRule]
+    dangerous_commands: List[CommandRule] = []
+    required_commands: List[CommandRule] = []
+    checks: FrozenSet[str] = frozenset()
+    delete_commands: FrozenSet[str] = frozenset()
+    backup_commands: FrozenSet[str] = frozenset()
+    error_handlers: List[CommandRule] = []
+
+
+def _split_rules(rules, section: str) -> Tuple[List[CompiledRule], List[CommandRule]]:
+    if not isinstance(rules, list) or not all(isinstance(r, dict) for r in rules):
+        raise ValueError(f"{section} must be a list of rule objects")
+    return (
+        [CompiledRule.build(r) for r in rules if "pattern" in r],
+        [CommandRule.build(r) for r in rules if "command" in r],
+    )
+
+
+def compile_pack(data: Dict) -> RulePack:
+    """Compile one pack file; raises ValueError so a bad edit is rejected whole"""
+    if not isinstance(data, dict):
+        raise ValueError("rule pack must be a JSON object")
+    dangerous, dangerous_commands = _split_rules(data.get("dangerous", []), "dangerous")
+    required_rules = data.get("required", [])
+    required, required_commands = _split_rules(required_rules, "required")
+    checks = frozenset(r["check"] for r in required_rules if "check" in r)
+    if checks - CHECKS:
+        raise ValueError(f"unknown checks: {sorted(checks - CHECKS)}")
+    backup = data.get("backup_pattern")
+    return RulePack(
+        dangerous,
+        required,
+        CompiledRule.build({"id": "backup", "pattern": backup}) if backup else None,
+        dangerous_commands,
+        required_commands,
+        checks,
+        frozenset(_strings(data.get("delete_commands", []), "delete_commands")),
+        frozenset(_strings(data.get("backup_commands", []), "backup_commands")),
+        _split_rules(data.get("error_handlers", []), "error_handlers")[1],
+    )
+
+
+class RuleSet:
+    """
+    Every rule that applies to one language, ready to scan scripts
+    Regex rules cost one lowercase pass plus a prefix search per candidate
+    rule; above VOCABULARY_MIN_RULES, rules with a required literal that does
+    not occur in the script's token vocabulary are skipped without scanning
+    the script. Command rules and checks run over the script's commands from
+    one linear lexer pass, and the regex rules then see the script with its
+    comments blanked out. Scripts nested in string arguments (bash -c, iex)
+    are checked with the rule set of their own language, from nested.
+    """
+
+    def __init__(
+        self,
+        packs: List[RulePack],
+        version: Tuple,
+        dialect: Dialect = BASH,
+        nested: Optional[Callable[[str], "RuleSet"]] = None,
+    ):
+        self.version = version
+        self.dialect = dialect
+        self.nested = nested
+        self.dangerous = [rule for pack in packs for rule in pack.dangerous]
+        self.required = [rule for pack in packs for rule in pack.required]
+        backups = [pack.backup for pack in packs if pack.backup is not None]
+        self.backup = backups[-1] if backups else None  # most specific pack wins
+
+        self.command_rules: Dict[str, List[CommandRule]] = {}
+        for pack in packs:
+            for rule in pack.dangerous_commands:
+                for name in rule.commands:
+                    self.command_rules.setdefault(name, []).append(rule)
+        self.required_commands = [r for pack in packs for r in pack.required_commands]
+        self.checks = frozenset().union(*(pack.checks for pack in packs))
+        self.delete_commands = frozenset().union(
+            *(pack.delete_commands for pack in packs)
+        )
+        self.backup_commands = frozenset().union(
+            *(pack.backup_commands for pack in packs)
+        )
+        self.error_handlers = [r for pack in packs for r in pack.error_handlers]
+        self.needs_commands = bool(
+            self.command_rules
+            or self.required_commands
+            or self.checks
+            or self.delete_commands
+        )
+        self.rule_count = (
+            len(self.dangerous)
+            + len(self.required)
+            + len(backups)
+            + sum(len(pack.dangerous_commands) for pack in packs)
+            + len(self.required_commands)
+            + len(self.checks)
+        )
+
+    def scan(self, script: str) -> Dict:
+        parsed = parse(script, self.dialect) if self.needs_commands else None
+        text = parsed.code if parsed is not None else script.lower()
+        vocabulary = None
+        if self.rule_count >= VOCABULARY_MIN_RULES:
+            vocabulary = "\n".join(set(text.split()))
+
+        def matches(rule: CompiledRule) -> bool:
+            if vocabulary is not None and not all(
+                keyword in vocabulary for keyword in rule.keywords
+            ):
+                return False
+            return rule.search(text)
+
+        issues = [
+            f"CRITICAL: Dangerous command pattern detected: {rule.pattern}"
+            for rule in self.dangerous
+            if matches(rule)
+        ]
+        safety_score = sum(1 for rule in self.required if matches(rule))
+        if parsed is not None:
+            command_issues, command_score = self._scan_commands(parsed)
+            issues.extend(command_issues)
+            safety_score += command_score
+        # Packs listing delete_commands check for a backup before the first one
+        if self.backup is not None and not self.delete_commands:
+            if not matches(self.backup):
+                issues.append("WARNING: No backup step detected")
+
+        critical = any(issue.startswith("CRITICAL") for issue in issues)
+        return {
+            "is_safe": not critical,
+            "issues": issues,
+            "safety_score": safety_score,
+            "recommendation": "REJECTED" if critical else "APPROVED",
+        }
+
+    def _scan_commands(self, parsed: ParsedScript) -> Tuple[List[str], int]:
+        """(issues, safety score) from the command rules and structural checks"""
+        dialect = self.dialect
+        issues = []
+        handler_seen = False
+        backup_seen = False
+        deletes: List[Command] = []
+        unhandled: List[Command] = []
+        cwd: Optional[str] = None
+        for command in parsed.commands:
+            issues.extend(self._dangerous(command, dialect, cwd, command.line, 0))
+            cwd = working_directory(command, cwd)
+            if command.name in self.backup_commands or "backup" in command.name:
+                backup_seen = True
+            if not handler_seen and any(
+                rule.matches(command, dialect) for rule in self.error_handlers
+            ):
+                handler_seen = True
+            if command.name in self.delete_commands:
+                if not deletes and not backup_seen:
+                    issues.append(
+                        f"WARNING: No backup step before delete at line {command.line}"
+                    )
+                deletes.append(command)
+                # Handled inside a try block with a catch, or after a trap / set -e
+                if not handler_seen and not parsed.guarded(command):
+                    unhandled.append(command)
+
+        score = sum(
+            1
+            for rule in self.required_commands
+            if any(rule.matches(command, dialect) for command in parsed.commands)
+        )
+        if "error-handling" in self.checks:
+            if unhandled:
+                issues.append(
+                    f"WARNING: {len(unhandled)} delete command(s) without error "
+                    f"handling (first at line {unhandled[0].line})"
+                )
+            elif deletes or handler_seen or parsed.caught:
+                score += 1
+        return list(dict.fromkeys(issues)), score
+
+    def _dangerous(
+        self,
+        command: Command,
+        dialect: Dialect,
+        cwd: Optional[str],
+        line: int,
+        depth: int,
+    ) -> List[str]:
+        """
+        Dangerous-command issues for one command and, recursively, for the
+        scripts it runs from string arguments (reported at the outer line)
+        """
+        issues = []
+        for rule in self.command_rules.get(command.name, ()):
+            if rule.matches(command, dialect, cwd):
+                issues.append(
+                    f"CRITICAL: Dangerous command at line {line}: {rule.description}"
+                )
+                continue
+            target = rule.unresolved(command, dialect, cwd)
+            if target is not None:
+                issues.append(
+                    f"CRITICAL: Dangerous command at line {line}: {rule.description}"
+                    f" (target cannot be inspected: {target})"
+                )
+        for source, nested_dialect in nested_scripts(command, dialect):
+            if source is None or depth >= MAX_NESTING:
+                issues.append(
+                    f"CRITICAL: Dangerous command at line {line}: runs code "
+                    f"that cannot be inspected ({command.name})"
+                )
+                continue
+            ruleset = self.nested(nested_dialect.name) if self.nested else self
+            nested = parse(source, nested_dialect)
+            issues.extend(
+                f"CRITICAL: Dangerous command pattern detected: {rule.pattern}"
+                for rule in ruleset.dangerous
+                if rule.search(nested.code)
+            )
+            nested_cwd = cwd
+            for inner in nested.commands:
+                issues.extend(
+                    ruleset._dangerous(
+                        inner, nested_dialect, nested_cwd, line, depth + 1
+                    )
+                )
+                nested_cwd = working_directory(inner, nested_cwd)
+        return issues
+
+
+class SafetyRulePacks:
+    """
+    Rule packs in SAFETY_RULES_DIR: common.json applies to every language,
+    <language>.json adds language-specific rules. Unknown languages get every
+    pack. Files are re-checked at most once per check_interval; an edited pack
+    is compiled off to the side and swapped in whole, and a pack that fails to
+    parse or compile keeps serving its last good version.
+    """
+
+    COMMON = "common"
+
+    def __init__(self, rules_dir: Optional[str] = None, check_interval: float = None):
+        self.rules_dir = rules_dir or os.getenv(
+            "SAFETY_RULES_DIR", os.path.join(DEFAULT_DATA_DIR, "safety_rules")
+        )
+        if check_interval is None:
+            check_interval = float(os.getenv("SAFETY_RULES_CHECK_INTERVAL", "1.0"))
+        self.check_interval = check_interval
+        self._files: Dict[str, CachedJSONFile] = {}
+        self._rulesets: Dict[str, RuleSet] = {}
+        self._names: List[str] = []
+        self._listed_at = float("-inf")
+        self._builtin = RuleSet([compile_pack(BUILTIN_PACK)], ("builtin",))
+
+    def _pack(self, name: str) -> Optional[RulePack]:
+        cached = self._files.get(name)
+        if cached is None:
+            cached = self._files.setdefault(
+                name,
+                CachedJSONFile(
+                    os.path.join(self.rules_dir, f"{name}.json"),
+                    default=None,
+                    transform=compile_pack,
+                    check_interval=self.check_interval,
+                    keep_last_good=True,
+                ),
+            )
+        return cached.get()
+
+    def pack_names(self) -> List[str]:
+        """Pack files on disk (listed at most once per check_interval)"""
+        now = time.monotonic()
+        if now - self._listed_at >= self.check_interval:
+            self._listed_at = now
+            paths = glob.glob(os.path.join(self.rules_dir, "*.json"))
+            self._names = sorted(
+                os.path.splitext(os.path.basename(p))[0] for p in paths
+            )
+        return self._names
+
+    def ruleset(self, language: str) -> RuleSet:
+        language = (language or "").lower()
+        language = LANGUAGE_ALIASES.get(language, language)
+        available = self.pack_names()
+        if language in available and language != self.COMMON:
+            names = [language]
+        else:
+            names = [n for n in available if n != self.COMMON]
+        if self.COMMON in available:
+            names.insert(0, self.COMMON)
+
+        loaded = {name: self._pack(name) for name in available}
+        packs = [loaded[name] for name in names if loaded.get(name) is not None]
+        if not packs:
+            return self._builtin
+
+        # Nested scripts are checked with other languages' packs, so an edit
+        # to any pack is a new version of every rule set
+        version = (tuple(names),) + tuple(
+            (name, self._files[name].version)
+            for name in available
+            if loaded[name] is not None
+        )
+        ruleset = self._rulesets.get(language)
+        if ruleset is None or ruleset.version != version:
+            ruleset = RuleSet(packs, version, dialect_for(language), self.ruleset)
+            self._rulesets[language] = ruleset
+        return ruleset
+
+    def stats(self) -> Dict:
+        return {
+            "rules_dir": self.rules_dir,
+            "packs": {
+                name: cached.stats()
+                for name, cached in self._files.items()
+                if cached.stats()["loaded"]
+            },
+        }
@@ -3,67 +3,101 @@ Script execution engine with safety validation
 Simulates RMM API execution for demo purposes
 """
 
+import asyncio
+import codecs
+import hashlib
 import subprocess
 import os
+import shlex
+import shutil
+import signal
+import tempfile
+import threading
 import time
-import re
-from typing import Dict, List
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from backend.instrumentation import metrics
+from backend.output_buffer import OutputBuffer
+from backend.safety_rules import SafetyRulePacks
+
+# Bytes read from a running script's stdout per await
+OUTPUT_CHUNK_SIZE = 64 * 1024
+
+# Command each language's script file is passed to (as the last argument)
+DEFAULT_INTERPRETERS = {
+    "powershell": ["powershell", "-ExecutionPolicy", "Bypass", "-File"],
+    "bash": ["bash"],
+}
+SCRIPT_SUFFIXES = {"powershell": ".ps1", "bash": ".sh"}
+
+
+def interpreters_from_env() -> Dict[str, List[str]]:
+    """
+    DEFAULT_INTERPRETERS with EXECUTION_INTERPRETER_<LANGUAGE> overrides,
+    e.g. EXECUTION_INTERPRETER_POWERSHELL="pwsh -NoProfile -File"
+    """
+    interpreters = {}
+    for language, command in DEFAULT_INTERPRETERS.items():
+        override = os.getenv(f"EXECUTION_INTERPRETER_{language.upper()}")
+        interpreters[language] = shlex.split(override) if override else command
+    return interpreters
 
 
 class ScriptSafetyValidator:
-    """Validates PowerShell scripts for dangerous patterns"""
-
-    DANGEROUS_PATTERNS = [
-        r"rm\s+-rf\s+/",
-        r"del\s+/[fF]\s+/[sS]\s+/[qQ]\s+C:\\\\_drive",
-        r"DROP\s+DATABASE",
-        r"shutdown\s+/[sS]",
-        r"format\s+[cC]:",
-        r"reg\s+delete.*HKLM",
-        r"chmod\s+777\s+/",
-        r"> /dev/sda",
-        r":(){ :|:& };:",  # Fork bomb
-        r"Remove-Item.*-Recurse.*C:\\\\Windows",
-    ]
-
-    REQUIRED_SAFETY_PATTERNS = [
-        r"Test-Path",  # Path validation
-        r"try.*catch",  # Error handling
-    ]
+    """
+    Validates scripts against the rule packs for their language
+    Packs are compiled once and hot-reloaded (see backend.safety_rules);
+    verdicts are memoized by script hash and rule pack version, so the same
+    script is never scanned twice against the same rules.
+    """
+
+    def __init__(
+        self,
+        rule_packs: Optional[SafetyRulePacks] = None,
+        cache_size: Optional[int] = None,
+    ):
+        self.rule_packs = rule_packs or SafetyRulePacks()
+        self.cache_size = cache_size or int(os.getenv("VALIDATION_CACHE_SIZE", "1024"))
+        self._verdicts: "OrderedDict[Tuple, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
 
     def validate(self, script: str, language: str = "powershell") -> Dict:
         """
         Validate script safety
         Returns: {is_safe: bool, issues: List[str], safety_score: int}
         """
-        issues = []
-
-        # Check for dangerous patterns
-        for pattern in self.DANGEROUS_PATTERNS:
-            if re.search(pattern, script, re.IGNORECASE):
-                issues.append(
-                    f"CRITICAL: Dangerous command pattern detected: {pattern}"
-                )
+        ruleset = self.rule_packs.ruleset(language)
+        digest = hashlib.sha256(script.encode()).hexdigest()
+        key = (digest, ruleset.version)
+        with self._lock:
+            verdict = self._verdicts.get(key)
+            if verdict is not None:
+                self._verdicts.move_to_end(key)
+                self.hits += 1
+                return self._copy(verdict)
+            self.misses += 1
 
-        # Check for safety measures
-        safety_score = 0
-        for pattern in self.REQUIRED_SAFETY_PATTERNS:
-            if re.search(pattern, script, re.IGNORECASE):
-                safety_score += 1
+        verdict = ruleset.scan(script)
+        with self._lock:
+            self._verdicts[key] = verdict
+            if len(self._verdicts) > self.cache_size:
+                self._verdicts.popitem(last=False)
+        return self._copy(verdict)
 
-        # Additional checks
-        if "backup" not in script.lower() and "Backup" not in script:
-            issues.append("WARNING: No backup step detected")
+    @staticmethod
+    def _copy(verdict: Dict) -> Dict:
+        return dict(verdict, issues=list(verdict["issues"]))
 
+    def stats(self) -> Dict:
         return {
-            "is_safe": len(issues) == 0 or all("WARNING" in issue for issue in issues),
-            "issues": issues,
-            "safety_score": safety_score,
-            "recommendation": (
-                "APPROVED"
-                if len([i for i in issues if "CRITICAL" in i]) == 0
-                else "REJECTED"
-            ),
+            "cached_verdicts": len(self._verdicts),
+            "hits": self.hits,
+            "misses": self.misses,
+            "rule_packs": self.rule_packs.stats(),
         }
 
 
@@ -77,42 +111,99 @@ class ScriptExecutor:
     def __init__(self):
         self.validator = ScriptSafetyValidator()
         self.demo_mode = True  # Set to False for real execution
+        self.timeout = int(os.getenv("EXECUTION_TIMEOUT", "300"))
+        self.interpreters = interpreters_from_env()
+        # Parent directory for per-execution sandboxes (system temp dir if unset)
+        self.sandbox_root = os.getenv("EXECUTION_SANDBOX_DIR") or None
 
     def execute_script(
-        self, script_content: str, script_language: str = "powershell"
+        self,
+        script_content: str,
+        script_language: str = "powershell",
+        validation: Optional[Dict] = None,
     ) -> Dict:
         """
         Execute remediation script
+        Pass the caller's validation verdict to skip validating the script again
         Returns: {status, output, exit_code, execution_time}
         """
         start_time = time.time()
 
-        # Validate safety first
-        validation = self.validator.validate(script_content, script_language)
-        if not validation["is_safe"]:
-            return {
-                "status": "rejected",
-                "output": "Script failed safety validation:\\n"
-                + "\\n".join(validation["issues"]),
-                "exit_code": 1,
-                "execution_time": 0,
-            }
+        rejection = self._check_safety(script_content, script_language, validation)
+        if rejection:
+            return rejection
 
         # For demo: simulate execution
-        if self.demo_mode:
-            if script_language == "powershell":
-                result = self._simulate_powershell_execution(script_content)
+        with metrics.span("execution"):
+            if self.demo_mode:
+                result = self._simulate_execution(script_content, script_language)
+            else:
+                # Real execution (use with caution!)
+                result = self._real_execution(script_content, script_language)
+
+        execution_time = time.time() - start_time
+        result["execution_time"] = round(execution_time, 2)
+
+        return result
+
+    async def execute_script_async(
+        self,
+        script_content: str,
+        script_language: str = "powershell",
+        validation: Optional[Dict] = None,
+        output: Optional[OutputBuffer] = None,
+    ) -> Dict:
+        """
+        execute_script for the job queue: real runs use an asyncio subprocess,
+        so the event loop stays free and cancelling the task kills the script.
+        Output lines are written to `output` as they arrive; the result holds
+        what the buffer retained.
+        """
+        start_time = time.time()
+        if output is None:
+            output = OutputBuffer()
+
+        rejection = self._check_safety(script_content, script_language, validation)
+        if rejection:
+            return rejection
+
+        with metrics.span("execution"):
+            if self.demo_mode:
+                result = self._simulate_execution(script_content, script_language)
+                output.write(result["output"])
+                output.flush()
             else:
-                result = self._simulate_bash_execution(script_content)
-        else:
-            # Real execution (use with caution!)
-            result = self._real_execution(script_content, script_language)
+                result = await self._real_execution_async(
+                    script_content, script_language, output
+                )
 
         execution_time = time.time() - start_time
         result["execution_time"] = round(execution_time, 2)
 
         return result
 
+    def _check_safety(
+        self, script: str, language: str, validation: Optional[Dict]
+    ) -> Optional[Dict]:
+        """Rejection result for an unsafe script, None if it may run"""
+        if validation is None:
+            with metrics.span("validation"):
+                validation = self.validator.validate(script, language)
+        if validation["is_safe"]:
+            return None
+        return {
+            "status": "rejected",
+            "output": "Script failed safety validation:\\n"
+            + "\\n".join(validation["issues"]),
+            "exit_code": 1,
+            "execution_time": 0,
+        }
+
+    def _simulate_execution(self, script: str, language: str) -> Dict:
+        if language == "powershell":
+            return self._simulate_powershell_execution(script)
+        return self._simulate_bash_execution(script)
+
     def _simulate_powershell_execution(self, script: str) -> Dict:
         """Simulate PowerShell execution for demo"""
         # Realistic output based on disk cleanup script
@@ -143,44 +234,131 @@ Cleanup complete"""
         Real script execution (disabled in demo)
         WARNING: Only use in controlled environments
         """
+        if language not in self.interpreters:
+            return self._unsupported(language)
         try:
-            if language == "powershell":
-                # Write script to temp file
-                script_path = "temp_script.ps1"
-                with open(script_path, "w") as f:
-                    f.write(script)
-
-                # Execute PowerShell script
+            with self._sandbox(script, language) as (directory, script_path):
                 result = subprocess.run(
-                    ["powershell", "-ExecutionPolicy", "Bypass", "-File", script_path],
+                    self.interpreters[language] + [script_path],
+                    cwd=directory,
                     capture_output=True,
                     text=True,
-                    timeout=300,  # 5 minute timeout
+                    timeout=self.timeout,
                 )
 
-                # Clean up
-                os.remove(script_path)
-
-                return {
-                    "status": "success" if result.returncode == 0 else "failed",
-                    "output": result.stdout + result.stderr,
-                    "exit_code": result.returncode,
-                }
-            else:
-                return {
-                    "status": "failed",
-                    "output": f"Language {language} not supported for real execution",
-                    "exit_code": 1,
-                }
+            return {
+                "status": "success" if result.returncode == 0 else "failed",
+                "output": result.stdout + result.stderr,
+                "exit_code": result.returncode,
+            }
         except subprocess.TimeoutExpired:
+            return self._timed_out()
+        except Exception as e:
             return {
                 "status": "failed",
-                "output": "Script execution timed out after 5 minutes",
+                "output": f"Execution error: {str(e)}",
                 "exit_code": 1,
             }
+
+    async def _real_execution_async(
+        self, script: str, language: str, output: OutputBuffer
+    ) -> Dict:
+        """
+        _real_execution on an asyncio subprocess, streaming into output
+        The script is killed on timeout and when the awaiting task is cancelled
+        """
+        if language not in self.interpreters:
+            return self._unsupported(language)
+        try:
+            with self._sandbox(script, language) as (directory, script_path):
+                process = await asyncio.create_subprocess_exec(
+                    *self.interpreters[language],
+                    script_path,
+                    cwd=directory,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.STDOUT,
+                    # Own process group, so a kill also reaches anything it spawned
+                    start_new_session=os.name == "posix",
+                )
+                try:
+                    await asyncio.wait_for(
+                        self._pump(process, output), timeout=self.timeout
+                    )
+                except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+                    # Killed before the sandbox is removed, so nothing is
+                    # left writing into it
+                    self._kill(process)
+                    await process.wait()
+                    if isinstance(e, asyncio.CancelledError):
+                        raise
+                    result = self._timed_out()
+                    output.write_line(result["output"])
+                    return dict(result, output=output.text())
+
+            return {
+                "status": "success" if process.returncode == 0 else "failed",
+                "output": output.text(),
+                "exit_code": process.returncode,
+            }
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
             return {
                 "status": "failed",
                 "output": f"Execution error: {str(e)}",
                 "exit_code": 1,
             }
+
+    @contextmanager
+    def _sandbox(self, script: str, language: str) -> Iterator[Tuple[str, str]]:
+        """
+        Private working directory holding the script, removed afterwards
+        Yields (directory, script path); every execution gets its own, so
+        concurrent runs never share a file
+        """
+        directory = tempfile.mkdtemp(prefix="remediation-", dir=self.sandbox_root)
+        try:
+            script_path = os.path.join(directory, "script" + SCRIPT_SUFFIXES[language])
+            with open(script_path, "w") as f:
+                f.write(script)
+            yield directory, script_path
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    @staticmethod
+    async def _pump(process: asyncio.subprocess.Process, output: OutputBuffer) -> None:
+        """Copy the script's output into the buffer as it arrives"""
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        while True:
+            chunk = await process.stdout.read(OUTPUT_CHUNK_SIZE)
+            if not chunk:
+                break
+            output.write(decoder.decode(chunk))
+        output.write(decoder.decode(b"", final=True))
+        output.flush()
+        await process.wait()
+
+    @staticmethod
+    def _kill(process: asyncio.subprocess.Process) -> None:
+        try:
+            if os.name == "posix":
+                os.killpg(process.pid, signal.SIGKILL)
+            else:
+                process.kill()
+        except ProcessLookupError:
+            pass  # already exited
+
+    @staticmethod
+    def _unsupported(language: str) -> Dict:
+        return {
+            "status": "failed",
+            "output": f"Language {language} not supported for real execution",
+            "exit_code": 1,
+        }
+
+    def _timed_out(self) -> Dict:
+        return {
+            "status": "failed",
+            "output": f"Script execution timed out after {self.timeout}s",
+            "exit_code": 1,
+        }
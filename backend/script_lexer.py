@@ -0,0 +1,389 @@
+"""
+Linear-time PowerShell / Bash lexer
+Turns a script into one token stream, then into simple commands (name,
+arguments, line, enclosing try blocks) for token-level safety rules
+"""
+
+import re
+from typing import (
+    Dict,
+    FrozenSet,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Pattern,
+    Set,
+    Tuple,
+)
+
+# Every token pattern is a single pass over its characters (no nested
+# quantifiers, unterminated strings and comments run to the end of the
+# script), so lexing is O(n) however the script is written. A run of plain
+# space-separated words is one "words" match, split in C rather than matched
+# word by word.
+_POWERSHELL_TOKENS = re.compile(
+    r"""
+    (?:[ \t\r\f]|`\r?\n)*
+    (?:(?P<comment><\#(?:[^#]|\#(?!>))*(?:\#>)?|\#[^\n]*)
+    |(?P<string>
+        @"(?:[^\n]|\n(?!"@))*(?:\n"@)?
+        |@'(?:[^\n]|\n(?!'@))*(?:\n'@)?
+        |"(?:[^"`]|`[\s\S]|"")*"?
+        |'(?:[^']|'')*'?)
+    |(?P<words>WORD(?:[ \t]+WORD)*)(?=[\s;|&(){}]|\Z)
+    |(?P<variable>\$\{[^}]*\}?|\$[\w:?^$]+)
+    |(?P<open>[$@]\(|@\{|[({])
+    |(?P<close>[)}])
+    |(?P<separator>\n|;|&&|\|\||\||&)
+    |(?P<redirect>[\d*]?>>?(?:&\d)?|<)
+    |(?P<word>[^\s;|&(){}'"`<>]+|[\s\S]))
+    """.replace("WORD", r"""(?![$@][({'"])[^\s;|&(){}'"`<>\#][^\s;|&(){}'"`<>]*"""),
+    re.VERBOSE,
+)
+
+_BASH_TOKENS = re.compile(
+    r"""
+    (?:[ \t\r\f]|\\\n)*
+    (?:(?P<comment>\#[^\n]*)
+    |(?P<heredoc><<-?[ \t]*(?:'[^'\n]*'|"[^"\n]*"|\\?[\w.-]+))
+    |(?P<string>
+        '[^']*'?
+        |\$'(?:[^'\\]|\\[\s\S])*'?
+        |"(?:[^"\\]|\\[\s\S])*"?)
+    |(?P<words>WORD(?:[ \t]+WORD)*)(?=[\s;|&(){}]|\Z)
+    |(?P<variable>\$(?:\{[^}]*\}?|\w+|[@*\#?$!-]))
+    |(?P<open>\$\(\(?|[({])
+    |(?P<close>[)}])
+    |(?P<separator>\n|;;?|&&|\|\||\|&?|&|`)
+    |(?P<redirect>\d*(?:>>?|<<<|<>?|&>>?)(?:&\d*-?)?)
+    |(?P<word>[^\s;|&()<>'"`]+|[\s\S]))
+    """.replace("WORD", r"""(?!\$[({'])[^\s;|&()<>'"`\#{}][^\s;|&()<>'"`]*"""),
+    re.VERBOSE,
+)
+
+# Token kinds that make up a command's name and arguments
+ARGUMENT_KINDS = frozenset(("word", "string", "variable"))
+
+# Stands in for an argument computed by a subexpression (`rm -rf $(pwd)`),
+# whose own commands are parsed separately
+COMPUTED_ARGUMENT = "$(...)"
+_SUBEXPRESSIONS = frozenset(("$(", "$((", "@("))
+
+
+class Token(NamedTuple):
+    # word, string, variable, redirect, separator, open, close, or heredoc (the
+    # << operator and, as an empty token, the here-document body)
+    kind: str
+    value: str  # lowercased; strings without their quotes
+    start: int
+    end: int
+
+
+class Command(NamedTuple):
+    """One simple command: `Remove-Item -Path C:\\Temp -Recurse`"""
+
+    name: str  # lowercased, without any directory or module qualifier
+    args: Tuple[str, ...]  # flags split from their values ("-path:x" -> "-path", "x")
+    line: int
+    # Ids of the try blocks the command sits in (PowerShell only)
+    try_blocks: Tuple[int, ...] = ()
+    piped: bool = False  # reads the previous command's output (`... | rm`)
+
+
+class ParsedScript(NamedTuple):
+    commands: List[Command]
+    caught: Set[int]  # try block ids followed by a catch block
+    code: str  # the lowercased script with comments blanked out
+
+    def guarded(self, command: Command) -> bool:
+        """Whether the command runs inside a try block that has a catch"""
+        return any(block in self.caught for block in command.try_blocks)
+
+
+class Dialect(NamedTuple):
+    name: str
+    tokens: Pattern
+    # Words that may precede the real command name (`if`, `sudo`, `!`)
+    prefixes: FrozenSet[str]
+    # Prefixes whose own flags are skipped too (`sudo -u root rm ...`)
+    wrappers: FrozenSet[str]
+    value_separator: str  # "-path:x" (PowerShell) / "--path=x" (Bash)
+
+    def flag_matches(self, arg: str, flag: str) -> bool:
+        """
+        Whether an argument spells the flag
+        PowerShell parameters may be abbreviated to any prefix (-Rec); Bash
+        single-letter flags may be clustered (-rf)
+        """
+        if arg == flag:
+            return True
+        if not arg.startswith("-") or not flag.startswith("-") or len(arg) < 2:
+            return False
+        if self.name == "powershell":
+            return flag.startswith(arg)
+        return (
+            len(flag) == 2
+            and not arg.startswith("--")
+            and arg[1:].isalnum()
+            and flag[1] in arg[1:]
+        )
+
+
+POWERSHELL = Dialect(
+    "powershell",
+    _POWERSHELL_TOKENS,
+    frozenset(),
+    frozenset(),
+    ":",
+)
+
+BASH = Dialect(
+    "bash",
+    _BASH_TOKENS,
+    frozenset(
+        ("if", "then", "elif", "else", "do", "while", "until", "!", "time")
+        + ("sudo", "nohup", "exec", "command", "builtin", "env", "doas")
+    ),
+    frozenset(("sudo", "nohup", "exec", "command", "env", "doas", "time")),
+    "=",
+)
+
+DIALECTS: Dict[str, Dialect] = {"powershell": POWERSHELL, "bash": BASH}
+
+# Options of sudo / env / doas that take a value (`sudo -u root ...`)
+_WRAPPER_VALUE_FLAGS = frozenset(("-u", "-g", "-c", "-d", "-p", "-r", "-t"))
+_NON_SPACE = re.compile(r"\S+")
+_ASSIGNMENT = re.compile(r"[a-z_][a-z0-9_]*=")
+_HEREDOC_DELIMITER = re.compile(r"<<(-?)[ \t]*['\"\\]?([^'\"]*)")
+
+
+def dialect_for(language: str) -> Dialect:
+    """Bash rules are the closer fit for any shell that is not PowerShell"""
+    return DIALECTS.get(language, BASH)
+
+
+def tokenize(script: str, dialect: Dialect) -> Iterator[Token]:
+    """Token stream of the script; whitespace and comments are dropped"""
+    for kind, value, start, end, _ in _scan(script.lower(), dialect):
+        if kind == "words":
+            for m in _NON_SPACE.finditer(value):
+                yield Token("word", m.group(), start + m.start(), start + m.end())
+        elif kind != "comment":
+            yield Token(kind, value, start, end)
+
+
+def _scan(text: str, dialect: Dialect) -> Iterator[Tuple[str, str, int, int, bool]]:
+    """
+    (kind, value, start, end, spaced) per token of already-lowercased text;
+    spaced is False when the token directly follows the previous one
+    Every position matches some token (a lone character at worst), so the
+    scan never skips text and never backtracks more than one token.
+    """
+    finditer = dialect.tokens.finditer
+    heredocs: List[Tuple[str, bool]] = []
+    pos = 0
+    while pos < len(text):
+        for m in finditer(text, pos):
+            kind = m.lastgroup
+            start = m.start(kind)
+            end = m.end()
+            value = m.group(kind)
+            if kind == "string":
+                value = _unquote(value)
+            elif kind == "heredoc":
+                strip_tabs, delimiter = _HEREDOC_DELIMITER.match(value).groups()
+                heredocs.append((delimiter, bool(strip_tabs)))
+            elif kind == "separator" and value == "\n" and heredocs:
+                # Here-document bodies are data, not commands: skip past them
+                yield kind, value, start, end, start != m.start()
+                pos = end
+                for delimiter, strip_tabs in heredocs:
+                    pos = _skip_heredoc(text, pos, delimiter, strip_tabs)
+                heredocs = []
+                yield "heredoc", "", end, pos, False
+                break
+            yield kind, value, start, end, start != m.start()
+        else:
+            return
+
+
+def _unquote(text: str) -> str:
+    if text[0] == "@":
+        return text[2:-2] if text[-2:] in ('"@', "'@") else text[2:]
+    if text[0] == "$":
+        text = text[1:]
+    quote = text[0]
+    return text[1:-1] if len(text) > 1 and text[-1] == quote else text[1:]
+
+
+def _skip_heredoc(text: str, pos: int, delimiter: str, strip_tabs: bool) -> int:
+    """Offset just past the line closing a here-document (or the end)"""
+    while pos < len(text):
+        eol = text.find("\n", pos)
+        if eol < 0:
+            eol = len(text)
+        line = text[pos:eol]
+        if (line.lstrip("\t") if strip_tabs else line).rstrip() == delimiter:
+            return min(eol + 1, len(text))
+        pos = eol + 1
+    return len(text)
+
+
+def parse(script: str, dialect: Dialect) -> ParsedScript:
+    """Split the token stream into simple commands, tracking try/catch blocks"""
+    text = script.lower()
+    commands: List[Command] = []
+    caught: Set[int] = set()
+    comments: List[Tuple[int, int]] = []
+    blocks: List[Optional[int]] = []  # open braces; try id for a try block
+    next_try = 0
+    try_stack: Tuple[int, ...] = ()
+    closed_try: Optional[int] = None  # try block just closed, awaiting catch
+    last_name = ""
+    powershell = dialect is POWERSHELL
+    piped = False  # the next command reads a pipe
+    # Per open parenthesis: the command whose argument it computes, if any
+    suspended: List[Optional[Tuple[List[str], int, bool]]] = []
+
+    words: List[str] = []
+    glue = False  # the previous token can continue the current argument
+    start = 0
+    line = 1
+    counted_to = 0
+
+    def finish() -> None:
+        nonlocal words, last_name, closed_try, line, counted_to, piped
+        command = _command(words, dialect)
+        words = []
+        if command is None:
+            return
+        name, args = command
+        line += text.count("\n", counted_to, start)
+        counted_to = start
+        if closed_try is not None and name == "catch":
+            caught.add(closed_try)
+        closed_try = None
+        last_name = name
+        commands.append(Command(name, args, line, try_stack, piped))
+        piped = False
+
+    for kind, value, token_start, token_end, spaced in _scan(text, dialect):
+        if kind == "words":
+            pieces = value.split()
+            if glue and not spaced:
+                words[-1] += pieces.pop(0)
+            elif not words:
+                start = token_start
+            words.extend(pieces)
+            glue = True
+            continue
+        if kind in ARGUMENT_KINDS:
+            if glue and not spaced:
+                words[-1] += value  # adjacent pieces form one argument
+            else:
+                if not words:
+                    start = token_start
+                words.append(value)
+            glue = True
+            continue
+        glue = False
+        if kind == "comment":
+            comments.append((token_start, token_end))
+            continue
+        if kind == "redirect" or kind == "heredoc":
+            continue
+
+        if kind == "open" and value[-1] == "(":
+            if words and (value in _SUBEXPRESSIONS or powershell):
+                # An argument computed by a subexpression: its commands are
+                # parsed on their own, then the outer command resumes
+                suspended.append((words + [COMPUTED_ARGUMENT], start, piped))
+                words = []
+                piped = False
+                if value == "$((":
+                    suspended.append(None)  # closed by ))
+                continue
+            suspended.append(None)
+        if words:
+            finish()
+        if kind == "close" and value == ")" and suspended:
+            outer = suspended.pop()
+            if outer is not None:
+                words, start, piped = outer
+                glue = True
+                continue
+        if kind == "separator":
+            # A line break after | continues the pipeline
+            piped = value in ("|", "|&") or (piped and value == "\n")
+        if kind == "open" and value[-1] == "{":  # { or @{
+            if powershell and last_name == "try":
+                blocks.append(next_try)
+                try_stack += (next_try,)
+                next_try += 1
+            else:
+                blocks.append(None)
+            last_name = ""
+        elif value == "}" and blocks:
+            block = blocks.pop()
+            if block is not None:
+                try_stack = try_stack[:-1]
+                closed_try = block  # cleared by the next command unless a catch
+    if words:
+        finish()
+    return ParsedScript(commands, caught, _blank(text, comments))
+
+
+def _blank(text: str, comments: List[Tuple[int, int]]) -> str:
+    """The text with each comment replaced by its newlines (or one space)"""
+    if not comments:
+        return text
+    parts: List[str] = []
+    last = 0
+    for start, end in comments:
+        parts.append(text[last:start])
+        parts.append("\n" * text.count("\n", start, end) or " ")
+        last = end
+    parts.append(text[last:])
+    return "".join(parts)
+
+
+def _command(words: List[str], dialect: Dialect) -> Optional[Tuple[str, Tuple]]:
+    """(name, args) of one command's words, after prefixes and assignments"""
+    i = 0
+    while i < len(words):
+        word = words[i]
+        if word in dialect.prefixes:
+            i += 1
+            if word in dialect.wrappers:
+                while i < len(words) and words[i].startswith("-"):
+                    i += 2 if words[i] in _WRAPPER_VALUE_FLAGS else 1
+        elif dialect is BASH and _ASSIGNMENT.match(word):
+            i += 1
+        elif (
+            dialect is POWERSHELL
+            and word.startswith("$")
+            and i + 1 < len(words)
+            and words[i + 1] in ("=", "+=", "-=")
+        ):
+            i += 2  # $result = Remove-Item ...
+        else:
+            break
+    if i >= len(words):
+        return None
+
+    name = words[i]
+    if dialect is POWERSHELL and "\\" in name and ":" not in name:
+        name = name.rsplit("\\", 1)[1]  # Microsoft.PowerShell.Management\Remove-Item
+    elif dialect is BASH and "/" in name and name != "/":
+        name = name.rsplit("/", 1)[1]  # /bin/rm
+    args: List[str] = []
+    for word in words[i + 1 :]:
+        if word.startswith("-") and dialect.value_separator in word:
+            flag, value = word.split(dialect.value_separator, 1)
+            args.append(flag)
+            if value:
+                args.append(value)
+        else:
+            args.append(word)
+    return name, tuple(args)
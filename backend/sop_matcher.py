@@ -0,0 +1,121 @@
+"""
+Precompiled SOP trigger matcher
+Aho-Corasick automaton built once from the `triggers` of every SOP in the KB
+"""
+
+import heapq
+from collections import deque
+from typing import Dict, List, NamedTuple, Tuple
+
+
+class SOPMatch(NamedTuple):
+    """Ranked SOP candidate"""
+
+    sop_id: str
+    sop: Dict
+    score: float
+    matched_triggers: Tuple[str, ...]
+    source: str = "trigger"  # "trigger" (automaton) or "semantic" (vector index)
+
+
+def normalize(text: str) -> str:
+    """Case- and separator-insensitive form used for triggers and alert text"""
+    return text.lower().replace("_", " ")
+
+
+class SOPMatcher:
+    """
+    Multi-pattern matcher over SOP triggers
+    Construction is O(total trigger length); matching is O(len(text) + hits),
+    independent of how many SOPs or triggers the KB holds
+    """
+
+    def __init__(self, sop_kb: Dict):
+        self.sop_kb = sop_kb
+        self._sop_ids: List[str] = list(sop_kb)
+        # (trigger text, owning SOP index) per pattern
+        self._patterns: List[Tuple[str, int]] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+
+        for sop_index, sop_id in enumerate(self._sop_ids):
+            for trigger in sop_kb[sop_id].get("triggers", []):
+                trigger = normalize(trigger)
+                if trigger:
+                    self._add_pattern(trigger, sop_index)
+        self._build_failure_links()
+
+    def _add_pattern(self, trigger: str, sop_index: int) -> None:
+        node = 0
+        for ch in trigger:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append(len(self._patterns))
+        self._patterns.append((trigger, sop_index))
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                # Fold suffix outputs in so matching never walks fail chains for output
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def _scan(self, text: str) -> set:
+        """Indexes of every pattern occurring in text"""
+        found = set()
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for ch in normalize(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                found.update(out[node])
+        return found
+
+    def match(
+        self, weighted_texts: List[Tuple[str, float]], limit: int = 5
+    ) -> List[SOPMatch]:
+        """
+        Rank SOPs by matched triggers across several texts
+        Each distinct trigger counts once, scored by its length times the
+        weight of the best text it appeared in
+        """
+        best: Dict[int, float] = {}
+        for text, weight in weighted_texts:
+            for pattern_index in self._scan(text):
+                if weight > best.get(pattern_index, 0.0):
+                    best[pattern_index] = weight
+
+        scores: Dict[int, float] = {}
+        triggers: Dict[int, List[str]] = {}
+        for pattern_index, weight in best.items():
+            trigger, sop_index = self._patterns[pattern_index]
+            scores[sop_index] = scores.get(sop_index, 0.0) + len(trigger) * weight
+            triggers.setdefault(sop_index, []).append(trigger)
+
+        # Highest score first; KB order breaks ties, matching the old first-match rule
+        ranked = heapq.nsmallest(limit, scores, key=lambda i: (-scores[i], i))
+        return [
+            SOPMatch(
+                sop_id=self._sop_ids[i],
+                sop=self.sop_kb[self._sop_ids[i]],
+                score=scores[i],
+                matched_triggers=tuple(sorted(triggers[i])),
+            )
+            for i in ranked
+        ]
@@ -0,0 +1,192 @@
+"""
+Semantic SOP retrieval
+Hashed TF-IDF embeddings of SOP title, triggers and steps, stored as a
+memory-mapped NumPy matrix; top-k cosine search is a single matmul.
+
+Build the index offline (workers then just mmap it):
+    python -m backend.sop_retrieval
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.context_cache import DEFAULT_DATA_DIR
+
+DEFAULT_DIM = 4096
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word unigrams plus bigrams"""
+    words = TOKEN_RE.findall(text.lower().replace("_", " "))
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def sop_text(sop: Dict) -> str:
+    """Text embedded for one SOP"""
+    return " ".join(
+        [sop.get("title", "")]
+        + list(sop.get("triggers", []))
+        + list(sop.get("steps", []))
+    )
+
+
+def kb_fingerprint(sop_kb: Dict) -> str:
+    """Content hash of the KB; an index is only reused for identical content"""
+    canonical = json.dumps(sop_kb, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()[:16]
+
+
+class HashingVectorizer:
+    """
+    Feature-hashed term counts with a signed hash to cancel collisions
+    crc32 keeps bucket assignment stable across processes (unlike hash())
+    """
+
+    def __init__(self, dim: int = DEFAULT_DIM):
+        self.dim = dim
+
+    def counts(self, text: str) -> np.ndarray:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for token in tokenize(text):
+            h = zlib.crc32(token.encode())
+            vec[h % self.dim] += 1.0 if (h >> 31) & 1 else -1.0
+        return vec
+
+
+class SOPVectorIndex:
+    """
+    Top-k cosine search over SOP embeddings
+    vectors is an (n_sops, dim) float32 matrix of L2-normalised rows, usually
+    np.load(..., mmap_mode="r") so workers share the OS page cache
+    """
+
+    def __init__(
+        self,
+        sop_ids: List[str],
+        vectors: np.ndarray,
+        idf: np.ndarray,
+        vectorizer: HashingVectorizer,
+        fingerprint: str,
+    ):
+        self.sop_ids = sop_ids
+        self.vectors = vectors
+        self.idf = idf
+        self.vectorizer = vectorizer
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def build(cls, sop_kb: Dict, dim: int = DEFAULT_DIM) -> "SOPVectorIndex":
+        vectorizer = HashingVectorizer(dim)
+        sop_ids = list(sop_kb)
+        raw = np.zeros((len(sop_ids), dim), dtype=np.float32)
+        for row, sop_id in enumerate(sop_ids):
+            raw[row] = vectorizer.counts(sop_text(sop_kb[sop_id]))
+
+        # Smoothed IDF over hashed buckets
+        doc_freq = np.count_nonzero(raw, axis=0).astype(np.float32)
+        idf = np.log((1.0 + len(sop_ids)) / (1.0 + doc_freq)) + 1.0
+        vectors = cls._normalize(cls._sublinear(raw) * idf)
+        return cls(
+            sop_ids, vectors, idf.astype(np.float32), vectorizer, kb_fingerprint(sop_kb)
+        )
+
+    @staticmethod
+    def _sublinear(counts: np.ndarray) -> np.ndarray:
+        return np.sign(counts) * np.log1p(np.abs(counts))
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (matrix / norms).astype(np.float32)
+
+    def embed(self, text: str) -> np.ndarray:
+        query = self._sublinear(self.vectorizer.counts(text)) * self.idf
+        return self._normalize(query[np.newaxis, :])[0]
+
+    def search(self, text: str, k: int = 5) -> List[Tuple[str, float]]:
+        """(sop_id, cosine similarity) pairs, best first"""
+        if not self.sop_ids:
+            return []
+        scores = self.vectors @ self.embed(text)
+        k = min(k, len(self.sop_ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.sop_ids[i], float(scores[i])) for i in top if scores[i] > 0]
+
+    # Persistence
+
+    @staticmethod
+    def _paths(index_dir: str, fingerprint: str) -> Tuple[str, str, str]:
+        base = os.path.join(index_dir, f"sop_index-{fingerprint}")
+        return base + ".vectors.npy", base + ".idf.npy", base + ".json"
+
+    def save(self, index_dir: str) -> None:
+        """Atomic write (temp file + rename) so concurrent workers never see a partial index"""
+        os.makedirs(index_dir, exist_ok=True)
+        vec_path, idf_path, meta_path = self._paths(index_dir, self.fingerprint)
+        for path, array in ((vec_path, self.vectors), (idf_path, self.idf)):
+            fd, tmp = tempfile.mkstemp(dir=index_dir, suffix=".npy.tmp")
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, np.ascontiguousarray(array))
+            os.replace(tmp, path)
+        # Metadata last: its presence marks the index as complete
+        fd, tmp = tempfile.mkstemp(dir=index_dir, suffix=".json.tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"sop_ids": self.sop_ids, "dim": self.vectorizer.dim}, f)
+        os.replace(tmp, meta_path)
+
+    @classmethod
+    def load(cls, index_dir: str, fingerprint: str) -> Optional["SOPVectorIndex"]:
+        vec_path, idf_path, meta_path = cls._paths(index_dir, fingerprint)
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, "r") as f:
+            meta = json.load(f)
+        return cls(
+            meta["sop_ids"],
+            np.load(vec_path, mmap_mode="r"),
+            np.load(idf_path),
+            HashingVectorizer(meta["dim"]),
+            fingerprint,
+        )
+
+    @classmethod
+    def load_or_build(cls, sop_kb: Dict, index_dir: str) -> "SOPVectorIndex":
+        """Reuse the on-disk index for this exact KB content, else embed and persist"""
+        fingerprint = kb_fingerprint(sop_kb)
+        index = cls.load(index_dir, fingerprint)
+        if index is not None:
+            return index
+
+        index = cls.build(sop_kb)
+        try:
+            index.save(index_dir)
+            print(
+                f"[OK] Built SOP vector index ({len(index.sop_ids)} SOPs) in {index_dir}"
+            )
+        except OSError as e:
+            print(f"[WARN] Could not persist SOP vector index to {index_dir}: {e}")
+        return index
+
+
+def default_index_dir(data_dir: Optional[str] = None) -> str:
+    return os.getenv(
+        "SOP_INDEX_DIR",
+        os.path.join(data_dir or os.getenv("DATA_DIR", DEFAULT_DATA_DIR), ".sop_index"),
+    )
+
+
+if __name__ == "__main__":
+    data_dir = os.getenv("DATA_DIR", DEFAULT_DATA_DIR)
+    with open(os.path.join(data_dir, "sop_kb.json"), "r") as f:
+        kb = json.load(f)
+    SOPVectorIndex.load_or_build(kb, default_index_dir(data_dir))
@@ -0,0 +1,385 @@
+"""
+SQLite storage backend
+One database file in WAL mode shared by all gunicorn workers on a host
+"""
+
+import json
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from backend.storage import StorageBackend
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    id TEXT PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    severity TEXT,
+    system TEXT,
+    alert_type TEXT,
+    body TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_alerts_timestamp ON alerts (timestamp, id);
+CREATE INDEX IF NOT EXISTS idx_alerts_system ON alerts (system, timestamp, id);
+CREATE INDEX IF NOT EXISTS idx_alerts_severity ON alerts (severity, timestamp, id);
+CREATE INDEX IF NOT EXISTS idx_alerts_type ON alerts (alert_type, timestamp, id);
+-- Correlation lookups filter on both; keeps the planner off the broad alert_type index
+CREATE INDEX IF NOT EXISTS idx_alerts_system_type ON alerts (system, alert_type, timestamp, id);
+
+CREATE TABLE IF NOT EXISTS incidents (
+    system TEXT NOT NULL,
+    alert_type TEXT NOT NULL,
+    parent_id TEXT NOT NULL,
+    last_seen REAL NOT NULL,
+    PRIMARY KEY (system, alert_type)
+);
+
+CREATE TABLE IF NOT EXISTS counters (
+    scope TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (scope, bucket, name)
+);
+-- Running totals (bucket 0) by size: top-N reads walk this, no GROUP BY
+CREATE INDEX IF NOT EXISTS idx_counters_top ON counters (scope, value) WHERE bucket = 0;
+
+CREATE TABLE IF NOT EXISTS plans (
+    alert_id TEXT PRIMARY KEY,
+    body TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS executions (
+    alert_id TEXT PRIMARY KEY,
+    body TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    host TEXT NOT NULL,
+    status TEXT NOT NULL,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    started_at REAL,
+    body TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_host_status ON jobs (host, status, started_at);
+"""
+
+# Statements are module constants so sqlite3's per-connection statement
+# cache hands back the same prepared statement on every call
+UPSERT_ALERT = (
+    "INSERT OR REPLACE INTO alerts (id, timestamp, severity, system, alert_type, body) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+SELECT_ALERT = "SELECT body FROM alerts WHERE id = ?"
+COUNT_ALERTS = "SELECT COUNT(*) FROM alerts"
+# Older sightings (out-of-order or slower workers) never replace a newer one
+UPSERT_INCIDENT = (
+    "INSERT INTO incidents (system, alert_type, parent_id, last_seen) "
+    "VALUES (?, ?, ?, ?) ON CONFLICT(system, alert_type) DO UPDATE SET "
+    "parent_id = excluded.parent_id, last_seen = excluded.last_seen "
+    "WHERE excluded.last_seen >= incidents.last_seen"
+)
+SELECT_INCIDENT = (
+    "SELECT parent_id, last_seen FROM incidents WHERE system = ? AND alert_type = ?"
+)
+UPSERT_PLAN = "INSERT OR REPLACE INTO plans (alert_id, body) VALUES (?, ?)"
+SELECT_PLAN = "SELECT body FROM plans WHERE alert_id = ?"
+COUNT_PLANS = "SELECT COUNT(*) FROM plans"
+UPSERT_EXECUTION = "INSERT OR REPLACE INTO executions (alert_id, body) VALUES (?, ?)"
+SELECT_EXECUTION = "SELECT body FROM executions WHERE alert_id = ?"
+COUNT_EXECUTIONS = "SELECT COUNT(*) FROM executions"
+# Upsert keeps cancel_requested: another worker may have set it meanwhile
+UPSERT_JOB = (
+    "INSERT INTO jobs (id, host, status, started_at, body) VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT(id) DO UPDATE SET status = excluded.status, "
+    "started_at = excluded.started_at, body = excluded.body"
+)
+SELECT_JOB = "SELECT body, status, cancel_requested, started_at FROM jobs WHERE id = ?"
+# One statement, so the host count and the status change can't interleave
+# with another worker's claim
+CLAIM_JOB = (
+    "UPDATE jobs SET status = 'running', started_at = ? "
+    "WHERE id = ? AND status = 'queued' AND ("
+    "SELECT COUNT(*) FROM jobs WHERE host = ? AND status = 'running' "
+    "AND started_at >= ?) < ?"
+)
+CANCEL_QUEUED_JOB = (
+    "UPDATE jobs SET status = 'cancelled' WHERE id = ? AND status = 'queued'"
+)
+FLAG_RUNNING_JOB = (
+    "UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = 'running'"
+)
+SELECT_JOB_STATUS = "SELECT status FROM jobs WHERE id = ?"
+INCREMENT_COUNTER = (
+    "INSERT INTO counters (scope, bucket, name, value) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT(scope, bucket, name) DO UPDATE SET value = value + excluded.value"
+)
+PRUNE_COUNTERS = "DELETE FROM counters WHERE scope = ? AND bucket < ?"
+TOP_COUNTERS = (
+    "SELECT name, value FROM counters INDEXED BY idx_counters_top "
+    "WHERE scope = ? AND bucket = 0 ORDER BY value DESC LIMIT ?"
+)
+
+BATCH_SIZE = 500
+
+
+class SQLiteStore(StorageBackend):
+    """
+    SQLite-backed store (WAL mode)
+    Readers never block the writer, so every worker process can share the file.
+    Each thread gets its own connection; bulk writes go through executemany
+    inside a single transaction.
+    """
+
+    def __init__(self, path: str = "alert_triage.db", batch_size: int = BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self._local = threading.local()
+
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.path,
+                timeout=30,
+                isolation_level=None,  # explicit BEGIN/COMMIT below
+                cached_statements=256,
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def _fetch_body(self, sql: str, key: str) -> Optional[Dict]:
+        row = self._conn().execute(sql, (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _count(self, sql: str) -> int:
+        return self._conn().execute(sql).fetchone()[0]
+
+    # Alerts
+
+    @staticmethod
+    def _alert_row(alert: Dict) -> tuple:
+        return (
+            alert["id"],
+            alert.get("timestamp", ""),
+            alert.get("severity"),
+            alert.get("system"),
+            alert.get("alert_type"),
+            json.dumps(alert),
+        )
+
+    def add_alert(self, alert: Dict) -> bool:
+        return bool(self._write_batch(self._conn(), [self._alert_row(alert)]))
+
+    def add_alerts(self, alerts: Iterable[Dict]) -> List[str]:
+        """Batched insert: one transaction per batch_size rows"""
+        conn = self._conn()
+        inserted: List[str] = []
+        batch: List[tuple] = []
+        for alert in alerts:
+            batch.append(self._alert_row(alert))
+            if len(batch) >= self.batch_size:
+                inserted += self._write_batch(conn, batch)
+                batch = []
+        if batch:
+            inserted += self._write_batch(conn, batch)
+        return inserted
+
+    @staticmethod
+    def _write_batch(conn: sqlite3.Connection, rows: List[tuple]) -> List[str]:
+        """Upsert rows; returns the ids that were not stored before"""
+        ids = list(dict.fromkeys(row[0] for row in rows))
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Read under the write lock, so two workers can't both see an id as new
+            existing = {
+                row[0]
+                for row in conn.execute(
+                    "SELECT id FROM alerts WHERE id IN "
+                    f"({', '.join('?' * len(ids))})",
+                    ids,
+                )
+            }
+            conn.executemany(UPSERT_ALERT, rows)
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return [alert_id for alert_id in ids if alert_id not in existing]
+
+    def get_alert(self, alert_id: str) -> Optional[Dict]:
+        return self._fetch_body(SELECT_ALERT, alert_id)
+
+    def count_alerts(self) -> int:
+        return self._count(COUNT_ALERTS)
+
+    def query_alerts(
+        self,
+        severity: Optional[str] = None,
+        system: Optional[str] = None,
+        alert_type: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        after: Optional[Tuple[str, str]] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict]:
+        clauses = []
+        params: List = []
+        for column, value in (
+            ("severity", severity),
+            ("system", system),
+            ("alert_type", alert_type),
+        ):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("timestamp <= ?")
+            params.append(until)
+        if after is not None:
+            # Keyset pagination: seek past the cursor on the (timestamp, id) index
+            clauses.append("(timestamp, id) > (?, ?)")
+            params.extend(after)
+
+        sql = "SELECT body FROM alerts"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY timestamp, id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        return [json.loads(row[0]) for row in self._conn().execute(sql, params)]
+
+    # Open incidents
+
+    def save_incidents(self, incidents: Iterable[Tuple[str, str, str, float]]) -> None:
+        rows = [
+            (system or "", alert_type or "", parent_id, last_seen)
+            for system, alert_type, parent_id, last_seen in incidents
+        ]
+        if not rows:
+            return
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(UPSERT_INCIDENT, rows)
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def latest_incident(
+        self, system: str, alert_type: str
+    ) -> Optional[Tuple[str, float]]:
+        row = (
+            self._conn()
+            .execute(SELECT_INCIDENT, (system or "", alert_type or ""))
+            .fetchone()
+        )
+        return (row[0], row[1]) if row else None
+
+    # Remediation plans
+
+    def save_plan(self, alert_id: str, plan: Dict) -> None:
+        self._conn().execute(UPSERT_PLAN, (alert_id, json.dumps(plan)))
+
+    def get_plan(self, alert_id: str) -> Optional[Dict]:
+        return self._fetch_body(SELECT_PLAN, alert_id)
+
+    def count_plans(self) -> int:
+        return self._count(COUNT_PLANS)
+
+    # Execution results
+
+    def save_execution(self, alert_id: str, result: Dict) -> None:
+        self._conn().execute(UPSERT_EXECUTION, (alert_id, json.dumps(result)))
+
+    def get_execution(self, alert_id: str) -> Optional[Dict]:
+        return self._fetch_body(SELECT_EXECUTION, alert_id)
+
+    def count_executions(self) -> int:
+        return self._count(COUNT_EXECUTIONS)
+
+    # Execution jobs
+
+    def save_job(self, job: Dict) -> None:
+        self._conn().execute(
+            UPSERT_JOB,
+            (
+                job["job_id"],
+                job["host"],
+                job["status"],
+                job.get("started_at"),
+                json.dumps(job),
+            ),
+        )
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        row = self._conn().execute(SELECT_JOB, (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = json.loads(row[0])
+        job.update(status=row[1], cancel_requested=bool(row[2]), started_at=row[3])
+        return job
+
+    def claim_job(
+        self, job_id: str, host: str, limit: int, now: float, stale_before: float
+    ) -> bool:
+        cursor = self._conn().execute(
+            CLAIM_JOB, (now, job_id, host, stale_before, limit)
+        )
+        return cursor.rowcount == 1
+
+    def cancel_job(self, job_id: str) -> Optional[str]:
+        conn = self._conn()
+        conn.execute(CANCEL_QUEUED_JOB, (job_id,))
+        conn.execute(FLAG_RUNNING_JOB, (job_id,))
+        row = conn.execute(SELECT_JOB_STATUS, (job_id,)).fetchone()
+        return row[0] if row else None
+
+    # Statistics counters
+
+    def increment_counters(self, deltas: Dict[Tuple[str, int, str], float]) -> None:
+        if not deltas:
+            return
+        rows = [
+            (scope, bucket, name, value)
+            for (scope, bucket, name), value in deltas.items()
+        ]
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(INCREMENT_COUNTER, rows)
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def read_counters(
+        self, scope: str, since_bucket: int = 0, prefix: str = ""
+    ) -> Dict[str, float]:
+        sql = (
+            "SELECT name, SUM(value) AS total FROM counters "
+            "WHERE scope = ? AND bucket >= ? AND name >= ? AND name < ? "
+            "GROUP BY name"
+        )
+        # Prefix match as a range so it stays on the primary key
+        params = (scope, since_bucket, prefix, prefix + "\uffff")
+        return dict(self._conn().execute(sql, params))
+
+    def top_counters(self, scope: str, limit: int) -> Dict[str, float]:
+        return dict(self._conn().execute(TOP_COUNTERS, (scope, limit)))
+
+    def prune_counters(self, scope: str, before_bucket: int) -> None:
+        self._conn().execute(PRUNE_COUNTERS, (scope, before_bucket))
@@ -0,0 +1,202 @@
+"""
+Incremental statistics engine
+Running counters updated at ingest, analyze and execute time, plus time-bucketed
+rollups, so /stats never scans the alert, plan or execution stores
+"""
+
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from backend.alert_correlation import CorrelationResult, parse_timestamp
+from backend.storage import StorageBackend
+
+# scope -> (window seconds, bucket seconds); a window read sums a fixed
+# number of buckets, and buckets older than the window are pruned
+ROLLUP_WINDOWS = {"1m": (60, 5), "1h": (3600, 60), "1d": (86400, 3600)}
+
+# Upper bounds of the MTTR histogram buckets, in minutes
+MTTR_BUCKETS_MINUTES = (1, 2, 5, 10, 15, 30, 60, 120, 240, 480, 1440)
+
+TOP_SYSTEMS = 10
+
+
+def _mttr_bucket(minutes: float) -> str:
+    for bound in MTTR_BUCKETS_MINUTES:
+        if minutes <= bound:
+            return f"mttr_le:{bound}"
+    return "mttr_le:inf"
+
+
+def _rate(part: float, whole: float) -> float:
+    return round(part / whole * 100, 2) if whole else 0.0
+
+
+class StatsAggregator:
+    """
+    Counter-based statistics kept in the storage backend
+    Every event is one batched increment, so all gunicorn workers sharing the
+    SQLite file see the same numbers. Reads touch a fixed set of counter names
+    and at most one window's worth of buckets, independent of history size.
+    Per-system counts live in their own scope; only the top systems are read.
+    """
+
+    def __init__(self, store: StorageBackend, clock=time.time):
+        self.store = store
+        self.clock = clock
+        self._pruned: Dict[str, int] = {}
+
+    # Recording
+
+    def record_ingest(
+        self,
+        alerts: List[Dict],
+        results: Optional[List[CorrelationResult]] = None,
+        new_ids: Optional[Iterable[str]] = None,
+    ) -> None:
+        """
+        Count newly stored alerts and suppressed repeats (results from dedup, if
+        on). Without dedup, new_ids are the ids the store inserted rather than
+        replaced; a re-ingested alert id is not counted again.
+        """
+        counts: Counter = Counter()
+        systems: Counter = Counter()
+        fresh = set(new_ids) if new_ids is not None else None
+        for i, alert in enumerate(alerts):
+            if results is not None:
+                if results[i].suppressed:
+                    counts["suppressed"] += 1
+                    continue
+                if not results[i].new:
+                    continue
+            elif fresh is not None:
+                if alert["id"] not in fresh:
+                    continue
+                fresh.discard(alert["id"])
+            counts["alerts"] += 1
+            counts[f"severity:{alert.get('severity')}"] += 1
+            systems[alert.get("system")] += 1
+        self._record(counts, systems)
+
+    def record_analysis(self) -> None:
+        self._record(Counter(analyzed=1))
+
+    def record_execution(self, alert: Optional[Dict], status: str) -> Optional[float]:
+        """
+        Count an execution; for successful ones also record time to recovery
+        MTTR runs from when the alert was received (or its own timestamp, for
+        alerts stored before received_at existed) to now. Returns it in seconds.
+        """
+        now = self.clock()
+        counts = Counter(executed=1)
+        mttr = None
+        if status == "success":
+            counts["succeeded"] += 1
+            if alert is not None:
+                started = alert.get("received_at") or parse_timestamp(
+                    alert.get("timestamp", "")
+                )
+                mttr = max(now - started, 0.0)
+                counts["mttr_seconds_sum"] += mttr
+                counts["mttr_count"] += 1
+                counts[_mttr_bucket(mttr / 60)] += 1
+        else:
+            counts["failed"] += 1
+        self._record(counts, now=now)
+        return mttr
+
+    def _record(
+        self, counts: Counter, systems: Optional[Counter] = None, now=None
+    ) -> None:
+        if not counts and not systems:
+            return
+        now = self.clock() if now is None else now
+        deltas: Dict[Tuple[str, int, str], float] = {}
+        for name, value in counts.items():
+            deltas[("total", 0, name)] = value
+            for scope, (_, step) in ROLLUP_WINDOWS.items():
+                deltas[(scope, int(now // step), name)] = value
+        for system, value in (systems or {}).items():
+            deltas[("systems", 0, str(system))] = value
+        self.store.increment_counters(deltas)
+        self._prune(now)
+
+    def _prune(self, now: float) -> None:
+        """Drop expired buckets once per bucket rollover, not on every event"""
+        for scope, (window, step) in ROLLUP_WINDOWS.items():
+            bucket = int(now // step)
+            if self._pruned.get(scope) != bucket:
+                self._pruned[scope] = bucket
+                self.store.prune_counters(scope, bucket - int(window // step) + 1)
+
+    # Reading
+
+    @staticmethod
+    def _summarize(counters: Dict[str, float]) -> Dict:
+        executed = counters.get("executed", 0)
+        mttr_count = counters.get("mttr_count", 0)
+        return {
+            "alerts": int(counters.get("alerts", 0)),
+            "suppressed": int(counters.get("suppressed", 0)),
+            "by_severity": {
+                name.split(":", 1)[1]: int(value)
+                for name, value in sorted(counters.items())
+                if name.startswith("severity:")
+            },
+            "analyzed": int(counters.get("analyzed", 0)),
+            "executed": int(executed),
+            "succeeded": int(counters.get("succeeded", 0)),
+            "failed": int(counters.get("failed", 0)),
+            "success_rate": _rate(counters.get("succeeded", 0), executed),
+            "mttr_mean_minutes": (
+                round(counters.get("mttr_seconds_sum", 0) / mttr_count / 60, 2)
+                if mttr_count
+                else None
+            ),
+        }
+
+    @staticmethod
+    def _mttr_distribution(counters: Dict[str, float]) -> Dict:
+        labels = [str(b) for b in MTTR_BUCKETS_MINUTES] + ["inf"]
+        histogram = {
+            label: int(counters.get(f"mttr_le:{label}", 0)) for label in labels
+        }
+        total = sum(histogram.values())
+
+        def percentile(q: float) -> Optional[float]:
+            # Upper bound of the bucket holding the q-th sample; None if there
+            # are no samples or it lies past the last finite bucket
+            seen = 0
+            for bound, count in zip(MTTR_BUCKETS_MINUTES, histogram.values()):
+                seen += count
+                if total and seen >= q * total:
+                    return float(bound)
+            return None
+
+        return {
+            "count": total,
+            "p50_minutes": percentile(0.5),
+            "p90_minutes": percentile(0.9),
+            "p99_minutes": percentile(0.99),
+            "histogram_minutes": histogram,
+        }
+
+    def snapshot(self) -> Dict:
+        now = self.clock()
+        totals = self.store.read_counters("total")
+        summary = self._summarize(totals)
+        summary["mttr"] = self._mttr_distribution(totals)
+        summary["top_systems"] = {
+            system: int(count)
+            for system, count in sorted(
+                self.store.top_counters("systems", TOP_SYSTEMS).items(),
+                key=lambda kv: -kv[1],
+            )
+        }
+        summary["windows"] = {}
+        for scope, (window, step) in ROLLUP_WINDOWS.items():
+            since = int(now // step) - int(window // step) + 1
+            summary["windows"][scope] = self._summarize(
+                self.store.read_counters(scope, since_bucket=since)
+            )
+        return summary
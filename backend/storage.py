@@ -0,0 +1,168 @@
+"""
+Pluggable storage layer for alerts, remediation plans and execution results
+Backend is selected with STORAGE_BACKEND (sqlite or memory)
+"""
+
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class StorageBackend(ABC):
+    """Interface every storage backend implements"""
+
+    # Alerts
+
+    @abstractmethod
+    def add_alert(self, alert: Dict) -> bool:
+        """Insert or replace a single alert; True if its id was not stored yet"""
+
+    def add_alerts(self, alerts: Iterable[Dict]) -> List[str]:
+        """
+        Insert or replace many alerts; backends override to batch the writes
+        Returns the ids that were inserted rather than replaced
+        """
+        return [alert["id"] for alert in alerts if self.add_alert(alert)]
+
+    @abstractmethod
+    def get_alert(self, alert_id: str) -> Optional[Dict]:
+        """Lookup by alert id, None if unknown"""
+
+    @abstractmethod
+    def count_alerts(self) -> int:
+        pass
+
+    @abstractmethod
+    def query_alerts(
+        self,
+        severity: Optional[str] = None,
+        system: Optional[str] = None,
+        alert_type: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        after: Optional[Tuple[str, str]] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict]:
+        """
+        Filtered listing ordered by (timestamp, id)
+        after is an exclusive (timestamp, id) cursor; limit caps the page size
+        """
+
+    # Open incidents
+    # One row per (system, alert_type): the parent alert collecting repeats and
+    # the epoch it was last seen. A write never moves last_seen backwards, so
+    # workers folding the same incident converge on the newest parent.
+
+    @abstractmethod
+    def save_incidents(self, incidents: Iterable[Tuple[str, str, str, float]]) -> None:
+        """Record (system, alert_type, parent_id, last_seen) for each incident"""
+
+    @abstractmethod
+    def latest_incident(
+        self, system: str, alert_type: str
+    ) -> Optional[Tuple[str, float]]:
+        """(parent_id, last_seen) of the key's most recent incident, None if none"""
+
+    # Remediation plans
+
+    @abstractmethod
+    def save_plan(self, alert_id: str, plan: Dict) -> None:
+        pass
+
+    @abstractmethod
+    def get_plan(self, alert_id: str) -> Optional[Dict]:
+        pass
+
+    @abstractmethod
+    def count_plans(self) -> int:
+        pass
+
+    # Execution results
+
+    @abstractmethod
+    def save_execution(self, alert_id: str, result: Dict) -> None:
+        pass
+
+    @abstractmethod
+    def get_execution(self, alert_id: str) -> Optional[Dict]:
+        pass
+
+    @abstractmethod
+    def count_executions(self) -> int:
+        pass
+
+    # Execution jobs
+    # status is queued -> running -> success | failed | cancelled. Transitions
+    # that race across workers (claim, cancel) are single atomic updates.
+
+    @abstractmethod
+    def save_job(self, job: Dict) -> None:
+        """Insert a job or record its final state; never clears a cancel request"""
+
+    @abstractmethod
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        """Job record with its current status and cancel_requested flag"""
+
+    @abstractmethod
+    def claim_job(
+        self, job_id: str, host: str, limit: int, now: float, stale_before: float
+    ) -> bool:
+        """
+        Move a queued job to running if fewer than limit jobs are running on
+        host. Running jobs started before stale_before (their worker died)
+        no longer count against the limit.
+        """
+
+    @abstractmethod
+    def cancel_job(self, job_id: str) -> Optional[str]:
+        """
+        Cancel a queued job outright, or flag a running one for its worker
+        Returns the status after the call, None if the job is unknown
+        """
+
+    # Statistics counters
+    # Rows are keyed by (scope, bucket, name): running totals ("total",
+    # "systems") use bucket 0, rollup scopes use time buckets. Increments are
+    # additive, so concurrent workers can apply them without coordination.
+
+    @abstractmethod
+    def increment_counters(self, deltas: Dict[Tuple[str, int, str], float]) -> None:
+        """Add each delta to its (scope, bucket, name) counter"""
+
+    @abstractmethod
+    def read_counters(
+        self, scope: str, since_bucket: int = 0, prefix: str = ""
+    ) -> Dict[str, float]:
+        """Sum counters per name over buckets >= since_bucket"""
+
+    @abstractmethod
+    def top_counters(self, scope: str, limit: int) -> Dict[str, float]:
+        """
+        The limit largest running totals (bucket 0) of scope
+        Read from an index ordered by value, without summing the whole scope
+        """
+
+    @abstractmethod
+    def prune_counters(self, scope: str, before_bucket: int) -> None:
+        """Drop rollup buckets that have fallen out of their window"""
+
+
+def create_storage(backend: Optional[str] = None) -> StorageBackend:
+    """
+    Build the configured storage backend
+    sqlite (default) is shared by every gunicorn worker on the host;
+    memory is per-process and only suitable for single-worker runs
+    """
+    backend = (backend or os.getenv("STORAGE_BACKEND", "sqlite")).lower()
+
+    if backend == "memory":
+        from backend.alert_store import AlertStore
+
+        return AlertStore()
+
+    if backend == "sqlite":
+        from backend.sqlite_store import SQLiteStore
+
+        return SQLiteStore(os.getenv("STORAGE_PATH", "alert_triage.db"))
+
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend} (expected sqlite or memory)")
@@ -0,0 +1,183 @@
+"""
+Bedrock resilience benchmark
+Drives the real boto3 bedrock-runtime client through BedrockService against
+stub_bedrock.py (BEDROCK_ENDPOINT_URL) and checks three storm conditions:
+concurrent calls reuse pooled connections instead of churning sockets, a
+throttling endpoint is ridden out with jittered backoff instead of failing
+analyses, and an outage trips the circuit breaker so later calls fail in
+milliseconds and the first call after recovery closes it again.
+
+Usage: python -m benchmarks.bench_bedrock_resilience [--concurrency 16] [--latency 0.2]
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from benchmarks.stub_bedrock import stub_bedrock_app
+from benchmarks.stubs import serve_in_thread
+
+PORT = 8792
+BASE = f"http://127.0.0.1:{PORT}"
+
+os.environ.update(
+    BEDROCK_ENDPOINT_URL=BASE,
+    AWS_ACCESS_KEY_ID="stub",
+    AWS_SECRET_ACCESS_KEY="stub",
+    PLAN_CACHE_ENABLED="false",
+)
+
+from backend.aws_bedrock_service import BedrockService  # noqa: E402
+
+
+class DiscardCounter(logging.Handler):
+    """Counts urllib3 'Connection pool is full, discarding connection' warnings"""
+
+    def __init__(self):
+        super().__init__(logging.WARNING)
+        self.discarded = 0
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if "pool is full" in record.getMessage():
+            self.discarded += 1
+
+
+def stub(path: str, method: str = "GET") -> Dict:
+    request = urllib.request.Request(f"{BASE}{path}", method=method)
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+def service(**env) -> BedrockService:
+    saved = {key: os.environ.get(key) for key in env}
+    os.environ.update({key: str(value) for key, value in env.items()})
+    try:
+        return BedrockService()
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def storm(bedrock: BedrockService, calls: int, concurrency: int) -> List[Dict]:
+    def one(_) -> Dict:
+        start = time.perf_counter()
+        try:
+            bedrock._call_bedrock("Analyze alert")
+            ok = True
+        except Exception:
+            ok = False
+        return {"ok": ok, "seconds": time.perf_counter() - start}
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(one, range(calls)))
+
+
+def pooling(concurrency: int, latency: float) -> None:
+    counter = DiscardCounter()
+    logging.getLogger("urllib3.connectionpool").addHandler(counter)
+    print(f"connection pool, {concurrency} concurrent calls x 4 rounds")
+    results = {}
+    for label, pool_size in (("botocore default (10)", 10), ("sized", concurrency)):
+        bedrock = service(ANALYSIS_CONCURRENCY=pool_size)
+        counter.discarded = 0
+        start = time.perf_counter()
+        outcomes = storm(bedrock, concurrency * 4, concurrency)
+        wall = time.perf_counter() - start
+        results[label] = counter.discarded
+        print(
+            f"  {label:<22} wall {wall:5.2f}s, ok {sum(o['ok'] for o in outcomes)}, "
+            f"sockets discarded {counter.discarded}"
+        )
+        assert all(o["ok"] for o in outcomes)
+    logging.getLogger("urllib3.connectionpool").removeHandler(counter)
+    assert results["sized"] == 0, "pool sized to concurrency still churned sockets"
+
+
+def throttling(concurrency: int, latency: float) -> None:
+    # Endpoint serves a quarter of our concurrency; the rest is throttled
+    capacity = max(concurrency // 4, 1)
+    calls = concurrency * 2
+    print(f"\nthrottling endpoint (capacity {capacity}), {calls} calls")
+    stub(f"/mode?capacity={capacity}", "PUT")
+    rates = {}
+    for label, attempts in (("no retries", 1), ("jittered backoff", 8)):
+        bedrock = service(
+            BEDROCK_MAX_ATTEMPTS=attempts,
+            BEDROCK_BACKOFF_BASE=latency,
+            BEDROCK_BREAKER_THRESHOLD=1000,
+        )
+        stub("/calls", "DELETE")
+        outcomes = storm(bedrock, calls, concurrency)
+        counts = stub("/calls")
+        rates[label] = sum(o["ok"] for o in outcomes) / calls
+        print(
+            f"  {label:<17} succeeded {rates[label]:6.1%}, "
+            f"throttled {counts['throttled']}, retries {bedrock.resilience.retries}"
+        )
+    stub("/mode?capacity=0", "PUT")
+    assert rates["jittered backoff"] == 1.0, "throttled calls were not ridden out"
+    assert rates["no retries"] < 1.0
+
+
+def outage(concurrency: int, latency: float) -> None:
+    threshold, reset = 5, 1.0
+    calls = concurrency * 4
+    bedrock = service(
+        BEDROCK_MAX_ATTEMPTS=3,
+        BEDROCK_BACKOFF_BASE=latency,
+        BEDROCK_BREAKER_THRESHOLD=threshold,
+        BEDROCK_BREAKER_RESET_SECONDS=reset,
+    )
+    stub("/mode?down=true", "PUT")
+    stub("/calls", "DELETE")
+    print(f"\noutage: {calls} calls while the endpoint answers 503")
+    outcomes = storm(bedrock, calls, concurrency)
+    counts = stub("/calls")
+    tail = sorted(o["seconds"] for o in outcomes)[: calls - concurrency]
+    breaker = bedrock.resilience.breaker.stats()
+    print(
+        f"  reached endpoint {counts['requests']}x, breaker {breaker['state']}, "
+        f"rejected {breaker['rejected']}"
+    )
+    print(f"  median time to fail (fast path): {statistics.median(tail) * 1000:.1f} ms")
+    assert not any(o["ok"] for o in outcomes)
+    assert breaker["state"] == "open"
+    # Only calls already in flight when it opened got through
+    assert counts["requests"] <= threshold + concurrency * 3
+    assert statistics.median(tail) < 0.01
+
+    stub("/mode?down=false", "PUT")
+    time.sleep(reset)
+    recovered = storm(bedrock, 1, 1)[0]
+    state = bedrock.resilience.breaker.state
+    print(f"  after recovery: trial call ok={recovered['ok']}, breaker {state}")
+    assert recovered["ok"] and state == "closed"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    server = serve_in_thread(stub_bedrock_app(args.latency), PORT)
+    try:
+        pooling(args.concurrency, args.latency)
+        throttling(args.concurrency, args.latency)
+        outage(args.concurrency, args.latency)
+    finally:
+        server.should_exit = True
+    print("\nOK: pooled connections, throttles ridden out, breaker fails fast")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Bulk ingest benchmark
+Streams --alerts generated alerts as a chunked NDJSON upload to
+POST /alerts/ingest/bulk on a single uvicorn worker backed by the default
+SQLite store, and checks throughput against the 10k alerts/sec target.
+
+Usage: python -m benchmarks.bench_bulk_ingest [--alerts 50000] [--format ndjson|array]
+"""
+
+import argparse
+import http.client
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.stubs import serve_in_thread
+
+TARGET_PER_SEC = 10000
+SEVERITIES = ["critical", "high", "medium", "low"]
+
+
+def alert_lines(count: int):
+    for i in range(count):
+        yield json.dumps(
+            {
+                "id": f"BULK{i:08d}",
+                "timestamp": f"2025-10-11T{(i // 3600) % 24:02d}:{(i // 60) % 60:02d}:{i % 60:02d}Z",
+                "severity": SEVERITIES[i % 4],
+                # Distinct systems so dedup keeps every alert as its own incident
+                "system": f"PROD-SRV-{i:06d}",
+                "alert_type": "disk_space",
+                "description": "Disk space critical on C:\\\\ drive",
+                "metrics": {"disk_used_percent": 90 + i % 10, "partition": "C:\\\\"},
+            }
+        )
+
+
+def body_chunks(count: int, fmt: str, lines_per_chunk: int = 500):
+    buf = ["["] if fmt == "array" else []
+    sep = "," if fmt == "array" else "\n"
+    for i, line in enumerate(alert_lines(count)):
+        buf.append(
+            (sep if fmt == "array" and i else "")
+            + line
+            + ("" if fmt == "array" else "\n")
+        )
+        if len(buf) >= lines_per_chunk:
+            yield "".join(buf).encode()
+            buf = []
+    if fmt == "array":
+        buf.append("]")
+    if buf:
+        yield "".join(buf).encode()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--alerts", type=int, default=50000)
+    parser.add_argument("--format", choices=["ndjson", "array"], default="ndjson")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ["STORAGE_PATH"] = os.path.join(tmp, "bulk.db")
+
+    from backend import app as app_module
+
+    serve_in_thread(app_module.app, args.port)
+
+    conn = http.client.HTTPConnection("127.0.0.1", args.port, timeout=300)
+    start = time.perf_counter()
+    conn.request(
+        "POST",
+        "/alerts/ingest/bulk",
+        body=body_chunks(args.alerts, args.format),
+        headers={"Content-Type": "application/x-ndjson"},
+        encode_chunked=True,
+    )
+    result = json.loads(conn.getresponse().read())
+    wall = time.perf_counter() - start
+
+    rate = args.alerts / wall
+    print(
+        f"{args.alerts} alerts ({args.format}) in {wall:.2f}s -> {rate:,.0f} alerts/s "
+        f"(server-side {result['alerts_per_sec']:,.0f}/s)"
+    )
+    print(
+        f"accepted={result['accepted']} suppressed={result['suppressed']} failed={result['failed']}"
+    )
+    stored = app_module.alert_store.count_alerts()
+    assert result["accepted"] == args.alerts and stored >= args.alerts
+    assert rate >= TARGET_PER_SEC, f"below target of {TARGET_PER_SEC} alerts/s"
+    print(f"OK: >= {TARGET_PER_SEC:,} alerts/s into the store on one worker")
+
+
+if __name__ == "__main__":
+    main()
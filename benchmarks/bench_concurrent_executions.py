@@ -0,0 +1,153 @@
+"""
+Concurrent real-execution benchmark
+Runs N scripts at once through ScriptExecutor.execute_script_async with a
+shell shim standing in for PowerShell (EXECUTION_INTERPRETER_POWERSHELL).
+Each script writes a marker file into its working directory, sleeps, and
+reads it back, so any two runs sharing a script path or directory show up
+as wrong output. Checks every run sees only its own files, that sandboxes
+are removed (also after a cancel), and that wall time stays flat as N grows.
+The old fixed temp_script.ps1 layout is replayed for comparison.
+
+Usage: python -m benchmarks.bench_concurrent_executions [--sleep 0.5]
+"""
+
+import argparse
+import asyncio
+import os
+import stat
+import tempfile
+import time
+from contextlib import contextmanager
+
+from backend.script_executor import ScriptExecutor
+
+CONCURRENCY = (1, 4, 16, 32)
+
+SCRIPT = """echo "run {run} started"
+echo {run} > marker.txt
+sleep {sleep}
+echo "run {run} marker=$(cat marker.txt) script=$(head -n 1 "$0")"
+"""
+
+SHIM = (
+    '#!/bin/sh\n# Stand-in for pwsh: run the script file with sh\nexec /bin/sh "$@"\n'
+)
+
+SAFE = {"is_safe": True}
+
+
+class SharedPathExecutor(ScriptExecutor):
+    """The pre-sandbox layout: every run writes temp_script.ps1 in one directory"""
+
+    def __init__(self, directory: str):
+        super().__init__()
+        self.shared = directory
+
+    @contextmanager
+    def _sandbox(self, script: str, language: str):
+        script_path = os.path.join(self.shared, "temp_script.ps1")
+        with open(script_path, "w") as f:
+            f.write(script)
+        yield self.shared, script_path
+
+
+def install_shim(directory: str) -> str:
+    path = os.path.join(directory, "pwsh")
+    with open(path, "w") as f:
+        f.write(SHIM)
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR)
+    return path
+
+
+def make_executor(executor_class=ScriptExecutor, *args) -> ScriptExecutor:
+    executor = executor_class(*args)
+    executor.demo_mode = False
+    return executor
+
+
+def collisions(results: list) -> int:
+    """Runs whose output mentions another run's marker or script"""
+    bad = 0
+    for run, result in enumerate(results):
+        expected = f'run {run} marker={run} script=echo "run {run} started"'
+        if result["status"] != "success" or expected not in result["output"]:
+            bad += 1
+    return bad
+
+
+async def run_batch(executor: ScriptExecutor, count: int, sleep: float):
+    scripts = [SCRIPT.format(run=run, sleep=sleep) for run in range(count)]
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(
+            executor.execute_script_async(script, "powershell", validation=SAFE)
+            for script in scripts
+        )
+    )
+    return results, time.perf_counter() - start
+
+
+async def sandboxed(sandbox_root: str, sleep: float) -> None:
+    executor = make_executor()
+    print(f"{'scripts':>8} {'wall':>8} {'speedup':>8} {'wrong':>6}")
+    for count in CONCURRENCY:
+        results, wall = await run_batch(executor, count, sleep)
+        speedup = count * sleep / wall
+        wrong = collisions(results)
+        print(f"{count:>8} {wall:>7.2f}s {speedup:>7.1f}x {wrong:>6}")
+        assert wrong == 0, [r["output"] for r in results if r["status"] != "success"]
+        assert not os.listdir(sandbox_root), "sandbox directories left behind"
+    assert speedup > CONCURRENCY[-1] / 4, "concurrent runs did not overlap"
+
+
+async def cancelled(sandbox_root: str, sleep: float) -> None:
+    executor = make_executor()
+    task = asyncio.ensure_future(
+        executor.execute_script_async(
+            SCRIPT.format(run=0, sleep=sleep * 10), "powershell", validation=SAFE
+        )
+    )
+    await asyncio.sleep(sleep)
+    assert len(os.listdir(sandbox_root)) == 1
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    print(f"\ncancelled run: sandbox removed = {not os.listdir(sandbox_root)}")
+    assert not os.listdir(sandbox_root), "cancelled run left its sandbox behind"
+
+
+async def shared_path(sleep: float) -> None:
+    with tempfile.TemporaryDirectory() as shared:
+        executor = make_executor(SharedPathExecutor, shared)
+        count = CONCURRENCY[-1]
+        results, wall = await run_batch(executor, count, sleep)
+        print(
+            f"old fixed temp_script.ps1: {collisions(results)}/{count} runs "
+            f"saw another run's files"
+        )
+
+
+async def run(sleep: float) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        sandbox_root = os.path.join(tmp, "sandboxes")
+        os.mkdir(sandbox_root)
+        os.environ["EXECUTION_INTERPRETER_POWERSHELL"] = install_shim(tmp)
+        os.environ["EXECUTION_SANDBOX_DIR"] = sandbox_root
+
+        await sandboxed(sandbox_root, sleep)
+        await cancelled(sandbox_root, sleep)
+        await shared_path(sleep)
+    print("OK: concurrent executions are isolated and cleaned up")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sleep", type=float, default=0.5)
+    args = parser.parse_args()
+    asyncio.run(run(args.sleep))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Execution job queue benchmark
+Runs fake scripts through ExecutionQueue and checks the per-host limit and
+worker bound hold, that a busy host does not hold up jobs for other hosts,
+and that queued and running jobs can be cancelled. Wall time is compared with
+running the same scripts one after another inline, as /execute used to.
+
+Usage: python -m benchmarks.bench_execution_jobs [--hosts 8] [--jobs-per-host 5]
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from typing import Dict, Optional
+
+from backend.execution_jobs import ExecutionQueue, FakeExecutor
+from backend.output_buffer import OutputBuffer
+from backend.storage import create_storage
+
+
+class TrackingExecutor(FakeExecutor):
+    """FakeExecutor that records peak concurrency, overall and per host"""
+
+    def __init__(self, duration: float):
+        super().__init__(duration)
+        self.running: Dict[str, int] = {}
+        self.peak_host = 0
+        self.peak_total = 0
+
+    async def __call__(
+        self,
+        script: str,
+        language: str,
+        validation: Optional[Dict] = None,
+        output: Optional[OutputBuffer] = None,
+    ) -> Dict:
+        host = script  # the benchmark passes the host name as the script
+        self.running[host] = self.running.get(host, 0) + 1
+        self.peak_host = max(self.peak_host, self.running[host])
+        self.peak_total = max(self.peak_total, sum(self.running.values()))
+        try:
+            return await super().__call__(script, language, validation, output)
+        finally:
+            self.running[host] -= 1
+
+
+def make_queue(store, executor, workers: int) -> ExecutionQueue:
+    return ExecutionQueue(
+        store, executor, workers=workers, per_host=1, poll_interval=0.05
+    )
+
+
+async def submit(queue: ExecutionQueue, host: str) -> str:
+    job = await queue.submit("BENCH", host, host, "powershell")
+    return job["job_id"]
+
+
+async def throughput(store, hosts: int, per_host: int, workers: int, duration: float):
+    executor = TrackingExecutor(duration)
+    queue = make_queue(store, executor, workers)
+    names = [f"HOST-{i:02}" for i in range(hosts)]
+
+    start = time.perf_counter()
+    job_ids = [await submit(queue, name) for _ in range(per_host) for name in names]
+    for job_id in job_ids:
+        await queue.wait(job_id, 60)
+    wall = time.perf_counter() - start
+    await queue.shutdown()
+
+    total = hosts * per_host
+    inline = total * duration
+    ideal = max(per_host * duration, total * duration / workers)
+    print(f"{total} jobs on {hosts} hosts, {workers} workers, 1 per host")
+    print(f"  inline (serial):  {inline:6.2f}s")
+    print(f"  ideal:            {ideal:6.2f}s")
+    print(f"  job queue:        {wall:6.2f}s")
+    print(f"  peak per host: {executor.peak_host}, peak total: {executor.peak_total}")
+    assert executor.peak_host <= 1, "per-host limit exceeded"
+    assert executor.peak_total <= workers, "worker bound exceeded"
+    assert wall < inline / 2, "queue did not overlap jobs on different hosts"
+
+
+async def head_of_line(store, workers: int, duration: float):
+    executor = TrackingExecutor(duration)
+    queue = make_queue(store, executor, workers)
+
+    start = time.perf_counter()
+    busy = [await submit(queue, "BUSY") for _ in range(10)]
+    others = [await submit(queue, f"OTHER-{i}") for i in range(workers - 1)]
+    for job_id in others:
+        await queue.wait(job_id, 60)
+    others_done = time.perf_counter() - start
+    for job_id in busy:
+        await queue.wait(job_id, 60)
+    busy_done = time.perf_counter() - start
+    await queue.shutdown()
+
+    print("\n10 jobs queued for one host ahead of jobs for other hosts")
+    print(
+        f"  other hosts done after {others_done:.2f}s, busy host after {busy_done:.2f}s"
+    )
+    assert others_done < 3 * duration, "jobs waited behind another host's queue"
+
+
+async def cancellation(store, duration: float):
+    executor = TrackingExecutor(duration)
+    queue = make_queue(store, executor, 2)
+
+    running = await submit(queue, "CANCEL")
+    queued = await submit(queue, "CANCEL")  # waits for the per-host slot
+    await asyncio.sleep(duration / 5)
+
+    start = time.perf_counter()
+    queue.cancel(queued)
+    queue.cancel(running)
+    jobs = [await queue.wait(job_id, 60) for job_id in (running, queued)]
+    elapsed = time.perf_counter() - start
+    await queue.shutdown()
+
+    print("\nCancel one running and one queued job")
+    print(f"  statuses: {[job['status'] for job in jobs]} in {elapsed * 1000:.1f}ms")
+    assert [job["status"] for job in jobs] == ["cancelled", "cancelled"]
+    assert jobs[1]["started_at"] is None, "cancelled queued job still ran"
+    assert elapsed < duration / 2, "running job was not killed"
+
+
+async def run(args) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.storage == "sqlite":
+            os.environ["STORAGE_PATH"] = os.path.join(tmp, "bench.db")
+        store = create_storage(args.storage)
+        await throughput(
+            store, args.hosts, args.jobs_per_host, args.workers, args.duration
+        )
+        await head_of_line(store, args.workers, args.duration)
+        await cancellation(store, args.duration)
+    print("\nOK: per-host limits, worker bound and cancellation hold")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--hosts", type=int, default=8)
+    parser.add_argument("--jobs-per-host", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=0.2)
+    parser.add_argument("--storage", choices=["sqlite", "memory"], default="sqlite")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
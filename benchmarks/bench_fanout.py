@@ -0,0 +1,152 @@
+"""
+Fleet fan-out benchmark
+Rolls one script out to --hosts targets as ExecutionQueue jobs run through
+RmmClient against the mock RMM endpoint and checks the canary waves (1, 10%,
+rest) run in order with the configured parallelism, that every host leaves
+a job record, that a failed canary stops everything after one host, and
+that the failure budget stops a bad rollout part way.
+
+Usage: python -m benchmarks.bench_fanout [--hosts 200] [--parallelism 20] [--latency 0.2]
+"""
+
+import argparse
+import asyncio
+import json
+import urllib.request
+from typing import Dict, List
+
+from backend.alert_store import AlertStore
+from backend.execution_jobs import ExecutionQueue
+from backend.fanout import RmmClient, fan_out, queued_runner
+from benchmarks.mock_rmm import mock_rmm_app
+from benchmarks.stubs import serve_in_thread
+
+PORT = 8791
+BASE = f"http://127.0.0.1:{PORT}"
+SCRIPT = "Test-Path C:\\inetpub\\logs"
+
+
+def reset_mock(failing: List[str]) -> None:
+    url = f"{BASE}/calls?failing={','.join(failing)}"
+    urllib.request.urlopen(urllib.request.Request(url, method="DELETE")).read()
+
+
+def mock_calls() -> List[Dict]:
+    with urllib.request.urlopen(f"{BASE}/calls") as response:
+        return json.loads(response.read())
+
+
+async def rollout(client: RmmClient, hosts: List[str], parallelism: int) -> List[Dict]:
+    store = AlertStore()
+    queue = ExecutionQueue(store, executor=None, workers=parallelism)
+    run_host = queued_runner(
+        queue, "ALR-FANOUT", SCRIPT, "powershell", rmm=client, rollout_id="bench"
+    )
+    try:
+        records = [
+            record async for record in fan_out(hosts, run_host, parallelism=parallelism)
+        ]
+    finally:
+        await queue.shutdown()
+    # Every host that ran left a finished job record
+    for record in records:
+        if record["type"] == "host" and record["status"] != "skipped":
+            job = store.get_job(record["job_id"])
+            assert job["host"] == record["host"] and job["rollout_id"] == "bench"
+            assert job["status"] == record["status"]
+    return records
+
+
+def summary(records: List[Dict]) -> Dict:
+    return records[-1]
+
+
+async def healthy(client, hosts, parallelism, latency) -> None:
+    reset_mock([])
+    records = await rollout(client, hosts, parallelism)
+    result = summary(records)
+    calls = mock_calls()
+
+    # Each wave starts only after the previous one has finished
+    starts = {call["host"]: call for call in calls}
+    waves = result["batches"]
+    edges = [sum(waves[: i + 1]) for i in range(len(waves))]
+    ordered = True
+    for end, next_end in zip(edges, edges[1:]):
+        finished = max(starts[h]["finished"] for h in hosts[:end])
+        started = min(starts[h]["started"] for h in hosts[end:next_end])
+        ordered = ordered and started >= finished
+
+    peak = max(
+        sum(1 for c in calls if c["started"] <= call["started"] < c["finished"])
+        for call in calls
+    )
+    serial = len(hosts) * latency
+    print(f"healthy fleet: {len(hosts)} hosts, waves {waves}")
+    print(
+        f"  wall {result['wall_time']:.2f}s (serial {serial:.1f}s), peak parallel {peak}"
+    )
+    print(f"  succeeded {result['succeeded']}, waves in order: {ordered}")
+    assert result["succeeded"] == len(hosts)
+    assert waves == [1, len(hosts) // 10, len(hosts) - 1 - len(hosts) // 10]
+    assert ordered, "a wave started before the previous one finished"
+    assert peak <= parallelism
+    assert len([r for r in records if r["type"] == "host"]) == len(hosts)
+    assert result["wall_time"] < serial / 4
+
+
+async def bad_canary(client, hosts, parallelism) -> None:
+    reset_mock([hosts[0]])
+    result = summary(await rollout(client, hosts, parallelism))
+    calls = mock_calls()
+    print(f"\nfailing canary: {len(calls)} host(s) called, {result['skipped']} skipped")
+    print(f"  {result['stop_reason']}")
+    assert len(calls) == 1 and result["skipped"] == len(hosts) - 1
+
+
+async def over_budget(client, hosts, parallelism) -> None:
+    # Every host in the last wave fails; the 5% budget stops it early
+    failing = hosts[len(hosts) // 2 :]
+    reset_mock(failing)
+    result = summary(await rollout(client, hosts, parallelism))
+    calls = mock_calls()
+    print(f"\nbad final wave: {len(calls)}/{len(hosts)} hosts called")
+    print(
+        f"  succeeded {result['succeeded']}, failed {result['failed']}, "
+        f"skipped {result['skipped']}"
+    )
+    print(f"  {result['stop_reason']}")
+    budget = int(len(hosts) * 0.05)
+    assert result["stopped"]
+    # Hosts already running when the budget ran out still finish
+    assert budget < result["failed"] <= budget + parallelism
+    assert result["skipped"] > 0
+    assert result["succeeded"] + result["failed"] + result["skipped"] == len(hosts)
+
+
+async def run(args) -> None:
+    client = RmmClient(BASE, max_workers=args.parallelism)
+    hosts = [f"WEB-{i:03}" for i in range(args.hosts)]
+    await healthy(client, hosts, args.parallelism, args.latency)
+    await bad_canary(client, hosts, args.parallelism)
+    await over_budget(client, hosts, args.parallelism)
+    client.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--hosts", type=int, default=200)
+    parser.add_argument("--parallelism", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    server = serve_in_thread(mock_rmm_app(args.latency), PORT)
+    try:
+        asyncio.run(run(args))
+    finally:
+        server.should_exit = True
+    print("\nOK: canary waves, parallelism and failure budget hold")
+
+
+if __name__ == "__main__":
+    main()
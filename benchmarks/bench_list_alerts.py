@@ -0,0 +1,94 @@
+"""
+GET /alerts latency benchmark
+Grows the SQLite store in steps and times the first page, a deep cursor page,
+a filtered page and the time to first byte of an NDJSON export at each size.
+Page latency should stay flat as the store grows.
+
+Usage: python -m benchmarks.bench_list_alerts [--steps 10000,100000,200000]
+"""
+
+import argparse
+import http.client
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks.stubs import serve_in_thread
+
+SEVERITIES = ["critical", "high", "medium", "low"]
+REPEATS = 20
+
+
+def make_alerts(start: int, count: int):
+    for i in range(start, start + count):
+        yield {
+            "id": f"LIST{i:08d}",
+            "timestamp": f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}T{i % 24:02d}:00:{i % 60:02d}Z",
+            "severity": SEVERITIES[i % 4],
+            "system": f"PROD-SRV-{i % 500:03d}",
+            "alert_type": "disk_space",
+            "description": "Disk space critical on C:\\ drive",
+            "metrics": {"disk_used_percent": 90 + i % 10},
+        }
+
+
+def timed_get(port: int, path: str, first_byte_only: bool = False) -> float:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    start = time.perf_counter()
+    conn.request("GET", path)
+    response = conn.getresponse()
+    if first_byte_only:
+        response.read(1)
+    else:
+        response.read()
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed
+
+
+def median_ms(port: int, path: str, first_byte_only: bool = False) -> float:
+    samples = [timed_get(port, path, first_byte_only) for _ in range(REPEATS)]
+    return statistics.median(samples) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--steps", default="10000,100000,200000")
+    parser.add_argument("--port", type=int, default=8768)
+    args = parser.parse_args()
+    steps = [int(s) for s in args.steps.split(",")]
+
+    tmp = tempfile.mkdtemp()
+    os.environ["STORAGE_PATH"] = os.path.join(tmp, "list.db")
+
+    from backend import app as app_module
+    from backend.alert_listing import encode_cursor
+
+    store = app_module.alert_store
+    serve_in_thread(app_module.app, args.port)
+
+    loaded = 0
+    print(f"{'alerts':>8} {'first':>9} {'deep':>9} {'filter':>9} {'ndjson TTFB':>12}")
+    for size in steps:
+        store.add_alerts(make_alerts(loaded, size - loaded))
+        loaded = size
+        middle = store.query_alerts(since="2025-06-15", limit=1)[0]
+        deep = f"/alerts?limit=100&cursor={encode_cursor(middle)}"
+        row = (
+            median_ms(args.port, "/alerts?limit=100"),
+            median_ms(args.port, deep),
+            median_ms(
+                args.port, "/alerts?limit=100&system=PROD-SRV-042&fields=severity"
+            ),
+            median_ms(args.port, "/alerts?format=ndjson", first_byte_only=True),
+        )
+        print(
+            f"{size:>8} "
+            + " ".join(f"{ms:>8.2f}ms" for ms in row[:3])
+            + f" {row[3]:>10.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
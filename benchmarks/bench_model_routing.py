@@ -0,0 +1,142 @@
+"""
+Model routing benchmark
+Analyzes a mixed alert stream (low/medium/high/critical across the shipped
+SOPs, plus alerts no SOP covers) with a stub Bedrock client whose latency
+depends on the model: Nova Pro slow, the fast model quicker, templates free.
+Runs the stream with ROUTING_ENABLED=false (everything on Nova Pro) and with
+routing on, and reports per-route call counts and latency from
+ModelRouter.stats() along with which model each Bedrock call went to.
+Template plans come from the shipped scripts/ templates.
+
+Usage: python -m benchmarks.bench_model_routing [--pro-latency 0.4] [--fast-latency 0.1] [--repeat 3]
+"""
+
+import argparse
+import os
+import time
+from collections import Counter
+from typing import Dict, List
+
+from backend.models import Alert
+from benchmarks.stubs import StubBedrockClient
+
+# (severity, alert_type, description): the shape of a day's alert stream
+ALERT_MIX = [
+    ("low", "disk_space", "C: drive at 91% capacity, disk critical soon"),
+    ("low", "disk_space", "D: drive crossed the storage alert threshold"),
+    ("low", "high_cpu", "cpu spike on worker process, cpu usage at 88%"),
+    ("low", "windows_update", "3 pending updates, security update required"),
+    ("medium", "disk_space", "E: drive at 93%, disk full expected in 2 days"),
+    ("medium", "high_cpu", "sustained cpu usage above 90% for 20 minutes"),
+    ("medium", "service_down", "W3SVC service stopped unexpectedly"),
+    ("high", "disk_space", "C: drive at 97% capacity, disk critical"),
+    ("high", "high_cpu", "processor saturated, performance degradation"),
+    ("critical", "service_down", "SQL Server service crashed, service stopped"),
+    ("low", "certificate", "TLS certificate expires in 20 days"),
+    ("medium", "backup_job", "Nightly backup job reported warnings"),
+]
+
+
+class RoutedStubClient(StubBedrockClient):
+    """Stub whose latency depends on the model the request was routed to"""
+
+    def __init__(self, latencies: Dict[str, float]):
+        super().__init__(latency=0)
+        self.latencies = latencies
+        self.models = Counter()
+
+    def invoke_model(self, modelId: str, body: str, **kwargs) -> dict:
+        self.models[modelId] += 1
+        time.sleep(self.latencies[modelId])
+        return super().invoke_model(modelId, body, **kwargs)
+
+
+def alerts(repeat: int) -> List[Alert]:
+    return [
+        Alert(
+            id=f"ALR-ROUTE-{n}-{i}",
+            timestamp="2026-10-18T09:00:00",
+            severity=severity,
+            system="WEB-01",
+            alert_type=alert_type,
+            description=description,
+            metrics={"usage_percent": 90 + i},
+        )
+        for n in range(repeat)
+        for i, (severity, alert_type, description) in enumerate(ALERT_MIX)
+    ]
+
+
+def run(routing: bool, latencies: Dict[str, float], repeat: int) -> Dict:
+    os.environ["ROUTING_ENABLED"] = "true" if routing else "false"
+    from backend.aws_bedrock_service import BedrockService
+
+    client = RoutedStubClient(latencies)
+    service = BedrockService(client=client)
+    start = time.perf_counter()
+    for alert in alerts(repeat):
+        plan = service.analyze_alert(alert)
+        assert plan.alert_id == alert.id and plan.script
+    elapsed = time.perf_counter() - start
+    return {
+        "elapsed": elapsed,
+        "stats": service.router.stats(),
+        "models": client.models,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pro-latency", type=float, default=0.4)
+    parser.add_argument("--fast-latency", type=float, default=0.1)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    os.environ.update(
+        PLAN_CACHE_ENABLED="false",
+        AWS_ACCESS_KEY_ID="stub",
+        AWS_SECRET_ACCESS_KEY="stub",
+    )
+    from backend.model_router import DEFAULT_FAST_MODEL, DEFAULT_PRO_MODEL
+
+    latencies = {
+        DEFAULT_PRO_MODEL: args.pro_latency,
+        DEFAULT_FAST_MODEL: args.fast_latency,
+    }
+    total = len(ALERT_MIX) * args.repeat
+    baseline = run(False, latencies, args.repeat)
+    routed = run(True, latencies, args.repeat)
+
+    print(
+        f"\n{total} alerts, Nova Pro {args.pro_latency}s, "
+        f"fast model {args.fast_latency}s per call"
+    )
+    for name, result in (("all on Nova Pro", baseline), ("routed", routed)):
+        print(f"\n{name}: {result['elapsed']:.2f}s total")
+        print(f"  {'route':<9} {'calls':>6} {'model':>6} {'p50 ms':>8} {'p99 ms':>8}")
+        for route, entry in result["stats"]["routes"].items():
+            if entry["calls"]:
+                print(
+                    f"  {route:<9} {entry['calls']:>6} {entry['model_calls']:>6} "
+                    f"{entry['latency_ms']['p50']:>8.1f} {entry['latency_ms']['p99']:>8.1f}"
+                )
+        print(f"  Bedrock calls by model: {dict(result['models'])}")
+
+    routes = routed["stats"]["routes"]
+    assert baseline["models"][DEFAULT_PRO_MODEL] == total
+    assert sum(entry["calls"] for entry in routes.values()) == total
+    assert routes["template"]["calls"] > 0 and routes["template"]["model_calls"] == 0
+    assert routes["fast"]["calls"] > 0 and routes["pro"]["calls"] > 0
+    # Templates never reach Bedrock
+    assert sum(routed["models"].values()) == total - routes["template"]["calls"]
+    assert routes["template"]["latency_ms"]["p99"] < args.fast_latency * 1000
+    assert routed["elapsed"] < baseline["elapsed"] * 0.75
+    print(
+        f"\nOK: {routes['template']['calls']} template, {routes['fast']['calls']} fast, "
+        f"{routes['pro']['calls']} Nova Pro; "
+        f"{baseline['elapsed'] / routed['elapsed']:.1f}x less model time"
+    )
+
+
+if __name__ == "__main__":
+    main()
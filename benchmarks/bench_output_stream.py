@@ -0,0 +1,93 @@
+"""
+Live script output benchmark
+Runs a real subprocess through ScriptExecutor.execute_script_async (a Python
+program stands in for PowerShell) that prints one line, pauses, then floods
+--lines lines. Checks the first line reaches the output buffer long before the
+script ends, and that memory held for the output stays at the ring buffer's
+size rather than growing with everything the script printed.
+
+Usage: python -m benchmarks.bench_output_stream [--lines 200000] [--pause 1.0]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+import tracemalloc
+
+from backend.output_buffer import OutputBuffer
+from backend.script_executor import ScriptExecutor
+
+LINE = "x" * 100
+
+SCRIPT = """
+import sys, time
+print("starting cleanup", flush=True)
+time.sleep({pause})
+line = "{line}"
+for i in range({lines}):
+    sys.stdout.write(line + "\\n")
+print("cleanup complete")
+"""
+
+
+class PythonScriptExecutor(ScriptExecutor):
+    """Real-mode executor that runs "PowerShell" scripts with this Python"""
+
+    def __init__(self):
+        super().__init__()
+        self.demo_mode = False
+        self.interpreters["powershell"] = [sys.executable]
+
+
+class TimedBuffer(OutputBuffer):
+    """Records when the first line arrived"""
+
+    first_line_at = None
+
+    def _append(self, line: str) -> None:
+        if self.first_line_at is None:
+            self.first_line_at = time.perf_counter()
+        super()._append(line)
+
+
+async def run(lines: int, pause: float) -> None:
+    executor = PythonScriptExecutor()
+    script = SCRIPT.format(pause=pause, line=LINE, lines=lines)
+    output = TimedBuffer()
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = await executor.execute_script_async(
+        script, "powershell", validation={"is_safe": True}, output=output
+    )
+    total = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    printed_mb = lines * (len(LINE) + 1) / 1e6
+    first = output.first_line_at - start
+    print(
+        f"script printed {lines + 2} lines ({printed_mb:.1f} MB), status {result['status']}"
+    )
+    print(f"  first line after:   {first:6.2f}s")
+    print(f"  script finished:    {total:6.2f}s")
+    print(f"  lines retained:     {len(output.since(0))} (max {output.max_lines})")
+    print(f"  peak traced memory: {peak / 1e6:6.2f} MB")
+    assert result["status"] == "success", result["output"][-500:]
+    assert result["output"].endswith("cleanup complete")
+    assert first < pause / 2, "output was not streamed while the script ran"
+    assert peak < printed_mb * 1e6 / 4, "output memory grew with script output"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", type=int, default=200000)
+    parser.add_argument("--pause", type=float, default=1.0)
+    args = parser.parse_args()
+    asyncio.run(run(args.lines, args.pause))
+    print("OK: output streams line by line into a bounded buffer")
+
+
+if __name__ == "__main__":
+    main()
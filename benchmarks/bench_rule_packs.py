@@ -0,0 +1,106 @@
+"""
+Safety rule pack scaling benchmark
+Writes rule packs with 1x, 10x and 100x the shipped PowerShell rule count
+(synthetic extra rules, about a tenth of them keyed on commands the script
+really uses) and times cold validation of a ~1 MB script at each size, with
+and without the token-vocabulary prefilter. Latency at 100x must stay well
+below 100x the baseline.
+
+Usage: python -m benchmarks.bench_rule_packs [--size-mb 1] [--repeat 5]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+from backend import safety_rules
+from backend.context_cache import DEFAULT_DATA_DIR
+from backend.safety_rules import SafetyRulePacks
+from backend.script_executor import ScriptSafetyValidator
+from benchmarks.bench_validator import generate_script
+
+SHIPPED_RULES = os.path.join(DEFAULT_DATA_DIR, "safety_rules")
+SCALES = (1, 10, 100)
+# Commands that appear in generated scripts; rules keyed on them can't be skipped
+LIVE_COMMANDS = ["Remove-Item", "Copy-Item", "Get-ChildItem", "Write-Host"]
+
+
+def synthetic_rules(count: int):
+    for i in range(count):
+        if i % 10 == 0:
+            command = LIVE_COMMANDS[i % len(LIVE_COMMANDS)]
+            pattern = rf"{command}\s+-Path\s+\\\\server{i}\\admin\$"
+        else:
+            pattern = rf"Invoke-Wiper{i:05d}\s+-Target\s+\S+"
+        yield {"id": f"synthetic-{i}", "pattern": pattern}
+
+
+def build_rules_dir(scale: int) -> str:
+    """Copy of the shipped packs with the PowerShell pack grown to scale x"""
+    rules_dir = tempfile.mkdtemp()
+    shutil.copytree(SHIPPED_RULES, rules_dir, dirs_exist_ok=True)
+    path = os.path.join(rules_dir, "powershell.json")
+    with open(path) as f:
+        pack = json.load(f)
+    base = len(pack["dangerous"]) + len(pack["required"])
+    pack["dangerous"] += list(synthetic_rules(base * (scale - 1)))
+    with open(path, "w") as f:
+        json.dump(pack, f)
+    return rules_dir
+
+
+def median_ms(rules_dir: str, script: str, repeat: int) -> float:
+    packs = SafetyRulePacks(rules_dir, check_interval=3600)
+    packs.ruleset("powershell")  # compile outside the timed region
+    samples = []
+    for _ in range(repeat):
+        validator = ScriptSafetyValidator(packs)  # empty verdict cache
+        start = time.perf_counter()
+        validator.validate(script, "powershell")
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size-mb", type=float, default=1.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    script = generate_script(int(args.size_mb * 1024 * 1024), seed=3)
+
+    dirs = {scale: build_rules_dir(scale) for scale in SCALES}
+    counts = {
+        scale: SafetyRulePacks(d, check_interval=3600).ruleset("powershell").rule_count
+        for scale, d in dirs.items()
+    }
+
+    results = {}
+    threshold = safety_rules.VOCABULARY_MIN_RULES
+    for label, min_rules in (("prefix only", 10**9), ("vocabulary", threshold)):
+        safety_rules.VOCABULARY_MIN_RULES = min_rules
+        results[label] = {
+            scale: median_ms(d, script, args.repeat) for scale, d in dirs.items()
+        }
+    safety_rules.VOCABULARY_MIN_RULES = threshold
+
+    print(f"{'scale':>6} {'rules':>6} {'prefix only':>12} {'vocabulary':>12}")
+    for scale in SCALES:
+        print(
+            f"{scale:>5}x {counts[scale]:>6} "
+            f"{results['prefix only'][scale]:>10.1f}ms "
+            f"{results['vocabulary'][scale]:>10.1f}ms"
+        )
+
+    best = {scale: min(r[scale] for r in results.values()) for scale in SCALES}
+    growth = best[100] / best[1]
+    print(f"100x rules -> {growth:.1f}x latency")
+    assert growth < 10, "validation latency grew roughly linearly with rule count"
+    print("OK: latency grows sublinearly with rule count")
+
+
+if __name__ == "__main__":
+    main()
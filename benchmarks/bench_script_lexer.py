@@ -0,0 +1,128 @@
+"""
+Script lexer benchmark
+Times the token-level validator against the regex rules it replaced on an
+adversarial one-line script (the old `Remove-Item.*-Recurse.*C:\\Windows`
+rule backtracks cubically there), checks lexing stays linear on generated
+scripts up to a few MB, and lists verdicts on scripts the regexes got wrong.
+
+Usage: python -m benchmarks.bench_script_lexer [--repeat 3]
+"""
+
+import argparse
+import re
+import statistics
+import time
+
+from backend.safety_rules import SafetyRulePacks
+from backend.script_executor import ScriptSafetyValidator
+from benchmarks.bench_validator import generate_script
+
+# The regex rules the lexer-based command rules and checks replaced. The
+# shipped remove-windows pattern escaped its backslash twice (it only matched
+# "C:\\Windows"); it is timed here as intended, with a single one.
+LEGACY_RULES = {
+    "remove-windows": re.compile(r"Remove-Item.*-Recurse.*C:\\Windows", re.I),
+    "error-handling": re.compile(r"try.*catch", re.I),
+}
+
+ADVERSARIAL_REPEATS = (100, 200, 400)
+SIZES_MB = (0.25, 0.5, 1, 2)
+
+# (label, script, legacy rule, expected token-level outcome)
+ACCURACY_CASES = [
+    (
+        "delete named in a comment",
+        "# never run Remove-Item -Recurse C:\\Windows here\nWrite-Host ok",
+        "remove-windows",
+        "safe",
+    ),
+    (
+        "delete quoted in a message",
+        "Write-Host 'Refusing Remove-Item -Recurse C:\\Windows'",
+        "remove-windows",
+        "safe",
+    ),
+    (
+        "abbreviated parameter",
+        "ri -Rec -Path:C:\\Windows\\System32",
+        "remove-windows",
+        "rejected",
+    ),
+    (
+        "try/catch across lines",
+        "try {\n  Copy-Item a b\n  Remove-Item c\n}\ncatch {\n  Write-Error $_\n}",
+        "error-handling",
+        "handled",
+    ),
+]
+
+
+def validator() -> ScriptSafetyValidator:
+    """Fresh validator over the shipped packs, so every call is a cache miss"""
+    return ScriptSafetyValidator(SafetyRulePacks(check_interval=3600))
+
+
+def median_ms(func, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def adversarial(repeat: int) -> None:
+    print(f"{'line length':>12} {'legacy regex':>14} {'token rules':>12}")
+    legacy = LEGACY_RULES["remove-windows"]
+    for repeats in ADVERSARIAL_REPEATS:
+        script = "Remove-Item -Recurse " * repeats
+        old = median_ms(lambda: legacy.search(script), 1)
+        new = median_ms(lambda: validator().validate(script), repeat)
+        print(f"{len(script):>12} {old:>12.1f}ms {new:>10.2f}ms")
+
+
+def scaling(repeat: int) -> float:
+    print(f"\n{'script':>8} {'validate':>10} {'per MB':>10}")
+    per_mb = {}
+    for size_mb in SIZES_MB:
+        script = generate_script(int(size_mb * 1024 * 1024), seed=5)
+        ms = median_ms(lambda: validator().validate(script), repeat)
+        per_mb[size_mb] = ms / size_mb
+        print(f"{size_mb:>6}MB {ms:>8.1f}ms {per_mb[size_mb]:>8.1f}ms")
+    return per_mb[SIZES_MB[-1]] / per_mb[SIZES_MB[0]]
+
+
+def accuracy() -> None:
+    print(f"\n{'case':<28} {'legacy regex':<14} {'token rules':<12}")
+    for label, script, rule, expected in ACCURACY_CASES:
+        verdict = validator().validate(script)
+        legacy_hit = LEGACY_RULES[rule].search(script) is not None
+        if rule == "error-handling":
+            legacy = "handled" if legacy_hit else "missed"
+            got = (
+                "handled"
+                if verdict["safety_score"] and not verdict["issues"]
+                else "missed"
+            )
+        else:
+            legacy = "rejected" if legacy_hit else "safe"
+            got = "safe" if verdict["is_safe"] else "rejected"
+        print(f"{label:<28} {legacy:<14} {got:<12}")
+        assert got == expected, (label, verdict)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    adversarial(args.repeat)
+    growth = scaling(args.repeat)
+    accuracy()
+    print(f"\nper-MB cost at {SIZES_MB[-1]}MB vs {SIZES_MB[0]}MB: {growth:.2f}x")
+    assert growth < 1.5, "validation time grew faster than script size"
+    print("OK: token-level validation is linear in script size")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+SOP matcher benchmark
+Builds a synthetic KB of --sops SOPs (5 triggers each) and compares the
+Aho-Corasick matcher against the old linear trigger scan.
+
+Usage: python -m benchmarks.bench_sop_matcher [--sops 10000] [--queries 2000]
+"""
+
+import argparse
+import random
+import time
+
+from backend.sop_matcher import SOPMatcher
+
+WORDS = (
+    "disk cpu memory service patch update network latency backup restore "
+    "cluster node pool queue cache index replica certificate dns firewall "
+    "login token session thread socket kernel driver volume snapshot quota"
+).split()
+STATES = (
+    "full critical spike down stopped failure missing expired degraded high".split()
+)
+
+
+def synthetic_kb(n: int, rng: random.Random) -> dict:
+    kb = {}
+    for i in range(n):
+        triggers = [
+            f"{rng.choice(WORDS)} {rng.choice(STATES)} {i}" if j else f"sop{i} trigger"
+            for j in range(5)
+        ]
+        kb[f"sop_{i}"] = {"title": f"Synthetic SOP {i}", "triggers": triggers}
+    return kb
+
+
+def linear_scan(text: str, kb: dict) -> dict:
+    """The pre-automaton _find_relevant_sop: every SOP x every trigger"""
+    lowered = text.lower()
+    for sop in kb.values():
+        if any(trigger in lowered for trigger in sop.get("triggers", [])):
+            return sop
+    return {}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sops", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    kb = synthetic_kb(args.sops, rng)
+    queries = []
+    for _ in range(args.queries):
+        i = rng.randrange(args.sops)
+        trig = kb[f"sop_{i}"]["triggers"][rng.randrange(1, 5)]
+        queries.append(
+            f"ALERT on PROD-SRV-{rng.randrange(500)}: {trig} detected by monitor"
+        )
+
+    start = time.perf_counter()
+    matcher = SOPMatcher(kb)
+    build = time.perf_counter() - start
+    print(
+        f"KB: {args.sops} SOPs, {args.sops * 5} triggers; automaton built in {build:.2f}s"
+    )
+
+    start = time.perf_counter()
+    for q in queries:
+        matcher.match([(q, 1.0)])
+    ac = (time.perf_counter() - start) / len(queries)
+
+    sample = queries[: max(1, min(len(queries), 200))]
+    start = time.perf_counter()
+    for q in sample:
+        linear_scan(q, kb)
+    linear = (time.perf_counter() - start) / len(sample)
+
+    print(f"Aho-Corasick : {ac * 1e6:9.1f} us/query (ranked candidates)")
+    print(f"Linear scan  : {linear * 1e6:9.1f} us/query (first match only)")
+    print(f"Speedup      : {linear / ac:9.1f}x")
+
+    for q in queries[:50]:
+        best = matcher.match([(q, 1.0)], limit=1)
+        assert best and any(t in q.lower() for t in best[0].matched_triggers)
+    print("OK: every query resolved to an SOP whose trigger occurs in the alert text")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Storage throughput benchmark
+Runs N worker processes (like gunicorn -w N) against one shared SQLite file,
+measures batched ingest and random-lookup throughput, and checks that every
+worker can read alerts written by the others.
+
+Usage: python -m benchmarks.bench_storage [--workers 4] [--alerts 20000]
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+from backend.sqlite_store import SQLiteStore
+
+SEVERITIES = ["critical", "high", "medium", "low"]
+ALERT_TYPES = ["disk_space", "cpu", "memory", "patch"]
+
+
+def make_alert(worker: int, i: int) -> dict:
+    return {
+        "id": f"W{worker}-{i:07d}",
+        "timestamp": f"2025-10-11T{(i // 3600) % 24:02d}:{(i // 60) % 60:02d}:{i % 60:02d}Z",
+        "severity": SEVERITIES[i % len(SEVERITIES)],
+        "system": f"PROD-SRV-{i % 200:03d}",
+        "alert_type": ALERT_TYPES[i % len(ALERT_TYPES)],
+        "description": "Synthetic benchmark alert",
+        "metrics": {"disk_used_percent": 90 + i % 10},
+    }
+
+
+def ingest_worker(path: str, worker: int, count: int, batch: int, out) -> None:
+    store = SQLiteStore(path, batch_size=batch)
+    alerts = [make_alert(worker, i) for i in range(count)]
+    start = time.perf_counter()
+    store.add_alerts(alerts)
+    out.put(("ingest", worker, count, time.perf_counter() - start))
+
+
+def lookup_worker(
+    path: str, worker: int, workers: int, per_worker: int, lookups: int, out
+) -> None:
+    store = SQLiteStore(path)
+    rng = random.Random(worker)
+    missing = 0
+    start = time.perf_counter()
+    for _ in range(lookups):
+        # Deliberately read alerts written by *other* workers
+        owner = (worker + 1 + rng.randrange(max(workers - 1, 1))) % workers
+        if store.get_alert(f"W{owner}-{rng.randrange(per_worker):07d}") is None:
+            missing += 1
+    out.put(("lookup", worker, lookups - missing, time.perf_counter() - start))
+
+
+def run_phase(target, args_list) -> list:
+    out = multiprocessing.Queue()
+    procs = [
+        multiprocessing.Process(target=target, args=args + (out,)) for args in args_list
+    ]
+    start = time.perf_counter()
+    for p in procs:
+        p.start()
+    results = [out.get() for _ in procs]
+    for p in procs:
+        p.join()
+    return results, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--alerts", type=int, default=20000, help="alerts per worker")
+    parser.add_argument("--lookups", type=int, default=20000, help="lookups per worker")
+    parser.add_argument("--batch", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        SQLiteStore(path)  # create schema once before workers race
+
+        results, wall = run_phase(
+            ingest_worker,
+            [(path, w, args.alerts, args.batch) for w in range(args.workers)],
+        )
+        total = sum(r[2] for r in results)
+        print(
+            f"Ingest : {total} alerts from {args.workers} workers in {wall:.2f}s "
+            f"-> {total / wall:,.0f} alerts/s"
+        )
+
+        results, wall = run_phase(
+            lookup_worker,
+            [
+                (path, w, args.workers, args.alerts, args.lookups)
+                for w in range(args.workers)
+            ],
+        )
+        found = sum(r[2] for r in results)
+        total = args.workers * args.lookups
+        print(
+            f"Lookup : {total} cross-worker lookups in {wall:.2f}s "
+            f"-> {total / wall:,.0f} lookups/s ({found}/{total} found)"
+        )
+
+        store = SQLiteStore(path)
+        assert store.count_alerts() == args.workers * args.alerts
+        assert found == total, "some workers could not see alerts written by others"
+        print("OK: every worker sees every other worker's alerts")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Streaming analysis benchmark
+Runs the API against stub_bedrock.py generating a realistic plan (long
+reasoning, ~5 KB script) at --tokens-per-second, and compares time to first
+insight: POST /alerts/{id}/analyze returns nothing until the whole plan is
+generated, while POST /alerts/{id}/analyze/stream sends root_cause and
+confidence as SSE "field" events as soon as the model has written them.
+Also checks the streamed fields match the final plan and times the
+incremental parser on its own.
+
+Usage: python -m benchmarks.bench_streaming_analysis [--tokens-per-second 200] [--latency 0.5]
+"""
+
+import argparse
+import json
+import os
+import time
+import urllib.request
+from typing import Dict, List, Tuple
+
+from backend.plan_stream import PlanStreamParser
+from benchmarks.stub_bedrock import stub_bedrock_app
+from benchmarks.stubs import STUB_PLAN, serve_in_thread
+
+STUB_PORT = 8793
+API_PORT = 8794
+API = f"http://127.0.0.1:{API_PORT}"
+
+SCRIPT_LINES = [
+    "# Step {n}: rotate IIS logs older than 30 days",
+    "try {{",
+    "    $logs = Get-ChildItem -Path $LogPath -Filter *.log | Where-Object {{ $_.LastWriteTime -lt (Get-Date).AddDays(-30) }}",
+    '    Write-Host "Found $($logs.Count) logs to archive" -ForegroundColor Cyan',
+    "    Compress-Archive -Path $logs.FullName -DestinationPath $BackupPath -Update",
+    "}} catch {{ Write-Host $_ -ForegroundColor Red; exit 1 }}",
+]
+
+PLAN = dict(
+    STUB_PLAN,
+    reasoning=(
+        "Disk usage on C: grew steadily over the past week and the largest "
+        "growth is under C:\\inetpub\\logs. Device history shows the same "
+        "pattern twice before, both resolved by archiving old IIS logs. "
+    )
+    * 6,
+    remediation_steps=[
+        f"Step {n}: archive and remove IIS logs older than 30 days, verify free space"
+        for n in range(1, 9)
+    ],
+    script="\n".join(line.format(n=n) for n in range(1, 16) for line in SCRIPT_LINES),
+    safety_checks=[
+        f"Safety check {n}: backup verified before delete" for n in range(6)
+    ],
+    rollback_plan="Restore the archived logs from $BackupPath with Expand-Archive. "
+    * 4,
+)
+
+ALERT = {
+    "id": "ALR-STREAM-1",
+    "timestamp": "2026-10-18T09:00:00",
+    "severity": "high",
+    "system": "WEB-01",
+    "alert_type": "disk_space",
+    "description": "C: drive at 95% capacity",
+    "metrics": {"disk_usage_percent": 95},
+}
+
+
+def post(path: str, body: Dict = None):
+    data = json.dumps(body).encode() if body is not None else b""
+    request = urllib.request.Request(
+        f"{API}{path}",
+        data=data,
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    return urllib.request.urlopen(request, timeout=120)
+
+
+def blocking_analysis() -> float:
+    start = time.perf_counter()
+    with post(f"/alerts/{ALERT['id']}/analyze") as response:
+        json.loads(response.read())
+    return time.perf_counter() - start
+
+
+def streamed_analysis() -> Tuple[List[Tuple[float, str, Dict]], Dict]:
+    """(seconds, event, data) for every SSE event, and the final plan"""
+    start = time.perf_counter()
+    events = []
+    plan = None
+    kind = None
+    with post(f"/alerts/{ALERT['id']}/analyze/stream") as response:
+        for raw in response:
+            line = raw.decode().rstrip("\n")
+            if line.startswith("event: "):
+                kind = line[7:]
+            elif line.startswith("data: "):
+                data = json.loads(line[6:])
+                events.append((time.perf_counter() - start, kind, data))
+                if kind == "plan":
+                    plan = data["plan"]
+    return events, plan
+
+
+def parser_speed() -> float:
+    text = json.dumps(PLAN)
+    start = time.perf_counter()
+    rounds = 200
+    for _ in range(rounds):
+        parser = PlanStreamParser()
+        for i in range(0, len(text), 16):
+            parser.feed(text[i : i + 16])
+    return (time.perf_counter() - start) / rounds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tokens-per-second", type=float, default=200)
+    parser.add_argument("--latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    os.environ.update(
+        BEDROCK_ENDPOINT_URL=f"http://127.0.0.1:{STUB_PORT}",
+        AWS_ACCESS_KEY_ID="stub",
+        AWS_SECRET_ACCESS_KEY="stub",
+        STORAGE_BACKEND="memory",
+        PLAN_CACHE_ENABLED="false",
+        DEDUP_ENABLED="false",
+    )
+    from backend.app import app
+
+    stub = serve_in_thread(
+        stub_bedrock_app(
+            args.latency, plan=PLAN, tokens_per_second=args.tokens_per_second
+        ),
+        STUB_PORT,
+    )
+    api = serve_in_thread(app, API_PORT)
+    try:
+        post("/alerts/ingest", ALERT).read()
+        blocking = blocking_analysis()
+        events, plan = streamed_analysis()
+    finally:
+        api.should_exit = True
+        stub.should_exit = True
+
+    tokens = len(json.dumps(PLAN)) // 4
+    fields = {
+        data["field"]: seconds for seconds, kind, data in events if kind == "field"
+    }
+    first_insight = max(fields["root_cause"], fields["confidence"])
+    streamed_total = events[-1][0]
+    print(
+        f"plan of ~{tokens} tokens at {args.tokens_per_second:.0f} tokens/s, "
+        f"{args.latency}s to first token"
+    )
+    print(f"  blocking /analyze:           {blocking:6.2f}s to anything")
+    print(f"  /analyze/stream status:      {events[0][0]:6.2f}s")
+    for name, seconds in fields.items():
+        print(f"  /analyze/stream {name + ':':<14} {seconds:6.2f}s")
+    print(f"  /analyze/stream full plan:   {streamed_total:6.2f}s")
+    per_plan = parser_speed()
+    print(f"  incremental parser: {per_plan * 1000:.2f} ms per plan")
+
+    streamed = {
+        data["field"]: data["value"] for _, kind, data in events if kind == "field"
+    }
+    assert plan is not None and events[-1][1] == "plan"
+    assert all(plan[name] == value for name, value in streamed.items())
+    assert "script" not in streamed and plan["script"] == PLAN["script"]
+    assert first_insight < args.latency + 1.0, "root cause was not streamed early"
+    assert first_insight < blocking / 4
+    print(
+        f"\nOK: first insight {blocking / first_insight:.0f}x sooner than the full plan"
+    )
+
+
+if __name__ == "__main__":
+    main()
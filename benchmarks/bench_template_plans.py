@@ -0,0 +1,226 @@
+"""
+Template plan benchmark
+Synthesizes RemediationPlans from the shipped SOP script templates and
+alert metrics: cold (compile + render) vs warm (compiled template cached)
+time per plan, against the stub Bedrock latency a model call would cost.
+Then takes Bedrock down (every call ServiceUnavailable, so the circuit
+breaker opens part way) and checks alerts with a matched SOP still get a
+template plan while an alert no SOP covers fails as before. Every rendered
+script must pass ScriptSafetyValidator, and metric values a template does
+not declare, or that fail its checks, must never reach the script.
+
+Usage: python -m benchmarks.bench_template_plans [--rounds 2000] [--bedrock-latency 5]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import Dict, List
+
+from botocore.exceptions import ClientError
+
+from backend.models import Alert
+from backend.plan_templates import DEFAULT_TEMPLATE_DIR, TemplateError, TemplatePlanner
+from backend.script_executor import ScriptSafetyValidator
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+
+# alert_type, description, metrics per SOP
+ALERTS = {
+    "disk_space_windows": (
+        "disk_space",
+        "Disk space critical on D: drive - 93% full",
+        {"disk_used_percent": 93, "partition": "D:\\", "retention_days": 14},
+    ),
+    "high_cpu_windows": (
+        "high_cpu",
+        "cpu usage above 95% for 15 minutes",
+        {"cpu_percent": 97.25, "process_name": "w3wp"},
+    ),
+    "service_restart_windows": (
+        "service_down",
+        "W3SVC service stopped unexpectedly",
+        {"service_name": "W3SVC", "service_state": "Stopped"},
+    ),
+    "patch_management_windows": (
+        "windows_update",
+        "12 pending updates, security update required",
+        {"pending_updates": 12, "critical_updates": 3},
+    ),
+}
+
+
+class DownBedrockClient:
+    """bedrock-runtime stand-in that is always unavailable"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def invoke_model(self, modelId: str, body: str, **kwargs):
+        self.calls += 1
+        raise ClientError(
+            {"Error": {"Code": "ServiceUnavailableException", "Message": "down"}},
+            "InvokeModel",
+        )
+
+
+def make_alerts() -> List[Alert]:
+    return [
+        Alert(
+            id=f"ALR-TPL-{n}",
+            timestamp="2026-10-18T09:00:00",
+            severity="high",
+            system="WEB-01",
+            alert_type=alert_type,
+            description=description,
+            metrics=alert_metrics,
+        )
+        for n, (alert_type, description, alert_metrics) in enumerate(ALERTS.values())
+    ]
+
+
+def synthesis_speed(kb: Dict, rounds: int) -> Dict[str, float]:
+    """Seconds per plan: compile + render from a fresh planner, and warm"""
+    alerts = make_alerts()
+    pairs = [(alert, kb[sop_id]) for alert, sop_id in zip(alerts, ALERTS)]
+    start = time.perf_counter()
+    cold_rounds = max(rounds // 20, 1)
+    for _ in range(cold_rounds):
+        planner = TemplatePlanner()
+        for alert, sop in pairs:
+            planner.plan(alert, sop, 1.0)
+    cold = (time.perf_counter() - start) / (cold_rounds * len(pairs))
+
+    planner = TemplatePlanner()
+    planner.warm(kb)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for alert, sop in pairs:
+            planner.plan(alert, sop, 1.0)
+    warm = (time.perf_counter() - start) / (rounds * len(pairs))
+    return {"cold": cold, "warm": warm, "compiles": planner.stats()["compiles"]}
+
+
+def reload_on_edit(kb: Dict) -> bool:
+    """An edited template is recompiled on the next plan"""
+    directory = tempfile.mkdtemp(prefix="sop-templates-")
+    try:
+        for name in os.listdir(DEFAULT_TEMPLATE_DIR):
+            shutil.copy(os.path.join(DEFAULT_TEMPLATE_DIR, name), directory)
+        planner = TemplatePlanner(directory)
+        alert = make_alerts()[0]
+        sop = kb["disk_space_windows"]
+        before = planner.plan(alert, sop, 1.0).script
+        path = os.path.join(directory, sop["script_template"])
+        with open(path, "a") as f:
+            f.write("# edited\n")
+        os.utime(path, (time.time() + 5, time.time() + 5))
+        after = planner.plan(alert, sop, 1.0).script
+        return after == before + "# edited\n"
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, default=2000)
+    parser.add_argument("--bedrock-latency", type=float, default=5.0)
+    args = parser.parse_args()
+
+    os.environ.update(
+        PLAN_CACHE_ENABLED="false",
+        BEDROCK_MAX_ATTEMPTS="1",
+        BEDROCK_BREAKER_THRESHOLD="2",
+        AWS_ACCESS_KEY_ID="stub",
+        AWS_SECRET_ACCESS_KEY="stub",
+    )
+    with open(os.path.join(DATA_DIR, "sop_kb.json")) as f:
+        kb = json.load(f)
+
+    speed = synthesis_speed(kb, args.rounds)
+    print(
+        f"template plan: cold {speed['cold'] * 1000:.3f} ms, "
+        f"warm {speed['warm'] * 1000:.3f} ms "
+        f"({speed['compiles']} compiles for {args.rounds * len(ALERTS)} plans) "
+        f"vs ~{args.bedrock_latency:.0f} s per Bedrock analysis"
+    )
+
+    # Bedrock down: template fallback for matched SOPs, error otherwise
+    from backend.aws_bedrock_service import BedrockService
+
+    client = DownBedrockClient()
+    service = BedrockService(client=client)
+    with open(os.path.join(DATA_DIR, "alerts.json")) as f:
+        demo = Alert(**json.load(f))
+    validator = ScriptSafetyValidator()
+    fallback_plans = []
+    for alert in make_alerts() + [demo]:
+        plan = service.analyze_alert(alert)
+        verdict = validator.validate(plan.script, plan.script_language)
+        fallback_plans.append((alert, plan, verdict))
+        print(
+            f"  {alert.id:<12} {alert.alert_type:<15} fallback plan "
+            f"confidence {plan.confidence:.2f}, validator {verdict['recommendation']}"
+        )
+    uncovered = Alert(
+        id="ALR-TPL-X",
+        timestamp="2026-10-18T09:00:00",
+        severity="high",
+        system="WEB-01",
+        alert_type="certificate",
+        description="TLS certificate expires in 20 days",
+        metrics={},
+    )
+    try:
+        service.analyze_alert(uncovered)
+        uncovered_failed = False
+    except Exception as e:
+        uncovered_failed = True
+        print(f"  {uncovered.id:<12} no SOP: {type(e).__name__}")
+    breaker = service.resilience.stats()["breaker"]["state"]
+    print(f"  Bedrock calls attempted: {client.calls}, breaker {breaker}")
+
+    planner = TemplatePlanner()
+    hostile = make_alerts()[1].model_copy(
+        update={"metrics": {"process_name": "w3wp'; Stop-Computer; '"}}
+    )
+    script = planner.plan(hostile, kb["high_cpu_windows"], 1.0).script
+    # Paths are never taken from metrics; out-of-range values are ignored
+    tampered = make_alerts()[0].model_copy(
+        update={"metrics": {"log_path": "C:\\Windows\\System32", "retention_days": -1}}
+    )
+    cleanup = planner.plan(tampered, kb["disk_space_windows"], 1.0)
+    unknown_service = make_alerts()[2].model_copy(
+        update={"metrics": {"service_name": "W3SVC'; Stop-Computer; '"}}
+    )
+    try:
+        planner.plan(unknown_service, kb["service_restart_windows"], 1.0)
+        service_refused = False
+    except TemplateError:
+        service_refused = True
+    edited = reload_on_edit(kb)
+
+    assert speed["warm"] < 0.005, "warm template plan slower than 5 ms"
+    assert speed["compiles"] == len(ALERTS)
+    assert all("AI analysis unavailable" in p.reasoning for _, p, _ in fallback_plans)
+    assert all(v["is_safe"] for _, _, v in fallback_plans)
+    assert fallback_plans[0][1].script.count("$Drive = 'D:\\'") == 1
+    assert "12" in fallback_plans[3][1].root_cause
+    assert uncovered_failed and breaker == "open"
+    assert "$ProcessName = ''" in script and "Stop-Computer" not in script
+    assert "$LogPath = 'C:\\inetpub\\logs\\LogFiles'" in cleanup.script
+    assert "$DaysToKeep = 30" in cleanup.script
+    assert "retention_days" in cleanup.reasoning
+    assert service_refused, "service outside the allowlist was planned"
+    assert edited, "edited template was not recompiled"
+    print(
+        f"\nOK: plans in {speed['warm'] * 1000:.2f} ms, "
+        f"{len(fallback_plans)} alerts answered with Bedrock down"
+    )
+
+
+if __name__ == "__main__":
+    main()
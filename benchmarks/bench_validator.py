@@ -0,0 +1,116 @@
+"""
+Script safety validator micro-benchmark
+Validates generated ~1 MB PowerShell scripts (clean, and with a dangerous
+command buried near the end) with the original per-pattern re.search loop and
+with the compiled validator over the same built-in rules, cold and memoized.
+
+Usage: python -m benchmarks.bench_validator [--size-mb 1] [--repeat 5]
+"""
+
+import argparse
+import random
+import re
+import statistics
+import tempfile
+import time
+
+from backend.safety_rules import BUILTIN_PACK, SafetyRulePacks
+from backend.script_executor import ScriptSafetyValidator
+
+DANGEROUS_PATTERNS = [rule["pattern"] for rule in BUILTIN_PACK["dangerous"]]
+REQUIRED_SAFETY_PATTERNS = [rule["pattern"] for rule in BUILTIN_PACK["required"]]
+
+SCRIPT_LINES = [
+    "$logPath = 'C:\\inetpub\\logs\\LogFiles'",
+    "if (Test-Path $logPath) {",
+    "    try {",
+    "        $old = Get-ChildItem $logPath -Recurse | Where-Object { $_.LastWriteTime -lt (Get-Date).AddDays(-30) }",
+    "        Copy-Item $old.FullName -Destination 'D:\\Backups\\IISLogs' -Force",
+    "        $old | Remove-Item -Force",
+    "    } catch {",
+    '        Write-Error "Cleanup failed: $_"',
+    "    }",
+    "}",
+    'Write-Host "Disk usage: $((Get-PSDrive C).Used / 1GB) GB"',
+]
+
+
+def generate_script(size: int, seed: int, payload: str = "") -> str:
+    rng = random.Random(seed)
+    lines = []
+    total = 0
+    while total < size:
+        line = rng.choice(SCRIPT_LINES)
+        lines.append(line)
+        total += len(line) + 1
+    if payload:
+        lines.insert(len(lines) - 10, payload)
+    return "\n".join(lines)
+
+
+def legacy_validate(script: str) -> dict:
+    """The original implementation: one re.search per pattern, plus lower()"""
+    issues = []
+    for pattern in DANGEROUS_PATTERNS:
+        if re.search(pattern, script, re.IGNORECASE):
+            issues.append(f"CRITICAL: Dangerous command pattern detected: {pattern}")
+    safety_score = 0
+    for pattern in REQUIRED_SAFETY_PATTERNS:
+        if re.search(pattern, script, re.IGNORECASE):
+            safety_score += 1
+    if "backup" not in script.lower() and "Backup" not in script:
+        issues.append("WARNING: No backup step detected")
+    return {"issues": issues, "safety_score": safety_score}
+
+
+def builtin_validator() -> ScriptSafetyValidator:
+    """Validator over the built-in rules, the same set the legacy loop used"""
+    return ScriptSafetyValidator(SafetyRulePacks(rules_dir=tempfile.mkdtemp()))
+
+
+def median_ms(func, script: str, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(script)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size-mb", type=float, default=1.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    size = int(args.size_mb * 1024 * 1024)
+
+    cases = {
+        "clean": generate_script(size, seed=1),
+        "dangerous": generate_script(
+            size, seed=2, payload="reg delete HKLM\\Software\\Foo /f"
+        ),
+    }
+
+    print(
+        f"{'script':<10} {'legacy':>10} {'compiled':>10} {'memoized':>10} {'speedup':>8}"
+    )
+    for name, script in cases.items():
+        expected = legacy_validate(script)
+        got = builtin_validator().validate(script)
+        assert got["issues"] == expected["issues"], (got, expected)
+        assert got["safety_score"] == expected["safety_score"]
+
+        legacy = median_ms(legacy_validate, script, args.repeat)
+        # Fresh validator per run so every call is a cache miss
+        cold = median_ms(lambda s: builtin_validator().validate(s), script, args.repeat)
+        warm_validator = builtin_validator()
+        warm_validator.validate(script)
+        warm = median_ms(warm_validator.validate, script, args.repeat)
+        print(
+            f"{name:<10} {legacy:>8.1f}ms {cold:>8.1f}ms {warm:>8.2f}ms "
+            f"{legacy / cold:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
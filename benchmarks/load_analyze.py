@@ -0,0 +1,112 @@
+"""
+Analyze-path load test
+Starts the API with a stubbed Bedrock client that sleeps for --latency seconds,
+fires --analyses concurrent POST /alerts/{id}/analyze requests, and measures
+/alerts, /stats and /api/health latency while they run. With the analysis
+pool offloading the blocking call, the probe latency should stay flat.
+
+Usage: python -m benchmarks.load_analyze [--analyses 8] [--latency 3]
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+import urllib.request
+
+from benchmarks.stubs import StubBedrockClient, serve_in_thread
+
+PROBE_PATHS = ["/alerts", "/stats", "/api/health"]
+
+
+def timed_get(url: str) -> float:
+    start = time.perf_counter()
+    with urllib.request.urlopen(url, timeout=30) as resp:
+        resp.read()
+    return time.perf_counter() - start
+
+
+def probe(base: str, duration: float) -> list:
+    samples = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        for path in PROBE_PATHS:
+            samples.append(timed_get(base + path))
+        time.sleep(0.02)
+    return samples
+
+
+def analyze(base: str, alert_id: str, out: list) -> None:
+    req = urllib.request.Request(f"{base}/alerts/{alert_id}/analyze", method="POST")
+    start = time.perf_counter()
+    with urllib.request.urlopen(req, timeout=120) as resp:
+        resp.read()
+    out.append(time.perf_counter() - start)
+
+
+def summarize(label: str, samples: list) -> float:
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(
+        f"{label:<18} n={len(samples):<5} p50={statistics.median(samples) * 1000:7.1f}ms "
+        f"p99={p99 * 1000:7.1f}ms max={samples[-1] * 1000:7.1f}ms"
+    )
+    return p99
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--analyses", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=3.0)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ["STORAGE_PATH"] = os.path.join(tmp, "load.db")
+    os.environ["ANALYSIS_CONCURRENCY"] = str(args.concurrency)
+    os.environ["USE_CACHED_RESPONSES"] = "false"
+
+    from backend import app as app_module
+    from backend.aws_bedrock_service import BedrockService
+
+    stub = StubBedrockClient(latency=args.latency)
+    app_module.bedrock_service = BedrockService(client=stub)
+    app_module.ai_service_configured = True
+
+    serve_in_thread(app_module.app, args.port)
+    base = f"http://127.0.0.1:{args.port}"
+
+    baseline = probe(base, 1.0)
+
+    durations: list = []
+    workers = [
+        threading.Thread(target=analyze, args=(base, "INC0012345", durations))
+        for _ in range(args.analyses)
+    ]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    under_load = probe(base, args.latency)
+    for w in workers:
+        w.join()
+    wall = time.perf_counter() - start
+
+    print(
+        f"{args.analyses} analyses x {args.latency}s stub latency, "
+        f"concurrency cap {args.concurrency}: finished in {wall:.1f}s "
+        f"({stub.calls} Bedrock calls)"
+    )
+    base_p99 = summarize("probe (idle)", baseline)
+    load_p99 = summarize("probe (loaded)", under_load)
+    summarize("analyze", durations)
+
+    # Blocking the loop would push probes to ~latency seconds; allow generous slack
+    assert load_p99 < max(0.25, base_p99 * 10), "event loop stalled during analyses"
+    print("OK: probe latency stayed flat while analyses were running")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Mock RMM script-execution endpoint
+Stands in for the RMM API behind RMM_URL: POST /hosts/{host}/scripts sleeps
+for --latency seconds and reports success, or failure for hosts listed in
+--fail. GET /calls returns when each host's run started and finished.
+
+Usage: python -m benchmarks.mock_rmm [--port 9100] [--latency 0.5] [--fail HOST-A,HOST-B]
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Dict, Iterable, List
+
+import uvicorn
+from fastapi import Body, FastAPI
+
+
+def mock_rmm_app(latency: float = 0.5, failing: Iterable[str] = ()) -> FastAPI:
+    app = FastAPI(title="Mock RMM")
+    app.state.failing = set(failing)
+    app.state.calls: List[Dict] = []
+
+    @app.post("/hosts/{host}/scripts")
+    async def run_script(host: str, payload: dict = Body(...)):
+        call = {"host": host, "started": time.monotonic(), "finished": None}
+        app.state.calls.append(call)
+        await asyncio.sleep(latency)
+        call["finished"] = time.monotonic()
+        if host in app.state.failing:
+            return {
+                "status": "failed",
+                "output": f"{host}: cleanup failed (access denied)",
+                "exit_code": 1,
+            }
+        return {
+            "status": "success",
+            "output": f"{host}: ran {len(payload['script'])} byte {payload['language']} script",
+            "exit_code": 0,
+        }
+
+    @app.get("/calls")
+    async def calls():
+        return app.state.calls
+
+    @app.delete("/calls")
+    async def reset(failing: str = ""):
+        app.state.calls.clear()
+        app.state.failing = set(filter(None, failing.split(",")))
+        return {"failing": sorted(app.state.failing)}
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--fail", default="", help="comma-separated failing hosts")
+    args = parser.parse_args()
+    app = mock_rmm_app(args.latency, filter(None, args.fail.split(",")))
+    uvicorn.run(app, host="127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
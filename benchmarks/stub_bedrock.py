@@ -0,0 +1,196 @@
+"""
+Stub bedrock-runtime HTTP endpoint
+Stands in for Bedrock behind BEDROCK_ENDPOINT_URL: POST /model/{id}/invoke
+answers with a Nova-shaped remediation plan after --latency seconds, and
+/model/{id}/invoke-with-response-stream sends the same plan as an AWS event
+stream. With --tokens-per-second the plan takes as long to "generate" as a
+real model would (streamed chunk by chunk, or all at the end). It can
+throttle: --capacity caps concurrent requests (extra ones get a 429
+ThrottlingException), --throttle-rate throttles that fraction at random, and
+PUT /mode?down=true answers 503 to everything. GET /calls returns counters.
+
+Usage: python -m benchmarks.stub_bedrock [--port 9200] [--latency 0.5] [--capacity 8] [--tokens-per-second 100]
+Then: BEDROCK_ENDPOINT_URL=http://127.0.0.1:9200 AWS_ACCESS_KEY_ID=x AWS_SECRET_ACCESS_KEY=x
+"""
+
+import argparse
+import asyncio
+import base64
+import binascii
+import json
+import random
+import struct
+from typing import Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from benchmarks.stubs import STUB_PLAN, nova_stream_events
+
+# Characters per streamed delta (about four tokens)
+CHUNK_CHARS = 16
+
+
+def _error(status: int, code: str, message: str) -> JSONResponse:
+    # rest-json error shape botocore parses into ClientError
+    return JSONResponse(
+        {"message": message}, status_code=status, headers={"x-amzn-ErrorType": code}
+    )
+
+
+def event_message(payload: bytes, event_type: str = "chunk") -> bytes:
+    """One vnd.amazon.eventstream frame: prelude, headers, payload, CRCs"""
+    headers = b""
+    for name, value in (
+        (":event-type", event_type),
+        (":content-type", "application/json"),
+        (":message-type", "event"),
+    ):
+        headers += struct.pack(">B", len(name)) + name.encode()
+        headers += struct.pack(">BH", 7, len(value)) + value.encode()
+    prelude = struct.pack(">II", 12 + len(headers) + len(payload) + 4, len(headers))
+    prelude += struct.pack(">I", binascii.crc32(prelude))
+    message = prelude + headers + payload
+    return message + struct.pack(">I", binascii.crc32(message))
+
+
+def stub_bedrock_app(
+    latency: float = 0.5,
+    capacity: Optional[int] = None,
+    throttle_rate: float = 0.0,
+    plan: dict = None,
+    tokens_per_second: Optional[float] = None,
+) -> FastAPI:
+    app = FastAPI(title="Stub bedrock-runtime")
+    app.state.latency = latency
+    app.state.capacity = capacity
+    app.state.throttle_rate = throttle_rate
+    app.state.down = False
+    app.state.plan = plan or STUB_PLAN
+    app.state.tokens_per_second = tokens_per_second
+    app.state.in_flight = 0
+    app.state.counts = {"requests": 0, "ok": 0, "throttled": 0, "unavailable": 0}
+
+    def admit() -> Optional[JSONResponse]:
+        """Error response if this request is refused, else None"""
+        counts = app.state.counts
+        counts["requests"] += 1
+        if app.state.down:
+            counts["unavailable"] += 1
+            return _error(503, "ServiceUnavailableException", "Service is unavailable")
+        over_capacity = (
+            app.state.capacity is not None and app.state.in_flight >= app.state.capacity
+        )
+        if over_capacity or random.random() < app.state.throttle_rate:
+            counts["throttled"] += 1
+            return _error(429, "ThrottlingException", "Too many requests")
+        return None
+
+    def chunk_delay() -> float:
+        # Time to generate one streamed delta
+        if not app.state.tokens_per_second:
+            return 0.0
+        return CHUNK_CHARS / 4 / app.state.tokens_per_second
+
+    @app.post("/model/{model_id}/invoke")
+    async def invoke(model_id: str, request: Request):
+        body = await request.body()
+        refused = admit()
+        if refused is not None:
+            return refused
+
+        text = json.dumps(app.state.plan)
+        chunks = -(-len(text) // CHUNK_CHARS)
+        app.state.in_flight += 1
+        try:
+            await asyncio.sleep(app.state.latency + chunks * chunk_delay())
+        finally:
+            app.state.in_flight -= 1
+        app.state.counts["ok"] += 1
+        return {
+            "output": {
+                "message": {
+                    "role": "assistant",
+                    "content": [{"text": text}],
+                }
+            },
+            "stopReason": "end_turn",
+            "usage": {"inputTokens": len(body) // 4, "outputTokens": len(text) // 4},
+        }
+
+    @app.post("/model/{model_id}/invoke-with-response-stream")
+    async def invoke_stream(model_id: str, request: Request):
+        await request.body()
+        refused = admit()
+        if refused is not None:
+            return refused
+
+        events = nova_stream_events(json.dumps(app.state.plan), CHUNK_CHARS)
+        app.state.in_flight += 1
+
+        async def frames():
+            try:
+                await asyncio.sleep(app.state.latency)
+                for event in events:
+                    inner = base64.b64encode(event["chunk"]["bytes"]).decode()
+                    yield event_message(json.dumps({"bytes": inner}).encode())
+                    await asyncio.sleep(chunk_delay())
+                app.state.counts["ok"] += 1
+            finally:
+                app.state.in_flight -= 1
+
+        return StreamingResponse(
+            frames(), media_type="application/vnd.amazon.eventstream"
+        )
+
+    @app.put("/mode")
+    async def mode(
+        down: Optional[bool] = None,
+        throttle_rate: Optional[float] = None,
+        capacity: Optional[int] = None,
+    ):
+        if down is not None:
+            app.state.down = down
+        if throttle_rate is not None:
+            app.state.throttle_rate = throttle_rate
+        if capacity is not None:
+            app.state.capacity = capacity or None
+        return {
+            "down": app.state.down,
+            "throttle_rate": app.state.throttle_rate,
+            "capacity": app.state.capacity,
+        }
+
+    @app.get("/calls")
+    async def calls():
+        return app.state.counts
+
+    @app.delete("/calls")
+    async def reset():
+        for key in app.state.counts:
+            app.state.counts[key] = 0
+        return app.state.counts
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=9200)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--capacity", type=int, default=None)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--tokens-per-second", type=float, default=None)
+    args = parser.parse_args()
+    app = stub_bedrock_app(
+        args.latency,
+        args.capacity,
+        args.throttle_rate,
+        tokens_per_second=args.tokens_per_second,
+    )
+    uvicorn.run(app, host="127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Shared stand-ins for external services used by the benchmarks
+"""
+
+import io
+import json
+import threading
+import time
+
+import uvicorn
+
+STUB_PLAN = {
+    "root_cause": "Log files accumulating on the system drive",
+    "confidence": 0.9,
+    "reasoning": "Stubbed response for load testing",
+    "remediation_steps": ["Back up old logs", "Delete old logs", "Verify disk usage"],
+    "script": (
+        "try {\n"
+        "    if (Test-Path $LogPath) { Copy-Item $LogPath $BackupPath }\n"
+        "} catch { exit 1 }"
+    ),
+    "safety_checks": ["Backup before delete"],
+    "estimated_execution_time": "1 minute",
+    "rollback_plan": "Restore from backup",
+}
+
+
+class StubBedrockClient:
+    """
+    Mimics boto3 bedrock-runtime invoke_model with artificial latency
+    Blocks the calling thread exactly like the real client does
+    """
+
+    def __init__(self, latency: float = 3.0, plan: dict = None):
+        self.latency = latency
+        self.plan = plan or STUB_PLAN
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def invoke_model(self, modelId: str, body: str, **kwargs) -> dict:
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        payload = {
+            "output": {"message": {"content": [{"text": json.dumps(self.plan)}]}},
+            "usage": {"inputTokens": len(body) // 4, "outputTokens": 400},
+        }
+        return {"body": io.BytesIO(json.dumps(payload).encode())}
+
+    def invoke_model_with_response_stream(
+        self, modelId: str, body: str, chunk_size: int = 16, **kwargs
+    ) -> dict:
+        """Nova stream events: latency before the first chunk, then all at once"""
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        text = json.dumps(self.plan)
+        return {"body": iter(nova_stream_events(text, chunk_size))}
+
+
+def nova_stream_events(text: str, chunk_size: int = 16) -> list:
+    """text as the chunk events of a streamed Nova response"""
+    messages = [{"messageStart": {"role": "assistant"}}]
+    for start in range(0, len(text), chunk_size):
+        delta = {"text": text[start : start + chunk_size]}
+        messages.append({"contentBlockDelta": {"delta": delta, "contentBlockIndex": 0}})
+    messages.append({"contentBlockStop": {"contentBlockIndex": 0}})
+    messages.append({"messageStop": {"stopReason": "end_turn"}})
+    return [{"chunk": {"bytes": json.dumps(m).encode()}} for m in messages]
+
+
+def serve_in_thread(app, port: int) -> uvicorn.Server:
+    """Start a uvicorn server for app on 127.0.0.1:port in a daemon thread"""
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
@@ -0,0 +1,85 @@
+# @root_cause: Sustained CPU load on {{ alert.system }} (CPU percent: {{ cpu_usage_percent, cpu_percent, usage_percent = not reported }}, process: {{ process_name, process = not reported }}); a runaway application process or a recent change is the usual cause
+# @estimated_time: 1-2 minutes
+# @rollback: The script only collects diagnostics and changes nothing. Delete {{ diagnostics_path = C:\Temp\CpuDiagnostics }} once the incident is closed.
+# @param: cpu_usage_percent, cpu_percent, usage_percent = number 0..100
+# @param: process_name, process = name
+# @param: cpu_threshold, threshold = number 1..100
+# @param: top_processes = int 1..50
+# @param: sample_seconds = int 1..60
+# High CPU Diagnostics Script
+# Generated from SOP template cpu_diagnostics.ps1
+# Alert ID: {{ alert.id }}
+# Safety: Read-only; never stops processes, critical services are only reported
+
+$CpuThreshold = {{ cpu_threshold, threshold = 90 }}
+$ProcessName = {{ process_name, process = '' }}
+$TopCount = {{ top_processes = 5 }}
+$SampleSeconds = {{ sample_seconds = 5 }}
+$DiagnosticsPath = {{ diagnostics_path = 'C:\Temp\CpuDiagnostics' }}
+$CriticalProcesses = @('lsass', 'csrss', 'services', 'wininit', 'smss', 'svchost', 'System')
+
+Write-Host "Collecting CPU diagnostics (threshold $CpuThreshold%)" -ForegroundColor Green
+Write-Host ("=" * 60) -ForegroundColor Gray
+
+try {
+    if (-not (Test-Path $DiagnosticsPath)) {
+        New-Item -ItemType Directory -Force -Path $DiagnosticsPath | Out-Null
+    }
+    $Stamp = Get-Date -Format 'yyyyMMdd-HHmmss'
+    $Report = Join-Path $DiagnosticsPath "cpu-$Stamp.csv"
+
+    # Current overall CPU, sampled over a few seconds
+    Write-Host "Sampling CPU for $SampleSeconds seconds..." -ForegroundColor Cyan
+    $Samples = Get-Counter '\Processor(_Total)\% Processor Time' -SampleInterval 1 -MaxSamples $SampleSeconds
+    $CpuNow = [math]::Round(($Samples.CounterSamples.CookedValue | Measure-Object -Average).Average, 1)
+    Write-Host "Average CPU: $CpuNow%" -ForegroundColor Cyan
+
+    # Top consumers with details (PID, command line, owner) for the ticket
+    $Top = Get-Process | Sort-Object CPU -Descending | Select-Object -First $TopCount
+    $Details = foreach ($p in $Top) {
+        $cim = Get-CimInstance Win32_Process -Filter "ProcessId = $($p.Id)" -ErrorAction SilentlyContinue
+        $owner = if ($cim) { (Invoke-CimMethod -InputObject $cim -MethodName GetOwner -ErrorAction SilentlyContinue).User } else { '' }
+        [PSCustomObject]@{
+            Name        = $p.ProcessName
+            Id          = $p.Id
+            CpuSeconds  = [math]::Round($p.CPU, 1)
+            WorkingSetMB = [math]::Round($p.WorkingSet64 / 1MB, 1)
+            StartTime   = $p.StartTime
+            Owner       = $owner
+            CommandLine = if ($cim) { $cim.CommandLine } else { '' }
+            Critical    = $CriticalProcesses -contains $p.ProcessName
+        }
+    }
+    $Details | Export-Csv -Path $Report -NoTypeInformation
+    $Details | Format-Table Name, Id, CpuSeconds, WorkingSetMB, Owner, Critical -AutoSize | Out-String | Write-Host
+    Write-Host "Diagnostics saved to $Report" -ForegroundColor Green
+
+    if ($ProcessName) {
+        $Target = $Details | Where-Object { $_.Name -eq $ProcessName }
+        if ($ProcessName -in $CriticalProcesses) {
+            Write-Host "$ProcessName is a critical Windows process: escalate, do not restart" -ForegroundColor Red
+        } elseif ($Target) {
+            Write-Host "$ProcessName (PID $($Target.Id)) is among the top consumers" -ForegroundColor Yellow
+            Write-Host "Confirm with the application owner before restarting its service" -ForegroundColor Yellow
+        } else {
+            Write-Host "$ProcessName is no longer among the top $TopCount consumers" -ForegroundColor Green
+        }
+    }
+
+    # Recent changes that often explain a new CPU pattern
+    Write-Host "Updates and installs in the last 7 days:" -ForegroundColor Cyan
+    Get-HotFix | Where-Object { $_.InstalledOn -gt (Get-Date).AddDays(-7) } |
+        Format-Table HotFixID, InstalledOn -AutoSize | Out-String | Write-Host
+
+    if ($CpuNow -lt $CpuThreshold) {
+        Write-Host "CPU currently below $CpuThreshold% - monitor for 15 minutes before closing" -ForegroundColor Green
+    } else {
+        Write-Host "CPU still above $CpuThreshold% - escalate with $Report attached" -ForegroundColor Yellow
+    }
+    exit 0
+
+} catch {
+    Write-Host "ERROR: Diagnostics failed: $($_.Exception.Message)" -ForegroundColor Red
+    Write-Host "No changes were made to the system" -ForegroundColor Gray
+    exit 1
+}
@@ -0,0 +1,120 @@
+# @root_cause: Disk space alert on {{ alert.system }} {{ partition, drive = C: }} (used percent: {{ disk_used_percent, disk_usage_percent, usage_percent = not reported }}); IIS and application logs kept past the retention period are the usual cause
+# @estimated_time: 2-5 minutes
+# @rollback: Every deleted log is copied to {{ backup_path = D:\Backups\IISLogs }} first. To restore, run: Copy-Item '{{ backup_path = D:\Backups\IISLogs }}\*' -Destination '{{ log_path = C:\inetpub\logs\LogFiles }}' -Force
+# @param: partition, drive = drive
+# @param: disk_used_percent, disk_usage_percent, usage_percent = number 0..100
+# @param: retention_days = int 1..3650
+# @param: target_percent = int 1..99
+# Disk Space Cleanup Script - IIS Logs
+# Generated from SOP template disk_cleanup.ps1
+# Alert ID: {{ alert.id }}
+# Safety: Creates backup before deletion, includes error handling
+
+$LogPath = {{ log_path = 'C:\inetpub\logs\LogFiles' }}
+$DaysToKeep = {{ retention_days = 30 }}
+$BackupPath = {{ backup_path = 'D:\Backups\IISLogs' }}
+$Drive = {{ partition, drive = 'C:\' }}
+$TargetPercent = {{ target_percent = 80 }}
+$CutoffDate = (Get-Date).AddDays(-$DaysToKeep)
+$DriveName = $Drive.Substring(0, 1)
+
+Write-Host "Starting disk cleanup on $Drive" -ForegroundColor Green
+Write-Host "Target: IIS logs older than $DaysToKeep days" -ForegroundColor Yellow
+Write-Host ("=" * 60) -ForegroundColor Gray
+
+try {
+    # Safety check: Ensure path exists
+    Write-Host "Checking log path..." -ForegroundColor Cyan
+    if (-not (Test-Path $LogPath)) {
+        Write-Host "ERROR: Log path not found - $LogPath" -ForegroundColor Red
+        Write-Host "This may indicate IIS is not installed or logs are in different location" -ForegroundColor Yellow
+        exit 1
+    }
+    Write-Host "Log path verified: $LogPath" -ForegroundColor Green
+
+    # Find old logs (current day logs are never selected)
+    Write-Host "Scanning for logs older than $DaysToKeep days..." -ForegroundColor Cyan
+    $OldLogs = @(Get-ChildItem -Path $LogPath -Recurse -File |
+               Where-Object { $_.LastWriteTime -lt $CutoffDate })
+
+    if ($OldLogs.Count -eq 0) {
+        Write-Host "No old logs found. Disk space issue may be elsewhere." -ForegroundColor Yellow
+        Write-Host "Consider checking application logs, temp directories and database files" -ForegroundColor Gray
+        exit 0
+    }
+
+    $TotalSize = ($OldLogs | Measure-Object -Property Length -Sum).Sum
+    $TotalSizeGB = [math]::Round($TotalSize / 1GB, 2)
+    Write-Host "Found $($OldLogs.Count) files totaling $TotalSizeGB GB" -ForegroundColor Green
+
+    # Create backup directory and check it can hold the logs (safety measure)
+    Write-Host "Preparing backup location..." -ForegroundColor Cyan
+    if (-not (Test-Path $BackupPath)) {
+        New-Item -ItemType Directory -Force -Path $BackupPath | Out-Null
+        Write-Host "Created backup directory: $BackupPath" -ForegroundColor Green
+    }
+    $BackupDrive = Get-PSDrive -Name $BackupPath.Substring(0, 1)
+    if ($BackupDrive.Free -lt $TotalSize) {
+        Write-Host "ERROR: Not enough free space in $BackupPath for the backup" -ForegroundColor Red
+        exit 1
+    }
+
+    # Backup old logs before deletion (retention compliance)
+    Write-Host "Creating backup of logs before deletion..." -ForegroundColor Yellow
+    $BackedUp = @()
+    foreach ($log in $OldLogs) {
+        try {
+            Copy-Item -Path $log.FullName -Destination $BackupPath -Force -ErrorAction Stop
+            $BackedUp += $log
+            if ($BackedUp.Count % 50 -eq 0) {
+                Write-Host "  Backed up $($BackedUp.Count) files..." -ForegroundColor Gray
+            }
+        } catch {
+            Write-Host "Warning: Could not backup $($log.Name), it will be kept: $($_.Exception.Message)" -ForegroundColor Yellow
+        }
+    }
+    Write-Host "Backup complete: $($BackedUp.Count) files backed up" -ForegroundColor Green
+
+    # Delete only the logs that were backed up
+    Write-Host "Deleting backed-up logs..." -ForegroundColor Yellow
+    $DeletedCount = 0
+    $DeletedSize = 0
+    foreach ($log in $BackedUp) {
+        try {
+            $fileSize = $log.Length
+            Remove-Item -Path $log.FullName -Force -ErrorAction Stop
+            $DeletedCount++
+            $DeletedSize += $fileSize
+            if ($DeletedCount % 50 -eq 0) {
+                Write-Host "  Deleted $DeletedCount files..." -ForegroundColor Gray
+            }
+        } catch {
+            Write-Host "Warning: Could not delete $($log.Name): $($_.Exception.Message)" -ForegroundColor Yellow
+        }
+    }
+    $FreedGB = [math]::Round($DeletedSize / 1GB, 2)
+    Write-Host "Cleanup complete: $DeletedCount files deleted, $FreedGB GB freed" -ForegroundColor Green
+
+    # Verify new disk usage
+    Write-Host "Verifying disk space..." -ForegroundColor Cyan
+    $Disk = Get-PSDrive -Name $DriveName
+    $UsedPercent = [math]::Round(($Disk.Used / ($Disk.Used + $Disk.Free)) * 100, 2)
+    Write-Host "Current usage of $Drive : $UsedPercent%" -ForegroundColor Cyan
+    if ($UsedPercent -lt $TargetPercent) {
+        Write-Host "SUCCESS: Disk usage now below $TargetPercent%" -ForegroundColor Green
+        Write-Host "Alert can be marked as RESOLVED" -ForegroundColor Green
+    } else {
+        Write-Host "WARNING: Disk usage still above $TargetPercent%" -ForegroundColor Yellow
+        Write-Host "Further investigation needed - logs may not be the primary cause" -ForegroundColor Yellow
+    }
+    Write-Host "Backup location: $BackupPath" -ForegroundColor Gray
+    exit 0
+
+} catch {
+    Write-Host "ERROR: Unexpected error occurred: $($_.Exception.Message)" -ForegroundColor Red
+    Write-Host "ROLLBACK INSTRUCTIONS:" -ForegroundColor Yellow
+    Write-Host "1. Logs backed up to: $BackupPath" -ForegroundColor Gray
+    Write-Host "2. To restore: Copy-Item '$BackupPath\*' -Destination '$LogPath' -Force" -ForegroundColor Gray
+    Write-Host "3. Contact system administrator if issue persists" -ForegroundColor Gray
+    exit 1
+}
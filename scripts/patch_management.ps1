@@ -0,0 +1,88 @@
+# @root_cause: {{ alert.system }} is missing Windows updates (pending: {{ pending_updates, missing_patches = not reported }}, critical: {{ critical_updates = not reported }})
+# @estimated_time: 5-30 minutes depending on update size; the reboot is scheduled separately
+# @rollback: A system restore point is created before installing. Uninstall a problem update with 'wusa /uninstall /kb:<number>' or restore the 'Before patching' restore point, then reboot in the maintenance window.
+# @param: pending_updates, missing_patches = int 0..10000
+# @param: critical_updates = int 0..10000
+# Windows Patch Management Script
+# Generated from SOP template patch_management.ps1
+# Alert ID: {{ alert.id }}
+# Safety: Restore point before install, installs only with an approved maintenance window, never reboots
+
+# Set to $true by the technician once the change is approved (never from alert data)
+$MaintenanceWindowApproved = $false
+$IncludeOptional = {{ include_optional = $false }}
+$LogPath = {{ log_path = 'C:\Temp\PatchLogs' }}
+$AlertId = {{ alert.id }}
+
+Write-Host "Windows patch compliance check" -ForegroundColor Green
+Write-Host ("=" * 60) -ForegroundColor Gray
+
+try {
+    if (-not (Test-Path $LogPath)) {
+        New-Item -ItemType Directory -Force -Path $LogPath | Out-Null
+    }
+    $Log = Join-Path $LogPath ("patch-" + (Get-Date -Format 'yyyyMMdd-HHmmss') + ".log")
+
+    # Scan for missing updates
+    Write-Host "Scanning for missing updates..." -ForegroundColor Cyan
+    $Session = New-Object -ComObject Microsoft.Update.Session
+    $Searcher = $Session.CreateUpdateSearcher()
+    $Result = $Searcher.Search("IsInstalled=0 and IsHidden=0 and Type='Software'")
+    $Updates = @($Result.Updates | Where-Object {
+        $IncludeOptional -or $_.MsrcSeverity -in @('Critical', 'Important') -or $_.AutoSelectOnWebSites
+    })
+    # Critical security updates first
+    $Updates = @($Updates | Sort-Object { if ($_.MsrcSeverity -eq 'Critical') { 0 } else { 1 } })
+    Write-Host "Missing updates to install: $($Updates.Count)" -ForegroundColor Cyan
+    $Updates | ForEach-Object { "$($_.MsrcSeverity) $($_.Title)" } | Tee-Object -FilePath $Log | Write-Host
+
+    if ($Updates.Count -eq 0) {
+        Write-Host "System is compliant - nothing to install" -ForegroundColor Green
+        exit 0
+    }
+    if (-not $MaintenanceWindowApproved) {
+        Write-Host "No approved maintenance window - scan only. Re-run with approval to install." -ForegroundColor Yellow
+        exit 0
+    }
+
+    # Restore point before any change
+    Write-Host "Creating restore point..." -ForegroundColor Cyan
+    Checkpoint-Computer -Description "Before patching ($AlertId)" -RestorePointType MODIFY_SETTINGS -ErrorAction Stop
+    Write-Host "Restore point created" -ForegroundColor Green
+
+    $Collection = New-Object -ComObject Microsoft.Update.UpdateColl
+    foreach ($update in $Updates) {
+        if (-not $update.EulaAccepted) { $update.AcceptEula() }
+        [void]$Collection.Add($update)
+    }
+
+    Write-Host "Downloading $($Collection.Count) updates..." -ForegroundColor Cyan
+    $Downloader = $Session.CreateUpdateDownloader()
+    $Downloader.Updates = $Collection
+    [void]$Downloader.Download()
+
+    Write-Host "Installing updates..." -ForegroundColor Yellow
+    $Installer = $Session.CreateUpdateInstaller()
+    $Installer.Updates = $Collection
+    $Install = $Installer.Install()
+    for ($i = 0; $i -lt $Collection.Count; $i++) {
+        $code = $Install.GetUpdateResult($i).ResultCode
+        "$code $($Collection.Item($i).Title)" | Tee-Object -FilePath $Log -Append | Write-Host
+    }
+
+    if ($Install.RebootRequired) {
+        Write-Host "Reboot required - schedule it in the approved maintenance window (not rebooting now)" -ForegroundColor Yellow
+    }
+    # ResultCode 2 = succeeded, 3 = succeeded with errors
+    if ($Install.ResultCode -in 2, 3) {
+        Write-Host "Patching finished (result $($Install.ResultCode)); log: $Log" -ForegroundColor Green
+        exit 0
+    }
+    Write-Host "Patching failed (result $($Install.ResultCode)); log: $Log" -ForegroundColor Red
+    exit 1
+
+} catch {
+    Write-Host "ERROR: $($_.Exception.Message)" -ForegroundColor Red
+    Write-Host "ROLLBACK: restore the 'Before patching' restore point if updates were partially installed" -ForegroundColor Yellow
+    exit 1
+}
@@ -0,0 +1,79 @@
+# @root_cause: Service {{ service_name, service }} on {{ alert.system }} is not running (state: {{ service_state, status = not reported }}); a crash or a failed dependency is the usual cause
+# @estimated_time: 1-3 minutes
+# @rollback: The service configuration is saved to {{ backup_path = C:\Temp\ServiceBackups }} before the restart. If the restart makes things worse, stop the service with Stop-Service and restore its start type from the saved file with Set-Service -StartupType.
+# @param: service_name, service = choice W3SVC WAS MSSQLSERVER SQLSERVERAGENT Spooler W32Time BITS Dnscache
+# @param: service_state, status = name
+# @param: wait_seconds = int 5..300
+# Service Health Check and Restart Script
+# Generated from SOP template service_restart.ps1
+# Alert ID: {{ alert.id }}
+# Safety: Backs up service configuration, checks dependencies, verifies after restart
+
+$ServiceName = {{ service_name, service }}
+$BackupPath = {{ backup_path = 'C:\Temp\ServiceBackups' }}
+$WaitSeconds = {{ wait_seconds = 30 }}
+
+Write-Host "Service health check: $ServiceName" -ForegroundColor Green
+Write-Host ("=" * 60) -ForegroundColor Gray
+
+try {
+    $Service = Get-Service -Name $ServiceName -ErrorAction Stop
+    Write-Host "Current status: $($Service.Status) (start type $($Service.StartType))" -ForegroundColor Cyan
+
+    # Recent errors for the service from the System event log
+    Write-Host "Recent service errors:" -ForegroundColor Cyan
+    Get-WinEvent -FilterHashtable @{ LogName = 'System'; Level = 2; StartTime = (Get-Date).AddHours(-24) } -MaxEvents 50 -ErrorAction SilentlyContinue |
+        Where-Object { $_.Message -like "*$ServiceName*" } |
+        Select-Object -First 5 TimeCreated, Id, Message | Format-List | Out-String | Write-Host
+
+    # Back up the service configuration before any change
+    if (-not (Test-Path $BackupPath)) {
+        New-Item -ItemType Directory -Force -Path $BackupPath | Out-Null
+    }
+    $Stamp = Get-Date -Format 'yyyyMMdd-HHmmss'
+    $Backup = Join-Path $BackupPath "$ServiceName-$Stamp.xml"
+    Get-CimInstance Win32_Service -Filter "Name = '$ServiceName'" | Export-Clixml -Path $Backup
+    Write-Host "Service configuration saved to $Backup" -ForegroundColor Green
+
+    # Dependencies must be running first
+    foreach ($dependency in $Service.ServicesDependedOn) {
+        if ($dependency.Status -ne 'Running') {
+            Write-Host "Dependency $($dependency.Name) is $($dependency.Status); starting it" -ForegroundColor Yellow
+            Start-Service -Name $dependency.Name -ErrorAction Stop
+        }
+    }
+    $Dependents = @($Service.DependentServices | Where-Object { $_.Status -eq 'Running' })
+    if ($Dependents.Count -gt 0) {
+        Write-Host "Running dependent services: $($Dependents.Name -join ', ')" -ForegroundColor Yellow
+    }
+
+    if ($Service.StartType -eq 'Disabled') {
+        Write-Host "ERROR: $ServiceName is disabled - escalate, it may be disabled on purpose" -ForegroundColor Red
+        exit 1
+    }
+
+    if ($Service.Status -eq 'Running') {
+        Write-Host "Restarting $ServiceName..." -ForegroundColor Yellow
+        Restart-Service -Name $ServiceName -ErrorAction Stop
+    } else {
+        Write-Host "Starting $ServiceName..." -ForegroundColor Yellow
+        Start-Service -Name $ServiceName -ErrorAction Stop
+    }
+
+    # Verify it starts and stays up
+    $Service.WaitForStatus('Running', [TimeSpan]::FromSeconds($WaitSeconds))
+    Start-Sleep -Seconds 10
+    $Service.Refresh()
+    if ($Service.Status -eq 'Running') {
+        Write-Host "SUCCESS: $ServiceName is running" -ForegroundColor Green
+        Write-Host "Test the application before marking the alert resolved" -ForegroundColor Cyan
+        exit 0
+    }
+    Write-Host "WARNING: $ServiceName stopped again ($($Service.Status)) - repeated failure, escalate" -ForegroundColor Red
+    exit 1
+
+} catch {
+    Write-Host "ERROR: $($_.Exception.Message)" -ForegroundColor Red
+    Write-Host "ROLLBACK: configuration backup in $BackupPath" -ForegroundColor Yellow
+    exit 1
+}
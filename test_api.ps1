@@ -69,9 +69,10 @@ Write-Host ""
 # Test 6: Execute Remediation (Demo Mode)
 Write-Host "[TEST 6] Execute Remediation Script (Demo Mode)..." -ForegroundColor Yellow
 try {
-    $response = Invoke-RestMethod -Uri "http://localhost:8000/alerts/INC0012345/execute?approved=true" -Method Post
+    $job = Invoke-RestMethod -Uri "http://localhost:8000/alerts/INC0012345/execute?approved=true&wait=30" -Method Post
+    $response = $job.result
     Write-Host "✅ PASSED: Script executed successfully" -ForegroundColor Green
-    Write-Host "Status: $($response.status)" -ForegroundColor Cyan
+    Write-Host "Job: $($job.job_id) ($($job.status))" -ForegroundColor Cyan
     Write-Host "MTTR: $($response.mttr_minutes) minutes" -ForegroundColor Cyan
     Write-Host "Output Preview:" -ForegroundColor Gray
     Write-Host "$($response.output.Substring(0, [Math]::Min(200, $response.output.Length)))..." -ForegroundColor DarkGray
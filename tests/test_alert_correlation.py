@@ -0,0 +1,93 @@
+"""
+Ingest-time correlation: repeats fold into one parent inside the window, on
+any worker sharing the store, however long the incident keeps flapping
+"""
+
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from backend.alert_correlation import AlertCorrelator
+from backend.alert_store import AlertStore
+from backend.sqlite_store import SQLiteStore
+
+WINDOW = 600
+START = datetime(2026, 10, 18, 9, 0, tzinfo=timezone.utc)
+
+
+def alert(n: int, seconds: float, system: str = "WEB-01", tz=timezone.utc) -> dict:
+    return {
+        "id": f"ALR-{n}",
+        "timestamp": (START + timedelta(seconds=seconds)).astimezone(tz).isoformat(),
+        "severity": "high",
+        "system": system,
+        "alert_type": "cpu_high",
+        "description": "test alert",
+        "metrics": {},
+    }
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return AlertStore()
+    return SQLiteStore(str(tmp_path / "alerts.db"))
+
+
+def test_repeats_fold_into_parent(store):
+    correlator = AlertCorrelator(store, window_seconds=WINDOW)
+    results = correlator.ingest_many([alert(n, n * 60) for n in range(3)])
+    assert [r.suppressed for r in results] == [False, True, True]
+    parent = store.get_alert("ALR-0")
+    assert parent["occurrence_count"] == 3
+    assert parent["last_seen"] == alert(2, 120)["timestamp"]
+    assert store.count_alerts() == 1
+
+
+def test_repeat_after_window_opens_new_incident(store):
+    correlator = AlertCorrelator(store, window_seconds=WINDOW)
+    correlator.ingest(alert(0, 0))
+    result = correlator.ingest(alert(1, WINDOW + 1))
+    assert result == ("ALR-1", False, 1, True)
+    assert store.count_alerts() == 2
+
+
+def test_other_worker_folds_flapping_incident(store):
+    first = AlertCorrelator(store, window_seconds=WINDOW)
+    # Repeats every half window keep the incident open for three windows
+    for n in range(7):
+        first.ingest(alert(n, n * WINDOW / 2))
+    second = AlertCorrelator(store, window_seconds=WINDOW)
+    result = second.ingest(alert(7, 3.5 * WINDOW))
+    assert result == ("ALR-0", True, 8, False)
+
+
+def test_window_compares_instants_not_strings(store):
+    first = AlertCorrelator(store, window_seconds=WINDOW)
+    first.ingest(alert(0, 0))
+    # 60s later, written in a zone whose local time sorts before the first
+    second = AlertCorrelator(store, window_seconds=WINDOW)
+    west = timezone(timedelta(hours=-5))
+    result = second.ingest(alert(1, 60, tz=west))
+    assert result.incident_id == "ALR-0"
+    assert result.suppressed
+
+
+def test_future_alert_does_not_expire_open_incidents():
+    correlator = AlertCorrelator(AlertStore(), window_seconds=WINDOW)
+    now = datetime.now(timezone.utc)
+    correlator.ingest(dict(alert(0, 0), timestamp=now.isoformat()))
+    future = now + timedelta(days=365)
+    correlator.ingest(dict(alert(1, 0, system="DB-01"), timestamp=future.isoformat()))
+    assert correlator.stats()["open_incidents"] == 2
+    repeat = dict(alert(2, 0), timestamp=datetime.now(timezone.utc).isoformat())
+    assert correlator.ingest(repeat).incident_id == "ALR-0"
+
+
+def test_future_alert_does_not_hold_incident_open():
+    store = AlertStore()
+    correlator = AlertCorrelator(store, window_seconds=WINDOW)
+    future = datetime.now(timezone.utc) + timedelta(days=365)
+    correlator.ingest(dict(alert(0, 0), timestamp=future.isoformat()))
+    assert store.get_alert("ALR-0")["last_seen_epoch"] <= time.time()
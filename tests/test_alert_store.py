@@ -0,0 +1,86 @@
+"""
+AlertStore.query_alerts pages match a full scan for every filter mix, and
+cursor paging walks the whole result once
+"""
+
+import random
+
+import pytest
+
+from backend.alert_store import AlertStore
+
+SEVERITIES = ["critical", "high", "medium", "low"]
+
+
+@pytest.fixture(scope="module")
+def store():
+    rng = random.Random(7)
+    store = AlertStore()
+    for i in range(3000):
+        store.add_alert(
+            {
+                "id": f"ALR-{i:05d}",
+                "timestamp": f"2026-10-{1 + rng.randrange(28):02d}T"
+                f"{rng.randrange(24):02d}:00:00Z",
+                "severity": rng.choice(SEVERITIES),
+                "system": f"SRV-{rng.randrange(40):02d}",
+                "alert_type": rng.choice(["disk_space", "high_cpu", "service_down"]),
+            }
+        )
+    # Replacing an alert moves it in every index
+    store.add_alert(
+        {
+            "id": "ALR-00000",
+            "timestamp": "2026-10-15T12:00:00Z",
+            "severity": "low",
+            "system": "SRV-99",
+            "alert_type": "disk_space",
+        }
+    )
+    return store
+
+
+def scan(store, since=None, until=None, after=None, limit=None, **filters):
+    alerts = sorted(store._alerts.values(), key=lambda a: (a["timestamp"], a["id"]))
+    matches = [
+        a
+        for a in alerts
+        if all(a[field] == value for field, value in filters.items())
+        and (since is None or a["timestamp"] >= since)
+        and (until is None or a["timestamp"] <= until)
+        and (after is None or (a["timestamp"], a["id"]) > after)
+    ]
+    return matches[:limit]
+
+
+QUERIES = [
+    {},
+    {"severity": "high"},
+    {"system": "SRV-07"},
+    {"system": "SRV-99"},
+    {"system": "SRV-07", "severity": "low"},
+    {"severity": "critical", "alert_type": "high_cpu", "system": "SRV-03"},
+    {"system": "NOPE"},
+    {"severity": "high", "since": "2026-10-10", "until": "2026-10-12T23:59:59Z"},
+    {"since": "2026-10-20"},
+    {"alert_type": "disk_space", "until": "2026-10-03"},
+]
+
+
+@pytest.mark.parametrize("query", QUERIES)
+@pytest.mark.parametrize("limit", [None, 1, 25])
+def test_query_matches_scan(store, query, limit):
+    assert store.query_alerts(limit=limit, **query) == scan(store, limit=limit, **query)
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_cursor_pages_cover_result(store, query):
+    pages = []
+    after = None
+    while True:
+        page = store.query_alerts(after=after, limit=50, **query)
+        if not page:
+            break
+        pages.extend(page)
+        after = (page[-1]["timestamp"], page[-1]["id"])
+    assert pages == scan(store, **query)
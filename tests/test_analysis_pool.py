@@ -0,0 +1,78 @@
+"""
+RateLimiter: a non-positive BATCH_RATE_LIMIT means unlimited, not a crash.
+AnalysisPool.iterate leaves no producer task behind, however it ends.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from backend.analysis_pool import AnalysisPool, RateLimiter
+
+
+def acquire_many(limiter: RateLimiter, count: int) -> float:
+    async def run():
+        start = time.perf_counter()
+        for _ in range(count):
+            await limiter.acquire()
+        return time.perf_counter() - start
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("rate", [0, -1, 0.0])
+def test_non_positive_rate_is_unlimited(rate):
+    assert acquire_many(RateLimiter(rate), 1000) < 0.5
+
+
+def test_positive_rate_throttles():
+    # Burst of 1, then one token every 50 ms
+    assert acquire_many(RateLimiter(20, burst=1), 3) >= 0.09
+
+
+def numbers(count: int, fail: bool = False):
+    for n in range(count):
+        time.sleep(0.001)
+        yield n
+    if fail:
+        raise RuntimeError("stream broke")
+
+
+def iterate(count: int, take: int, fail: bool = False):
+    pool = AnalysisPool(max_concurrency=1)
+
+    async def run():
+        items, error = [], None
+        stream = pool.iterate(numbers, count, fail)
+        try:
+            async for item in stream:
+                items.append(item)
+                if len(items) == take:
+                    break
+        except RuntimeError as e:
+            error = str(e)
+        finally:
+            await stream.aclose()
+        others = asyncio.all_tasks() - {asyncio.current_task()}
+        return items, error, others
+
+    try:
+        return asyncio.run(run())
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.parametrize(
+    "count, take, fail, expected, error",
+    [
+        (5, 0, False, [0, 1, 2, 3, 4], None),
+        (50, 2, False, [0, 1], None),
+        (3, 0, True, [0, 1, 2], "stream broke"),
+    ],
+)
+def test_iterate_leaves_no_task(count, take, fail, expected, error):
+    items, raised, others = iterate(count, take, fail)
+    assert items == expected
+    assert raised == error
+    assert not others
@@ -0,0 +1,90 @@
+"""
+API endpoints against the in-memory backend: only stored plans are executed
+"""
+
+import json
+import os
+
+os.environ["STORAGE_BACKEND"] = "memory"
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from backend import app as api  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(api.app) as client:
+        yield client
+
+
+def test_execute_ignores_plan_in_body(client):
+    plan = {"script": "Stop-Computer -Force", "script_language": "powershell"}
+    response = client.post(
+        "/alerts/NO-PLAN-1/execute?approved=true", json={"plan": plan}
+    )
+    assert response.status_code == 404
+    assert api.execution_queue.stats()["queued"] == 0
+
+
+def test_batch_rejects_empty_filter(client, monkeypatch):
+    monkeypatch.setattr(api, "ai_service_configured", True)
+    response = client.post("/alerts/analyze/batch", json={"filter": {}})
+    assert response.status_code == 400
+
+
+def test_batch_filter_stops_past_the_limit(client, monkeypatch):
+    monkeypatch.setattr(api, "ai_service_configured", True)
+    monkeypatch.setattr(api, "MAX_BATCH_SIZE", 2)
+    calls = []
+    query_alerts = api.alert_store.query_alerts
+
+    def spy(**kwargs):
+        calls.append(kwargs)
+        return query_alerts(**kwargs)
+
+    monkeypatch.setattr(api.alert_store, "query_alerts", spy)
+    for n in range(5):
+        api.alert_store.add_alert(
+            {
+                "id": f"ALR-BATCH-{n}",
+                "timestamp": f"2026-10-18T09:00:0{n}",
+                "severity": "low",
+                "system": "BATCH-01",
+                "alert_type": "disk_space",
+                "description": "test alert",
+                "metrics": {},
+            }
+        )
+    response = client.post(
+        "/alerts/analyze/batch", json={"filter": {"system": "BATCH-01"}}
+    )
+    assert response.status_code == 400
+    assert calls == [{"system": "BATCH-01", "limit": 3}]
+
+
+def test_bulk_reports_overlong_line(client, monkeypatch):
+    monkeypatch.setattr(api, "BULK_MAX_LINE_CHARS", 300)
+    alert = {
+        "id": "ALR-BULK-1",
+        "timestamp": "2026-10-18T09:00:00",
+        "severity": "low",
+        "system": "BULK-01",
+        "alert_type": "disk_space",
+        "description": "test alert",
+        "metrics": {},
+    }
+    body = json.dumps(alert) + "\n" + "x" * 301 + "\n"
+    response = client.post("/alerts/ingest/bulk", content=body)
+    assert response.json()["accepted"] == 1
+    assert response.json()["errors"] == [
+        {"line": 2, "error": "Line longer than 300 characters"}
+    ]
+    assert api.alert_store.get_alert("ALR-BULK-1") is not None
+
+
+def test_startup_alert_is_counted(client):
+    demo = api.alert_store.get_alert("INC0012345")
+    assert demo is not None
+    assert api.stats.snapshot()["top_systems"].get(demo["system"]) == 1
@@ -0,0 +1,134 @@
+"""
+Streamed bulk ingest parsing: a malformed record is reported on its own and
+the records after it are still read, whatever the chunk boundaries
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from backend.bulk_ingest import LineSplitter, RecordError, iter_json_records
+
+CHUNK_SIZES = [1, 3, 16, 1 << 20]
+
+
+def alert(n: int) -> str:
+    return json.dumps(
+        {
+            "id": f"ALR-{n}",
+            "timestamp": "2026-10-18T09:00:00Z",
+            "severity": "high",
+            "system": "WEB-01",
+            "alert_type": "disk_space",
+            "description": 'Disk, {full} [93%] "C:\\\\"',
+            "metrics": {"disk_used_percent": 93},
+        }
+    )
+
+
+def parse(body: str, size: int, **kwargs):
+    async def chunks():
+        data = body.encode()
+        for i in range(0, len(data), size):
+            yield data[i : i + size]
+
+    async def collect():
+        return [item async for item in iter_json_records(chunks(), **kwargs)]
+
+    return [
+        (
+            (n, "error" if isinstance(r, RecordError) else r.get("id", r))
+            if not isinstance(r, (int, str))
+            else (n, r)
+        )
+        for n, r in asyncio.run(collect())
+    ]
+
+
+@pytest.mark.parametrize("size", CHUNK_SIZES)
+@pytest.mark.parametrize(
+    "bad",
+    [
+        '{"id": "x", oops}',
+        '{"id": "a,}]\\" ", "x": [1, 2,]}',
+        "nope",
+        "{,}",
+        "}",
+    ],
+)
+def test_array_skips_only_the_malformed_element(size, bad):
+    body = f"[{alert(1)}, {bad}, {alert(3)},\n{alert(4)}]"
+    assert parse(body, size) == [
+        (1, "ALR-1"),
+        (2, "error"),
+        (3, "ALR-3"),
+        (4, "ALR-4"),
+    ]
+
+
+def test_array_unclosed_string_recovers():
+    body = f'[{alert(1)}, "unterminated, ] }}, {alert(3)},\n{alert(4)}]'
+    for size in CHUNK_SIZES:
+        records = parse(body, size)
+        # The quote pairs shift, so ALR-3 is lost as junk; ALR-4 is read again
+        assert records[0] == (1, "ALR-1")
+        assert records[-1][1] == "ALR-4"
+        assert "error" in [r for _, r in records]
+
+
+@pytest.mark.parametrize("size", CHUNK_SIZES)
+def test_array_truncated_last_element(size):
+    body = f'[{alert(1)}, {{"id": "ALR-2", "metrics": {{'
+    assert parse(body, size) == [(1, "ALR-1"), (2, "error")]
+
+
+@pytest.mark.parametrize("size", CHUNK_SIZES)
+def test_array_scalar_split_across_chunks(size):
+    assert parse("[12345, " + alert(2) + "]", size) == [(1, 12345), (2, "ALR-2")]
+
+
+def test_array_many_records_after_a_malformed_one():
+    bad = '{"id": "x", "metrics": {"disk_used_percent": 9O}}'
+    body = "[" + ",".join([bad] + [alert(n) for n in range(2, 2002)]) + "]"
+    records = parse(body, 64)
+    assert records[0] == (1, "error")
+    assert [r for _, r in records].count("error") == 1
+    assert len(records) == 2001
+    assert records[-1][1] == "ALR-2001"
+
+
+@pytest.mark.parametrize("size", CHUNK_SIZES)
+def test_ndjson_line_numbers(size):
+    body = f"\n\n{alert(3)}\n{{bad\n\n{alert(6)}\n{alert(7)}"
+    assert parse(body, size) == [
+        (3, "ALR-3"),
+        (4, "error"),
+        (6, "ALR-6"),
+        (7, "ALR-7"),
+    ]
+
+
+@pytest.mark.parametrize("size", CHUNK_SIZES)
+def test_ndjson_overlong_line_is_a_record_error(size):
+    limit = len(alert(1))
+    long_line = "x" * (limit + 1)
+    body = f"{alert(1)}\n{long_line}\n{alert(3)}\n{long_line}"
+    assert parse(body, size, max_line=limit) == [
+        (1, "ALR-1"),
+        (2, "error"),
+        (3, "ALR-3"),
+        (4, "error"),
+    ]
+
+
+def test_line_splitter_drops_overlong_line_as_it_arrives():
+    lines = LineSplitter(max_length=len(alert(2)))
+    for _ in range(1000):
+        assert lines.feed("x" * 64) == []
+    assert lines.overlong
+    assert lines.parts == []
+    complete = lines.feed("tail\n" + alert(2) + "\n")
+    assert isinstance(complete[0], RecordError)
+    assert json.loads(complete[1])["id"] == "ALR-2"
+    assert lines.finish() == []
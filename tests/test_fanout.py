@@ -0,0 +1,60 @@
+"""
+Fan-out hosts run as ExecutionQueue jobs: each leaves a job record and waits
+its turn on a host another job is already running on
+"""
+
+import asyncio
+
+from backend.alert_store import AlertStore
+from backend.execution_jobs import ExecutionQueue, FakeExecutor
+from backend.fanout import fan_out, queued_runner
+
+
+def rollout(queue: ExecutionQueue, hosts, **kwargs):
+    run_host = queued_runner(
+        queue, "ALR-1", "Get-Service W3SVC", "powershell", rollout_id="r1", **kwargs
+    )
+
+    async def collect():
+        try:
+            return [r async for r in fan_out(hosts, run_host, parallelism=4)]
+        finally:
+            await queue.shutdown()
+
+    return collect
+
+
+def test_hosts_leave_job_records():
+    store = AlertStore()
+    queue = ExecutionQueue(store, FakeExecutor(0.01, lines=1), poll_interval=0.01)
+    records = asyncio.run(rollout(queue, ["WEB-01", "WEB-02", "WEB-03"])())
+    hosts = [r for r in records if r["type"] == "host"]
+    assert records[-1]["succeeded"] == 3
+    for record in hosts:
+        job = store.get_job(record["job_id"])
+        assert job["host"] == record["host"]
+        assert job["rollout_id"] == "r1"
+        assert job["status"] == "success"
+
+
+def test_busy_host_waits_for_its_claim():
+    store = AlertStore()
+    queue = ExecutionQueue(store, FakeExecutor(0.2, lines=1), poll_interval=0.01)
+    collect = rollout(queue, ["WEB-01"])
+
+    async def run():
+        other = await queue.submit("ALR-0", "WEB-01", "Get-Date", "powershell")
+        records = await collect()
+        return store.get_job(other["job_id"]), store.get_job(records[1]["job_id"])
+
+    other, host = asyncio.run(run())
+    assert host["status"] == "success"
+    assert host["started_at"] >= other["finished_at"]
+
+
+def test_unfinished_host_is_cancelled():
+    store = AlertStore()
+    queue = ExecutionQueue(store, FakeExecutor(5, lines=1), poll_interval=0.01)
+    records = asyncio.run(rollout(queue, ["WEB-01"], timeout=0.05)())
+    assert records[-1]["failed"] == 1
+    assert store.get_job(records[1]["job_id"])["cancel_requested"]
@@ -0,0 +1,95 @@
+"""
+PlanCache: a warm hit does not write to the database, counters still add
+up across flushes, and invalidation matches scopes like the fingerprint
+"""
+
+import pytest
+
+from backend.models import Alert
+from backend.plan_cache import PlanCache
+
+SOP = {"title": "Disk Space Cleanup", "steps": ["Clean logs"]}
+PLAN = {"alert_id": "ALR-1", "root_cause": "logs", "script": "Write-Host ok"}
+
+
+def alert(system: str = "WEB-01", alert_type: str = "Disk_Space") -> Alert:
+    return Alert(
+        id="ALR-1",
+        timestamp="2026-10-18T09:00:00Z",
+        severity="high",
+        system=system,
+        alert_type=alert_type,
+        description="disk full",
+        metrics={"disk_used_percent": 93},
+    )
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return PlanCache(
+        path=str(tmp_path / "plans.db"),
+        ttl=3600,
+        touch_interval=60,
+        stats_flush_interval=3600,
+    )
+
+
+def test_warm_hit_does_not_write(cache):
+    fingerprint = cache.fingerprint(alert(), SOP)
+    cache.put(fingerprint, alert(), PLAN)
+    conn = cache._conn()
+    writes = conn.total_changes
+    for _ in range(50):
+        assert cache.get(fingerprint)["root_cause"] == "logs"
+    assert cache.get("unknown") is None
+    assert conn.total_changes == writes
+
+
+def test_stale_last_used_is_touched(cache):
+    fingerprint = cache.fingerprint(alert(), SOP)
+    cache.put(fingerprint, alert(), PLAN)
+    conn = cache._conn()
+    conn.execute("UPDATE plan_cache SET last_used = 0")
+    writes = conn.total_changes
+    cache.get(fingerprint)
+    assert conn.total_changes == writes + 1
+    cache.get(fingerprint)
+    assert conn.total_changes == writes + 1
+
+
+def test_counters_flush(cache, tmp_path):
+    fingerprint = cache.fingerprint(alert(), SOP)
+    cache.put(fingerprint, alert(), PLAN)
+    for _ in range(3):
+        cache.get(fingerprint)
+    cache.get("unknown")
+    other = PlanCache(path=str(tmp_path / "plans.db"), stats_flush_interval=3600)
+    # Another worker sees the counts only once they are flushed
+    assert other.stats()["hits"] == 0
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (3, 1)
+    assert other.stats()["hits"] == 3
+    cache.get(fingerprint)
+    assert cache.stats()["hits"] == 4
+
+
+def test_invalidate_matches_fingerprint_case(cache):
+    for system in ("WEB-01", "Db-02 "):
+        a = alert(system)
+        cache.put(cache.fingerprint(a, SOP), a, PLAN)
+    assert cache.invalidate(system="web-01") == 1
+    assert cache.invalidate(system="DB-02", alert_type="disk_space") == 1
+    assert cache.stats()["entries"] == 0
+
+
+def test_invalidate_by_scope_uses_index(cache):
+    conn = cache._conn()
+    statements = []
+    conn.set_trace_callback(statements.append)
+    try:
+        cache.invalidate(system="WEB-01", alert_type="Disk_Space")
+    finally:
+        conn.set_trace_callback(None)
+    delete = next(s for s in statements if s.startswith("DELETE"))
+    plan = " ".join(row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {delete}"))
+    assert "idx_plan_cache_scope" in plan
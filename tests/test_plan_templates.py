@@ -0,0 +1,108 @@
+"""
+TemplatePlanner: only declared, checked alert metrics reach a script, and a
+rendered script the safety validator rejects is never returned as a plan.
+"""
+
+import json
+import os
+
+import pytest
+
+from backend.models import Alert
+from backend.plan_templates import TemplateError, TemplatePlanner, compile_template
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+
+
+@pytest.fixture(scope="module")
+def kb():
+    with open(os.path.join(DATA_DIR, "sop_kb.json")) as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope="module")
+def planner():
+    return TemplatePlanner()
+
+
+def alert(alert_type: str, **metrics) -> Alert:
+    return Alert(
+        id="ALR-T-1",
+        timestamp="2026-10-18T09:00:00",
+        severity="high",
+        system="WEB-01",
+        alert_type=alert_type,
+        description="test alert",
+        metrics=metrics,
+    )
+
+
+def test_paths_keep_sop_defaults(planner, kb):
+    tampered = alert(
+        "disk_space",
+        log_path="C:\\Windows\\System32",
+        backup_path="C:\\Windows",
+        retention_days=-1,
+    )
+    plan = planner.plan(tampered, kb["disk_space_windows"], 1.0)
+    assert "System32" not in plan.script
+    assert "$LogPath = 'C:\\inetpub\\logs\\LogFiles'" in plan.script
+    assert "$BackupPath = 'D:\\Backups\\IISLogs'" in plan.script
+    assert "$DaysToKeep = 30" in plan.script
+    assert "retention_days" in plan.reasoning
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [(14, "14"), ("7", "7"), (0, "30"), (2.5, "30"), (True, "30"), ("x", "30")],
+)
+def test_retention_days_checked(planner, kb, value, expected):
+    plan = planner.plan(
+        alert("disk_space", retention_days=value), kb["disk_space_windows"], 1.0
+    )
+    assert f"$DaysToKeep = {expected}\n" in plan.script
+
+
+def test_drive_must_be_a_drive_letter(planner, kb):
+    plan = planner.plan(
+        alert("disk_space", partition="d:"), kb["disk_space_windows"], 1.0
+    )
+    assert "$Drive = 'D:\\'" in plan.script
+    plan = planner.plan(
+        alert("disk_space", partition="C:\\Windows"), kb["disk_space_windows"], 1.0
+    )
+    assert "$Drive = 'C:\\'" in plan.script
+
+
+def test_service_allowlist(planner, kb):
+    sop = kb["service_restart_windows"]
+    plan = planner.plan(alert("service_down", service_name="w3svc"), sop, 1.0)
+    assert "$ServiceName = 'W3SVC'" in plan.script
+    with pytest.raises(TemplateError):
+        planner.plan(alert("service_down", service_name="WinDefend"), sop, 1.0)
+
+
+def test_rendered_script_is_validated(tmp_path, kb):
+    (tmp_path / "disk_cleanup.ps1").write_text(
+        "# @param: retention_days = int 1..30\n"
+        "$DaysToKeep = {{ retention_days = 30 }}\n"
+        "Stop-Computer -Force\n"
+    )
+    planner = TemplatePlanner(str(tmp_path))
+    with pytest.raises(TemplateError, match="safety validation"):
+        planner.plan(alert("disk_space"), kb["disk_space_windows"], 1.0)
+    assert planner.stats()["rejected"] == 1
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "$Name = {{ service_name }}\n",
+        "# @param: nothing_here = int\n$X = 1\n",
+        "# @param: days = int 1-30\n$X = {{ days = 1 }}\n",
+        "# @param: days = choice\n$X = {{ days = 1 }}\n",
+    ],
+)
+def test_bad_declarations_rejected(source):
+    with pytest.raises(TemplateError):
+        compile_template("bad.ps1", source)
@@ -0,0 +1,191 @@
+"""
+ScriptSafetyValidator verdicts on the shipped rule packs, checked against
+the regex-only validator they replaced: nothing it rejected may be approved
+now, including when the command is hidden in a nested script.
+"""
+
+import os
+import re
+
+import pytest
+
+from backend.safety_rules import BUILTIN_PACK, SafetyRulePacks
+from backend.script_executor import ScriptSafetyValidator
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(__file__), "..", "scripts")
+
+# The validator's pattern list before the rule packs (the fork bomb pattern
+# never compiled, so it never matched)
+BASELINE_PATTERNS = [
+    r"rm\s+-rf\s+/",
+    r"del\s+/[fF]\s+/[sS]\s+/[qQ]\s+C:\\\\_drive",
+    r"DROP\s+DATABASE",
+    r"shutdown\s+/[sS]",
+    r"format\s+[cC]:",
+    r"reg\s+delete.*HKLM",
+    r"chmod\s+777\s+/",
+    r"> /dev/sda",
+    r"Remove-Item.*-Recurse.*C:\\\\Windows",
+]
+
+
+# Languages every baseline rejection must hold in (the baseline had one
+# pattern list for all of them)
+LANGUAGES = ["powershell", "bash"]
+
+
+def baseline(script: str) -> str:
+    for pattern in BASELINE_PATTERNS:
+        if re.search(pattern, script, re.IGNORECASE):
+            return "REJECTED"
+    return "APPROVED"
+
+
+@pytest.fixture(scope="module")
+def validator() -> ScriptSafetyValidator:
+    return ScriptSafetyValidator(SafetyRulePacks(check_interval=3600))
+
+
+# (language, script, expected verdict)
+CASES = [
+    # Nested scripts the baseline caught in the raw text
+    ("bash", 'bash -c "rm -rf /"', "REJECTED"),
+    ("bash", 'eval "rm -rf /"', "REJECTED"),
+    ("bash", 'sudo sh -lc "rm -rf /etc"', "REJECTED"),
+    ("powershell", 'powershell -Command "reg delete HKLM\\Software\\X /f"', "REJECTED"),
+    ("powershell", 'cmd /c "reg delete HKLM\\Software\\X /f"', "REJECTED"),
+    # Nested scripts neither caught before
+    ("powershell", 'Invoke-Expression "Remove-Item -Recurse C:\\Windows"', "REJECTED"),
+    ("powershell", 'iex "Remove-Item -Recurse C:\\Windows"', "REJECTED"),
+    (
+        "powershell",
+        'Start-Process powershell -ArgumentList "Remove-Item C:\\Windows -Recurse"',
+        "REJECTED",
+    ),
+    (
+        "powershell",
+        'Start-Process -FilePath cmd.exe -ArgumentList "/c rd /s /q C:\\Windows"',
+        "REJECTED",
+    ),
+    (
+        "powershell",
+        "powershell -NoProfile -EncodedCommand UgBlAG0AbwB2AGUA",
+        "REJECTED",
+    ),
+    ("powershell", "Get-Content .\\fix.ps1 | iex", "REJECTED"),
+    ("bash", 'eval "$REMOTE_CMD"', "REJECTED"),
+    # Nested code is checked with its own language's rules
+    ("powershell", 'bash -c "mkfs.ext4 /dev/sda1"', "REJECTED"),
+    ("bash", 'pwsh -Command "Stop-Computer -Force"', "REJECTED"),
+    # Unix commands run from PowerShell (pwsh on Linux runs /bin/rm)
+    ("powershell", "rm -rf /", "REJECTED"),
+    ("powershell", "chmod 777 /", "REJECTED"),
+    ("powershell", "echo x > /dev/sda", "REJECTED"),
+    ("powershell", 'bash -c "rm -rf /"', "REJECTED"),
+    # Spellings and commands the baseline had no pattern for
+    ("powershell", "Remove-Item ${env:windir} -Recurse", "REJECTED"),
+    ("powershell", "Set-Location C:\\Windows; Remove-Item * -Recurse", "REJECTED"),
+    ("powershell", "Remove-Item -Recurse C:\\Windows\\Temp\\..\\System32", "REJECTED"),
+    ("powershell", "Format-Volume -DriveLetter C", "REJECTED"),
+    ("powershell", "Stop-Computer -Force", "REJECTED"),
+    ("bash", "find / -delete", "REJECTED"),
+    ("bash", "find /etc -name '*.conf' -exec rm {} \\;", "REJECTED"),
+    ("bash", "dd if=/dev/zero of=/dev/sda", "REJECTED"),
+    ("bash", "mkfs.ext4 /dev/sda1", "REJECTED"),
+    ("bash", "cd / && rm -rf *", "REJECTED"),
+    # Recursive deletes of a target that cannot be resolved fail closed
+    ("powershell", '$p="C:\\Windows"; Remove-Item -Path $p -Recurse', "REJECTED"),
+    ("bash", "x=/; rm -rf $x", "REJECTED"),
+    ("powershell", "Get-ChildItem C:\\Windows | Remove-Item -Recurse", "REJECTED"),
+    ("bash", "rm -rf $HOME/../../", "REJECTED"),
+    ("bash", "rm -rf $(dirname $0)/..", "REJECTED"),
+    ("powershell", "Remove-Item (Get-Item C:\\Windows) -Recurse", "REJECTED"),
+    ("powershell", "cmd /c rd /s /q %windir%", "REJECTED"),
+    ("bash", "find $DIR -delete", "REJECTED"),
+    # Routine maintenance stays approved
+    ("powershell", "Remove-Item -Recurse -Path C:\\Windows\\Temp\\*", "APPROVED"),
+    ("powershell", "Remove-Item -Recurse -Path ${env:windir}\\Temp\\*", "APPROVED"),
+    ("powershell", "Start-Process notepad", "APPROVED"),
+    ("powershell", 'Write-Host "Refusing Stop-Computer"', "APPROVED"),
+    ("bash", "find /var/log -name '*.gz' -mtime +30 -delete", "APPROVED"),
+    ("bash", "cd /var/tmp && rm -rf *", "APPROVED"),
+    ("bash", "cd /var/tmp && rm -rf ../cache", "APPROVED"),
+    ("bash", "rm -rf ./build", "APPROVED"),
+    ("powershell", "Remove-Item -Path $log.FullName -Force", "APPROVED"),
+    ("bash", "dd if=/dev/sda of=/backup/disk.img", "APPROVED"),
+    ("bash", 'bash -c "systemctl restart nginx"', "APPROVED"),
+]
+
+
+@pytest.mark.parametrize("language,script,expected", CASES)
+def test_verdict(validator, language, script, expected):
+    result = validator.validate(script, language)
+    assert result["recommendation"] == expected, result["issues"]
+
+
+@pytest.mark.parametrize("language", LANGUAGES)
+@pytest.mark.parametrize(
+    "script", [script for _, script, _ in CASES if baseline(script) == "REJECTED"]
+)
+def test_no_regression_from_baseline(validator, language, script):
+    result = validator.validate(script, language)
+    assert result["recommendation"] == "REJECTED", result["issues"]
+
+
+# A script each of the old validator's patterns (BUILTIN_PACK) rejected, in
+# every language; splitting the rules into packs must not narrow that
+PATTERN_SAMPLES = {
+    "rm-rf-root": "rm -rf /",
+    "del-force-quiet": "del /F /S /Q C:\\\\_drive",
+    "drop-database": "sqlcmd -Q 'DROP DATABASE prod'",
+    "shutdown": "shutdown /s /t 0",
+    "format-c": "format c: /q",
+    "reg-delete-hklm": "reg delete HKLM\\Software\\X /f",
+    "chmod-777-root": "chmod 777 /",
+    "overwrite-disk": "echo x > /dev/sda",
+    "fork-bomb": ":(){ :|:& };:",
+    "remove-windows": "Remove-Item -Recurse C:\\\\Windows",
+}
+
+
+def test_pattern_samples_cover_old_patterns():
+    ids = [rule["id"] for rule in BUILTIN_PACK["dangerous"]]
+    assert sorted(PATTERN_SAMPLES) == sorted(ids)
+    for rule in BUILTIN_PACK["dangerous"]:
+        sample = PATTERN_SAMPLES[rule["id"]]
+        assert re.search(rule["pattern"], sample, re.IGNORECASE), rule["id"]
+
+
+@pytest.mark.parametrize("language", LANGUAGES)
+@pytest.mark.parametrize("rule_id", sorted(PATTERN_SAMPLES))
+def test_packs_cover_old_patterns(validator, language, rule_id):
+    result = validator.validate(PATTERN_SAMPLES[rule_id], language)
+    assert result["recommendation"] == "REJECTED", result["issues"]
+
+
+def test_temp_cleanup_matches_baseline(validator):
+    script = "Remove-Item -Recurse -Path C:\\Windows\\Temp\\*"
+    assert baseline(script) == "APPROVED"
+    assert validator.validate(script, "powershell")["recommendation"] == "APPROVED"
+
+
+def test_nested_issue_reports_outer_line(validator):
+    script = 'Write-Host "cleanup"\nbash -c "rm -rf /"'
+    issues = validator.validate(script, "bash")["issues"]
+    assert any("line 2" in issue for issue in issues if "CRITICAL" in issue)
+
+
+@pytest.mark.parametrize(
+    "name", sorted(n for n in os.listdir(SCRIPTS_DIR) if n.endswith(".ps1"))
+)
+def test_shipped_templates_approved(validator, name):
+    with open(os.path.join(SCRIPTS_DIR, name)) as f:
+        script = f.read()
+    result = validator.validate(script, "powershell")
+    assert result["recommendation"] == "APPROVED", result["issues"]
+
+
+def test_verdicts_cached_per_language(validator):
+    script = "Stop-Computer -Force"
+    assert validator.validate(script, "powershell")["recommendation"] == "REJECTED"
+    assert validator.validate(script, "bash")["recommendation"] == "APPROVED"
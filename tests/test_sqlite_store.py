@@ -0,0 +1,45 @@
+"""
+Counter reads on both storage backends: top_counters returns the largest
+running totals, and rollup buckets never leak into them
+"""
+
+import random
+
+import pytest
+
+from backend.alert_store import AlertStore
+from backend.sqlite_store import SQLiteStore, TOP_COUNTERS
+
+
+@pytest.fixture(params=["sqlite", "memory"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteStore(str(tmp_path / "store.db"))
+    return AlertStore()
+
+
+def test_top_counters(store):
+    rng = random.Random(3)
+    totals = {}
+    for _ in range(20):
+        deltas = {}
+        for _ in range(200):
+            name = f"SRV-{rng.randrange(500):03d}"
+            deltas[("systems", 0, name)] = deltas.get(("systems", 0, name), 0) + 1
+            totals[name] = totals.get(name, 0) + 1
+        # Rollup buckets with huge values must not count
+        deltas[("systems", 7, "ROLLUP")] = 10**6
+        store.increment_counters(deltas)
+    top = store.top_counters("systems", 10)
+    assert (
+        sorted(top.values(), reverse=True) == sorted(totals.values(), reverse=True)[:10]
+    )
+    assert all(totals[name] == value for name, value in top.items())
+    assert store.top_counters("nothing", 10) == {}
+
+
+def test_top_counters_uses_index(tmp_path):
+    store = SQLiteStore(str(tmp_path / "store.db"))
+    plan = store._conn().execute("EXPLAIN QUERY PLAN " + TOP_COUNTERS, ("systems", 10))
+    detail = " ".join(row[-1] for row in plan)
+    assert "idx_counters_top" in detail and "TEMP B-TREE" not in detail
@@ -0,0 +1,58 @@
+"""
+Ingest counters: an alert id counts once, however often it is re-sent
+"""
+
+import pytest
+
+from backend.alert_correlation import AlertCorrelator
+from backend.alert_store import AlertStore
+from backend.sqlite_store import SQLiteStore
+from backend.stats_aggregator import StatsAggregator
+
+
+def alert(n: int, system: str = "WEB-01") -> dict:
+    return {
+        "id": f"ALR-{n}",
+        "timestamp": f"2026-10-18T09:00:0{n}Z",
+        "severity": "high",
+        "system": system,
+        "alert_type": f"type-{n}",
+        "description": "test alert",
+        "metrics": {},
+    }
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return AlertStore()
+    return SQLiteStore(str(tmp_path / "alerts.db"))
+
+
+def test_store_reports_inserted_ids(store):
+    assert store.add_alerts([alert(1), alert(2), alert(1)]) == ["ALR-1", "ALR-2"]
+    assert store.add_alerts([alert(2), alert(3)]) == ["ALR-3"]
+    assert store.add_alert(alert(4))
+    assert not store.add_alert(alert(4))
+
+
+def test_reingest_without_dedup_counts_once(store):
+    stats = StatsAggregator(store)
+    for _ in range(2):
+        batch = [alert(1), alert(2), alert(2)]
+        stats.record_ingest(batch, new_ids=store.add_alerts(batch))
+    summary = stats.snapshot()
+    assert summary["alerts"] == 2
+    assert summary["by_severity"] == {"high": 2}
+    assert summary["top_systems"] == {"WEB-01": 2}
+
+
+def test_reingest_with_dedup_counts_once(store):
+    stats = StatsAggregator(store)
+    correlator = AlertCorrelator(store, window_seconds=1)
+    for _ in range(2):
+        batch = [alert(1), alert(2), alert(2)]
+        stats.record_ingest(batch, correlator.ingest_many(batch))
+    summary = stats.snapshot()
+    assert summary["alerts"] == 2
+    assert summary["top_systems"] == {"WEB-01": 2}